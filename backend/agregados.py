@@ -0,0 +1,128 @@
+import math
+
+# =============================================
+# DIÁRIO DE NOTAS E AGREGADOS INCREMENTAIS
+# =============================================
+# Toda mudança de nota vira um evento em `notas_eventos` (migração 007),
+# gravado por triggers em `notas` — então qualquer caminho de escrita
+# (lançamento em lote, entrega de atividade, exclusão, scripts) entra no
+# diário. Cada evento traz a nota anterior e a nova, e um trigger no diário
+# aplica a diferença em `agregados_notas`: soma, quantidade, mínimo e máximo
+# por aluno, turma (da matéria da atividade) e matéria. Médias viram uma
+# leitura por chave primária em vez de um AVG sobre as notas.
+#
+# `quantidade` conta notas não nulas (base da média, como AVG) e `registros`
+# conta todas as linhas (como COUNT(*)). Mínimo e máximo só são recalculados
+# a partir de `notas` quando o valor removido era o próprio extremo.
+
+DIMENSOES_AGREGADOS = ('aluno', 'turma', 'materia')
+
+# Notas de cada grupo, a partir do estado atual de `notas`
+ORIGEM_DIMENSAO = {
+    'aluno': ('n.aluno_id', 'FROM notas n'),
+    'materia': ('a.materia_id', 'FROM notas n JOIN atividades a ON a.id = n.atividade_id'),
+    'turma': (
+        'm.turma_id',
+        'FROM notas n JOIN atividades a ON a.id = n.atividade_id JOIN materias m ON m.id = a.materia_id'
+    )
+}
+
+CAMPOS_AGREGADOS = ('soma', 'quantidade', 'registros', 'minimo', 'maximo')
+
+def sql_recalculo(dimensao):
+    """SELECT chave, soma, quantidade, registros, minimo, maximo de cada grupo da dimensão"""
+    coluna, origem = ORIGEM_DIMENSAO[dimensao]
+    return f'''
+        SELECT {coluna} as chave, COALESCE(SUM(n.nota), 0) as soma, COUNT(n.nota) as quantidade,
+               COUNT(*) as registros, MIN(n.nota) as minimo, MAX(n.nota) as maximo
+        {origem}
+        WHERE {coluna} IS NOT NULL
+        GROUP BY {coluna}
+    '''
+
+def sql_extremo(dimensao, funcao, chave):
+    """Subconsulta com MIN/MAX atual das notas de um grupo (usada nos triggers)"""
+    coluna, origem = ORIGEM_DIMENSAO[dimensao]
+    return f'(SELECT {funcao}(n.nota) {origem} WHERE {coluna} = {chave})'
+
+# ---------- leitura ----------
+
+def media_aluno(conn, aluno_id):
+    """Média das notas do aluno (None se não há notas) com uma leitura por chave"""
+    row = conn.execute('''
+        SELECT soma / quantidade FROM agregados_notas
+        WHERE dimensao = 'aluno' AND chave = ? AND quantidade > 0
+    ''', (aluno_id,)).fetchone()
+    return row[0] if row else None
+
+def obter_agregados(conn, dimensao, chaves=None):
+    """{chave: {soma, quantidade, registros, minimo, maximo, media}} da dimensão"""
+    sql = 'SELECT chave, soma, quantidade, registros, minimo, maximo FROM agregados_notas WHERE dimensao = ?'
+    valores = [dimensao]
+    if chaves is not None:
+        chaves = list(chaves)
+        sql += f" AND chave IN ({', '.join('?' for _ in chaves)})"
+        valores += chaves
+
+    resultado = {}
+    for row in conn.execute(sql, valores):
+        grupo = dict(zip(CAMPOS_AGREGADOS, row[1:]))
+        grupo['media'] = grupo['soma'] / grupo['quantidade'] if grupo['quantidade'] else None
+        resultado[row[0]] = grupo
+    return resultado
+
+# ---------- reconstrução e verificação ----------
+
+def _iguais(a, b):
+    if a is None or b is None:
+        return a is b
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+
+def recalcular_agregados(conn, corrigir=True):
+    """
+    Recalcula os agregados do zero a partir de `notas` e compara com os
+    materializados.
+
+    Retorna os desvios {dimensao: {chave: {campo: (antes, depois)}}}; grupos
+    que só existem em um dos lados aparecem com o outro lado None. Com
+    `corrigir`, substitui os valores materializados pelos recalculados.
+    """
+    desvios = {}
+    for dimensao in DIMENSOES_AGREGADOS:
+        antes = {
+            row[0]: dict(zip(CAMPOS_AGREGADOS, row[1:]))
+            for row in conn.execute(
+                'SELECT chave, soma, quantidade, registros, minimo, maximo '
+                'FROM agregados_notas WHERE dimensao = ? AND registros > 0', (dimensao,)
+            )
+        }
+        depois = {
+            row[0]: dict(zip(CAMPOS_AGREGADOS, row[1:]))
+            for row in conn.execute(sql_recalculo(dimensao))
+        }
+
+        vazio = dict.fromkeys(CAMPOS_AGREGADOS)
+        diferencas = {}
+        for chave in antes.keys() | depois.keys():
+            anterior, atual = antes.get(chave, vazio), depois.get(chave, vazio)
+            campos = {
+                campo: (anterior[campo], atual[campo])
+                for campo in CAMPOS_AGREGADOS if not _iguais(anterior[campo], atual[campo])
+            }
+            if campos:
+                diferencas[chave] = campos
+        if diferencas:
+            desvios[dimensao] = diferencas
+
+        if corrigir:
+            conn.execute('DELETE FROM agregados_notas WHERE dimensao = ?', (dimensao,))
+            conn.execute(f'''
+                INSERT INTO agregados_notas (dimensao, chave, soma, quantidade, registros, minimo, maximo)
+                SELECT ?, chave, soma, quantidade, registros, minimo, maximo FROM ({sql_recalculo(dimensao)})
+            ''', (dimensao,))
+
+    return desvios
+
+def verificar_agregados(conn):
+    """Só compara (sem corrigir); retorna os desvios como recalcular_agregados"""
+    return recalcular_agregados(conn, corrigir=False)
@@ -1,11 +1,49 @@
-﻿from flask import Flask, request, jsonify, send_from_directory
+﻿from flask import Flask, has_app_context, request, jsonify, send_from_directory, url_for
 from flask_cors import CORS
 import sqlite3
 import os
-from werkzeug.security import check_password_hash, generate_password_hash
+import json
+from werkzeug.security import generate_password_hash
 import jwt
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from functools import wraps
+from database import connect, get_db, get_pool, get_writer, run_write, init_app as init_db_pool
+from migrations import aplicar_migracoes
+from grading import ErroLancamento, salvar_notas_em_lote
+from utils.reports import PERCENTIS_PADRAO, generate_desempenho_turmas_report
+from colunar import get_notas_colunares, obter_notas, run_write_notas, init_app as init_notas_colunares
+from autenticacao import get_cache_tokens, init_app as init_cache_tokens
+from senhas import LimiteSenhas, atualizar_hash_senha, get_senhas, init_app as init_senhas
+from horarios import (
+    ErroHorario, alocar_materia, desalocar_materias, get_indice_horarios, obter_indice, run_write_horarios,
+    validar_grade, init_app as init_horarios
+)
+from calendario import (
+    ErroCalendario, formato_calendario, get_calendario, intervalo_calendario, intervalo_feed, ler_token_feed,
+    renovar_feed, resposta_calendario, token_feed, versao_feed, init_app as init_calendario
+)
+from cache_consultas import consultas_cacheadas, get_cache_consultas, init_app as init_cache_consultas
+from cache_http import condicional, get_respostas_condicionais, init_app as init_respostas_condicionais
+from gerador_grade import (
+    ErroGrade, aplicar_tarefa, get_gerador_grade, ler_tarefa, montar_problema, init_app as init_gerador_grade
+)
+from importacao import ErroImportacao, formato_importacao, importar_alunos, ler_linhas
+from matriculas import (
+    ErroMatricula, desmatricular, excluir_aluno, ler_turma_id, listar_espera, matricular,
+    matricular_em_lote, sair_lista_espera, transferir
+)
+from stats import obter_estatisticas, professores_mais_ativos
+from telas import (
+    TELAS, ErroTela, alunos_da_turma, atividades_do_aluno, montar_tela, notas_do_aluno, professores_da_turma,
+    professores_disponiveis, turma_detalhada, turmas_do_professor
+)
+from snapshots import obter_snapshot
+from search import LIMITE_BUSCA, LISTAGEM_BUSCA_ALUNOS, montar_consulta_fts
+from export import ErroExportacao, formato_exportacao, resposta_exportacao
+from pagination import (
+    ErroPaginacao, listar, consulta_listagem, resposta_listagem, LISTAGEM_ALUNOS, LISTAGEM_TURMAS,
+    LISTAGEM_PROFESSORES, LISTAGEM_MATERIAS, LISTAGEM_ATIVIDADES
+)
 
 # Configuração JWT
 JWT_SECRET = 'sistema-academico-jwt-secret-key'
@@ -44,13 +82,14 @@ def token_required(f):
         if not token:
             return error_response('Token de acesso é necessário', 401)
         
-        payload = verify_token(token)
-        if not payload:
+        principal = get_cache_tokens().autenticar(token)
+        if not principal:
             return error_response('Token inválido ou expirado', 401)
         
         # Adicionar informações do usuário ao request
-        request.user_id = payload['user_id']
-        request.user_type = payload['user_type']
+        request.principal = principal
+        request.user_id = principal.usuario_id
+        request.user_type = principal.tipo
         
         return f(*args, **kwargs)
     
@@ -71,9 +110,9 @@ app.config['SECRET_KEY'] = 'sistema-academico-secret-key'
 CORS(app, 
      origins=["http://127.0.0.1:5500", "http://localhost:5500", "http://localhost:8000", "http://127.0.0.1:8000", "http://localhost:3000"],
      supports_credentials=True, 
-     allow_headers=["Content-Type", "Authorization", "Accept", "X-Requested-With"],
+     allow_headers=["Content-Type", "Authorization", "Accept", "X-Requested-With", "If-None-Match", "If-Modified-Since"],
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
-     expose_headers=["Content-Type", "Authorization"])
+     expose_headers=["Content-Type", "Authorization", "ETag", "Last-Modified"])
 
 @app.route('/api/test-cors', methods=['GET', 'OPTIONS'])
 def test_cors():
@@ -88,20 +127,55 @@ def test_cors():
 # Configuração do banco de dados
 DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'database', 'sistema_academico.db')
 
-def get_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+app.config['DATABASE'] = DB_PATH
+
+def create_app(config=None):
+    """
+    Fábrica da aplicação: aplica `config` e registra as extensões (pool de
+    conexões, caches, pools de threads e processos). Chamada uma vez por
+    processo; no servidor de produção (servidor.py) cada worker a chama
+    depois do fork, para não herdar threads nem pools do processo mestre.
+    """
+    if 'db_pool' in app.extensions:
+        if config:
+            raise RuntimeError('create_app já foi chamada neste processo')
+        return app
+    if config:
+        app.config.update(config)
+    
+    # Pool de conexões: cada requisição usa uma conexão do pool, devolvida no teardown
+    init_db_pool(app)
+    init_notas_colunares(app)
+    # Tokens verificados em cache (LRU por hash do token, até o exp)
+    init_cache_tokens(app, verify_token)
+    # Hash de senhas em pool de processos (política em SENHA_METODO)
+    init_senhas(app)
+    # Índice de intervalos de horário por turma e por professor
+    init_horarios(app)
+    # Geração automática de grade em segundo plano (processos em GRADE_PROCESSOS)
+    init_gerador_grade(app)
+    # Semanas do calendário de aulas expandidas em cache por turma
+    init_calendario(app)
+    # ETag/Last-Modified a partir das versões das tabelas e 304 nas listagens mais recarregadas
+    init_respostas_condicionais(app)
+    # Resultados das listagens de referência em cache, invalidados pela versão das tabelas
+    init_cache_consultas(app)
+    return app
 
 # =============================================
 # INICIALIZAÇÃO DO BANCO DE DADOS
 # =============================================
 
-def init_db():
-    """Inicializa o banco de dados com todas as tabelas necessárias"""
+def init_db(db_path=None):
+    """
+    Inicializa o banco de dados com todas as tabelas necessárias. É o passo
+    de migração: roda uma vez antes de subir o servidor (servidor.py
+    --migrar), não a cada início de worker.
+    """
+    # Só fecha a conexão que abriu: a da requisição (g.db) volta ao pool no teardown
+    propria = db_path is not None or not has_app_context()
+    db = connect(db_path) if db_path else get_db()
     try:
-        db = get_db()
-        
         # Tabela de usuários
         db.execute('''
             CREATE TABLE IF NOT EXISTS usuarios (
@@ -214,6 +288,9 @@ def init_db():
             )
         ''')
 
+        # Completar o schema e aplicar migrações pendentes (índices etc.)
+        aplicar_migracoes(db)
+
         # Verificar se já existem usuários
         existing_users = db.execute('SELECT COUNT(*) as count FROM usuarios').fetchone()['count']
         
@@ -275,7 +352,8 @@ def init_db():
         print(f"❌ Erro ao inicializar banco de dados: {e}")
         raise e
     finally:
-        db.close()
+        if propria:
+            db.close()
 
 # =============================================
 # FUNÇÕES AUXILIARES
@@ -313,6 +391,22 @@ def health_check():
         'message': 'Sistema Acadêmico Integrado está funcionando'
     })
 
+@app.route('/api/admin/monitoramento', methods=['GET'])
+@token_required
+@admin_required
+def get_monitoramento():
+    return success_response('Métricas de monitoramento', {
+        'pool': get_pool().stats(),
+        'escrita': get_writer().stats(),
+        'notas_colunares': get_notas_colunares().stats(),
+        'autenticacao': get_cache_tokens().stats(),
+        'senhas': get_senhas().stats(),
+        'horarios': get_indice_horarios().stats(),
+        'calendario': get_calendario().stats(),
+        'respostas_condicionais': get_respostas_condicionais().stats(),
+        'cache_consultas': get_cache_consultas().stats()
+    })
+
 # Rota de login
 @app.route('/api/auth/login', methods=['POST'])
 def login():
@@ -329,7 +423,18 @@ def login():
             'SELECT * FROM usuarios WHERE email = ?', (email,)
         ).fetchone()
         
-        if user and check_password_hash(user['senha'], password):
+        confere, novo_hash = False, None
+        if user:
+            # Hash conferido no pool de processos, sem prender a thread nem o GIL
+            confere, novo_hash = get_senhas().verificar(
+                user['senha'], password, conta=email, ip=request.remote_addr
+            )
+        
+        if confere:
+            if novo_hash:
+                # Política de hash mudou: regrava com os parâmetros atuais
+                run_write(atualizar_hash_senha, user['id'], user['senha'], novo_hash)
+            
             # Gerar token JWT
             token = generate_token(user['id'], user['tipo'])
             
@@ -345,6 +450,8 @@ def login():
         
         return error_response('Credenciais inválidas', 401)
         
+    except LimiteSenhas as e:
+        return error_response(e.message, e.status)
     except Exception as e:
         print(f'Erro no login: {e}')
         return error_response('Erro interno do servidor')
@@ -362,20 +469,30 @@ def manage_turmas():
 
 def get_turmas():
     try:
-        db = get_db()
-        turmas = db.execute('''
-            SELECT t.*, u.nome as criado_por_nome 
-            FROM turmas t 
-            LEFT JOIN usuarios u ON t.criado_por = u.id
-            ORDER BY t.nome
-        ''').fetchall()
+        db = consultas_cacheadas(get_db(), ('turmas', 'usuarios'))
+        turmas, paginacao = listar(db, LISTAGEM_TURMAS, request.args)
         
-        return success_response('Turmas carregadas', {
-            'turmas': [dict(turma) for turma in turmas]
-        })
+        return success_response('Turmas carregadas', resposta_listagem('turmas', turmas, paginacao))
+    except ErroPaginacao as e:
+        return error_response(str(e), e.status_code)
     except Exception as e:
         return error_response(str(e))
 
+def _criar_turma(conn, data):
+    """Job de escrita do cadastro de turma"""
+    conn.execute('''
+        INSERT INTO turmas (nome, codigo, descricao, ano_letivo, periodo, capacidade_max, criado_por)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        data['nome'], 
+        data['codigo'], 
+        data.get('descricao', ''), 
+        data['ano_letivo'], 
+        data['periodo'],
+        data.get('capacidade_max', 90),
+        1  # admin user
+    ))
+
 def create_turma():
     try:
         data = request.get_json()
@@ -396,19 +513,7 @@ def create_turma():
             return error_response('Código de turma já existe', 400)
         
         # Inserir nova turma
-        db.execute('''
-            INSERT INTO turmas (nome, codigo, descricao, ano_letivo, periodo, capacidade_max, criado_por)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            data['nome'], 
-            data['codigo'], 
-            data.get('descricao', ''), 
-            data['ano_letivo'], 
-            data['periodo'],
-            data.get('capacidade_max', 90),
-            1  # admin user
-        ))
-        db.commit()
+        run_write(_criar_turma, data)
         
         return success_response('Turma criada com sucesso!')
         
@@ -428,22 +533,34 @@ def manage_turma(turma_id):
 def get_turma(turma_id):
     try:
         db = get_db()
-        turma = db.execute('''
-            SELECT t.*, u.nome as criado_por_nome 
-            FROM turmas t 
-            LEFT JOIN usuarios u ON t.criado_por = u.id
-            WHERE t.id = ?
-        ''', (turma_id,)).fetchone()
+        turma = turma_detalhada(db, turma_id)
         
         if not turma:
             return error_response('Turma não encontrada', 404)
         
         return success_response('Turma carregada', {
-            'turma': dict(turma)
+            'turma': turma
         })
     except Exception as e:
         return error_response(str(e))
 
+def _atualizar_turma(conn, turma_id, data, capacidade_max):
+    """Job de escrita da edição de turma"""
+    conn.execute('''
+        UPDATE turmas 
+        SET nome = ?, codigo = ?, descricao = ?, ano_letivo = ?, 
+            periodo = ?, capacidade_max = ?
+        WHERE id = ?
+    ''', (
+        data['nome'], 
+        data['codigo'], 
+        data.get('descricao', ''), 
+        data['ano_letivo'], 
+        data['periodo'],
+        capacidade_max,
+        turma_id
+    ))
+
 def update_turma(turma_id):
     try:
         data = request.get_json()
@@ -485,22 +602,7 @@ def update_turma(turma_id):
             return error_response(f'Não é possível reduzir a capacidade para {capacidade_max}. Existem {alunos_count} alunos matriculados.', 400)
         
         # Atualizar turma
-        db.execute('''
-            UPDATE turmas 
-            SET nome = ?, codigo = ?, descricao = ?, ano_letivo = ?, 
-                periodo = ?, capacidade_max = ?
-            WHERE id = ?
-        ''', (
-            data['nome'], 
-            data['codigo'], 
-            data.get('descricao', ''), 
-            data['ano_letivo'], 
-            data['periodo'],
-            capacidade_max,
-            turma_id
-        ))
-        
-        db.commit()
+        run_write(_atualizar_turma, turma_id, data, capacidade_max)
         
         return success_response('Turma atualizada com sucesso!')
         
@@ -508,6 +610,9 @@ def update_turma(turma_id):
         print(f'Erro ao atualizar turma: {e}')
         return error_response(f'Erro interno: {str(e)}')
 
+def _excluir_turma(conn, turma_id):
+    conn.execute('DELETE FROM turmas WHERE id = ?', (turma_id,))
+
 def delete_turma(turma_id):
     try:
         db = get_db()
@@ -520,8 +625,7 @@ def delete_turma(turma_id):
         if alunos_count > 0:
             return error_response('Não é possível excluir turma com alunos matriculados', 400)
         
-        db.execute('DELETE FROM turmas WHERE id = ?', (turma_id,))
-        db.commit()
+        run_write(_excluir_turma, turma_id)
         
         return success_response('Turma excluída com sucesso!')
         
@@ -547,29 +651,12 @@ def get_turmas_professor(professor_id):
         if not professor:
             return error_response('Professor não encontrado', 404)
         
-        # Buscar turmas do professor
-        turmas = db.execute('''
-            SELECT 
-                t.id,
-                t.nome as turma_nome,
-                t.codigo,
-                m.nome as materia_nome,
-                m.horario,
-                m.dia_semana,
-                m.carga_horaria_semanal,
-                m.data_inicio
-            FROM materias m
-            JOIN turmas t ON m.turma_id = t.id
-            WHERE m.professor_id = ?
-            ORDER BY t.nome, m.nome
-        ''', (professor_id,)).fetchall()
-        
         return success_response('Turmas do professor carregadas', {
             'professor': {
                 'id': professor['id'],
                 'nome': professor['nome']
             },
-            'turmas': [dict(turma) for turma in turmas]
+            'turmas': turmas_do_professor(db, professor_id)
         })
         
     except Exception as e:
@@ -584,27 +671,14 @@ def get_turmas_professor(professor_id):
 @app.route('/api/admin/professores/<int:professor_id>/desalocar/<int:materia_id>', methods=['DELETE'])
 def desalocar_professor(professor_id, materia_id):
     try:
-        db = get_db()
-        
-        # Verificar se a matéria existe e pertence ao professor
-        materia = db.execute('''
-            SELECT id FROM materias 
-            WHERE id = ? AND professor_id = ?
-        ''', (materia_id, professor_id)).fetchone()
-        
-        if not materia:
-            return error_response('Matéria não encontrada ou não pertence a este professor', 404)
-        
-        # Remover a matéria (desalocar professor)
-        db.execute(
-            'DELETE FROM materias WHERE id = ?',
-            (materia_id,)
-        )
-        
-        db.commit()
+        # Remover a matéria (desalocar professor); o índice de horários é
+        # atualizado após o COMMIT
+        run_write_horarios(desalocar_materias, professor_id, materia_id=materia_id)
         
         return success_response('Professor desalocado da matéria com sucesso!')
         
+    except ErroHorario as e:
+        return error_response(str(e), e.status_code)
     except Exception as e:
         return error_response(str(e))
     
@@ -619,11 +693,8 @@ def get_admin_dashboard():
     try:
         db = get_db()
         
-        # Estatísticas gerais
-        total_alunos = db.execute('SELECT COUNT(*) FROM alunos').fetchone()[0]
-        total_professores = db.execute('SELECT COUNT(*) FROM usuarios WHERE tipo = "professor"').fetchone()[0]
-        total_turmas = db.execute('SELECT COUNT(*) FROM turmas').fetchone()[0]
-        total_atividades = db.execute('SELECT COUNT(*) FROM atividades').fetchone()[0]
+        # Estatísticas gerais (materializadas por triggers)
+        estatisticas = obter_estatisticas(db)
         
         # Turmas com capacidade
         turmas_capacidade = db.execute('''
@@ -634,23 +705,10 @@ def get_admin_dashboard():
         ''').fetchall()
         
         # Professores mais ativos
-        professores_ativos = db.execute('''
-            SELECT u.nome, COUNT(m.id) as total_materias
-            FROM usuarios u
-            LEFT JOIN materias m ON u.id = m.professor_id
-            WHERE u.tipo = 'professor'
-            GROUP BY u.id
-            ORDER BY total_materias DESC
-            LIMIT 5
-        ''').fetchall()
+        professores_ativos = professores_mais_ativos(db, 5)
 
         return success_response('Dashboard carregado', {
-            'estatisticas': {
-                'total_alunos': total_alunos,
-                'total_professores': total_professores,
-                'total_turmas': total_turmas,
-                'total_atividades': total_atividades
-            },
+            'estatisticas': estatisticas,
             'turmas_capacidade': [dict(turma) for turma in turmas_capacidade],
             'professores_ativos': [dict(prof) for prof in professores_ativos]
         })
@@ -658,6 +716,29 @@ def get_admin_dashboard():
     except Exception as e:
         return error_response(str(e))
 
+@app.route('/api/admin/dashboard/contagens', methods=['GET'])
+@token_required
+@admin_required
+def get_admin_dashboard_contagens():
+    """Contadores do dashboard + primeiras turmas, sem baixar as listas completas"""
+    try:
+        db = get_db()
+        
+        turmas_recentes = db.execute('''
+            SELECT id, nome, codigo, ano_letivo, periodo, alunos_matriculados, capacidade_max
+            FROM turmas
+            ORDER BY nome
+            LIMIT 5
+        ''').fetchall()
+        
+        return success_response('Contagens carregadas', {
+            'estatisticas': obter_estatisticas(db),
+            'turmas_recentes': [dict(turma) for turma in turmas_recentes]
+        })
+        
+    except Exception as e:
+        return error_response(str(e))
+
 @app.route('/api/admin/relatorios/turmas', methods=['GET'])
 @token_required
 @admin_required
@@ -665,30 +746,69 @@ def get_relatorio_turmas():
     try:
         db = get_db()
         
-        turmas = db.execute('''
-            SELECT t.*, 
-                   COUNT(DISTINCT a.id) as total_alunos,
-                   COUNT(DISTINCT m.id) as total_materias,
-                   COUNT(DISTINCT mat.id) as total_professores,
-                   (SELECT AVG(nota) FROM notas n 
-                    JOIN alunos al ON n.aluno_id = al.id 
-                    WHERE al.turma_id = t.id) as media_geral
-            FROM turmas t
-            LEFT JOIN alunos a ON t.id = a.turma_id
-            LEFT JOIN materias m ON t.id = m.turma_id
-            LEFT JOIN usuarios mat ON m.professor_id = mat.id
-            GROUP BY t.id
-            ORDER BY t.nome
-        ''').fetchall()
+        formato = formato_exportacao(request)
+        if formato:
+            return resposta_exportacao(
+                RELATORIO_TURMAS_SQL, (), formato, 'turmas',
+                'Relatório de turmas gerado', 'relatorio_turmas'
+            )
+        
+        # Snapshot reaproveitado enquanto as tabelas do relatório não mudarem
+        turmas, gerado_em, reaproveitado = obter_snapshot(
+            db, 'relatorio_turmas', RELATORIO_TURMAS_TABELAS, gerar_relatorio_turmas
+        )
         
         return success_response('Relatório de turmas gerado', {
-            'turmas': [dict(turma) for turma in turmas],
-            'gerado_em': datetime.now().isoformat()
+            'turmas': turmas,
+            'gerado_em': gerado_em,
+            'snapshot': reaproveitado
         })
         
+    except ErroExportacao as e:
+        return error_response(str(e), e.status_code)
     except Exception as e:
         return error_response(str(e))
 
+RELATORIO_TURMAS_TABELAS = ('turmas', 'alunos', 'materias', 'usuarios', 'notas')
+
+# Relatório por turma em uma passada: cada CTE agrega uma tabela uma única vez
+RELATORIO_TURMAS_SQL = '''
+    WITH alunos_turma AS (
+        SELECT turma_id, COUNT(*) as total_alunos
+        FROM alunos
+        WHERE turma_id IS NOT NULL
+        GROUP BY turma_id
+    ),
+    materias_turma AS (
+        SELECT m.turma_id,
+               COUNT(*) as total_materias,
+               COUNT(DISTINCT u.id) as total_professores
+        FROM materias m
+        LEFT JOIN usuarios u ON m.professor_id = u.id
+        GROUP BY m.turma_id
+    ),
+    notas_turma AS (
+        SELECT al.turma_id, AVG(n.nota) as media_geral
+        FROM notas n
+        JOIN alunos al ON n.aluno_id = al.id
+        GROUP BY al.turma_id
+    )
+    SELECT t.*,
+           COALESCE(a.total_alunos, 0) as total_alunos,
+           COALESCE(m.total_materias, 0) as total_materias,
+           COALESCE(m.total_professores, 0) as total_professores,
+           n.media_geral
+    FROM turmas t
+    LEFT JOIN alunos_turma a ON a.turma_id = t.id
+    LEFT JOIN materias_turma m ON m.turma_id = t.id
+    LEFT JOIN notas_turma n ON n.turma_id = t.id
+    ORDER BY t.nome
+'''
+
+def gerar_relatorio_turmas(db):
+    """Gera o conteúdo do snapshot do relatório de turmas"""
+    return [dict(turma) for turma in db.execute(RELATORIO_TURMAS_SQL)]
+
 @app.route('/api/admin/relatorios/professores', methods=['GET'])
 @token_required
 @admin_required
@@ -696,32 +816,144 @@ def get_relatorio_professores():
     try:
         db = get_db()
         
-        professores = db.execute('''
-            SELECT u.*,
-                   COUNT(DISTINCT m.id) as total_materias,
-                   COUNT(DISTINCT t.id) as total_turmas,
-                   GROUP_CONCAT(DISTINCT m.nome) as materias_lecionadas
-            FROM usuarios u
-            LEFT JOIN materias m ON u.id = m.professor_id
-            LEFT JOIN turmas t ON m.turma_id = t.id
-            WHERE u.tipo = 'professor'
-            GROUP BY u.id
-            ORDER BY u.nome
-        ''').fetchall()
+        formato = formato_exportacao(request)
+        if formato:
+            return resposta_exportacao(
+                RELATORIO_PROFESSORES_SQL, (), formato, 'professores',
+                'Relatório de professores gerado', 'relatorio_professores'
+            )
+        
+        professores = db.execute(RELATORIO_PROFESSORES_SQL).fetchall()
         
         return success_response('Relatório de professores gerado', {
             'professores': [dict(prof) for prof in professores],
             'gerado_em': datetime.now().isoformat()
         })
         
+    except ErroExportacao as e:
+        return error_response(str(e), e.status_code)
     except Exception as e:
         return error_response(str(e))
 
+RELATORIO_PROFESSORES_SQL = '''
+    SELECT u.id, u.nome, u.email, u.tipo, u.telefone, u.formacao, u.experiencia, u.criado_em,
+           COUNT(DISTINCT m.id) as total_materias,
+           COUNT(DISTINCT t.id) as total_turmas,
+           GROUP_CONCAT(DISTINCT m.nome) as materias_lecionadas
+    FROM usuarios u
+    LEFT JOIN materias m ON u.id = m.professor_id
+    LEFT JOIN turmas t ON m.turma_id = t.id
+    WHERE u.tipo = 'professor'
+    GROUP BY u.id
+    ORDER BY u.nome
+'''
+
+@app.route('/api/admin/relatorios/desempenho', methods=['GET'])
+@token_required
+@admin_required
+def get_relatorio_desempenho_turmas():
+    """
+    Desempenho de uma ou várias turmas em uma chamada.
+
+    ?turma_id=1,2 (padrão: todas), ?faixas=insuficiente:0,regular:5,bom:7,excelente:9,
+    ?percentis=25,50,75,90, ?ranking=0 para omitir o ranking ou
+    ?ranking_limit=&ranking_offset= para paginá-lo.
+    """
+    try:
+        opcoes = _opcoes_relatorio_desempenho(request.args)
+        db = get_db()
+        
+        relatorios = generate_desempenho_turmas_report(
+            dados_desempenho_turmas(db, opcoes.pop('turma_ids')), **opcoes
+        )
+        
+        return success_response('Relatório de desempenho gerado', {
+            'turmas': relatorios,
+            'gerado_em': datetime.now().isoformat()
+        })
+        
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except Exception as e:
+        return error_response(str(e))
+
+def _lista_parametro(args, nome, conversor):
+    bruto = args.get(nome)
+    if not bruto:
+        return None
+    try:
+        return [conversor(item.strip()) for item in bruto.split(',') if item.strip()]
+    except ValueError:
+        raise ValueError(f'Parâmetro {nome} inválido')
+
+def _opcoes_relatorio_desempenho(args):
+    faixas = None
+    pares = _lista_parametro(args, 'faixas', lambda item: item.split(':'))
+    if pares:
+        try:
+            faixas = {nome.strip(): float(minimo) for nome, minimo in pares}
+        except ValueError:
+            raise ValueError('Parâmetro faixas inválido (use nome:minimo,...)')
+    
+    ranking_limite = args.get('ranking_limit')
+    try:
+        ranking_limite = int(ranking_limite) if ranking_limite else None
+        ranking_offset = int(args.get('ranking_offset') or 0)
+    except ValueError:
+        raise ValueError('Paginação do ranking inválida')
+    
+    return {
+        'turma_ids': _lista_parametro(args, 'turma_id', int),
+        'faixas': faixas,
+        'percentis': _lista_parametro(args, 'percentis', float) or PERCENTIS_PADRAO,
+        'incluir_ranking': args.get('ranking', '1').lower() not in ('0', 'false', 'nao', 'não'),
+        'ranking_limite': ranking_limite,
+        'ranking_offset': ranking_offset
+    }
+
+def dados_desempenho_turmas(db, turma_ids=None):
+    """
+    Entrada do relatório de desempenho para várias turmas: duas consultas
+    (turmas e alunos) e as médias por aluno do armazenamento colunar.
+    """
+    filtro, valores = '', ()
+    if turma_ids:
+        filtro = 'WHERE t.id IN (SELECT value FROM json_each(?))'
+        valores = (json.dumps(turma_ids),)
+    
+    turmas = {
+        turma['id']: {'turma_info': dict(turma), 'alunos': []}
+        for turma in db.execute(f'''
+            SELECT t.id, t.nome, t.ano_letivo, t.periodo
+            FROM turmas t
+            {filtro}
+            ORDER BY t.nome, t.id
+        ''', valores)
+    }
+    
+    agregados = obter_notas(db).agregar('aluno')
+    for aluno in db.execute(f'''
+        SELECT a.id, u.nome, a.matricula, a.turma_id
+        FROM alunos a
+        JOIN usuarios u ON a.usuario_id = u.id
+        JOIN turmas t ON a.turma_id = t.id
+        {filtro}
+    ''', valores):
+        grupo = agregados.get(aluno['id'])
+        turmas[aluno['turma_id']]['alunos'].append({
+            **dict(aluno),
+            'media': grupo['media'] if grupo else None,
+            'total_avaliacoes': grupo['quantidade'] if grupo else 0
+        })
+    
+    return list(turmas.values())
+
 # Rotas auxiliares para turmas
 @app.route('/api/admin/todas-turmas', methods=['GET'])
+@condicional(('turmas',), por_usuario=False)
 def get_todas_turmas():
     try:
-        db = get_db()
+        db = consultas_cacheadas(get_db(), ('turmas',))
         turmas = db.execute('''
             SELECT id, nome, codigo, capacidade_max, alunos_matriculados
             FROM turmas 
@@ -738,18 +970,9 @@ def get_todas_turmas():
 def get_alunos_turma(turma_id):
     try:
         db = get_db()
-        alunos = db.execute('''
-            SELECT a.id, u.nome, u.email, a.matricula, a.telefone,
-                   AVG(n.nota) as media_geral, COUNT(n.id) as total_avaliacoes
-            FROM alunos a
-            JOIN usuarios u ON a.usuario_id = u.id
-            LEFT JOIN notas n ON a.id = n.aluno_id
-            WHERE a.turma_id = ?
-            GROUP BY a.id
-        ''', (turma_id,)).fetchall()
         
         return success_response('Alunos da turma carregados', {
-            'alunos': [dict(aluno) for aluno in alunos]
+            'alunos': alunos_da_turma(db, turma_id)
         })
     except Exception as e:
         return error_response(str(e))
@@ -759,27 +982,8 @@ def get_professores_turma(turma_id):
     try:
         db = get_db()
         
-        professores = db.execute('''
-            SELECT 
-                u.id, 
-                u.nome, 
-                u.email, 
-                u.telefone,
-                u.formacao,
-                m.nome as materia_nome,
-                m.horario,
-                m.dia_semana,
-                m.carga_horaria_semanal,
-                m.data_inicio
-            FROM materias m
-            JOIN usuarios u ON m.professor_id = u.id
-            WHERE m.turma_id = ? AND u.tipo = 'professor'
-        ''', (turma_id,)).fetchall()
-        
-        professores_list = [dict(prof) for prof in professores]
-        
         return success_response('Professores da turma carregados', {
-            'professores': professores_list
+            'professores': professores_da_turma(db, turma_id)
         })
     except Exception as e:
         print(f"Erro em get_professores_turma: {e}")
@@ -803,33 +1007,62 @@ def manage_alunos():
 def get_alunos_completo():
     try:
         db = get_db()
-        alunos = db.execute('''
-            SELECT 
-                a.id,
-                u.nome,
-                u.email,
-                a.matricula,
-                a.data_nascimento,
-                a.endereco,
-                a.telefone,
-                t.nome as turma_nome,
-                t.id as turma_id,
-                COUNT(n.id) as total_avaliacoes,
-                AVG(n.nota) as media_geral
-            FROM alunos a
-            JOIN usuarios u ON a.usuario_id = u.id
-            LEFT JOIN turmas t ON a.turma_id = t.id
-            LEFT JOIN notas n ON a.id = n.aluno_id
-            GROUP BY a.id
-            ORDER BY u.nome
-        ''').fetchall()
         
-        return success_response('Alunos carregados', {
-            'alunos': [dict(aluno) for aluno in alunos]
-        })
+        formato = formato_exportacao(request)
+        if formato:
+            sql, valores = consulta_listagem(LISTAGEM_ALUNOS, request.args)
+            return resposta_exportacao(sql, valores, formato, 'alunos', 'Alunos carregados')
+        
+        alunos, paginacao = listar(db, LISTAGEM_ALUNOS, request.args)
+        
+        return success_response('Alunos carregados', resposta_listagem('alunos', alunos, paginacao))
+    except (ErroPaginacao, ErroExportacao) as e:
+        return error_response(str(e), e.status_code)
     except Exception as e:
         return error_response(str(e))
 
+@app.route('/api/admin/alunos/search', methods=['GET'])
+@token_required
+@admin_required
+def buscar_alunos():
+    try:
+        consulta = montar_consulta_fts(request.args.get('q'))
+        if consulta is None:
+            return error_response('Parâmetro q é obrigatório', 400)
+        
+        db = get_db()
+        # Ordenado por relevância (bm25); sempre paginado
+        alunos, paginacao = listar(
+            db, LISTAGEM_BUSCA_ALUNOS, request.args,
+            condicoes=[('b.alunos_busca MATCH ?', consulta)],
+            limite_padrao=LIMITE_BUSCA
+        )
+        
+        return success_response('Busca de alunos concluída', resposta_listagem('alunos', alunos, paginacao))
+    except ErroPaginacao as e:
+        return error_response(str(e), e.status_code)
+    except Exception as e:
+        return error_response(str(e))
+
+def _criar_aluno(conn, data, senha):
+    """Job de escrita do cadastro de aluno (com matrícula se vier turma_id)"""
+    usuario_id = conn.execute(
+        'INSERT INTO usuarios (nome, email, senha, tipo) VALUES (?, ?, ?, ?)',
+        (data['nome'], data['email'], senha, 'aluno')
+    ).lastrowid
+    aluno_id = conn.execute('''
+        INSERT INTO alunos (usuario_id, matricula, data_nascimento, endereco, telefone)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (
+        usuario_id,
+        data['matricula'],
+        data.get('data_nascimento'),
+        data.get('endereco'),
+        data.get('telefone')
+    )).lastrowid
+    if data.get('turma_id'):
+        matricular(conn, data['turma_id'], aluno_id)
+
 def create_aluno():
     try:
         data = request.get_json()
@@ -838,6 +1071,7 @@ def create_aluno():
         for field in required_fields:
             if field not in data or not data[field]:
                 return error_response(f'Campo obrigatório: {field}', 400)
+        data['turma_id'] = ler_turma_id(data.get('turma_id'))
         
         db = get_db()
         
@@ -855,42 +1089,51 @@ def create_aluno():
         if existing_matricula:
             return error_response('Matrícula já existe', 400)
         
-        # Criar usuário
-        db.execute(
-            'INSERT INTO usuarios (nome, email, senha, tipo) VALUES (?, ?, ?, ?)',
-            (data['nome'], data['email'], generate_password_hash(data['senha']), 'aluno')
-        )
-        
-        usuario_id = db.execute('SELECT last_insert_rowid()').fetchone()[0]
-        
-        # Criar aluno
-        db.execute('''
-            INSERT INTO alunos (usuario_id, matricula, turma_id, data_nascimento, endereco, telefone)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            usuario_id,
-            data['matricula'],
-            data.get('turma_id'),
-            data.get('data_nascimento'),
-            data.get('endereco'),
-            data.get('telefone')
-        ))
-        
-        # Atualizar contagem de alunos na turma se houver turma
-        if data.get('turma_id'):
-            db.execute(
-                'UPDATE turmas SET alunos_matriculados = alunos_matriculados + 1 WHERE id = ?',
-                (data['turma_id'],)
-            )
-        
-        db.commit()
+        # Usuário, aluno e vaga na turma em uma transação: turma lotada
+        # desfaz o cadastro inteiro
+        senha = get_senhas().gerar(data['senha'])
+        run_write(_criar_aluno, data, senha)
         
         return success_response('Aluno criado com sucesso!')
         
+    except ErroMatricula as e:
+        return error_response(str(e), e.status_code)
     except Exception as e:
         print(f'Erro ao criar aluno: {e}')
         return error_response(f'Erro interno: {str(e)}')
     
+@app.route('/api/admin/alunos/importar', methods=['POST'])
+@token_required
+@admin_required
+def importar_alunos_lote():
+    """
+    Importa alunos de um arquivo CSV ou JSON Lines (campo `arquivo` de um
+    multipart ou o próprio corpo da requisição), em lotes transacionais.
+    ?simular=1 só valida. Responde com o relatório por linha.
+    """
+    try:
+        arquivo = request.files.get('arquivo')
+        if arquivo is not None:
+            formato = formato_importacao(request.args.get('formato'), arquivo.mimetype, arquivo.filename)
+            fluxo = arquivo.stream
+        else:
+            formato = formato_importacao(request.args.get('formato'), request.mimetype)
+            fluxo = request.stream
+        
+        simular = request.args.get('simular') in ('1', 'true')
+        relatorio = importar_alunos(ler_linhas(fluxo, formato), get_db(), simular=simular)
+        
+        mensagem = 'Validação concluída' if simular else 'Importação concluída'
+        return success_response(mensagem, {'importacao': relatorio})
+        
+    except ErroImportacao as e:
+        return error_response(str(e), e.status_code)
+    except LimiteSenhas as e:
+        return error_response(e.message, e.status)
+    except Exception as e:
+        print(f'Erro ao importar alunos: {e}')
+        return error_response(f'Erro interno: {str(e)}')
+    
 # =============================================
 # SISTEMA DE ATIVIDADES E NOTAS
 # =============================================
@@ -905,21 +1148,21 @@ def manage_atividades():
 def get_atividades():
     try:
         db = get_db()
-        atividades = db.execute('''
-            SELECT a.*, m.nome as materia_nome, t.nome as turma_nome, u.nome as professor_nome
-            FROM atividades a
-            JOIN materias m ON a.materia_id = m.id
-            JOIN turmas t ON m.turma_id = t.id
-            JOIN usuarios u ON a.criado_por = u.id
-            ORDER BY a.data_entrega DESC
-        ''').fetchall()
+        atividades, paginacao = listar(db, LISTAGEM_ATIVIDADES, request.args)
         
-        return success_response('Atividades carregadas', {
-            'atividades': [dict(atividade) for atividade in atividades]
-        })
+        return success_response('Atividades carregadas', resposta_listagem('atividades', atividades, paginacao))
+    except ErroPaginacao as e:
+        return error_response(str(e), e.status_code)
     except Exception as e:
         return error_response(str(e))
 
+def _criar_atividade(conn, titulo, descricao, materia_id, valor, data_entrega, criado_por):
+    """Job de escrita do cadastro de atividade"""
+    conn.execute('''
+        INSERT INTO atividades (titulo, descricao, materia_id, valor, data_entrega, criado_por)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (titulo, descricao, materia_id, valor, data_entrega, criado_por))
+
 def criar_atividade():
     try:
         data = request.get_json()
@@ -929,21 +1172,15 @@ def criar_atividade():
             if field not in data or not data[field]:
                 return error_response(f'Campo obrigatório: {field}', 400)
         
-        db = get_db()
-        
-        db.execute('''
-            INSERT INTO atividades (titulo, descricao, materia_id, valor, data_entrega, criado_por)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
+        run_write(
+            _criar_atividade,
             data['titulo'],
             data.get('descricao', ''),
             data['materia_id'],
             data.get('valor', 10.0),
             data['data_entrega'],
             data.get('criado_por', 1)  # ID do professor
-        ))
-        
-        db.commit()
+        )
         
         return success_response('Atividade criada com sucesso!')
         
@@ -951,6 +1188,7 @@ def criar_atividade():
         return error_response(str(e))
 
 @app.route('/api/professor/atividades/<int:atividade_id>/notas', methods=['POST'])
+@token_required
 def lancar_notas(atividade_id):
     try:
         data = request.get_json()
@@ -958,46 +1196,14 @@ def lancar_notas(atividade_id):
         if 'notas' not in data or not isinstance(data['notas'], list):
             return error_response('Lista de notas é obrigatória', 400)
         
-        db = get_db()
-        
-        for nota_data in data['notas']:
-            if 'aluno_id' not in nota_data or 'nota' not in nota_data:
-                continue
-                
-            # Verificar se nota já existe
-            existing = db.execute(
-                'SELECT id FROM notas WHERE aluno_id = ? AND atividade_id = ?',
-                (nota_data['aluno_id'], atividade_id)
-            ).fetchone()
-            
-            if existing:
-                # Atualizar nota existente
-                db.execute('''
-                    UPDATE notas SET nota = ?, feedback = ?, data_avaliacao = CURRENT_TIMESTAMP
-                    WHERE aluno_id = ? AND atividade_id = ?
-                ''', (
-                    nota_data['nota'],
-                    nota_data.get('feedback', ''),
-                    nota_data['aluno_id'],
-                    atividade_id
-                ))
-            else:
-                # Inserir nova nota
-                db.execute('''
-                    INSERT INTO notas (aluno_id, atividade_id, nota, feedback, avaliado_por)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    nota_data['aluno_id'],
-                    atividade_id,
-                    nota_data['nota'],
-                    nota_data.get('feedback', ''),
-                    data.get('avaliado_por', 1)  # ID do professor
-                ))
-        
-        db.commit()
+        # Upsert em lote na fila de escrita (uma transação por lote); o
+        # avaliador é quem está autenticado, nunca um campo do corpo
+        resumo = run_write_notas(salvar_notas_em_lote, atividade_id, data['notas'], request.user_id)
         
-        return success_response('Notas lançadas com sucesso!')
+        return success_response('Notas lançadas com sucesso!', resumo)
         
+    except ErroLancamento as e:
+        return error_response(str(e), e.status_code)
     except Exception as e:
         return error_response(str(e))
     
@@ -1008,27 +1214,13 @@ def lancar_notas(atividade_id):
 @app.route('/api/admin/turmas/<int:turma_id>/professores/<int:professor_id>', methods=['DELETE'])
 def remover_professor_turma(turma_id, professor_id):
     try:
-        db = get_db()
-        
-        # Verificar se existe matéria desse professor na turma
-        materia = db.execute('''
-            SELECT id FROM materias 
-            WHERE turma_id = ? AND professor_id = ?
-        ''', (turma_id, professor_id)).fetchone()
-        
-        if not materia:
-            return error_response('Professor não está alocado nesta turma', 404)
-        
-        # Remover a matéria (e consequentemente o professor da turma)
-        db.execute(
-            'DELETE FROM materias WHERE turma_id = ? AND professor_id = ?',
-            (turma_id, professor_id)
-        )
-        
-        db.commit()
+        # Remover as matérias (e consequentemente o professor da turma)
+        run_write_horarios(desalocar_materias, professor_id, turma_id=turma_id)
         
         return success_response('Professor removido da turma com sucesso!')
         
+    except ErroHorario as e:
+        return error_response(str(e), e.status_code)
     except Exception as e:
         return error_response(str(e))
     
@@ -1045,88 +1237,82 @@ def manage_aluno_turma(turma_id, aluno_id):
 
 def matricular_aluno(turma_id, aluno_id):
     try:
-        data = request.get_json() or {}
-        
-        db = get_db()
-        
-        # Verificar se turma existe
-        turma = db.execute(
-            'SELECT id, capacidade_max, alunos_matriculados FROM turmas WHERE id = ?', 
-            (turma_id,)
-        ).fetchone()
-        
-        if not turma:
-            return error_response('Turma não encontrada', 404)
-        
-        # Verificar se aluno existe
-        aluno = db.execute(
-            'SELECT id, turma_id FROM alunos WHERE id = ?', 
-            (aluno_id,)
-        ).fetchone()
+        data = request.get_json(silent=True) or {}
+        lista_espera = bool(data.get('lista_espera')) or request.args.get('lista_espera') in ('1', 'true')
         
-        if not aluno:
-            return error_response('Aluno não encontrada', 404)
-        
-        # Verificar capacidade da turma
-        if turma['alunos_matriculados'] >= turma['capacidade_max']:
-            return error_response('Turma está lotada', 400)
-        
-        # Verificar se aluno já está em alguma turma
-        if aluno['turma_id']:
-            return error_response('Aluno já está matriculado em outra turma', 400)
-        
-        # Atualizar aluno com nova turma
-        db.execute(
-            'UPDATE alunos SET turma_id = ? WHERE id = ?',
-            (turma_id, aluno_id)
-        )
-        
-        # Atualizar contagem de alunos na turma
-        db.execute(
-            'UPDATE turmas SET alunos_matriculados = alunos_matriculados + 1 WHERE id = ?',
-            (turma_id,)
-        )
+        # Checagem de capacidade e incremento no mesmo UPDATE condicional
+        resultado = run_write(matricular, turma_id, aluno_id, lista_espera=lista_espera)
         
-        db.commit()
-        
-        return success_response('Aluno matriculado na turma com sucesso!')
+        if resultado['status'] == 'lista_espera':
+            return success_response('Turma lotada: aluno incluído na lista de espera', resultado), 202
+        return success_response('Aluno matriculado na turma com sucesso!', resultado)
         
+    except ErroMatricula as e:
+        return error_response(str(e), e.status_code)
     except Exception as e:
         print(f'Erro ao matricular aluno: {e}')
         return error_response(f'Erro interno: {str(e)}')
 
 def remover_aluno_turma(turma_id, aluno_id):
     try:
-        db = get_db()
+        # A vaga liberada vai para o primeiro da lista de espera
+        resultado = run_write(desmatricular, turma_id, aluno_id)
         
-        # Verificar se aluno está na turma
-        aluno = db.execute(
-            'SELECT id, turma_id FROM alunos WHERE id = ? AND turma_id = ?',
-            (aluno_id, turma_id)
-        ).fetchone()
+        return success_response('Aluno removido da turma com sucesso!', resultado)
         
-        if not aluno:
-            return error_response('Aluno não encontrado nesta turma', 404)
+    except ErroMatricula as e:
+        return error_response(str(e), e.status_code)
+    except Exception as e:
+        return error_response(str(e))
+
+@app.route('/api/admin/turmas/<int:turma_id>/matriculas', methods=['POST'])
+@token_required
+@admin_required
+def matricular_alunos_lote(turma_id):
+    """Matricula vários alunos na turma em uma transação: {'aluno_ids': [...], 'lista_espera': bool}"""
+    try:
+        data = request.get_json(silent=True) or {}
+        aluno_ids = data.get('aluno_ids')
+        if not isinstance(aluno_ids, list) or not aluno_ids:
+            return error_response('Lista aluno_ids é obrigatória', 400)
+        try:
+            aluno_ids = [int(aluno_id) for aluno_id in aluno_ids]
+        except (TypeError, ValueError):
+            return error_response('aluno_ids deve conter apenas números', 400)
         
-        # Remover aluno da turma
-        db.execute(
-            'UPDATE alunos SET turma_id = NULL WHERE id = ?',
-            (aluno_id,)
-        )
+        resultado = run_write(matricular_em_lote, turma_id, aluno_ids, lista_espera=bool(data.get('lista_espera')))
         
-        # Atualizar contagem de alunos na turma (com proteção contra valores negativos)
-        db.execute('''
-            UPDATE turmas 
-            SET alunos_matriculados = CASE 
-                WHEN alunos_matriculados > 0 THEN alunos_matriculados - 1 
-                ELSE 0 
-            END
-            WHERE id = ?
-        ''', (turma_id,))
+        return success_response('Matrículas processadas', resultado)
         
-        db.commit()
+    except ErroMatricula as e:
+        return error_response(str(e), e.status_code)
+    except Exception as e:
+        print(f'Erro ao matricular alunos: {e}')
+        return error_response(f'Erro interno: {str(e)}')
+
+@app.route('/api/admin/turmas/<int:turma_id>/lista-espera', methods=['GET'])
+@token_required
+@admin_required
+def get_lista_espera(turma_id):
+    try:
+        alunos = listar_espera(get_db(), turma_id)
         
-        return success_response('Aluno removido da turma com sucesso!')
+        return success_response('Lista de espera carregada', {'alunos': alunos, 'total': len(alunos)})
+        
+    except ErroMatricula as e:
+        return error_response(str(e), e.status_code)
+    except Exception as e:
+        return error_response(str(e))
+
+@app.route('/api/admin/turmas/<int:turma_id>/lista-espera/<int:aluno_id>', methods=['DELETE'])
+@token_required
+@admin_required
+def remover_lista_espera(turma_id, aluno_id):
+    try:
+        if not run_write(sair_lista_espera, turma_id, aluno_id):
+            return error_response('Aluno não está na lista de espera desta turma', 404)
+        
+        return success_response('Aluno removido da lista de espera')
         
     except Exception as e:
         return error_response(str(e))
@@ -1170,65 +1356,50 @@ def get_aluno(aluno_id):
     except Exception as e:
         return error_response(str(e))
 
+def _atualizar_aluno(conn, aluno_id, data):
+    """Job de escrita da edição de aluno; a troca de turma passa pelo motor de matrículas"""
+    aluno = conn.execute('SELECT usuario_id FROM alunos WHERE id = ?', (aluno_id,)).fetchone()
+    if not aluno:
+        raise ErroMatricula('Aluno não encontrado', 404)
+    
+    # Atualizar usuário
+    if 'nome' in data or 'email' in data:
+        conn.execute('''
+            UPDATE usuarios 
+            SET nome = COALESCE(?, nome), email = COALESCE(?, email) 
+            WHERE id = ?
+        ''', (data.get('nome'), data.get('email'), aluno['usuario_id']))
+    
+    # Atualizar aluno
+    conn.execute('''
+        UPDATE alunos 
+        SET matricula = COALESCE(?, matricula),
+            data_nascimento = COALESCE(?, data_nascimento),
+            endereco = COALESCE(?, endereco),
+            telefone = COALESCE(?, telefone)
+        WHERE id = ?
+    ''', (
+        data.get('matricula'),
+        data.get('data_nascimento'),
+        data.get('endereco'),
+        data.get('telefone'),
+        aluno_id
+    ))
+    
+    # Troca de turma: vaga reservada no destino antes de liberar a de origem
+    return transferir(conn, aluno_id, data.get('turma_id'))
+
 def update_aluno(aluno_id):
     try:
         data = request.get_json()
-        db = get_db()
-        
-        # Obter dados atuais do aluno
-        aluno = db.execute(
-            'SELECT usuario_id, turma_id FROM alunos WHERE id = ?', (aluno_id,)
-        ).fetchone()
-        
-        if not aluno:
-            return error_response('Aluno não encontrado', 404)
-        
-        old_turma_id = aluno['turma_id']
-        new_turma_id = data.get('turma_id')
-        
-        # Atualizar usuário
-        if 'nome' in data or 'email' in data:
-            db.execute('''
-                UPDATE usuarios 
-                SET nome = COALESCE(?, nome), email = COALESCE(?, email) 
-                WHERE id = ?
-            ''', (data.get('nome'), data.get('email'), aluno['usuario_id']))
-        
-        # Atualizar aluno
-        db.execute('''
-            UPDATE alunos 
-            SET matricula = COALESCE(?, matricula),
-                turma_id = ?,
-                data_nascimento = COALESCE(?, data_nascimento),
-                endereco = COALESCE(?, endereco),
-                telefone = COALESCE(?, telefone)
-            WHERE id = ?
-        ''', (
-            data.get('matricula'),
-            new_turma_id,
-            data.get('data_nascimento'),
-            data.get('endereco'),
-            data.get('telefone'),
-            aluno_id
-        ))
-        
-        # Atualizar contagens de alunos nas turmas se a turma mudou
-        if old_turma_id != new_turma_id:
-            if old_turma_id:
-                db.execute(
-                    'UPDATE turmas SET alunos_matriculados = alunos_matriculados - 1 WHERE id = ?',
-                    (old_turma_id,)
-                )
-            if new_turma_id:
-                db.execute(
-                    'UPDATE turmas SET alunos_matriculados = alunos_matriculados + 1 WHERE id = ?',
-                    (new_turma_id,)
-                )
+        data['turma_id'] = ler_turma_id(data.get('turma_id'))
         
-        db.commit()
+        resultado = run_write(_atualizar_aluno, aluno_id, data)
         
-        return success_response('Aluno atualizado com sucesso!')
+        return success_response('Aluno atualizado com sucesso!', resultado)
         
+    except ErroMatricula as e:
+        return error_response(str(e), e.status_code)
     except Exception as e:
         return error_response(str(e))
 
@@ -1236,16 +1407,6 @@ def delete_aluno(aluno_id):
     try:
         db = get_db()
         
-        # Obter dados do aluno
-        aluno = db.execute('''
-            SELECT a.usuario_id, a.turma_id 
-            FROM alunos a 
-            WHERE a.id = ?
-        ''', (aluno_id,)).fetchone()
-        
-        if not aluno:
-            return error_response('Aluno não encontrado', 404)
-        
         # Verificar se há notas associadas
         notas_count = db.execute(
             'SELECT COUNT(*) FROM notas WHERE aluno_id = ?', (aluno_id,)
@@ -1254,23 +1415,13 @@ def delete_aluno(aluno_id):
         if notas_count > 0:
             return error_response('Não é possível excluir aluno com notas registradas', 400)
         
-        # Deletar aluno
-        db.execute('DELETE FROM alunos WHERE id = ?', (aluno_id,))
-        
-        # Deletar usuário
-        db.execute('DELETE FROM usuarios WHERE id = ?', (aluno['usuario_id'],))
-        
-        # Atualizar contagem na turma se houver
-        if aluno['turma_id']:
-            db.execute(
-                'UPDATE turmas SET alunos_matriculados = alunos_matriculados - 1 WHERE id = ?',
-                (aluno['turma_id'],)
-            )
-        
-        db.commit()
+        # Aluno, usuário e vaga na turma em uma transação
+        resultado = run_write(excluir_aluno, aluno_id)
         
-        return success_response('Aluno excluído com sucesso!')
+        return success_response('Aluno excluído com sucesso!', resultado)
         
+    except ErroMatricula as e:
+        return error_response(str(e), e.status_code)
     except Exception as e:
         return error_response(str(e))
 
@@ -1278,19 +1429,15 @@ def delete_aluno(aluno_id):
 def get_alunos_sem_turma():
     try:
         db = get_db()
-        alunos = db.execute('''
-            SELECT a.id, u.nome, u.email, a.matricula, a.telefone,
-                   AVG(n.nota) as media_geral
-            FROM alunos a
-            JOIN usuarios u ON a.usuario_id = u.id
-            LEFT JOIN notas n ON a.id = n.aluno_id
-            WHERE a.turma_id IS NULL
-            GROUP BY a.id
-        ''').fetchall()
+        alunos, paginacao = listar(
+            db, LISTAGEM_ALUNOS, request.args,
+            condicoes=[('a.turma_id IS NULL',)],
+            padrao=['id', 'nome', 'email', 'matricula', 'telefone', 'media_geral']
+        )
         
-        return success_response('Alunos sem turma carregados', {
-            'alunos': [dict(aluno) for aluno in alunos]
-        })
+        return success_response('Alunos sem turma carregados', resposta_listagem('alunos', alunos, paginacao))
+    except ErroPaginacao as e:
+        return error_response(str(e), e.status_code)
     except Exception as e:
         return error_response(str(e))
 
@@ -1308,31 +1455,22 @@ def manage_professores():
 def get_professores():
     try:
         db = get_db()
-        professores = db.execute('''
-            SELECT 
-                u.*, 
-                COUNT(DISTINCT m.id) as total_turmas,
-                GROUP_CONCAT(DISTINCT m.nome) as materias_lecionadas
-            FROM usuarios u
-            LEFT JOIN materias m ON u.id = m.professor_id
-            WHERE u.tipo = 'professor'
-            GROUP BY u.id
-            ORDER BY u.nome
-        ''').fetchall()
-        
-        # Garantir que total_turmas seja sempre um número
-        professores_data = []
-        for prof in professores:
-            prof_dict = dict(prof)
-            prof_dict['total_turmas'] = prof_dict['total_turmas'] or 0
-            professores_data.append(prof_dict)
+        professores, paginacao = listar(db, LISTAGEM_PROFESSORES, request.args)
         
-        return success_response('Professores carregados', {
-            'professores': professores_data
-        })
+        return success_response('Professores carregados', resposta_listagem('professores', professores, paginacao))
+    except ErroPaginacao as e:
+        return error_response(str(e), e.status_code)
     except Exception as e:
         return error_response(str(e))
 
+def _criar_professor(conn, data, senha):
+    """Job de escrita do cadastro de professor"""
+    conn.execute(
+        'INSERT INTO usuarios (nome, email, senha, tipo, telefone, formacao, experiencia) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        (data['nome'], data['email'], senha, 'professor',
+         data.get('telefone'), data.get('formacao'), data.get('experiencia', 0))
+    )
+
 def create_professor():
     try:
         data = request.get_json()
@@ -1351,14 +1489,9 @@ def create_professor():
         if existing_email:
             return error_response('Email já cadastrado', 400)
         
-        # Criar usuário professor
-        db.execute(
-            'INSERT INTO usuarios (nome, email, senha, tipo, telefone, formacao, experiencia) VALUES (?, ?, ?, ?, ?, ?, ?)',
-            (data['nome'], data['email'], generate_password_hash(data['senha']), 'professor',
-             data.get('telefone'), data.get('formacao'), data.get('experiencia', 0))
-        )
-        
-        db.commit()
+        # Criar usuário professor (hash fora da transação de escrita)
+        senha = get_senhas().gerar(data['senha'])
+        run_write(_criar_professor, data, senha)
         
         return success_response('Professor criado com sucesso!')
         
@@ -1410,6 +1543,23 @@ def get_professor_details(professor_id):
     except Exception as e:
         return error_response(str(e))
 
+def _atualizar_professor(conn, professor_id, data):
+    """Job de escrita da edição de professor"""
+    conn.execute('''
+        UPDATE usuarios 
+        SET nome = COALESCE(?, nome), email = COALESCE(?, email),
+            telefone = COALESCE(?, telefone), formacao = COALESCE(?, formacao),
+            experiencia = COALESCE(?, experiencia)
+        WHERE id = ?
+    ''', (
+        data.get('nome'), 
+        data.get('email'),
+        data.get('telefone'),
+        data.get('formacao'),
+        data.get('experiencia'),
+        professor_id
+    ))
+
 def update_professor(professor_id):
     try:
         data = request.get_json()
@@ -1424,28 +1574,16 @@ def update_professor(professor_id):
             return error_response('Professor não encontrado', 404)
         
         # Atualizar dados do professor
-        db.execute('''
-            UPDATE usuarios 
-            SET nome = COALESCE(?, nome), email = COALESCE(?, email),
-                telefone = COALESCE(?, telefone), formacao = COALESCE(?, formacao),
-                experiencia = COALESCE(?, experiencia)
-            WHERE id = ?
-        ''', (
-            data.get('nome'), 
-            data.get('email'),
-            data.get('telefone'),
-            data.get('formacao'),
-            data.get('experiencia'),
-            professor_id
-        ))
-        
-        db.commit()
+        run_write(_atualizar_professor, professor_id, data)
         
         return success_response('Professor atualizado com sucesso!')
         
     except Exception as e:
         return error_response(str(e))
 
+def _excluir_professor(conn, professor_id):
+    conn.execute('DELETE FROM usuarios WHERE id = ?', (professor_id,))
+
 def delete_professor(professor_id):
     try:
         db = get_db()
@@ -1467,8 +1605,7 @@ def delete_professor(professor_id):
             return error_response('Não é possível excluir professor com matérias atribuídas', 400)
         
         # Deletar professor
-        db.execute('DELETE FROM usuarios WHERE id = ?', (professor_id,))
-        db.commit()
+        run_write(_excluir_professor, professor_id)
         
         return success_response('Professor excluído com sucesso!')
         
@@ -1527,90 +1664,26 @@ def get_atividades_professor():
         
         db = get_db()
         
-        atividades = db.execute('''
-            SELECT 
-                a.*,
-                m.nome as materia_nome,
-                t.nome as turma_nome
-            FROM atividades a
-            JOIN materias m ON a.materia_id = m.id
-            JOIN turmas t ON m.turma_id = t.id
-            WHERE m.professor_id = ?
-            ORDER BY a.data_entrega DESC
-        ''', (request.user_id,)).fetchall()
+        atividades, paginacao = listar(
+            db, LISTAGEM_ATIVIDADES, request.args,
+            condicoes=[('m.professor_id = ?', request.user_id)]
+        )
         
-        return success_response('Atividades carregadas', {
-            'atividades': [dict(atividade) for atividade in atividades]
-        })
+        return success_response('Atividades carregadas', resposta_listagem('atividades', atividades, paginacao))
         
+    except ErroPaginacao as e:
+        return error_response(str(e), e.status_code)
     except Exception as e:
         return error_response(str(e))
 
-def validar_conflito_horario(turma_id, horario, dia_semana, professor_id=None, materia_id=None):
-    """Valida conflitos de horário na turma"""
-    try:
-        db = get_db()
-        
-        query = '''
-            SELECT m.id, m.nome as materia_nome, u.nome as professor_nome, 
-                   m.horario, m.dia_semana
-            FROM materias m
-            JOIN usuarios u ON m.professor_id = u.id
-            WHERE m.turma_id = ? AND m.horario = ? AND m.dia_semana = ?
-        '''
-        params = [turma_id, horario, dia_semana]
-        
-        if professor_id:
-            query += ' AND m.professor_id = ?'
-            params.append(professor_id)
-        
-        if materia_id:
-            query += ' AND m.id != ?'
-            params.append(materia_id)
-        
-        conflito = db.execute(query, params).fetchone()
-        
-        if conflito:
-            return {
-                'conflito': True,
-                'mensagem': f'Conflito de horário: {conflito["materia_nome"]} com {conflito["professor_nome"]}'
-            }
-        
-        return {'conflito': False}
-        
-    except Exception as e:
-        print(f'Erro na validação de horário: {e}')
-        return {'conflito': False}
-
 @app.route('/api/admin/professores-disponiveis', methods=['GET'])
+@condicional(('usuarios', 'materias'), por_usuario=False)
 def get_professores_disponiveis():
     try:
-        db = get_db()
-        
-        professores = db.execute('''
-            SELECT 
-                u.id, 
-                u.nome, 
-                u.email, 
-                u.telefone,
-                u.formacao,
-                u.experiencia,
-                COUNT(m.id) as turmas_count
-            FROM usuarios u
-            LEFT JOIN materias m ON u.id = m.professor_id
-            WHERE u.tipo = 'professor'
-            GROUP BY u.id
-            ORDER BY u.nome
-        ''').fetchall()
-        
-        professores_list = []
-        for prof in professores:
-            prof_dict = dict(prof)
-            prof_dict['turmas_count'] = prof_dict['turmas_count'] or 0
-            professores_list.append(prof_dict)
+        db = consultas_cacheadas(get_db(), ('usuarios', 'materias'))
         
         return success_response('Professores disponíveis carregados', {
-            'professores': professores_list
+            'professores': professores_disponiveis(db)
         })
         
     except Exception as e:
@@ -1618,20 +1691,15 @@ def get_professores_disponiveis():
         return error_response(f'Erro ao carregar professores: {str(e)}')
 
 @app.route('/api/admin/materias', methods=['GET'])
+@condicional(('materias', 'turmas', 'usuarios'), por_usuario=False)
 def get_materias():
     try:
-        db = get_db()
-        materias = db.execute('''
-            SELECT m.*, t.nome as turma_nome, u.nome as professor_nome
-            FROM materias m
-            JOIN turmas t ON m.turma_id = t.id
-            JOIN usuarios u ON m.professor_id = u.id
-            ORDER BY m.nome
-        ''').fetchall()
+        db = consultas_cacheadas(get_db(), ('materias', 'turmas', 'usuarios'))
+        materias, paginacao = listar(db, LISTAGEM_MATERIAS, request.args)
         
-        return success_response('Matérias carregadas', {
-            'materias': [dict(materia) for materia in materias]
-        })
+        return success_response('Matérias carregadas', resposta_listagem('materias', materias, paginacao))
+    except ErroPaginacao as e:
+        return error_response(str(e), e.status_code)
     except Exception as e:
         return error_response(str(e))
 
@@ -1647,63 +1715,103 @@ def alocar_professor_turma(turma_id):
             if field not in data or not data[field]:
                 return error_response(f'Campo obrigatório: {field}', 400)
         
-        db = get_db()
-        
-        # Validar conflito de horário
-        validacao = validar_conflito_horario(
-            turma_id, 
-            data['horario'], 
-            data['dia_semana'], 
-            data['professor_id']
-        )
+        # Conflitos por sobreposição de intervalos, na turma e na agenda do
+        # professor, checados dentro da transação que cria a matéria
+        materia_id = run_write_horarios(alocar_materia, turma_id, data)
         
-        if validacao['conflito']:
-            return error_response(validacao['mensagem'], 400)
+        print("Professor alocado com sucesso no banco de dados!")
         
-        # Verificar se turma existe
-        turma = db.execute(
-            'SELECT id, nome FROM turmas WHERE id = ?', (turma_id,)
-        ).fetchone()
+        return success_response('Professor alocado na turma com sucesso!', {'materia_id': materia_id})
         
-        if not turma:
-            return error_response('Turma não encontrada', 404)
+    except ErroHorario as e:
+        if e.conflitos:
+            return jsonify({'error': str(e), 'conflitos': e.conflitos}), e.status_code
+        return error_response(str(e), e.status_code)
+    except Exception as e:
+        print(f"Erro ao alocar professor: {e}")
+        import traceback
+        traceback.print_exc()
+        return error_response(f'Erro interno: {str(e)}')
+
+@app.route('/api/admin/horarios/validar', methods=['POST'])
+@token_required
+@admin_required
+def validar_grade_horarios():
+    """Valida uma grade proposta em uma chamada: {'aulas': [...], 'substituir': bool}"""
+    try:
+        data = request.get_json(silent=True) or {}
+        aulas = data.get('aulas')
+        if not isinstance(aulas, list) or not aulas:
+            return error_response('Lista aulas é obrigatória', 400)
         
-        # Verificar se professor existe
-        professor = db.execute(
-            'SELECT id, nome FROM usuarios WHERE id = ? AND tipo = "professor"', (data['professor_id'],)
-        ).fetchone()
+        db = get_db()
+        resultado = validar_grade(db, obter_indice(db), aulas, substituir=bool(data.get('substituir')))
         
-        if not professor:
-            return error_response('Professor não encontrado', 404)
+        return success_response('Grade válida' if resultado['valida'] else 'Grade com conflitos', resultado)
         
-        print(f"Turma: {turma['nome']}, Professor: {professor['nome']}")
+    except Exception as e:
+        return error_response(str(e))
+
+@app.route('/api/admin/grade/gerar', methods=['POST'])
+@token_required
+@admin_required
+def gerar_grade():
+    """
+    Gera a grade em segundo plano e devolve a tarefa (202); o progresso e o
+    plano ficam em GET /api/admin/grade/gerar/<tarefa_id>. Com 'gravar', o
+    plano é gravado em materias ao final.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
         
-        # Criar nova matéria com o professor
-        db.execute('''
-            INSERT INTO materias (nome, turma_id, professor_id, horario, dia_semana, carga_horaria_semanal, data_inicio, observacoes)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            data['materia_nome'],
-            turma_id,
-            data['professor_id'],
-            data['horario'],
-            data['dia_semana'],
-            data.get('carga_horaria_semanal', 4),
-            data.get('data_inicio'),
-            data.get('observacoes')
-        ))
+        db = get_db()
+        problema = montar_problema(db, obter_indice(db), data)
+        
+        opcoes = {}
+        for campo in ('processos', 'tentativas', 'limite_nos'):
+            if data.get(campo) is not None:
+                try:
+                    opcoes[campo] = max(int(data[campo]), 0 if campo == 'processos' else 1)
+                except (TypeError, ValueError):
+                    return error_response(f'{campo} deve ser um número', 400)
+        
+        tarefa = get_gerador_grade().iniciar(
+            problema, app=app, gravar=bool(data.get('gravar')), **opcoes
+        )
         
-        db.commit()
+        return success_response('Geração da grade iniciada', {'tarefa': tarefa.to_dict()}), 202
         
-        print("Professor alocado com sucesso no banco de dados!")
+    except ErroGrade as e:
+        return error_response(str(e), e.status_code)
+    except Exception as e:
+        print(f'Erro ao gerar grade: {e}')
+        return error_response(f'Erro interno: {str(e)}')
+
+@app.route('/api/admin/grade/gerar/<tarefa_id>', methods=['GET'])
+@token_required
+@admin_required
+def get_tarefa_grade(tarefa_id):
+    # Estado gravado em tarefas_grade: responde de qualquer worker
+    tarefa = ler_tarefa(get_db(), tarefa_id)
+    if tarefa is None:
+        return error_response('Tarefa não encontrada', 404)
+    
+    return success_response('Tarefa de geração de grade', {'tarefa': tarefa})
+
+@app.route('/api/admin/grade/gerar/<tarefa_id>/aplicar', methods=['POST'])
+@token_required
+@admin_required
+def aplicar_grade(tarefa_id):
+    """Grava em materias, em uma transação, o plano de uma geração concluída"""
+    try:
+        tarefa = run_write_horarios(aplicar_tarefa, tarefa_id)
         
-        return success_response('Professor alocado na turma com sucesso!')
+        return success_response('Grade gravada com sucesso!', {'materia_ids': tarefa['materia_ids']})
         
+    except ErroGrade as e:
+        return error_response(str(e), e.status_code)
     except Exception as e:
-        print(f"Erro ao alocar professor: {e}")
-        import traceback
-        traceback.print_exc()
-        return error_response(f'Erro interno: {str(e)}')
+        return error_response(str(e))
     
 # =============================================
 # SISTEMA DE ATIVIDADES - FUNCIONAIS
@@ -1738,19 +1846,15 @@ def criar_atividade_professor():
         materia_id = materia['id']
         
         # Criar atividade
-        db.execute('''
-            INSERT INTO atividades (titulo, descricao, materia_id, valor, data_entrega, criado_por)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
+        run_write(
+            _criar_atividade,
             data['titulo'],
             data.get('descricao', ''),
             materia_id,
             data['valor'],
             data['data_entrega'],
             request.user_id
-        ))
-        
-        db.commit()
+        )
         
         return success_response('Atividade criada com sucesso!')
         
@@ -1759,6 +1863,22 @@ def criar_atividade_professor():
         return error_response(str(e))
     
 
+def _registrar_entrega(conn, aluno_id, atividade, alteracoes):
+    """
+    Job de escrita da entrega; retorna False se a atividade já foi entregue.
+    A checagem é o próprio índice único notas(aluno_id, atividade_id), então
+    duas entregas simultâneas (clique duplo, nova tentativa) não passam ambas.
+    """
+    inseridas = conn.execute('''
+        INSERT INTO notas (aluno_id, atividade_id, nota, feedback, avaliado_por)
+        VALUES (?, ?, 0, 'Aguardando correção', NULL)
+        ON CONFLICT (aluno_id, atividade_id) DO NOTHING
+    ''', (aluno_id, atividade['id'])).rowcount
+    if not inseridas:
+        return False
+    alteracoes.append((aluno_id, atividade['id'], 0.0, atividade['materia_id'], atividade['turma_id']))
+    return True
+
 @app.route('/api/aluno/entregar-atividade/<int:atividade_id>', methods=['POST'])
 @token_required
 def entregar_atividade(atividade_id):  # ✅ CORRIGIDO: Remove aluno_id
@@ -1770,14 +1890,10 @@ def entregar_atividade(atividade_id):  # ✅ CORRIGIDO: Remove aluno_id
         
         db = get_db()
         
-        # Buscar o aluno baseado no usuário logado
-        aluno = db.execute('''
-            SELECT a.id, a.turma_id 
-            FROM alunos a 
-            WHERE a.usuario_id = ?
-        ''', (request.user_id,)).fetchone()
+        # Aluno do usuário logado (ids resolvidos uma vez por token)
+        aluno = request.principal
         
-        if not aluno:
+        if aluno.aluno_id is None:
             return error_response('Aluno não encontrado', 404)
         
         # Verificar se a atividade existe e pertence à turma do aluno
@@ -1786,7 +1902,7 @@ def entregar_atividade(atividade_id):  # ✅ CORRIGIDO: Remove aluno_id
             FROM atividades a
             JOIN materias m ON a.materia_id = m.id
             WHERE a.id = ? AND m.turma_id = ?
-        ''', (atividade_id, aluno['turma_id'])).fetchone()
+        ''', (atividade_id, aluno.turma_id)).fetchone()
         
         if not atividade:
             return error_response('Atividade não encontrada ou não disponível para este aluno', 404)
@@ -1795,7 +1911,7 @@ def entregar_atividade(atividade_id):  # ✅ CORRIGIDO: Remove aluno_id
         nota_existente = db.execute('''
             SELECT id FROM notas 
             WHERE aluno_id = ? AND atividade_id = ?
-        ''', (aluno['id'], atividade_id)).fetchone()
+        ''', (aluno.aluno_id, atividade_id)).fetchone()
         
         if nota_existente:
             return error_response('Atividade já foi entregue', 400)
@@ -1805,13 +1921,10 @@ def entregar_atividade(atividade_id):  # ✅ CORRIGIDO: Remove aluno_id
         if datetime.now() > data_entrega:
             return error_response('Prazo de entrega expirado', 400)
         
-        # Criar registro de entrega (nota com valor 0 = pendente de correção)
-        db.execute('''
-            INSERT INTO notas (aluno_id, atividade_id, nota, feedback, avaliado_por)
-            VALUES (?, ?, 0, 'Aguardando correção', NULL)
-        ''', (aluno['id'], atividade_id))
-        
-        db.commit()
+        # Criar registro de entrega (nota com valor 0 = pendente de correção);
+        # uma entrega concorrente pode ter chegado depois da checagem acima
+        if not run_write_notas(_registrar_entrega, aluno.aluno_id, atividade):
+            return error_response('Atividade já foi entregue', 400)
         
         return success_response('Atividade entregue com sucesso! Aguarde a correção.')
         
@@ -1851,6 +1964,14 @@ def gerenciar_atividade(atividade_id):
     elif request.method == 'DELETE':
         return excluir_atividade(atividade_id)
 
+def _atualizar_atividade(conn, atividade_id, campos):
+    """Job de escrita da edição de atividade; `campos` é {coluna: valor} já filtrado"""
+    conn.execute(f'''
+        UPDATE atividades 
+        SET {', '.join(f'{coluna} = ?' for coluna in campos)}
+        WHERE id = ?
+    ''', (*campos.values(), atividade_id))
+
 def editar_atividade(atividade_id):
     try:
         if request.user_type != 'professor':
@@ -1871,40 +1992,31 @@ def editar_atividade(atividade_id):
             return error_response('Atividade não encontrada ou acesso negado', 404)
         
         # Atualizar atividade
-        update_fields = []
-        update_values = []
+        campos = {}
         
         if 'titulo' in data:
-            update_fields.append('titulo = ?')
-            update_values.append(data['titulo'])
+            campos['titulo'] = data['titulo']
         
         if 'descricao' in data:
-            update_fields.append('descricao = ?')
-            update_values.append(data.get('descricao', ''))
+            campos['descricao'] = data.get('descricao', '')
         
         if 'valor' in data:
-            update_fields.append('valor = ?')
-            update_values.append(data['valor'])
+            campos['valor'] = data['valor']
         
         if 'data_entrega' in data:
-            update_fields.append('data_entrega = ?')
-            update_values.append(data['data_entrega'])
-        
-        if update_fields:
-            update_values.append(atividade_id)
-            db.execute(f'''
-                UPDATE atividades 
-                SET {', '.join(update_fields)}
-                WHERE id = ?
-            ''', update_values)
-            
-            db.commit()
+            campos['data_entrega'] = data['data_entrega']
+        
+        if campos:
+            run_write(_atualizar_atividade, atividade_id, campos)
         
         return success_response('Atividade atualizada com sucesso!')
         
     except Exception as e:
         return error_response(str(e))
 
+def _excluir_atividade(conn, atividade_id):
+    conn.execute('DELETE FROM atividades WHERE id = ?', (atividade_id,))
+
 def excluir_atividade(atividade_id):
     try:
         if request.user_type != 'professor':
@@ -1932,8 +2044,7 @@ def excluir_atividade(atividade_id):
             return error_response('Não é possível excluir atividade com notas registradas', 400)
         
         # Excluir atividade
-        db.execute('DELETE FROM atividades WHERE id = ?', (atividade_id,))
-        db.commit()
+        run_write(_excluir_atividade, atividade_id)
         
         return success_response('Atividade excluída com sucesso!')
         
@@ -2013,48 +2124,13 @@ def avaliar_atividade_alunos(atividade_id):
         if not atividade:
             return error_response('Atividade não encontrada ou acesso negado', 404)
         
-        # Processar avaliações
-        for avaliacao in data['avaliacoes']:
-            if 'aluno_id' not in avaliacao or 'nota' not in avaliacao:
-                continue
-            
-            # Verificar se nota já existe
-            existing = db.execute(
-                'SELECT id FROM notas WHERE aluno_id = ? AND atividade_id = ?',
-                (avaliacao['aluno_id'], atividade_id)
-            ).fetchone()
-            
-            if existing:
-                # Atualizar nota existente
-                db.execute('''
-                    UPDATE notas 
-                    SET nota = ?, feedback = ?, data_avaliacao = CURRENT_TIMESTAMP,
-                        avaliado_por = ?
-                    WHERE aluno_id = ? AND atividade_id = ?
-                ''', (
-                    avaliacao['nota'],
-                    avaliacao.get('feedback', ''),
-                    request.user_id,
-                    avaliacao['aluno_id'],
-                    atividade_id
-                ))
-            else:
-                # Inserir nova nota
-                db.execute('''
-                    INSERT INTO notas (aluno_id, atividade_id, nota, feedback, avaliado_por)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    avaliacao['aluno_id'],
-                    atividade_id,
-                    avaliacao['nota'],
-                    avaliacao.get('feedback', ''),
-                    request.user_id
-                ))
-        
-        db.commit()
+        # Processar avaliações: upsert em lote na fila de escrita
+        resumo = run_write_notas(salvar_notas_em_lote, atividade_id, data['avaliacoes'], request.user_id)
         
-        return success_response('Avaliações salvas com sucesso!')
+        return success_response('Avaliações salvas com sucesso!', resumo)
         
+    except ErroLancamento as e:
+        return error_response(str(e), e.status_code)
     except Exception as e:
         return error_response(str(e))
 
@@ -2094,21 +2170,20 @@ def ver_avaliacoes_atividade(atividade_id):
             ORDER BY u.nome
         ''', (atividade_id,)).fetchall()
         
-        # Estatísticas
-        estatisticas = db.execute('''
-            SELECT 
-                COUNT(*) as total_avaliacoes,
-                AVG(nota) as media_geral,
-                MIN(nota) as nota_minima,
-                MAX(nota) as nota_maxima
-            FROM notas 
-            WHERE atividade_id = ?
-        ''', (atividade_id,)).fetchone()
+        # Estatísticas: fatia contígua da atividade no armazenamento colunar
+        resumo = obter_notas(db).estatisticas_atividade(atividade_id)
         
         return success_response('Avaliações carregadas', {
             'atividade': dict(atividade_data),
             'avaliacoes': [dict(avaliacao) for avaliacao in avaliacoes],
-            'estatisticas': dict(estatisticas)
+            'estatisticas': {
+                'total_avaliacoes': resumo['quantidade'],
+                'media_geral': resumo['media'],
+                'nota_minima': resumo['minimo'],
+                'nota_maxima': resumo['maximo'],
+                'mediana': resumo['mediana'],
+                'desvio_padrao': resumo['desvio_padrao']
+            }
         })
         
     except Exception as e:
@@ -2118,6 +2193,8 @@ def ver_avaliacoes_atividade(atividade_id):
 # DESEMPENHO DO ALUNO
 # =============================================
 
+LIMITES_APROVACAO = (6.0,)
+
 @app.route('/api/professor/alunos/<int:aluno_id>/desempenho', methods=['GET'])
 @token_required
 def get_desempenho_aluno(aluno_id):
@@ -2163,32 +2240,83 @@ def get_desempenho_aluno(aluno_id):
             ORDER BY n.data_avaliacao DESC
         ''', (aluno_id,)).fetchall()
         
-        # Estatísticas
-        estatisticas = db.execute('''
-            SELECT 
-                COUNT(*) as total_atividades,
-                AVG(n.nota) as media_geral,
-                COUNT(CASE WHEN n.nota >= 6 THEN 1 END) as aprovados,
-                COUNT(CASE WHEN n.nota < 6 THEN 1 END) as reprovados
-            FROM notas n
-            WHERE n.aluno_id = ?
-        ''', (aluno_id,)).fetchone()
+        # Estatísticas: agregação por aluno do armazenamento colunar (faixas < 6 e >= 6)
+        grupo = obter_notas(db).agregar('aluno', LIMITES_APROVACAO).get(aluno_id)
         
         return success_response('Desempenho carregado', {
             'aluno': dict(aluno_data),
             'desempenho': [dict(item) for item in desempenho],
-            'estatisticas': dict(estatisticas)
+            'estatisticas': {
+                'total_atividades': grupo['quantidade'] if grupo else 0,
+                'media_geral': grupo['media'] if grupo else None,
+                'aprovados': grupo['faixas'][1] if grupo else 0,
+                'reprovados': grupo['faixas'][0] if grupo else 0
+            }
         })
         
     except Exception as e:
         return error_response(str(e))
 
+# =============================================
+# TELAS AGREGADAS (BOOTSTRAP)
+# =============================================
+# Uma requisição por tela com todas as seções que ela usa; ?secoes= e
+# ?versoes= permitem atualizar só o que mudou (ver telas.py)
+
+def resposta_tela(nome, contexto):
+    try:
+        return success_response('Tela carregada', montar_tela(get_db(), nome, contexto, request.args))
+    except ErroTela as e:
+        return error_response(str(e), e.status_code)
+    except Exception as e:
+        print(f'Erro ao montar a tela {nome}: {e}')
+        return error_response(str(e))
+
+@app.route('/api/admin/telas/dashboard', methods=['GET'])
+@token_required
+@admin_required
+@condicional(TELAS['admin_dashboard'].tabelas)
+def get_tela_admin_dashboard():
+    return resposta_tela('admin_dashboard', {})
+
+@app.route('/api/admin/telas/turmas/<int:turma_id>', methods=['GET'])
+@token_required
+@admin_required
+@condicional(TELAS['turma'].tabelas)
+def get_tela_turma(turma_id):
+    return resposta_tela('turma', {'turma_id': turma_id})
+
+@app.route('/api/admin/telas/professores/<int:professor_id>', methods=['GET'])
+@token_required
+@admin_required
+@condicional(TELAS['professor'].tabelas)
+def get_tela_professor(professor_id):
+    return resposta_tela('professor', {'professor_id': professor_id})
+
+@app.route('/api/aluno/telas/inicio', methods=['GET'])
+@token_required
+@condicional(TELAS['aluno_inicio'].tabelas, variacao=lambda: date.today().isoformat())
+def get_tela_aluno_inicio():
+    if request.user_type != 'aluno':
+        return error_response('Acesso restrito a alunos', 403)
+    
+    aluno = request.principal
+    if aluno.aluno_id is None:
+        return error_response('Aluno não encontrado', 404)
+    
+    return resposta_tela('aluno_inicio', {
+        'aluno_id': aluno.aluno_id,
+        'turma_id': aluno.turma_id,
+        'hoje': date.today().isoformat()
+    })
+
 # =============================================
 # ROTAS DO ALUNO (FRONTEND)
 # =============================================
 
 @app.route('/api/aluno/atividades-pendentes', methods=['GET'])
 @token_required
+@condicional(('alunos', 'turmas', 'materias', 'atividades', 'notas'))
 def get_atividades_pendentes_aluno():
     try:
         if request.user_type != 'aluno':
@@ -2196,43 +2324,14 @@ def get_atividades_pendentes_aluno():
         
         db = get_db()
         
-        # Buscar o aluno baseado no usuário logado
-        aluno = db.execute('''
-            SELECT a.id, a.turma_id 
-            FROM alunos a 
-            WHERE a.usuario_id = ?
-        ''', (request.user_id,)).fetchone()
+        # Aluno do usuário logado (ids resolvidos uma vez por token)
+        aluno = request.principal
         
-        if not aluno:
+        if aluno.aluno_id is None:
             return error_response('Aluno não encontrado', 404)
         
-        # Buscar atividades da turma do aluno
-        atividades = db.execute('''
-            SELECT 
-                a.id,
-                a.titulo,
-                a.descricao,
-                a.valor,
-                a.data_entrega,
-                m.nome as materia_nome,
-                t.nome as turma_nome,
-                -- Verificar se o aluno já entregou esta atividade
-                CASE WHEN n.id IS NOT NULL THEN 1 ELSE 0 END as entregue,
-                n.nota,
-                n.feedback
-            FROM atividades a
-            JOIN materias m ON a.materia_id = m.id
-            JOIN turmas t ON m.turma_id = t.id
-            LEFT JOIN notas n ON a.id = n.atividade_id AND n.aluno_id = ?
-            WHERE t.id = ?  -- Apenas atividades da turma do aluno
-            ORDER BY a.data_entrega ASC
-        ''', (aluno['id'], aluno['turma_id'])).fetchall()
-        
-        return success_response('Atividades carregadas', {
-            'atividades': [dict(atividade) for atividade in atividades],
-            'total': len(atividades),
-            'pendentes': len([a for a in atividades if not a['entregue']])
-        })
+        # Atividades da turma do aluno, com a situação de entrega dele
+        return success_response('Atividades carregadas', atividades_do_aluno(db, aluno.aluno_id, aluno.turma_id))
         
     except Exception as e:
         print(f'Erro ao carregar atividades do aluno: {e}')
@@ -2242,6 +2341,7 @@ def get_atividades_pendentes_aluno():
 
 @app.route('/api/aluno/minhas-notas', methods=['GET'])
 @token_required
+@condicional(('materias', 'atividades', 'notas', 'usuarios'))
 def get_minhas_notas_aluno():
     try:
         if request.user_type != 'aluno':
@@ -2249,96 +2349,122 @@ def get_minhas_notas_aluno():
         
         db = get_db()
         
-        # Buscar o aluno baseado no usuário logado
-        aluno = db.execute('''
-            SELECT a.id 
-            FROM alunos a 
-            WHERE a.usuario_id = ?
-        ''', (request.user_id,)).fetchone()
+        # Aluno do usuário logado (ids resolvidos uma vez por token)
+        aluno = request.principal
         
-        if not aluno:
+        if aluno.aluno_id is None:
             return error_response('Aluno não encontrado', 404)
         
-        # Buscar notas do aluno
-        notas = db.execute('''
-            SELECT 
-                n.*,
-                a.titulo as atividade_titulo,
-                a.valor as valor_atividade,
-                m.nome as materia_nome,
-                u.nome as professor_nome
-            FROM notas n
-            JOIN atividades a ON n.atividade_id = a.id
-            JOIN materias m ON a.materia_id = m.id
-            JOIN usuarios u ON n.avaliado_por = u.id
-            WHERE n.aluno_id = ?
-            ORDER BY n.data_avaliacao DESC
-        ''', (aluno['id'],)).fetchall()
-        
-        # Calcular média geral
-        media_geral = db.execute('''
-            SELECT AVG(nota) as media FROM notas WHERE aluno_id = ?
-        ''', (aluno['id'],)).fetchone()
-        
-        return success_response('Notas carregadas', {
-            'notas': [dict(nota) for nota in notas],
-            'media_geral': round(media_geral['media'], 1) if media_geral['media'] else 0
-        })
+        # Notas com a média geral lida dos agregados incrementais
+        return success_response('Notas carregadas', notas_do_aluno(db, aluno.aluno_id))
     except Exception as e:
         print(f'Erro ao carregar notas do aluno: {e}')
         return error_response(str(e))
 
 @app.route('/api/aluno/calendario-aulas', methods=['GET'])
+@token_required
 def get_calendario_aulas():
+    """
+    Aulas da turma do aluno com data, de ?inicio= a ?fim= (padrão: os
+    próximos 7 dias), em JSON ou iCalendar (?formato=ics ou Accept:
+    text/calendar). Responde 304 se o If-None-Match ainda vale.
+    """
     try:
-        from datetime import datetime, timedelta
-        
-        # Gerar datas da próxima semana
-        hoje = datetime.now()
-        dias_semana = []
-        
-        for i in range(7):
-            data = hoje + timedelta(days=i)
-            dias_semana.append(data.strftime('%Y-%m-%d'))
-        
-        aulas_mock = [
-            {
-                'id': 1,
-                'materia': 'Matemática',
-                'horario': '08:00 - 09:30',
-                'dia_semana': 'segunda',
-                'professor': 'Prof. Carlos Silva',
-                'sala': 'Sala 101',
-                'data': dias_semana[0],
-                'tipo': 'aula',
-                'cor': '#3498db'
-            }
-        ]
+        if request.user_type != 'aluno':
+            return error_response('Acesso restrito a alunos', 403)
+        
+        aluno = request.principal
+        if aluno.turma_id is None:
+            return error_response('Aluno não matriculado em turma', 400)
+        
+        formato = formato_calendario(request)
+        inicio, fim = intervalo_calendario(request.args)
+        
+        return _resposta_calendario(aluno.turma_id, formato, inicio, fim)
+        
+    except ErroCalendario as e:
+        return error_response(str(e), e.status_code)
+    except Exception as e:
+        return error_response(str(e))
+
+def _resposta_calendario(turma_id, formato, inicio, fim):
+    """Calendário da turma em JSON ou iCalendar, com ETag fraco e 304"""
+    return resposta_calendario(
+        get_db(), turma_id, formato, inicio, fim,
+        lambda dados: success_response('Calendário carregado', dados)
+    )
+
+@app.route('/api/aluno/calendario-aulas/feed', methods=['GET', 'POST'])
+@token_required
+def link_feed_calendario():
+    """
+    Link do feed iCalendar do aluno, para assinar em aplicativos de
+    calendário (que não enviam o cabeçalho Authorization). POST gera um
+    link novo e o anterior deixa de valer.
+    """
+    try:
+        if request.user_type != 'aluno':
+            return error_response('Acesso restrito a alunos', 403)
         
-        return success_response('Calendário carregado', {
-            'dias_aula': aulas_mock,
-            'total_aulas': len(aulas_mock)
+        aluno_id = request.principal.aluno_id
+        if aluno_id is None:
+            return error_response('Aluno não encontrado', 404)
+        
+        if request.method == 'POST':
+            versao = run_write(renovar_feed, aluno_id)
+        else:
+            versao = versao_feed(get_db(), aluno_id)
+        token = token_feed(app.config['SECRET_KEY'], aluno_id, versao)
+        
+        return success_response('Link do calendário', {
+            'token': token,
+            'url': url_for('feed_calendario_aulas', token=token, _external=True)
         })
         
     except Exception as e:
         return error_response(str(e))
 
+@app.route('/api/aluno/calendario-aulas.ics', methods=['GET'])
+def feed_calendario_aulas():
+    """
+    Feed iCalendar autenticado só pelo ?token= do link do aluno (sem
+    cabeçalho Authorization). Padrão: de 30 dias atrás a 180 à frente.
+    """
+    try:
+        lido = ler_token_feed(app.config['SECRET_KEY'], request.args.get('token'))
+        
+        db = get_db()
+        aluno = db.execute('SELECT id, turma_id FROM alunos WHERE id = ?', (lido[0],)).fetchone() if lido else None
+        if aluno is None or versao_feed(db, aluno['id']) != lido[1]:
+            return error_response('Link do calendário inválido ou revogado', 401)
+        if aluno['turma_id'] is None:
+            return error_response('Aluno não matriculado em turma', 400)
+        
+        inicio, fim = intervalo_feed(request.args)
+        return _resposta_calendario(aluno['turma_id'], 'ics', inicio, fim)
+        
+    except ErroCalendario as e:
+        return error_response(str(e), e.status_code)
+    except Exception as e:
+        return error_response(str(e))
+
 # =============================================
 # ROTAS GERAIS
 # =============================================
 
+def _registrar_feedback(conn, data):
+    conn.execute(
+        'INSERT INTO feedback (user_id, user_type, feedback, rating, suggestions) VALUES (?, ?, ?, ?, ?)',
+        (data.get('user_id'), data.get('user_type'), data.get('feedback'), 
+         data.get('rating'), data.get('suggestions'))
+    )
+
 @app.route('/api/feedback', methods=['POST'])
 def submit_feedback():
     try:
         data = request.get_json()
         
-        db = get_db()
-        db.execute(
-            'INSERT INTO feedback (user_id, user_type, feedback, rating, suggestions) VALUES (?, ?, ?, ?, ?)',
-            (data.get('user_id'), data.get('user_type'), data.get('feedback'), 
-             data.get('rating'), data.get('suggestions'))
-        )
-        db.commit()
+        run_write(_registrar_feedback, data)
         
         return success_response('Feedback enviado com sucesso!')
     except Exception as e:
@@ -2349,8 +2475,9 @@ def get_sustainability_metrics():
     try:
         db = get_db()
         
-        students_count = db.execute('SELECT COUNT(*) FROM alunos').fetchone()[0] or 0
-        assignments_count = db.execute('SELECT COUNT(*) FROM atividades').fetchone()[0] or 0
+        estatisticas = obter_estatisticas(db)
+        students_count = estatisticas['total_alunos']
+        assignments_count = estatisticas['total_atividades']
         
         metrics = {
             'paper_saved_pages': assignments_count * 3,
@@ -2369,9 +2496,10 @@ def get_sustainability_metrics():
 # =============================================
 
 if __name__ == '__main__':
-    # Inicializar banco de dados
+    # Servidor de desenvolvimento; em produção use backend/servidor.py
     print("🔄 Inicializando banco de dados...")
-    init_db()
+    init_db(DB_PATH)
+    create_app()
     
     print("🚀 Iniciando servidor Flask...")
     print("📊 Banco de dados:", DB_PATH)
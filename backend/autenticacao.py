@@ -0,0 +1,173 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context, request
+
+from database import get_db
+from versioning import VersoesRecentes
+
+# =============================================
+# CACHE DE TOKENS E PRINCIPAL DA REQUISIÇÃO
+# =============================================
+# Verificar um JWT (HMAC, JSON, exp) a cada requisição custa mais que o
+# resto de muitos handlers, e as rotas de aluno/professor ainda consultavam
+# `alunos`/`materias` para descobrir os ids do usuário logado.
+#
+# CacheTokens guarda os tokens já verificados em um LRU limitado, indexado
+# pelo sha256 do token (o token em si não fica em memória) e descartado ao
+# atingir o `exp` do payload. Tokens inválidos não entram no cache. Cada
+# entrada carrega um Principal com os ids resolvidos do usuário, carregados
+# no primeiro uso e recarregados quando a versão de `alunos` ou `materias`
+# muda (matrícula, troca de turma, atribuição de matérias). As versões são
+# relidas no máximo uma vez por segundo e logo após qualquer requisição de
+# escrita deste processo.
+
+TAMANHO_PADRAO = 10000
+METODOS_ESCRITA = ('POST', 'PUT', 'PATCH', 'DELETE')
+TABELAS_PRINCIPAL = {
+    'aluno': ('alunos',),
+    'professor': ('materias',)
+}
+
+class Principal:
+    """Usuário autenticado com ids resolvidos sob demanda"""
+
+    __slots__ = ('usuario_id', 'tipo', '_versoes_recentes', '_versoes', '_ids')
+
+    def __init__(self, usuario_id, tipo, versoes_recentes):
+        self.usuario_id = usuario_id
+        self.tipo = tipo
+        self._versoes_recentes = versoes_recentes
+        self._versoes = None
+        self._ids = {}
+
+    def _resolver(self):
+        tabelas = TABELAS_PRINCIPAL.get(self.tipo)
+        if not tabelas:
+            return self._ids
+
+        atuais = self._versoes_recentes.obter(tabelas=tabelas, abrir=get_db)
+        if atuais == self._versoes:
+            return self._ids
+
+        conn = get_db()
+        if self.tipo == 'aluno':
+            row = conn.execute(
+                'SELECT id, turma_id FROM alunos WHERE usuario_id = ?', (self.usuario_id,)
+            ).fetchone()
+            ids = {'aluno_id': row[0], 'turma_id': row[1]} if row else {'aluno_id': None, 'turma_id': None}
+        else:
+            rows = conn.execute(
+                'SELECT id, turma_id FROM materias WHERE professor_id = ? ORDER BY id', (self.usuario_id,)
+            ).fetchall()
+            ids = {
+                'materia_ids': tuple(row[0] for row in rows),
+                'turma_ids': frozenset(row[1] for row in rows if row[1] is not None)
+            }
+        self._ids, self._versoes = ids, atuais
+        return ids
+
+    @property
+    def aluno_id(self):
+        return self._resolver().get('aluno_id')
+
+    @property
+    def turma_id(self):
+        return self._resolver().get('turma_id')
+
+    @property
+    def materia_ids(self):
+        return self._resolver().get('materia_ids', ())
+
+    @property
+    def turma_ids(self):
+        return self._resolver().get('turma_ids', frozenset())
+
+class CacheTokens:
+    """LRU de tokens verificados: sha256(token) -> (exp, Principal)"""
+
+    def __init__(self, verificar, max_tamanho=TAMANHO_PADRAO, versoes_recentes=None):
+        self.verificar = verificar
+        self.max_tamanho = max_tamanho
+        self.versoes_recentes = versoes_recentes or VersoesRecentes()
+        self._lock = threading.Lock()
+        self._itens = OrderedDict()
+        self.acertos = 0
+        self.falhas = 0
+        self.expirados = 0
+        self.descartados = 0
+
+    def autenticar(self, token):
+        """Principal do token, ou None se o token é inválido ou expirou"""
+        chave = hashlib.sha256(token.encode()).digest()
+        agora = time.time()
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None:
+                if item[0] > agora:
+                    self._itens.move_to_end(chave)
+                    self.acertos += 1
+                    return item[1]
+                del self._itens[chave]
+                self.expirados += 1
+            self.falhas += 1
+
+        payload = self.verificar(token)
+        if not payload:
+            return None
+
+        principal = Principal(payload['user_id'], payload['user_type'], self.versoes_recentes)
+        with self._lock:
+            self._itens[chave] = (payload['exp'], principal)
+            while len(self._itens) > self.max_tamanho:
+                self._itens.popitem(last=False)
+                self.descartados += 1
+        return principal
+
+    def invalidar(self):
+        """Força a recarga dos ids de todos os principais no próximo uso"""
+        self.versoes_recentes.expirar()
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+    def stats(self):
+        """Métricas para o monitoramento"""
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                'tokens': len(self._itens),
+                'max_tamanho': self.max_tamanho,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'taxa_acerto': round(self.acertos / consultas, 4) if consultas else None,
+                'expirados': self.expirados,
+                'descartados': self.descartados
+            }
+
+# ---------- integração com a aplicação ----------
+
+def init_app(app, verificar):
+    """Registra o cache de tokens na aplicação (tamanho em AUTH_CACHE_TAMANHO)"""
+    cache = CacheTokens(verificar, app.config.get('AUTH_CACHE_TAMANHO', TAMANHO_PADRAO))
+    app.extensions['cache_tokens'] = cache
+
+    @app.after_request
+    def _expirar_versoes(response):
+        # Escritas deste processo (matrículas, troca de turma, matérias) valem
+        # já na próxima requisição; as de outros processos, em até 1 segundo
+        if request.method in METODOS_ESCRITA:
+            cache.invalidar()
+        return response
+
+    return cache
+
+def get_cache_tokens(app=None):
+    """Retorna o cache registrado na aplicação (ou None se init_app não foi chamado)"""
+    if app is None and not has_app_context():
+        return None
+    app = app or current_app
+    return app.extensions.get('cache_tokens')
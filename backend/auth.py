@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
-from database import get_db
-from werkzeug.security import check_password_hash, generate_password_hash
+from database import get_db, run_write
+from senhas import LimiteSenhas, atualizar_hash_senha, get_senhas
 from datetime import timedelta
 
 auth_bp = Blueprint('auth', __name__)
@@ -18,7 +18,19 @@ def login():
         'SELECT * FROM usuarios WHERE email = ?', (email,)
     ).fetchone()
     
-    if user and check_password_hash(user['senha'], password):
+    confere, novo_hash = False, None
+    if user:
+        try:
+            confere, novo_hash = get_senhas().verificar(
+                user['senha'], password, conta=email, ip=request.remote_addr
+            )
+        except LimiteSenhas as e:
+            return jsonify({'error': e.message}), e.status
+    
+    if confere:
+        if novo_hash:
+            run_write(atualizar_hash_senha, user['id'], user['senha'], novo_hash)
+        
         access_token = create_access_token(
             identity={
                 'id': user['id'],
@@ -40,6 +52,12 @@ def login():
     
     return jsonify({'error': 'Credenciais inválidas'}), 401
 
+def _inserir_usuario(conn, nome, email, senha, tipo):
+    conn.execute(
+        'INSERT INTO usuarios (nome, email, senha, tipo) VALUES (?, ?, ?, ?)',
+        (nome, email, senha, tipo)
+    )
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     data = request.get_json()
@@ -59,11 +77,7 @@ def register():
         return jsonify({'error': 'Usuário já existe'}), 400
     
     # Inserir novo usuário
-    hashed_password = generate_password_hash(password)
-    db.execute(
-        'INSERT INTO usuarios (nome, email, senha, tipo) VALUES (?, ?, ?, ?)',
-        (nome, email, hashed_password, tipo)
-    )
-    db.commit()
+    hashed_password = get_senhas().gerar(password)
+    run_write(_inserir_usuario, nome, email, hashed_password, tipo)
     
     return jsonify({'message': 'Usuário criado com sucesso'}), 201
\ No newline at end of file
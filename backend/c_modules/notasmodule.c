@@ -0,0 +1,668 @@
+/*
+ * notas_c: operações vetoriais sobre buffers contíguos de notas.
+ *
+ * Todas as funções recebem objetos com protocolo de buffer (array('d'),
+ * array('q'), bytes) e devolvem índices como bytes de int64, que o wrapper
+ * em utils/vetorial.py converte para array('q') sem cópia elemento a
+ * elemento. O wrapper também tem a implementação em Python usada quando a
+ * extensão não foi compilada.
+ *
+ * Compilação: cd backend/c_modules && python setup.py build_ext --inplace
+ */
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#include <math.h>
+#include <stdint.h>
+#include <stdlib.h>
+#include <string.h>
+
+/* ---------- buffers ---------- */
+
+static int
+obter_buffer(PyObject *obj, Py_buffer *view, char formato, const char *nome)
+{
+    if (PyObject_GetBuffer(obj, view, PyBUF_C_CONTIGUOUS | PyBUF_FORMAT) < 0) {
+        return -1;
+    }
+    const char *f = view->format ? view->format : "B";
+    if (f[0] == '@' || f[0] == '=' || f[0] == '<') {
+        f++;
+    }
+    int ok = (formato == 'd') ? (f[0] == 'd' && view->itemsize == 8)
+                              : ((f[0] == 'q' || f[0] == 'l') && view->itemsize == 8);
+    if (!ok || view->ndim > 1) {
+        PyBuffer_Release(view);
+        /* o formato precisa ser ASCII; o texto acentuado vai como argumento */
+        PyErr_Format(PyExc_TypeError, "%s %s", nome,
+                     formato == 'd' ? "deve ser um buffer contíguo de float64 (array('d'))"
+                                    : "deve ser um buffer contíguo de int64 (array('q'))");
+        return -1;
+    }
+    return 0;
+}
+
+/* ---------- chaves ordenáveis ---------- */
+
+/* Mapeia um double para um uint64 com a mesma ordem (IEEE 754). -0.0 vira
+ * 0.0 para que empates sejam iguais aos do Python. */
+static inline uint64_t
+chave_ordenavel(double v)
+{
+    uint64_t u;
+    if (v == 0.0) {
+        v = 0.0;
+    }
+    memcpy(&u, &v, sizeof(u));
+    return (u & 0x8000000000000000ULL) ? ~u : (u | 0x8000000000000000ULL);
+}
+
+/* ---------- ordenar ---------- */
+
+/* Radix sort LSD estável (8 passadas de 8 bits, pulando as passadas em que
+ * todas as chaves têm o mesmo dígito). Empates mantêm a ordem original. */
+static void
+radix_indices(uint64_t *chaves, int64_t *indices, Py_ssize_t n,
+              uint64_t *chaves_tmp, int64_t *indices_tmp)
+{
+    Py_ssize_t contagem[256];
+
+    for (int passada = 0; passada < 8; passada++) {
+        int deslocamento = passada * 8;
+        memset(contagem, 0, sizeof(contagem));
+        for (Py_ssize_t i = 0; i < n; i++) {
+            contagem[(chaves[i] >> deslocamento) & 0xFF]++;
+        }
+        if (contagem[(chaves[0] >> deslocamento) & 0xFF] == n) {
+            continue;
+        }
+
+        Py_ssize_t total = 0;
+        for (int d = 0; d < 256; d++) {
+            Py_ssize_t c = contagem[d];
+            contagem[d] = total;
+            total += c;
+        }
+        for (Py_ssize_t i = 0; i < n; i++) {
+            Py_ssize_t destino = contagem[(chaves[i] >> deslocamento) & 0xFF]++;
+            chaves_tmp[destino] = chaves[i];
+            indices_tmp[destino] = indices[i];
+        }
+        memcpy(chaves, chaves_tmp, n * sizeof(uint64_t));
+        memcpy(indices, indices_tmp, n * sizeof(int64_t));
+    }
+}
+
+static PyObject *
+notas_ordenar(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+    static char *palavras[] = {"valores", "descendente", NULL};
+    PyObject *obj;
+    int descendente = 0;
+    Py_buffer view;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|p", palavras, &obj, &descendente)) {
+        return NULL;
+    }
+    if (obter_buffer(obj, &view, 'd', "valores") < 0) {
+        return NULL;
+    }
+
+    Py_ssize_t n = view.len / 8;
+    const double *valores = (const double *)view.buf;
+    PyObject *resultado = PyBytes_FromStringAndSize(NULL, n * (Py_ssize_t)sizeof(int64_t));
+    if (resultado == NULL) {
+        PyBuffer_Release(&view);
+        return NULL;
+    }
+    int64_t *indices = (int64_t *)PyBytes_AS_STRING(resultado);
+
+    uint64_t *chaves = NULL, *chaves_tmp = NULL;
+    int64_t *indices_tmp = NULL;
+    if (n > 0) {
+        chaves = PyMem_Malloc(n * sizeof(uint64_t));
+        chaves_tmp = PyMem_Malloc(n * sizeof(uint64_t));
+        indices_tmp = PyMem_Malloc(n * sizeof(int64_t));
+        if (!chaves || !chaves_tmp || !indices_tmp) {
+            PyMem_Free(chaves);
+            PyMem_Free(chaves_tmp);
+            PyMem_Free(indices_tmp);
+            Py_DECREF(resultado);
+            PyBuffer_Release(&view);
+            return PyErr_NoMemory();
+        }
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    for (Py_ssize_t i = 0; i < n; i++) {
+        uint64_t chave = chave_ordenavel(valores[i]);
+        chaves[i] = descendente ? ~chave : chave;
+        indices[i] = i;
+    }
+    if (n > 1) {
+        radix_indices(chaves, indices, n, chaves_tmp, indices_tmp);
+    }
+    Py_END_ALLOW_THREADS
+
+    PyMem_Free(chaves);
+    PyMem_Free(chaves_tmp);
+    PyMem_Free(indices_tmp);
+    PyBuffer_Release(&view);
+    return resultado;
+}
+
+/* ---------- top-k ---------- */
+
+typedef struct {
+    uint64_t chave;
+    int64_t indice;
+} Entrada;
+
+/* a vem antes de b no ranking (chave menor; empate pelo menor índice) */
+static inline int
+antes(const Entrada *a, const Entrada *b)
+{
+    return a->chave < b->chave || (a->chave == b->chave && a->indice < b->indice);
+}
+
+/* Heap de máximo: a raiz é a pior entrada mantida */
+static void
+descer(Entrada *heap, Py_ssize_t tamanho, Py_ssize_t i)
+{
+    for (;;) {
+        Py_ssize_t maior = i, esq = 2 * i + 1, dir = 2 * i + 2;
+        if (esq < tamanho && antes(&heap[maior], &heap[esq])) {
+            maior = esq;
+        }
+        if (dir < tamanho && antes(&heap[maior], &heap[dir])) {
+            maior = dir;
+        }
+        if (maior == i) {
+            return;
+        }
+        Entrada t = heap[i];
+        heap[i] = heap[maior];
+        heap[maior] = t;
+        i = maior;
+    }
+}
+
+static void
+subir(Entrada *heap, Py_ssize_t i)
+{
+    while (i > 0) {
+        Py_ssize_t pai = (i - 1) / 2;
+        if (!antes(&heap[pai], &heap[i])) {
+            return;
+        }
+        Entrada t = heap[i];
+        heap[i] = heap[pai];
+        heap[pai] = t;
+        i = pai;
+    }
+}
+
+static int
+comparar_entradas(const void *a, const void *b)
+{
+    const Entrada *x = a, *y = b;
+    return antes(x, y) ? -1 : (antes(y, x) ? 1 : 0);
+}
+
+static PyObject *
+notas_top_k(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+    static char *palavras[] = {"valores", "k", "descendente", NULL};
+    PyObject *obj;
+    Py_ssize_t k;
+    int descendente = 1;
+    Py_buffer view;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "On|p", palavras, &obj, &k, &descendente)) {
+        return NULL;
+    }
+    if (obter_buffer(obj, &view, 'd', "valores") < 0) {
+        return NULL;
+    }
+
+    Py_ssize_t n = view.len / 8;
+    const double *valores = (const double *)view.buf;
+    if (k < 0) {
+        k = 0;
+    }
+    if (k > n) {
+        k = n;
+    }
+
+    Entrada *heap = PyMem_Malloc((k > 0 ? k : 1) * sizeof(Entrada));
+    if (heap == NULL) {
+        PyBuffer_Release(&view);
+        return PyErr_NoMemory();
+    }
+
+    Py_ssize_t tamanho = 0;
+    Py_BEGIN_ALLOW_THREADS
+    for (Py_ssize_t i = 0; i < n && k > 0; i++) {
+        uint64_t chave = chave_ordenavel(valores[i]);
+        Entrada e = {descendente ? ~chave : chave, i};
+        if (tamanho < k) {
+            heap[tamanho] = e;
+            subir(heap, tamanho++);
+        }
+        else if (antes(&e, &heap[0])) {
+            heap[0] = e;
+            descer(heap, tamanho, 0);
+        }
+    }
+    qsort(heap, tamanho, sizeof(Entrada), comparar_entradas);
+    Py_END_ALLOW_THREADS
+
+    PyObject *resultado = PyBytes_FromStringAndSize(NULL, tamanho * (Py_ssize_t)sizeof(int64_t));
+    if (resultado != NULL) {
+        int64_t *indices = (int64_t *)PyBytes_AS_STRING(resultado);
+        for (Py_ssize_t i = 0; i < tamanho; i++) {
+            indices[i] = heap[i].indice;
+        }
+    }
+    PyMem_Free(heap);
+    PyBuffer_Release(&view);
+    return resultado;
+}
+
+/* ---------- estatísticas ---------- */
+
+static inline void
+trocar(double *a, double *b)
+{
+    double t = *a;
+    *a = *b;
+    *b = t;
+}
+
+static int
+comparar_doubles(const void *a, const void *b)
+{
+    double x = *(const double *)a, y = *(const double *)b;
+    return (x > y) - (x < y);
+}
+
+/* Introselect: quickselect com pivô mediana-de-três; se a recursão passar
+ * de 2*log2(n) níveis, ordena o trecho restante (pior caso O(n log n)). */
+static double
+selecionar(double *v, Py_ssize_t n, Py_ssize_t alvo)
+{
+    Py_ssize_t esq = 0, dir = n - 1;
+    int limite = 2;
+    for (Py_ssize_t m = n; m > 1; m >>= 1) {
+        limite += 2;
+    }
+
+    while (dir > esq) {
+        if (limite-- == 0) {
+            qsort(v + esq, dir - esq + 1, sizeof(double), comparar_doubles);
+            return v[alvo];
+        }
+
+        Py_ssize_t meio = esq + (dir - esq) / 2;
+        if (v[meio] < v[esq]) trocar(&v[meio], &v[esq]);
+        if (v[dir] < v[esq]) trocar(&v[dir], &v[esq]);
+        if (v[dir] < v[meio]) trocar(&v[dir], &v[meio]);
+        double pivo = v[meio];
+
+        Py_ssize_t i = esq, j = dir;
+        while (i <= j) {
+            while (v[i] < pivo) i++;
+            while (v[j] > pivo) j--;
+            if (i <= j) {
+                trocar(&v[i], &v[j]);
+                i++;
+                j--;
+            }
+        }
+        if (alvo <= j) {
+            dir = j;
+        }
+        else if (alvo >= i) {
+            esq = i;
+        }
+        else {
+            return v[alvo];
+        }
+    }
+    return v[alvo];
+}
+
+static PyObject *
+notas_estatisticas(PyObject *self, PyObject *obj)
+{
+    Py_buffer view;
+    if (obter_buffer(obj, &view, 'd', "valores") < 0) {
+        return NULL;
+    }
+
+    Py_ssize_t n = view.len / 8;
+    const double *valores = (const double *)view.buf;
+    if (n == 0) {
+        PyBuffer_Release(&view);
+        return Py_BuildValue("{s:n,s:O,s:O,s:O,s:O,s:O}", "quantidade", (Py_ssize_t)0,
+                             "media", Py_None, "mediana", Py_None, "desvio_padrao", Py_None,
+                             "minimo", Py_None, "maximo", Py_None);
+    }
+
+    double *copia = PyMem_Malloc(n * sizeof(double));
+    if (copia == NULL) {
+        PyBuffer_Release(&view);
+        return PyErr_NoMemory();
+    }
+
+    double media = 0.0, m2 = 0.0, minimo = valores[0], maximo = valores[0], mediana;
+    Py_BEGIN_ALLOW_THREADS
+    /* Welford: média e variância numa passada, sem cancelamento catastrófico */
+    for (Py_ssize_t i = 0; i < n; i++) {
+        double x = valores[i];
+        double delta = x - media;
+        media += delta / (double)(i + 1);
+        m2 += delta * (x - media);
+        if (x < minimo) minimo = x;
+        if (x > maximo) maximo = x;
+        copia[i] = x;
+    }
+
+    Py_ssize_t meio = n / 2;
+    mediana = selecionar(copia, n, meio);
+    if (n % 2 == 0) {
+        /* após a seleção, o maior elemento de copia[0..meio) é o vizinho inferior */
+        double inferior = copia[0];
+        for (Py_ssize_t i = 1; i < meio; i++) {
+            if (copia[i] > inferior) inferior = copia[i];
+        }
+        mediana = (mediana + inferior) / 2.0;
+    }
+    Py_END_ALLOW_THREADS
+
+    PyMem_Free(copia);
+    PyBuffer_Release(&view);
+    return Py_BuildValue("{s:n,s:d,s:d,s:d,s:d,s:d}", "quantidade", n, "media", media,
+                         "mediana", mediana, "desvio_padrao", sqrt(m2 / (double)n),
+                         "minimo", minimo, "maximo", maximo);
+}
+
+/* ---------- distribuição por faixas ---------- */
+
+static PyObject *
+notas_distribuicao(PyObject *self, PyObject *args)
+{
+    PyObject *obj_valores, *obj_limites;
+    Py_buffer valores_view, limites_view;
+
+    if (!PyArg_ParseTuple(args, "OO", &obj_valores, &obj_limites)) {
+        return NULL;
+    }
+    if (obter_buffer(obj_valores, &valores_view, 'd', "valores") < 0) {
+        return NULL;
+    }
+    if (obter_buffer(obj_limites, &limites_view, 'd', "limites") < 0) {
+        PyBuffer_Release(&valores_view);
+        return NULL;
+    }
+
+    Py_ssize_t n = valores_view.len / 8, faixas = limites_view.len / 8 + 1;
+    const double *valores = valores_view.buf, *limites = limites_view.buf;
+    Py_ssize_t *contagem = PyMem_Calloc(faixas, sizeof(Py_ssize_t));
+    if (contagem == NULL) {
+        PyBuffer_Release(&valores_view);
+        PyBuffer_Release(&limites_view);
+        return PyErr_NoMemory();
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    /* faixa f = quantidade de limites <= valor (limites crescentes) */
+    for (Py_ssize_t i = 0; i < n; i++) {
+        Py_ssize_t baixo = 0, alto = faixas - 1;
+        while (baixo < alto) {
+            Py_ssize_t meio = (baixo + alto) / 2;
+            if (limites[meio] <= valores[i]) baixo = meio + 1;
+            else alto = meio;
+        }
+        contagem[baixo]++;
+    }
+    Py_END_ALLOW_THREADS
+
+    PyObject *resultado = PyList_New(faixas);
+    for (Py_ssize_t f = 0; resultado != NULL && f < faixas; f++) {
+        PyObject *item = PyLong_FromSsize_t(contagem[f]);
+        if (item == NULL) {
+            Py_CLEAR(resultado);
+            break;
+        }
+        PyList_SET_ITEM(resultado, f, item);
+    }
+    PyMem_Free(contagem);
+    PyBuffer_Release(&valores_view);
+    PyBuffer_Release(&limites_view);
+    return resultado;
+}
+
+/* ---------- agregação por grupo ---------- */
+
+/* Soma, contagem e (opcionalmente) faixas por grupo em uma passada. Os
+ * grupos vêm como códigos densos 0..grupos-1; códigos fora do intervalo são
+ * ignorados. */
+static PyObject *
+notas_agrupar(PyObject *self, PyObject *args)
+{
+    PyObject *obj_codigos, *obj_valores, *obj_limites = Py_None;
+    Py_buffer codigos_view, valores_view, limites_view;
+    Py_ssize_t grupos;
+
+    if (!PyArg_ParseTuple(args, "OOn|O", &obj_codigos, &obj_valores, &grupos, &obj_limites)) {
+        return NULL;
+    }
+    if (grupos < 0) {
+        PyErr_SetString(PyExc_ValueError, "grupos deve ser >= 0");
+        return NULL;
+    }
+    if (obter_buffer(obj_codigos, &codigos_view, 'q', "codigos") < 0) {
+        return NULL;
+    }
+    if (obter_buffer(obj_valores, &valores_view, 'd', "valores") < 0) {
+        PyBuffer_Release(&codigos_view);
+        return NULL;
+    }
+    int com_faixas = obj_limites != Py_None;
+    if (com_faixas && obter_buffer(obj_limites, &limites_view, 'd', "limites") < 0) {
+        PyBuffer_Release(&codigos_view);
+        PyBuffer_Release(&valores_view);
+        return NULL;
+    }
+    if (codigos_view.len != valores_view.len) {
+        PyErr_SetString(PyExc_ValueError, "codigos e valores devem ter o mesmo tamanho");
+        goto erro_buffers;
+    }
+
+    Py_ssize_t n = valores_view.len / 8;
+    Py_ssize_t faixas = com_faixas ? limites_view.len / 8 + 1 : 0;
+    const int64_t *codigos = codigos_view.buf;
+    const double *valores = valores_view.buf;
+    const double *limites = com_faixas ? limites_view.buf : NULL;
+    Py_ssize_t alocados = grupos > 0 ? grupos : 1;
+    double *somas = PyMem_Calloc(alocados, sizeof(double));
+    int64_t *contagens = PyMem_Calloc(alocados, sizeof(int64_t));
+    int64_t *contagem_faixas = com_faixas ? PyMem_Calloc(alocados * faixas, sizeof(int64_t)) : NULL;
+    if (somas == NULL || contagens == NULL || (com_faixas && contagem_faixas == NULL)) {
+        PyMem_Free(somas);
+        PyMem_Free(contagens);
+        PyMem_Free(contagem_faixas);
+        PyErr_NoMemory();
+        goto erro_buffers;
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    for (Py_ssize_t i = 0; i < n; i++) {
+        int64_t g = codigos[i];
+        if (g < 0 || g >= grupos) {
+            continue;
+        }
+        somas[g] += valores[i];
+        contagens[g]++;
+        if (com_faixas) {
+            Py_ssize_t baixo = 0, alto = faixas - 1;
+            while (baixo < alto) {
+                Py_ssize_t meio = (baixo + alto) / 2;
+                if (limites[meio] <= valores[i]) baixo = meio + 1;
+                else alto = meio;
+            }
+            contagem_faixas[g * faixas + baixo]++;
+        }
+    }
+    Py_END_ALLOW_THREADS
+
+    PyObject *resultado = Py_BuildValue(
+        "(y#y#)", (const char *)somas, grupos * (Py_ssize_t)sizeof(double),
+        (const char *)contagens, grupos * (Py_ssize_t)sizeof(int64_t));
+    if (resultado != NULL && com_faixas) {
+        PyObject *extra = PyBytes_FromStringAndSize(
+            (const char *)contagem_faixas, grupos * faixas * (Py_ssize_t)sizeof(int64_t));
+        PyObject *completo = extra ? PyTuple_Pack(3, PyTuple_GET_ITEM(resultado, 0),
+                                                  PyTuple_GET_ITEM(resultado, 1), extra) : NULL;
+        Py_XDECREF(extra);
+        Py_SETREF(resultado, completo);
+    }
+
+    PyMem_Free(somas);
+    PyMem_Free(contagens);
+    PyMem_Free(contagem_faixas);
+    PyBuffer_Release(&codigos_view);
+    PyBuffer_Release(&valores_view);
+    if (com_faixas) {
+        PyBuffer_Release(&limites_view);
+    }
+    return resultado;
+
+erro_buffers:
+    PyBuffer_Release(&codigos_view);
+    PyBuffer_Release(&valores_view);
+    if (com_faixas) {
+        PyBuffer_Release(&limites_view);
+    }
+    return NULL;
+}
+
+/* ---------- busca em tabela de nomes ---------- */
+
+static const char *
+procurar(const char *texto, Py_ssize_t tamanho, const char *termo, Py_ssize_t tamanho_termo)
+{
+    const char *fim = texto + tamanho - tamanho_termo;
+    while (texto <= fim) {
+        const char *p = memchr(texto, termo[0], fim - texto + 1);
+        if (p == NULL) {
+            return NULL;
+        }
+        if (memcmp(p, termo, tamanho_termo) == 0) {
+            return p;
+        }
+        texto = p + 1;
+    }
+    return NULL;
+}
+
+static PyObject *
+notas_buscar(PyObject *self, PyObject *args)
+{
+    Py_buffer tabela, termo;
+    PyObject *obj_offsets;
+    Py_buffer offsets_view;
+
+    if (!PyArg_ParseTuple(args, "y*Oy*", &tabela, &obj_offsets, &termo)) {
+        return NULL;
+    }
+    if (obter_buffer(obj_offsets, &offsets_view, 'q', "offsets") < 0) {
+        PyBuffer_Release(&tabela);
+        PyBuffer_Release(&termo);
+        return NULL;
+    }
+
+    const char *texto = tabela.buf;
+    const int64_t *offsets = offsets_view.buf;
+    Py_ssize_t registros = offsets_view.len / 8 - 1;
+    int64_t *achados = PyMem_Malloc((registros > 0 ? registros : 1) * sizeof(int64_t));
+    Py_ssize_t total = 0;
+
+    if (achados == NULL) {
+        PyBuffer_Release(&tabela);
+        PyBuffer_Release(&termo);
+        PyBuffer_Release(&offsets_view);
+        return PyErr_NoMemory();
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    if (termo.len == 0) {
+        for (Py_ssize_t i = 0; i < registros; i++) {
+            achados[total++] = i;
+        }
+    }
+    else {
+        /* Uma única varredura da tabela; ao achar, pula para o próximo registro */
+        Py_ssize_t registro = 0;
+        int64_t pos = 0;
+        while (registro < registros) {
+            const char *p = procurar(texto + pos, tabela.len - pos, termo.buf, termo.len);
+            if (p == NULL) {
+                break;
+            }
+            int64_t achado = p - texto;
+            Py_ssize_t baixo = registro, alto = registros - 1;
+            while (baixo < alto) {
+                Py_ssize_t meio = (baixo + alto + 1) / 2;
+                if (offsets[meio] <= achado) baixo = meio;
+                else alto = meio - 1;
+            }
+            if (achado + termo.len <= offsets[baixo + 1]) {
+                achados[total++] = baixo;
+                registro = baixo + 1;
+                pos = offsets[registro];
+            }
+            else {
+                pos = achado + 1;
+                registro = baixo;
+            }
+        }
+    }
+    Py_END_ALLOW_THREADS
+
+    PyObject *resultado = PyBytes_FromStringAndSize((const char *)achados, total * (Py_ssize_t)sizeof(int64_t));
+    PyMem_Free(achados);
+    PyBuffer_Release(&tabela);
+    PyBuffer_Release(&termo);
+    PyBuffer_Release(&offsets_view);
+    return resultado;
+}
+
+/* ---------- módulo ---------- */
+
+static PyMethodDef metodos[] = {
+    {"ordenar", (PyCFunction)(void (*)(void))notas_ordenar, METH_VARARGS | METH_KEYWORDS,
+     "ordenar(valores, descendente=False) -> bytes de int64 com os índices em ordem estável"},
+    {"top_k", (PyCFunction)(void (*)(void))notas_top_k, METH_VARARGS | METH_KEYWORDS,
+     "top_k(valores, k, descendente=True) -> bytes de int64 com os k primeiros índices"},
+    {"estatisticas", notas_estatisticas, METH_O,
+     "estatisticas(valores) -> dict com quantidade, media, mediana, desvio_padrao, minimo, maximo"},
+    {"distribuicao", notas_distribuicao, METH_VARARGS,
+     "distribuicao(valores, limites) -> contagem por faixa (len(limites) + 1 faixas)"},
+    {"agrupar", notas_agrupar, METH_VARARGS,
+     "agrupar(codigos, valores, grupos, limites=None) -> (somas, contagens[, faixas]) em bytes"},
+    {"buscar", notas_buscar, METH_VARARGS,
+     "buscar(tabela, offsets, termo) -> bytes de int64 com os registros que contêm o termo"},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef modulo = {
+    PyModuleDef_HEAD_INIT, "notas_c", "Operações vetoriais sobre buffers de notas", -1, metodos
+};
+
+PyMODINIT_FUNC
+PyInit_notas_c(void)
+{
+    return PyModule_Create(&modulo);
+}
@@ -0,0 +1,23 @@
+"""
+Compila a extensão notas_c ao lado deste arquivo:
+
+    cd backend/c_modules && python setup.py build_ext --inplace
+
+Sem a extensão compilada, utils/vetorial.py usa a implementação em Python.
+"""
+import sys
+
+from setuptools import Extension, setup
+
+setup(
+    name='notas_c',
+    version='1.0',
+    description='Operações vetoriais sobre buffers de notas',
+    ext_modules=[
+        Extension(
+            'notas_c',
+            sources=['notasmodule.c'],
+            extra_compile_args=[] if sys.platform == 'win32' else ['-O3', '-std=c99']
+        )
+    ]
+)
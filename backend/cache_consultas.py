@@ -0,0 +1,284 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+
+from versioning import assinatura
+
+# =============================================
+# CACHE DE RESULTADOS DE CONSULTAS
+# =============================================
+# Dados de referência (turmas, professores disponíveis, matérias) mudam
+# poucas vezes por dia, mas são lidos em quase toda tela do admin.
+#
+# CacheConsultas memoriza o resultado de consultas de leitura registradas
+# com as tabelas de que dependem: conexao(conn, tabelas) devolve um
+# invólucro cujo execute() responde do cache, indexado pelo SQL, pelos
+# parâmetros e pelas tabelas. Cada entrada guarda a assinatura das versões
+# dessas tabelas (versoes_tabelas, incrementadas pelos triggers em toda
+# escrita) no momento da leitura; se a assinatura atual for outra, alguma
+# escrita tocou uma das tabelas e a entrada é descartada. A assinatura é
+# lida uma vez por invólucro, antes da consulta, então a invalidação vale
+# entre processos sem depender de cada rota de escrita avisar o cache.
+#
+# O cache local é um LRU limitado com TTL. Opcionalmente os resultados
+# também vão para um arquivo SQLite à parte (CACHE_CONSULTAS_ARQUIVO),
+# compartilhado pelos workers: um worker que ainda não leu a consulta
+# aproveita o resultado de outro com a mesma assinatura.
+
+MAX_ITENS_PADRAO = 512
+TTL_PADRAO = 300.0
+
+class Linha:
+    """Linha em cache com acesso por índice e por nome, como sqlite3.Row"""
+    __slots__ = ('_valores', '_colunas', '_indices')
+
+    def __init__(self, valores, colunas, indices):
+        self._valores = valores
+        self._colunas = colunas
+        self._indices = indices
+
+    def __getitem__(self, chave):
+        if isinstance(chave, str):
+            return self._valores[self._indices[chave]]
+        return self._valores[chave]
+
+    def keys(self):
+        return self._colunas
+
+    def __iter__(self):
+        return iter(self._valores)
+
+    def __len__(self):
+        return len(self._valores)
+
+class ResultadoCacheado:
+    """Cursor somente leitura sobre um resultado em cache"""
+
+    def __init__(self, linhas):
+        self._linhas = linhas
+
+    def fetchall(self):
+        return list(self._linhas)
+
+    def fetchone(self):
+        return self._linhas[0] if self._linhas else None
+
+    def __iter__(self):
+        return iter(self._linhas)
+
+class ConexaoCacheada:
+    """
+    Invólucro de leitura de uma conexão: execute() passa pelo cache com as
+    `tabelas` informadas. Só para SELECTs cujo resultado depende apenas
+    dessas tabelas.
+    """
+
+    def __init__(self, cache, conn, tabelas):
+        self._cache = cache
+        self._conn = conn
+        self._tabelas = tuple(sorted(tabelas))
+        self._assinatura = None
+
+    def execute(self, sql, params=()):
+        if self._assinatura is None:
+            self._assinatura = assinatura(self._conn, self._tabelas)
+        return ResultadoCacheado(self._cache.obter(self._conn, sql, tuple(params), self._tabelas, self._assinatura))
+
+class ArmazemCompartilhado:
+    """Resultados em um arquivo SQLite próprio, visível para todos os workers"""
+
+    def __init__(self, caminho, max_itens=MAX_ITENS_PADRAO * 4):
+        self.caminho = caminho
+        self.max_itens = max_itens
+        self._local = threading.local()
+        self._gravacoes = 0
+
+    def _conexao(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.caminho, timeout=0.5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = OFF')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS resultados (
+                    chave TEXT PRIMARY KEY,
+                    assinatura TEXT NOT NULL,
+                    criado_em REAL NOT NULL,
+                    conteudo TEXT NOT NULL
+                ) WITHOUT ROWID
+            ''')
+            self._local.conn = conn
+        return conn
+
+    def ler(self, chave, chave_versoes, validade):
+        """(criado_em, colunas, linhas) se houver resultado com a mesma assinatura e dentro da validade"""
+        row = self._conexao().execute(
+            'SELECT criado_em, conteudo FROM resultados WHERE chave = ? AND assinatura = ? AND criado_em >= ?',
+            (chave, chave_versoes, validade)
+        ).fetchone()
+        if row is None:
+            return None
+        conteudo = json.loads(row[1])
+        return row[0], tuple(conteudo['colunas']), tuple(tuple(linha) for linha in conteudo['linhas'])
+
+    def gravar(self, chave, chave_versoes, criado_em, colunas, linhas):
+        conn = self._conexao()
+        conn.execute(
+            'INSERT OR REPLACE INTO resultados (chave, assinatura, criado_em, conteudo) VALUES (?, ?, ?, ?)',
+            (chave, chave_versoes, criado_em, json.dumps({'colunas': colunas, 'linhas': linhas}))
+        )
+        self._gravacoes += 1
+        if self._gravacoes % 64 == 0:
+            # Poda ocasional: ficam só as max_itens entradas mais recentes
+            conn.execute('''
+                DELETE FROM resultados WHERE chave NOT IN (
+                    SELECT chave FROM resultados ORDER BY criado_em DESC LIMIT ?
+                )
+            ''', (self.max_itens,))
+
+    def limpar(self):
+        self._conexao().execute('DELETE FROM resultados')
+
+class CacheConsultas:
+    """LRU de resultados de consultas com TTL, invalidado pela versão das tabelas"""
+
+    def __init__(self, max_itens=MAX_ITENS_PADRAO, ttl=TTL_PADRAO, compartilhado=None):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self.compartilhado = compartilhado
+        self._lock = threading.Lock()
+        self._itens = OrderedDict()
+        self.acertos = 0
+        self.acertos_compartilhados = 0
+        self.falhas = 0
+        self.invalidadas = 0
+        self.expiradas = 0
+        self.descartadas = 0
+        self.erros_compartilhados = 0
+
+    def conexao(self, conn, tabelas):
+        """Invólucro de `conn` cujas leituras passam pelo cache, dependentes de `tabelas`"""
+        return ConexaoCacheada(self, conn, tabelas)
+
+    @staticmethod
+    def _chave(sql, params, tabelas):
+        return hashlib.sha256(repr((sql, params, tabelas)).encode()).hexdigest()
+
+    @staticmethod
+    def _linhas(colunas, valores):
+        # Montadas uma vez por entrada e reaproveitadas em todos os acertos
+        indices = {coluna: i for i, coluna in enumerate(colunas)}
+        return tuple(Linha(linha, colunas, indices) for linha in valores)
+
+    def obter(self, conn, sql, params, tabelas, chave_versoes):
+        """Linhas do cache ou da consulta; `chave_versoes` é a assinatura atual das tabelas"""
+        chave = self._chave(sql, params, tabelas)
+        agora = time.time()
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None:
+                if item[0] != chave_versoes:
+                    del self._itens[chave]
+                    self.invalidadas += 1
+                elif agora - item[1] > self.ttl:
+                    del self._itens[chave]
+                    self.expiradas += 1
+                else:
+                    self._itens.move_to_end(chave)
+                    self.acertos += 1
+                    return item[2]
+
+        resultado = None
+        if self.compartilhado is not None:
+            try:
+                resultado = self.compartilhado.ler(chave, chave_versoes, agora - self.ttl)
+            except sqlite3.Error:
+                self.erros_compartilhados += 1
+
+        if resultado is not None:
+            criado_em, colunas, linhas = resultado
+            with self._lock:
+                self.acertos_compartilhados += 1
+        else:
+            cursor = conn.execute(sql, params)
+            colunas = tuple(descricao[0] for descricao in cursor.description or ())
+            linhas = tuple(tuple(linha) for linha in cursor.fetchall())
+            criado_em = agora
+            with self._lock:
+                self.falhas += 1
+            if self.compartilhado is not None:
+                try:
+                    self.compartilhado.gravar(chave, chave_versoes, criado_em, colunas, linhas)
+                except (sqlite3.Error, TypeError, ValueError):
+                    # Valores fora do JSON (BLOBs) ficam só no cache local
+                    self.erros_compartilhados += 1
+
+        linhas = self._linhas(colunas, linhas)
+        with self._lock:
+            self._itens[chave] = (chave_versoes, criado_em, linhas)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                self.descartadas += 1
+        return linhas
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+        if self.compartilhado is not None:
+            self.compartilhado.limpar()
+
+    def stats(self):
+        """Métricas para o monitoramento"""
+        with self._lock:
+            consultas = self.acertos + self.acertos_compartilhados + self.falhas
+            return {
+                'itens': len(self._itens),
+                'max_itens': self.max_itens,
+                'ttl': self.ttl,
+                'compartilhado': self.compartilhado.caminho if self.compartilhado is not None else None,
+                'acertos': self.acertos,
+                'acertos_compartilhados': self.acertos_compartilhados,
+                'falhas': self.falhas,
+                'taxa_acerto': (
+                    round((self.acertos + self.acertos_compartilhados) / consultas, 4) if consultas else None
+                ),
+                'invalidadas': self.invalidadas,
+                'expiradas': self.expiradas,
+                'descartadas': self.descartadas,
+                'erros_compartilhados': self.erros_compartilhados
+            }
+
+# ---------- integração com a aplicação ----------
+
+def init_app(app):
+    """
+    Registra o cache de consultas na aplicação (CACHE_CONSULTAS_ITENS,
+    CACHE_CONSULTAS_TTL; CACHE_CONSULTAS_ARQUIVO ou a variável de ambiente
+    de mesmo nome ativa o armazenamento compartilhado entre workers)
+    """
+    arquivo = app.config.get('CACHE_CONSULTAS_ARQUIVO', os.environ.get('CACHE_CONSULTAS_ARQUIVO'))
+    max_itens = app.config.get('CACHE_CONSULTAS_ITENS', MAX_ITENS_PADRAO)
+    app.extensions['cache_consultas'] = CacheConsultas(
+        max_itens,
+        app.config.get('CACHE_CONSULTAS_TTL', TTL_PADRAO),
+        ArmazemCompartilhado(arquivo, max_itens * 4) if arquivo else None
+    )
+
+def get_cache_consultas(app=None):
+    """Retorna o cache registrado na aplicação (ou None se init_app não foi chamado)"""
+    if app is None and not has_app_context():
+        return None
+    app = app or current_app
+    return app.extensions.get('cache_consultas')
+
+def consultas_cacheadas(conn, tabelas):
+    """`conn` envolvida pelo cache da aplicação; sem cache registrado, a própria conexão"""
+    cache = get_cache_consultas()
+    return cache.conexao(conn, tabelas) if cache is not None else conn
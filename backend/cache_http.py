@@ -0,0 +1,154 @@
+import hashlib
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+
+from flask import current_app, has_app_context, make_response, request
+
+from database import get_db
+from versioning import validadores
+
+# =============================================
+# RESPOSTAS CONDICIONAIS (ETag / Last-Modified)
+# =============================================
+# Os painéis recarregam as mesmas listagens a todo momento (minhas-notas,
+# atividades-pendentes, todas-turmas, professores-disponiveis, materias) e
+# cada chamada reexecutava a consulta e reserializava o JSON.
+#
+# O decorador condicional() calcula, antes de chamar a rota, um ETag fraco a
+# partir das versões das tabelas de que a resposta depende (versoes_tabelas,
+# incrementadas pelos triggers em toda escrita), da rota, dos parâmetros e do
+# usuário logado. Se o If-None-Match do cliente ainda vale (ou, sem ele, o
+# If-Modified-Since não é anterior à última escrita), responde 304 sem
+# executar a consulta. As versões são lidas antes da rota: uma escrita no
+# meio faz no máximo o cliente receber de novo um conteúdo já novo, nunca
+# guardar conteúdo velho sob um ETag novo.
+#
+# Last-Modified tem resolução de um segundo: uma escrita no mesmo segundo da
+# anterior muda o ETag mas não o Last-Modified. Por isso o Last-Modified só é
+# enviado (e o If-Modified-Since só é aceito) quando a última escrita tem
+# pelo menos um segundo; antes disso vale só o ETag.
+#
+# Com Cache-Control 'private, no-cache' o navegador guarda a resposta e
+# revalida a cada uso enviando If-None-Match sozinho, sem mudança no
+# frontend.
+
+CACHE_CONTROL_PADRAO = 'private, no-cache'
+
+class RespostasCondicionais:
+    """Contadores de respostas condicionais por rota"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rotas = {}
+
+    def registrar(self, endpoint, resultado):
+        """resultado: 'nao_modificadas' (304), 'completas' (200 com ETag) ou 'sem_etag' (erros)"""
+        with self._lock:
+            rota = self._rotas.setdefault(endpoint, {'nao_modificadas': 0, 'completas': 0, 'sem_etag': 0})
+            rota[resultado] += 1
+
+    def limpar(self):
+        with self._lock:
+            self._rotas.clear()
+
+    def stats(self):
+        """Métricas para o monitoramento: taxa de 304 geral e por rota"""
+        with self._lock:
+            rotas = {}
+            for endpoint, contadores in sorted(self._rotas.items()):
+                consultas = sum(contadores.values())
+                rotas[endpoint] = dict(
+                    contadores, consultas=consultas,
+                    taxa_acerto=round(contadores['nao_modificadas'] / consultas, 4) if consultas else None
+                )
+        consultas = sum(rota['consultas'] for rota in rotas.values())
+        nao_modificadas = sum(rota['nao_modificadas'] for rota in rotas.values())
+        return {
+            'consultas': consultas,
+            'nao_modificadas': nao_modificadas,
+            'taxa_acerto': round(nao_modificadas / consultas, 4) if consultas else None,
+            'rotas': rotas
+        }
+
+def etag_resposta(chave, *partes):
+    """ETag fraco a partir da assinatura das tabelas e do que mais identifica a resposta"""
+    return hashlib.sha256('|'.join(map(str, (chave,) + partes)).encode()).hexdigest()[:32]
+
+def _agora():
+    return datetime.now(timezone.utc)
+
+def _segundo_encerrado(ultima):
+    """`ultima` se o segundo dela já terminou (nenhuma escrita ainda pode cair nele), senão None"""
+    if ultima is not None and ultima + timedelta(seconds=1) <= _agora():
+        return ultima
+    return None
+
+def _nao_modificada(etag, ultima):
+    # If-None-Match tem precedência; If-Modified-Since só vale sem ele (RFC 9110)
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and ultima is not None:
+        return ultima <= request.if_modified_since
+    return False
+
+def _validadores(resposta, etag, ultima, cache_control, por_usuario):
+    resposta.set_etag(etag, weak=True)
+    if ultima is not None:
+        resposta.last_modified = ultima
+    resposta.headers['Cache-Control'] = cache_control
+    if por_usuario:
+        resposta.vary.add('Authorization')
+    return resposta
+
+def condicional(tabelas, cache_control=CACHE_CONTROL_PADRAO, por_usuario=True, variacao=None):
+    """
+    Torna uma rota GET condicional. `tabelas` são as tabelas versionadas de
+    que a resposta depende; com `por_usuario` o ETag inclui o usuário logado
+    (aplicar abaixo de @token_required). `variacao()`, se informada, entra
+    no ETag para respostas que dependem de algo fora do banco (a data de hoje).
+    """
+    tabelas = tuple(tabelas)
+
+    def decorador(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            contadores = get_respostas_condicionais()
+            chave, ultima = validadores(get_db(), tabelas)
+            ultima = _segundo_encerrado(ultima)
+            etag = etag_resposta(
+                chave, request.endpoint, sorted(kwargs.items()), sorted(request.args.items(multi=True)),
+                getattr(request, 'user_id', None) if por_usuario else None,
+                variacao() if variacao is not None else None
+            )
+
+            if _nao_modificada(etag, ultima):
+                if contadores is not None:
+                    contadores.registrar(request.endpoint, 'nao_modificadas')
+                resposta = current_app.response_class(status=304)
+                return _validadores(resposta, etag, ultima, cache_control, por_usuario)
+
+            resposta = make_response(f(*args, **kwargs))
+            if resposta.status_code != 200:
+                # Erros não recebem validadores: o próximo pedido refaz a consulta
+                if contadores is not None:
+                    contadores.registrar(request.endpoint, 'sem_etag')
+                return resposta
+            if contadores is not None:
+                contadores.registrar(request.endpoint, 'completas')
+            return _validadores(resposta, etag, ultima, cache_control, por_usuario)
+        return decorated
+    return decorador
+
+# ---------- integração com a aplicação ----------
+
+def init_app(app):
+    """Registra os contadores de respostas condicionais na aplicação"""
+    app.extensions['respostas_condicionais'] = RespostasCondicionais()
+
+def get_respostas_condicionais(app=None):
+    """Retorna os contadores registrados na aplicação (ou None se init_app não foi chamado)"""
+    if app is None and not has_app_context():
+        return None
+    app = app or current_app
+    return app.extensions.get('respostas_condicionais')
@@ -0,0 +1,379 @@
+import hashlib
+import hmac
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+
+from flask import Response, current_app, has_app_context, jsonify, request, stream_with_context
+
+from horarios import DIAS_SEMANA, DURACAO_AULA, ErroHorario, aulas_da_materia, formatar_minutos
+from versioning import assinatura
+
+# =============================================
+# CALENDÁRIO DE AULAS
+# =============================================
+# As matérias guardam a regra semanal (dia_semana ou dias_aula, horario e
+# data_inicio; ver horarios.aulas_da_materia); aqui a regra é expandida em aulas com data para
+# qualquer intervalo, descontando os dias_sem_aula da turma (ou da escola
+# inteira, turma_id NULL).
+#
+# A expansão é preguiçosa e feita por semana (segunda a domingo):
+# ocorrencias() é um gerador que só expande a semana seguinte quando o
+# consumidor chega nela, então um feed iCalendar de meses sai em streaming.
+# As semanas expandidas ficam em cache por turma junto com a assinatura das
+# versões de materias, dias_sem_aula e usuarios (nome do professor); uma
+# mudança em qualquer delas invalida o cache na próxima leitura. A mesma
+# assinatura vira o ETag das respostas: um celular que consulta o
+# calendário periodicamente recebe 304 sem nenhuma expansão.
+#
+# Aplicativos de calendário assinam o feed iCalendar por URL e não enviam o
+# cabeçalho Authorization. Por isso o feed tem um link próprio, com ?token=
+# assinado (HMAC-SHA256 com a SECRET_KEY) sobre o id do aluno e a versão do
+# link em calendario_feeds (migração 011). Renovar o link incrementa a
+# versão e o token anterior deixa de valer. O token só abre o feed.
+
+TABELAS_CALENDARIO = ('materias', 'dias_sem_aula', 'usuarios')
+
+FORMATOS_CALENDARIO = {
+    'json': 'application/json',
+    'ics': 'text/calendar'
+}
+
+DIAS_PADRAO = 7
+FEED_DIAS_ANTES = 30
+FEED_DIAS_DEPOIS = 180
+MAX_DIAS_INTERVALO = 400
+MAX_SEMANAS_CACHE = 4096
+
+CORES = ('#3498db', '#e67e22', '#2ecc71', '#9b59b6', '#e74c3c', '#1abc9c', '#f1c40f', '#34495e')
+
+class ErroCalendario(Exception):
+    """Intervalo ou formato de calendário inválido"""
+
+    def __init__(self, mensagem, status_code=400):
+        super().__init__(mensagem)
+        self.status_code = status_code
+
+def formato_calendario(req):
+    """Formato por ?formato=json|ics ou pelo Accept (text/calendar); JSON por padrão"""
+    formato = req.args.get('formato')
+    if formato:
+        if formato not in FORMATOS_CALENDARIO:
+            raise ErroCalendario(f"Formato inválido: {formato} (use {', '.join(FORMATOS_CALENDARIO)})")
+        return formato
+    aceitos = {tipo for tipo, qualidade in req.accept_mimetypes if qualidade > 0}
+    return 'ics' if FORMATOS_CALENDARIO['ics'] in aceitos else 'json'
+
+def intervalo_calendario(args, hoje=None):
+    """(início, fim) de ?inicio=&fim= (AAAA-MM-DD, inclusivos); padrão: hoje e os próximos 6 dias"""
+    hoje = hoje or date.today()
+    try:
+        inicio = date.fromisoformat(args['inicio']) if args.get('inicio') else hoje
+        fim = date.fromisoformat(args['fim']) if args.get('fim') else inicio + timedelta(days=DIAS_PADRAO - 1)
+    except ValueError:
+        raise ErroCalendario('Datas devem estar no formato AAAA-MM-DD')
+    if fim < inicio:
+        raise ErroCalendario('fim deve ser igual ou posterior a inicio')
+    if (fim - inicio).days >= MAX_DIAS_INTERVALO:
+        raise ErroCalendario(f'Intervalo máximo de {MAX_DIAS_INTERVALO} dias')
+    return inicio, fim
+
+def carregar_regras(conn, turma_id, duracao=DURACAO_AULA):
+    """Regras semanais das matérias da turma; matérias com horário ou dia ilegível ficam de fora"""
+    regras = []
+    for row in conn.execute('''
+        SELECT m.id, m.nome, m.horario, m.dia_semana, m.dias_aula, m.data_inicio, u.nome as professor
+        FROM materias m
+        LEFT JOIN usuarios u ON m.professor_id = u.id
+        WHERE m.turma_id = ?
+    ''', (turma_id,)):
+        try:
+            aulas = aulas_da_materia(row['horario'], row['dia_semana'], row['dias_aula'], duracao)
+            data_inicio = date.fromisoformat(row['data_inicio'][:10]) if row['data_inicio'] else None
+        except (ErroHorario, TypeError, ValueError):
+            continue
+        # Uma regra por horário: dias com horários diferentes viram regras separadas
+        dias_por_horario = {}
+        for dia, inicio, fim in aulas:
+            dias_por_horario.setdefault((inicio, fim), []).append(DIAS_SEMANA.index(dia))
+        for (inicio, fim), dias in dias_por_horario.items():
+            regras.append({
+                'materia_id': row['id'],
+                'materia': row['nome'],
+                'professor': row['professor'],
+                'inicio': inicio,
+                'fim': fim,
+                'dias': dias,
+                'data_inicio': data_inicio
+            })
+    return regras
+
+def dias_sem_aula(conn, turma_id, inicio, fim):
+    """{data: motivo} dos dias sem aula da turma ou da escola no intervalo"""
+    return {
+        date.fromisoformat(row['data'][:10]): row['motivo']
+        for row in conn.execute('''
+            SELECT data, motivo FROM dias_sem_aula
+            WHERE (turma_id = ? OR turma_id IS NULL) AND data >= ? AND data <= ?
+        ''', (turma_id, inicio.isoformat(), fim.isoformat()))
+    }
+
+def expandir(regras, inicio, fim, folgas=()):
+    """Gera as aulas de `regras` entre `inicio` e `fim` (inclusivos), em ordem de data e horário"""
+    por_dia = {}
+    for regra in regras:
+        for dia in regra['dias']:
+            por_dia.setdefault(dia, []).append(regra)
+    for aulas in por_dia.values():
+        aulas.sort(key=lambda regra: (regra['inicio'], regra['materia_id']))
+
+    data = inicio
+    while data <= fim:
+        if data not in folgas:
+            for regra in por_dia.get(data.weekday(), ()):
+                if regra['data_inicio'] and data < regra['data_inicio']:
+                    continue
+                yield {
+                    'id': f"{regra['materia_id']}-{data.isoformat()}",
+                    'materia_id': regra['materia_id'],
+                    'materia': regra['materia'],
+                    'professor': regra['professor'],
+                    'data': data.isoformat(),
+                    'dia_semana': DIAS_SEMANA[data.weekday()],
+                    'horario': f"{formatar_minutos(regra['inicio'])} - {formatar_minutos(regra['fim'])}",
+                    'inicio': f"{data.isoformat()}T{formatar_minutos(regra['inicio'])}",
+                    'fim': f"{data.isoformat()}T{formatar_minutos(regra['fim'])}",
+                    'sala': '',
+                    'tipo': 'aula',
+                    'cor': CORES[regra['materia_id'] % len(CORES)]
+                }
+        data += timedelta(days=1)
+
+def _segunda(data):
+    return data - timedelta(days=data.weekday())
+
+class CalendarioTurmas:
+    """Cache LRU de semanas expandidas por (turma, segunda-feira), validado pela assinatura das tabelas"""
+
+    def __init__(self, max_semanas=MAX_SEMANAS_CACHE, duracao=DURACAO_AULA):
+        self.max_semanas = max_semanas
+        self.duracao = duracao
+        self._lock = threading.Lock()
+        self._semanas = OrderedDict()
+        self.acertos = 0
+        self.expansoes = 0
+        self.descartadas = 0
+
+    def assinatura(self, conn):
+        """Assinatura das tabelas do calendário (base do ETag)"""
+        return assinatura(conn, TABELAS_CALENDARIO)
+
+    def semana(self, conn, turma_id, segunda, chave, regras=None):
+        """
+        Aulas da semana que começa em `segunda`, do cache se a assinatura
+        `chave` ainda vale. `regras()` devolve as regras da turma e só é
+        chamada se a semana precisar ser expandida.
+        """
+        with self._lock:
+            salvo = self._semanas.get((turma_id, segunda))
+            if salvo is not None and salvo[0] == chave:
+                self._semanas.move_to_end((turma_id, segunda))
+                self.acertos += 1
+                return salvo[1]
+
+        regras = regras or (lambda: carregar_regras(conn, turma_id, self.duracao))
+        domingo = segunda + timedelta(days=6)
+        aulas = tuple(expandir(regras(), segunda, domingo, dias_sem_aula(conn, turma_id, segunda, domingo)))
+
+        with self._lock:
+            self._semanas[(turma_id, segunda)] = (chave, aulas)
+            self._semanas.move_to_end((turma_id, segunda))
+            self.expansoes += 1
+            while len(self._semanas) > self.max_semanas:
+                self._semanas.popitem(last=False)
+                self.descartadas += 1
+        return aulas
+
+    def ocorrencias(self, conn, turma_id, inicio, fim, chave=None):
+        """Gera as aulas da turma entre `inicio` e `fim`, expandindo semana a semana conforme o consumo"""
+        chave = chave or self.assinatura(conn)
+        lidas = []
+
+        def regras():
+            # Lidas no máximo uma vez por chamada, só se alguma semana não estiver em cache
+            if not lidas:
+                lidas.append(carregar_regras(conn, turma_id, self.duracao))
+            return lidas[0]
+
+        segunda = _segunda(inicio)
+        while segunda <= fim:
+            for aula in self.semana(conn, turma_id, segunda, chave, regras):
+                if inicio.isoformat() <= aula['data'] <= fim.isoformat():
+                    yield aula
+            segunda += timedelta(days=7)
+
+    def limpar(self):
+        with self._lock:
+            self._semanas.clear()
+
+    def stats(self):
+        """Métricas para o monitoramento"""
+        with self._lock:
+            consultas = self.acertos + self.expansoes
+            return {
+                'semanas': len(self._semanas),
+                'max_semanas': self.max_semanas,
+                'acertos': self.acertos,
+                'expansoes': self.expansoes,
+                'taxa_acerto': round(self.acertos / consultas, 4) if consultas else None,
+                'descartadas': self.descartadas
+            }
+
+def etag_calendario(turma_id, inicio, fim, formato, chave):
+    """ETag fraco do calendário: muda só quando o intervalo, o formato ou as tabelas mudam"""
+    return hashlib.sha256(f'{turma_id}|{inicio}|{fim}|{formato}|{chave}'.encode()).hexdigest()[:32]
+
+# ---------- link do feed ----------
+
+def _assinar_feed(segredo, aluno_id, versao):
+    return hmac.new(
+        str(segredo).encode(), f'calendario-feed|{aluno_id}|{versao}'.encode(), hashlib.sha256
+    ).hexdigest()
+
+def token_feed(segredo, aluno_id, versao):
+    """Token do link do feed: '<aluno_id>.<versao>.<assinatura>'"""
+    return f'{aluno_id}.{versao}.{_assinar_feed(segredo, aluno_id, versao)}'
+
+def ler_token_feed(segredo, token):
+    """(aluno_id, versao) de um token com assinatura válida, ou None"""
+    try:
+        aluno_id, versao, recebida = str(token or '').split('.')
+        aluno_id, versao = int(aluno_id), int(versao)
+    except ValueError:
+        return None
+    esperada = _assinar_feed(segredo, aluno_id, versao)
+    if not hmac.compare_digest(recebida.encode(), esperada.encode()):
+        return None
+    return aluno_id, versao
+
+def versao_feed(conn, aluno_id):
+    """Versão atual do link do aluno (0 se nunca foi renovado)"""
+    row = conn.execute('SELECT versao FROM calendario_feeds WHERE aluno_id = ?', (aluno_id,)).fetchone()
+    return row[0] if row else 0
+
+def renovar_feed(conn, aluno_id):
+    """Job de escrita: nova versão do link do aluno, invalidando o token anterior; retorna a versão"""
+    conn.execute('''
+        INSERT INTO calendario_feeds (aluno_id, versao) VALUES (?, 1)
+        ON CONFLICT (aluno_id) DO UPDATE SET versao = versao + 1
+    ''', (aluno_id,))
+    return versao_feed(conn, aluno_id)
+
+def intervalo_feed(args, hoje=None):
+    """(início, fim) do feed: ?inicio=&fim= ou, sem eles, de FEED_DIAS_ANTES atrás a FEED_DIAS_DEPOIS à frente"""
+    hoje = hoje or date.today()
+    if args.get('inicio') or args.get('fim'):
+        return intervalo_calendario(args, hoje)
+    return hoje - timedelta(days=FEED_DIAS_ANTES), hoje + timedelta(days=FEED_DIAS_DEPOIS)
+
+# ---------- iCalendar ----------
+
+def _texto_ical(valor):
+    return (
+        str(valor or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+    )
+
+def _linha_ical(linha):
+    # Linhas de no máximo 75 octetos; as continuações começam com espaço
+    dados = linha.encode('utf-8')
+    if len(dados) <= 75:
+        return linha + '\r\n'
+    partes, atual = [], b''
+    for caractere in linha:
+        codificado = caractere.encode('utf-8')
+        if len(atual) + len(codificado) > (75 if not partes else 74):
+            partes.append(atual.decode('utf-8'))
+            atual = b''
+        atual += codificado
+    partes.append(atual.decode('utf-8'))
+    return '\r\n '.join(partes) + '\r\n'
+
+def _data_ical(iso):
+    return iso.replace('-', '').replace(':', '') + '00'
+
+def gerar_ical(aulas, nome, dominio='sistema-academico'):
+    """Gera o feed iCalendar (RFC 5545) linha a linha a partir das aulas"""
+    carimbo = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    for linha in (
+        'BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:-//{dominio}//Calendario de aulas//PT',
+        'CALSCALE:GREGORIAN', 'METHOD:PUBLISH', f'X-WR-CALNAME:{_texto_ical(nome)}'
+    ):
+        yield _linha_ical(linha)
+    for aula in aulas:
+        for linha in (
+            'BEGIN:VEVENT',
+            f"UID:{aula['id']}@{dominio}",
+            f'DTSTAMP:{carimbo}',
+            f"DTSTART:{_data_ical(aula['inicio'])}",
+            f"DTEND:{_data_ical(aula['fim'])}",
+            f"SUMMARY:{_texto_ical(aula['materia'])}",
+            f"DESCRIPTION:{_texto_ical('Prof. ' + aula['professor'] if aula['professor'] else '')}",
+            'END:VEVENT'
+        ):
+            yield _linha_ical(linha)
+    yield _linha_ical('END:VCALENDAR')
+
+# ---------- resposta HTTP ----------
+
+def resposta_calendario(conn, turma_id, formato, inicio, fim, responder_json=jsonify):
+    """
+    Calendário da turma em JSON ou iCalendar, com ETag fraco e 304.
+
+    Usada pela rota da aplicação e pelo blueprint de aluno; `responder_json`
+    monta a resposta JSON a partir do dicionário (dias_aula, total_aulas,
+    dias_sem_aula, inicio, fim), no formato de envelope de cada um.
+    """
+    calendario = get_calendario()
+    chave = calendario.assinatura(conn)
+    etag = etag_calendario(turma_id, inicio, fim, formato, chave)
+
+    # Nada mudou desde a última consulta: sem expansão nem corpo
+    if request.if_none_match.contains_weak(etag):
+        resposta = Response(status=304)
+    elif formato == 'ics':
+        aulas = calendario.ocorrencias(conn, turma_id, inicio, fim, chave)
+        resposta = Response(
+            stream_with_context(gerar_ical(aulas, 'Calendário de aulas')), mimetype=FORMATOS_CALENDARIO['ics']
+        )
+        resposta.headers['Content-Disposition'] = 'inline; filename=calendario-aulas.ics'
+    else:
+        aulas = list(calendario.ocorrencias(conn, turma_id, inicio, fim, chave))
+        folgas = dias_sem_aula(conn, turma_id, inicio, fim)
+        resposta = responder_json({
+            'dias_aula': aulas,
+            'total_aulas': len(aulas),
+            'dias_sem_aula': [
+                {'data': data.isoformat(), 'motivo': motivo} for data, motivo in sorted(folgas.items())
+            ],
+            'inicio': inicio.isoformat(),
+            'fim': fim.isoformat()
+        })
+
+    resposta.set_etag(etag, weak=True)
+    resposta.headers['Cache-Control'] = 'private, no-cache'
+    return resposta
+
+# ---------- integração com a aplicação ----------
+
+def init_app(app):
+    """Registra o cache de semanas do calendário na aplicação"""
+    app.extensions['calendario'] = CalendarioTurmas(
+        app.config.get('CALENDARIO_MAX_SEMANAS', MAX_SEMANAS_CACHE), app.config.get('DURACAO_AULA', DURACAO_AULA)
+    )
+
+def get_calendario(app=None):
+    """Retorna o cache registrado na aplicação (ou None se init_app não foi chamado)"""
+    if app is None and not has_app_context():
+        return None
+    app = app or current_app
+    return app.extensions.get('calendario')
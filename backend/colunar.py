@@ -0,0 +1,447 @@
+import sqlite3
+import threading
+from array import array
+from bisect import bisect_left
+
+from flask import current_app, has_app_context
+
+from database import connect, run_write
+from utils.vetorial import FAIXAS_DESEMPENHO, LIMITES_DESEMPENHO, agrupar, estatisticas
+from versioning import versoes
+
+# =============================================
+# ARMAZENAMENTO COLUNAR DE NOTAS
+# =============================================
+# A tabela `notas` fica em memória como colunas paralelas: a nota em um
+# array('d') e, para cada dimensão (aluno, atividade, matéria, turma), um
+# array('q') com códigos densos 0..n-1 — cerca de 48 bytes por nota, em vez
+# de um dict por linha. As agregações por grupo rodam em uma passada sobre
+# os arrays (kernel `agrupar` de utils/vetorial.py, em C quando compilado).
+#
+# As linhas ficam ordenadas por (atividade_id, aluno_id), então as notas de
+# uma atividade são uma fatia contígua e uma nota nova entra por busca
+# binária. A turma de uma nota é a turma da matéria da atividade.
+#
+# Carga preguiçosa: a primeira leitura carrega tudo. Depois disso o
+# armazenamento guarda as versões de notas/atividades/materias
+# (versoes_tabelas) e o último evento do diário de notas (`notas_eventos`,
+# migração 007) que já aplicou. Escritas feitas por run_write_notas() são
+# aplicadas após o COMMIT; qualquer outra mudança (outro worker, script,
+# blueprint) é percebida pela versão e a próxima leitura aplica só os
+# eventos novos do diário, sem recarga. Uma atividade que mudou de matéria
+# (ou matéria que mudou de turma) tem suas notas, que são uma fatia
+# contígua, recodificadas no lugar. A recarga completa fica para quando o
+# diário não tem mais os eventos necessários, e roda em segundo plano
+# enquanto as leituras usam as colunas atuais. Notas NULL ficam de fora.
+
+TABELAS_COLUNAS = ('notas', 'atividades', 'materias')
+DIMENSOES = ('aluno', 'atividade', 'materia', 'turma')
+
+CARGA_SQL = '''
+    SELECT n.atividade_id, n.aluno_id, n.nota, a.materia_id, m.turma_id
+    FROM notas n
+    LEFT JOIN atividades a ON a.id = n.atividade_id
+    LEFT JOIN materias m ON m.id = a.materia_id
+    WHERE n.nota IS NOT NULL
+    ORDER BY n.atividade_id, n.aluno_id
+'''
+
+EVENTOS_SQL = '''
+    SELECT id, operacao, aluno_id, atividade_id, nota_nova, materia_id, turma_id
+    FROM notas_eventos
+    WHERE id > ?
+    ORDER BY id
+'''
+
+ATIVIDADES_SQL = '''
+    SELECT a.id, a.materia_id, m.turma_id
+    FROM atividades a
+    LEFT JOIN materias m ON m.id = a.materia_id
+'''
+
+def ultimo_evento(conn):
+    """Id do evento mais recente do diário de notas (0 se vazio)"""
+    return conn.execute('SELECT COALESCE(MAX(id), 0) FROM notas_eventos').fetchone()[0]
+
+def _caminho_banco(conn):
+    for _, nome, arquivo in conn.execute('PRAGMA database_list'):
+        if nome == 'main':
+            return arquivo
+    return None
+
+def _chave(atividade_id, aluno_id):
+    return ((atividade_id or 0) << 32) | (aluno_id or 0)
+
+def _codificar(codigos, ids):
+    # Código denso de cada id; ids novos recebem o próximo código, então a
+    # ordem de inserção do dict é a ordem dos códigos
+    return [codigos.setdefault(id_, len(codigos)) for id_ in ids]
+
+class NotasColunares:
+    """Notas em colunas com agregações por aluno, atividade, matéria e turma"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._versoes = None
+        self._ultimo_evento = 0
+        self._recarga = None
+        self._limpar()
+        self.cargas = 0
+        self.atualizacoes = 0
+        self.eventos_aplicados = 0
+        self.remapeamentos = 0
+        self.recargas_segundo_plano = 0
+
+    def _limpar(self):
+        self.chaves = array('q')
+        self.notas = array('d')
+        self.colunas = {dimensao: array('q') for dimensao in DIMENSOES}
+        # {dimensao: {id: código}}
+        self.dimensoes = {dimensao: {} for dimensao in DIMENSOES}
+        # {atividade_id: (materia_id, turma_id)} com que as notas da atividade estão codificadas
+        self._atividades = {}
+        self._agregados = {}
+
+    def __len__(self):
+        return len(self.notas)
+
+    # ---------- carga e sincronização ----------
+
+    def carregar(self, conn):
+        """Recarrega todas as colunas a partir do banco"""
+        with self._lock:
+            self._limpar()
+            # Versões e último evento antes das notas: o que for gravado durante
+            # a leitura volta pelo diário na próxima sincronização (reaplicar um
+            # evento já refletido não muda nada)
+            versoes_carga = versoes(conn, TABELAS_COLUNAS)
+            evento_carga = ultimo_evento(conn)
+            cursor = conn.execute(CARGA_SQL)
+            while True:
+                linhas = cursor.fetchmany(10000)
+                if not linhas:
+                    break
+                atividades, alunos, notas, materias, turmas = zip(*linhas)
+                self.chaves.extend(map(_chave, atividades, alunos))
+                self.notas.extend(notas)
+                for dimensao, ids in zip(DIMENSOES, (alunos, atividades, materias, turmas)):
+                    self.colunas[dimensao].extend(_codificar(self.dimensoes[dimensao], ids))
+                self._atividades.update(zip(atividades, zip(materias, turmas)))
+            self._versoes = versoes_carga
+            self._ultimo_evento = evento_carga
+            self.cargas += 1
+            return self
+
+    def sincronizar(self, conn):
+        """
+        Garante que as colunas refletem o banco: carga completa na primeira
+        vez; depois, só os eventos novos do diário e a recodificação das
+        atividades que mudaram de matéria ou de turma.
+        """
+        atuais = versoes(conn, TABELAS_COLUNAS)
+        with self._lock:
+            if self._versoes == atuais:
+                return self
+            if self._versoes is None:
+                return self.carregar(conn)
+            if self._diario_incompleto(conn):
+                self._recarregar_em_segundo_plano(conn)
+                return self
+
+            self._aplicar_eventos(conn)
+            if any(atuais[tabela] != self._versoes[tabela] for tabela in ('atividades', 'materias')):
+                self._remapear(conn)
+            self._versoes = atuais
+            self._agregados = {}
+            return self
+
+    def _diario_incompleto(self, conn):
+        # Eventos posteriores à carga já removidos do diário: só a recarga recupera
+        primeiro = conn.execute('SELECT MIN(id) FROM notas_eventos').fetchone()[0]
+        return primeiro is not None and primeiro > self._ultimo_evento + 1
+
+    def _aplicar_eventos(self, conn):
+        """Aplica os eventos do diário posteriores ao último aplicado"""
+        # Só o estado final de cada nota importa: None = nota removida ou NULL
+        finais = {}
+        ultimo = self._ultimo_evento
+        cursor = conn.execute(EVENTOS_SQL, (ultimo,))
+        while True:
+            linhas = cursor.fetchmany(10000)
+            if not linhas:
+                break
+            for _, operacao, aluno_id, atividade_id, nota, materia_id, turma_id in linhas:
+                finais[_chave(atividade_id, aluno_id)] = (
+                    None if operacao == 'DELETE' or nota is None
+                    else (nota, aluno_id, atividade_id, materia_id, turma_id)
+                )
+            ultimo = linhas[-1][0]
+            self.eventos_aplicados += len(linhas)
+
+        novas, removidas = {}, []
+        for chave, valores in finais.items():
+            posicao = bisect_left(self.chaves, chave)
+            existe = posicao < len(self.chaves) and self.chaves[posicao] == chave
+            if valores is None:
+                if existe:
+                    removidas.append(posicao)
+            elif existe:
+                self.notas[posicao] = valores[0]
+            else:
+                novas[chave] = valores
+        if removidas:
+            self._remover(removidas)
+        if novas:
+            self._intercalar(novas)
+        self._ultimo_evento = ultimo
+
+    def _remapear(self, conn):
+        """Recodifica as notas das atividades cuja matéria ou turma mudou"""
+        atuais = {atividade_id: (materia_id, turma_id) for atividade_id, materia_id, turma_id in conn.execute(ATIVIDADES_SQL)}
+        for atividade_id, anteriores in list(self._atividades.items()):
+            novos = atuais.get(atividade_id, (None, None))
+            if novos == anteriores:
+                continue
+            inicio, fim = self._fatia(atividade_id)
+            for dimensao, id_ in zip(('materia', 'turma'), novos):
+                codigo = _codificar(self.dimensoes[dimensao], (id_,))[0]
+                self.colunas[dimensao][inicio:fim] = array('q', [codigo]) * (fim - inicio)
+            self._atividades[atividade_id] = novos
+            self.remapeamentos += 1
+
+    def _recarregar_em_segundo_plano(self, conn):
+        """Carga completa numa conexão própria; as leituras seguem nas colunas atuais até a troca"""
+        caminho = _caminho_banco(conn)
+        if not caminho:
+            # Banco em memória: não há outra conexão que o enxergue
+            self.carregar(conn)
+            return
+        if self._recarga is not None:
+            return
+
+        def recarregar():
+            nova = NotasColunares()
+            conexao = connect(caminho)
+            try:
+                nova.carregar(conexao)
+            except sqlite3.Error:
+                nova = None
+            finally:
+                conexao.close()
+            with self._lock:
+                if nova is not None:
+                    self.chaves, self.notas = nova.chaves, nova.notas
+                    self.colunas, self.dimensoes = nova.colunas, nova.dimensoes
+                    self._atividades = nova._atividades
+                    # Versões da carga: escritas feitas durante ela são aplicadas
+                    # pelo diário na próxima sincronização
+                    self._versoes, self._ultimo_evento = nova._versoes, nova._ultimo_evento
+                    self._agregados = {}
+                    self.cargas += 1
+                    self.recargas_segundo_plano += 1
+                self._recarga = None
+
+        self._recarga = threading.Thread(target=recarregar, name='recarga-notas-colunares', daemon=True)
+        self._recarga.start()
+
+    def atualizar(self, versoes_antes, versoes_depois, alteracoes, evento_antes=None, evento_depois=None):
+        """
+        Aplica as notas gravadas por uma transação já confirmada.
+
+        `alteracoes` traz tuplas (aluno_id, atividade_id, nota, materia_id,
+        turma_id). Só aplica se o armazenamento estava exatamente nas versões
+        (e no evento do diário) anteriores à transação; caso contrário a
+        próxima leitura aplica os eventos pelo diário.
+        """
+        with self._lock:
+            if self._versoes is None or self._recarga is not None:
+                return
+            if self._versoes != versoes_antes or (evento_antes is not None and self._ultimo_evento != evento_antes):
+                return
+
+            novas, removidas = {}, []
+            for aluno_id, atividade_id, nota, materia_id, turma_id in alteracoes:
+                chave = _chave(atividade_id, aluno_id)
+                posicao = bisect_left(self.chaves, chave)
+                existe = posicao < len(self.chaves) and self.chaves[posicao] == chave
+                if nota is None:
+                    if existe:
+                        removidas.append(posicao)
+                elif existe:
+                    self.notas[posicao] = nota
+                else:
+                    novas[chave] = (nota, aluno_id, atividade_id, materia_id, turma_id)
+            if removidas:
+                self._remover(removidas)
+            if novas:
+                self._intercalar(novas)
+
+            self._versoes = versoes_depois
+            if evento_depois is not None:
+                self._ultimo_evento = evento_depois
+            self._agregados = {}
+            self.atualizacoes += 1
+
+    def _remover(self, posicoes):
+        posicoes = sorted(set(posicoes))
+
+        def filtrar(coluna):
+            resultado = array(coluna.typecode)
+            anterior = 0
+            for posicao in posicoes:
+                resultado.extend(coluna[anterior:posicao])
+                anterior = posicao + 1
+            resultado.extend(coluna[anterior:])
+            return resultado
+
+        self.chaves = filtrar(self.chaves)
+        self.notas = filtrar(self.notas)
+        for dimensao in DIMENSOES:
+            self.colunas[dimensao] = filtrar(self.colunas[dimensao])
+
+    def _intercalar(self, novas):
+        # Notas novas entram com uma cópia de cada coluna (fatias entre as
+        # posições de inserção) em vez de um insert O(n) por nota
+        chaves = sorted(novas)
+        posicoes = [bisect_left(self.chaves, chave) for chave in chaves]
+        # Atividade já presente: as notas novas seguem a matéria/turma das
+        # demais, que _remapear() mantém atualizadas
+        for chave in chaves:
+            nota, aluno_id, atividade_id, materia_id, turma_id = novas[chave]
+            materia_id, turma_id = self._atividades.setdefault(atividade_id, (materia_id, turma_id))
+            novas[chave] = (nota, aluno_id, atividade_id, materia_id, turma_id)
+        valores = {'chaves': chaves, 'notas': [novas[chave][0] for chave in chaves]}
+        for i, dimensao in enumerate(DIMENSOES, start=1):
+            valores[dimensao] = _codificar(self.dimensoes[dimensao], (novas[chave][i] for chave in chaves))
+
+        def intercalar(coluna, inseridos):
+            resultado = array(coluna.typecode)
+            anterior = 0
+            for posicao, valor in zip(posicoes, inseridos):
+                resultado.extend(coluna[anterior:posicao])
+                resultado.append(valor)
+                anterior = posicao
+            resultado.extend(coluna[anterior:])
+            return resultado
+
+        self.chaves = intercalar(self.chaves, valores['chaves'])
+        self.notas = intercalar(self.notas, valores['notas'])
+        for dimensao in DIMENSOES:
+            self.colunas[dimensao] = intercalar(self.colunas[dimensao], valores[dimensao])
+
+    # ---------- agregações ----------
+
+    def agregar(self, dimensao, limites=LIMITES_DESEMPENHO):
+        """
+        Quantidade, média e contagem por faixa de notas para cada id da dimensão.
+
+        Retorna {id: {'quantidade', 'media', 'faixas'}}, com `faixas` na ordem
+        de `limites` (len(limites) + 1 posições). O resultado fica em cache
+        até a próxima mudança nas colunas.
+        """
+        if dimensao not in DIMENSOES:
+            raise ValueError(f'Dimensão inválida: {dimensao}')
+
+        limites = tuple(limites)
+        with self._lock:
+            cache = (dimensao, limites)
+            if cache not in self._agregados:
+                ids = list(self.dimensoes[dimensao])
+                somas, contagens, faixas = agrupar(self.colunas[dimensao], self.notas, len(ids), limites)
+                largura = len(limites) + 1
+                self._agregados[cache] = {
+                    id_: {
+                        'quantidade': contagens[codigo],
+                        'media': somas[codigo] / contagens[codigo],
+                        'faixas': list(faixas[codigo * largura:(codigo + 1) * largura])
+                    }
+                    for codigo, id_ in enumerate(ids) if contagens[codigo]
+                }
+            return self._agregados[cache]
+
+    def medias_por(self, dimensao):
+        """{id: média} de todas as notas de cada id da dimensão"""
+        return {id_: grupo['media'] for id_, grupo in self.agregar(dimensao).items()}
+
+    def distribuicao_por(self, dimensao):
+        """{id: {excelente, bom, regular, insuficiente}} contando notas individuais"""
+        return {
+            id_: {faixa: grupo['faixas'][i] for i, faixa in reversed(list(enumerate(FAIXAS_DESEMPENHO)))}
+            for id_, grupo in self.agregar(dimensao).items()
+        }
+
+    def _fatia(self, atividade_id):
+        return bisect_left(self.chaves, _chave(atividade_id, 0)), bisect_left(self.chaves, _chave(atividade_id + 1, 0))
+
+    def notas_da_atividade(self, atividade_id):
+        """Fatia (array('d')) com as notas da atividade, ordenadas por aluno_id"""
+        with self._lock:
+            inicio, fim = self._fatia(atividade_id)
+            return self.notas[inicio:fim]
+
+    def estatisticas_atividade(self, atividade_id):
+        """Quantidade, média, mediana, desvio padrão, mínimo e máximo das notas da atividade"""
+        return estatisticas(self.notas_da_atividade(atividade_id))
+
+    def memoria(self):
+        """Bytes ocupados pelas colunas (sem os mapas de ids)"""
+        with self._lock:
+            colunas = [self.chaves, self.notas, *self.colunas.values()]
+            return sum(coluna.buffer_info()[1] * coluna.itemsize for coluna in colunas)
+
+    def stats(self):
+        """Métricas para o monitoramento"""
+        with self._lock:
+            return {
+                'carregado': self._versoes is not None,
+                'notas': len(self.notas),
+                'memoria_bytes': self.memoria(),
+                'cargas': self.cargas,
+                'atualizacoes_incrementais': self.atualizacoes,
+                'ultimo_evento': self._ultimo_evento,
+                'eventos_aplicados': self.eventos_aplicados,
+                'remapeamentos': self.remapeamentos,
+                'recargas_segundo_plano': self.recargas_segundo_plano,
+                'recarregando': self._recarga is not None
+            }
+
+# ---------- integração com a aplicação ----------
+
+def init_app(app):
+    """Registra o armazenamento colunar na aplicação (a carga acontece no primeiro uso)"""
+    app.extensions['notas_colunares'] = NotasColunares()
+
+def get_notas_colunares(app=None):
+    """Retorna o armazenamento registrado na aplicação (ou None se init_app não foi chamado)"""
+    if app is None and not has_app_context():
+        return None
+    app = app or current_app
+    return app.extensions.get('notas_colunares')
+
+def obter_notas(conn):
+    """Armazenamento da aplicação já sincronizado com o banco de `conn`"""
+    armazenamento = get_notas_colunares()
+    if armazenamento is None:
+        return NotasColunares().carregar(conn)
+    return armazenamento.sincronizar(conn)
+
+def run_write_notas(fn, *args, **kwargs):
+    """
+    run_write para jobs que gravam notas.
+
+    O job recebe `alteracoes=[]` e deve acrescentar as tuplas (aluno_id,
+    atividade_id, nota, materia_id, turma_id) que gravou; depois do COMMIT
+    elas são aplicadas ao armazenamento colunar sem recarga.
+    """
+    alteracoes = []
+
+    def job(conn):
+        antes = versoes(conn, TABELAS_COLUNAS), ultimo_evento(conn)
+        resultado = fn(conn, *args, alteracoes=alteracoes, **kwargs)
+        return resultado, antes, (versoes(conn, TABELAS_COLUNAS), ultimo_evento(conn))
+
+    resultado, antes, depois = run_write(job)
+    armazenamento = get_notas_colunares()
+    if armazenamento is not None:
+        armazenamento.atualizar(antes[0], depois[0], alteracoes, antes[1], depois[1])
+    return resultado
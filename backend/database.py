@@ -1,14 +1,363 @@
 import sqlite3
 import os
+import threading
+import time
+import queue
+from concurrent.futures import Future
+from flask import current_app, g, has_app_context
 from werkzeug.security import generate_password_hash
+from migrations import aplicar_migracoes
 
 DATABASE_PATH = os.path.join(os.path.dirname(__file__), '..', 'database', 'sistema_academico.db')
 
-def get_db():
-    conn = sqlite3.connect(DATABASE_PATH)
+# Configuração do pool de conexões (sobrescrevível via app.config ou variáveis de ambiente)
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 8))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+DB_POOL_HEALTH_CHECK = float(os.environ.get('DB_POOL_HEALTH_CHECK', 30))
+
+# PRAGMAs aplicados a toda conexão aberta pelo backend
+# WAL permite leitores simultâneos durante uma escrita; NORMAL é seguro em WAL
+DB_PRAGMAS = {
+    'journal_mode': os.environ.get('DB_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('DB_SYNCHRONOUS', 'NORMAL'),
+    'mmap_size': int(os.environ.get('DB_MMAP_SIZE', 256 * 1024 * 1024)),
+    'cache_size': int(os.environ.get('DB_CACHE_SIZE', -64000)),  # negativo = KiB (64 MB)
+    'temp_store': 'MEMORY',
+    'busy_timeout': int(os.environ.get('DB_BUSY_TIMEOUT', 5000))  # ms
+}
+
+def apply_pragmas(conn, pragmas=None):
+    """Aplica a configuração de armazenamento a uma conexão"""
+    for name, value in (DB_PRAGMAS if pragmas is None else pragmas).items():
+        conn.execute(f'PRAGMA {name} = {value}')
+
+def connect(path=None, pragmas=None):
+    """Abre uma nova conexão SQLite com row_factory e PRAGMAs configurados"""
+    conn = sqlite3.connect(path or DATABASE_PATH, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    apply_pragmas(conn, pragmas)
     return conn
 
+class PoolTimeoutError(Exception):
+    """Nenhuma conexão ficou livre dentro do tempo limite do pool"""
+
+class ConnectionPool:
+    """
+    Pool limitado de conexões SQLite reaproveitadas entre requisições.
+
+    Cada thread segura no máximo uma conexão por vez: chamadas aninhadas de
+    acquire() na mesma thread devolvem a mesma conexão.
+    """
+
+    def __init__(self, path=None, max_size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT,
+                 health_check_interval=DB_POOL_HEALTH_CHECK, pragmas=None):
+        self.path = path or DATABASE_PATH
+        self.pragmas = pragmas
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._idle = []  # pilha de (conexão, instante em que foi devolvida)
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._created = 0
+        self._in_use = 0
+        self._closed = False
+        self._stats = {
+            'checkouts': 0,
+            'wait_time_total_ms': 0.0,
+            'wait_time_max_ms': 0.0,
+            'peak_in_use': 0,
+            'timeouts': 0,
+            'discarded': 0
+        }
+
+    def acquire(self):
+        """Obtém uma conexão do pool, aguardando até `timeout` segundos se estiver esgotado"""
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            self._local.depth += 1
+            return held
+
+        start = time.perf_counter()
+        conn = None
+        with self._cond:
+            while conn is None:
+                if self._closed:
+                    raise RuntimeError('Pool de conexões encerrado')
+                if self._idle:
+                    conn, released_at = self._idle.pop()
+                    if time.monotonic() - released_at > self.health_check_interval and not self._is_healthy(conn):
+                        self._created -= 1
+                        self._stats['discarded'] += 1
+                        conn = None
+                        continue
+                elif self._created < self.max_size:
+                    conn = connect(self.path, self.pragmas)
+                    self._created += 1
+                else:
+                    remaining = self.timeout - (time.perf_counter() - start)
+                    if remaining <= 0 or not self._cond.wait(remaining):
+                        if not self._idle and self._created >= self.max_size:
+                            self._stats['timeouts'] += 1
+                            raise PoolTimeoutError(
+                                f'Nenhuma conexão livre após {self.timeout}s (limite de {self.max_size})'
+                            )
+
+            waited_ms = (time.perf_counter() - start) * 1000
+            self._in_use += 1
+            self._stats['checkouts'] += 1
+            self._stats['wait_time_total_ms'] += waited_ms
+            self._stats['wait_time_max_ms'] = max(self._stats['wait_time_max_ms'], waited_ms)
+            self._stats['peak_in_use'] = max(self._stats['peak_in_use'], self._in_use)
+
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def release(self, conn):
+        """Devolve a conexão ao pool, descartando transações não confirmadas"""
+        if getattr(self._local, 'conn', None) is conn:
+            self._local.depth -= 1
+            if self._local.depth > 0:
+                return
+            self._local.conn = None
+
+        healthy = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            healthy = False
+
+        with self._cond:
+            self._in_use -= 1
+            if healthy and not self._closed:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._created -= 1
+                self._stats['discarded'] += 1
+                conn.close()
+            self._cond.notify()
+
+    def close(self):
+        """Fecha todas as conexões ociosas e impede novos checkouts"""
+        with self._cond:
+            self._closed = True
+            for conn, _ in self._idle:
+                conn.close()
+            self._created -= len(self._idle)
+            self._idle = []
+            self._cond.notify_all()
+
+    def stats(self):
+        """Retorna as métricas do pool para monitoramento"""
+        with self._cond:
+            checkouts = self._stats['checkouts']
+            return {
+                'max_size': self.max_size,
+                'created': self._created,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'checkouts': checkouts,
+                'wait_time_total_ms': round(self._stats['wait_time_total_ms'], 3),
+                'wait_time_avg_ms': round(self._stats['wait_time_total_ms'] / checkouts, 3) if checkouts else 0,
+                'wait_time_max_ms': round(self._stats['wait_time_max_ms'], 3),
+                'peak_in_use': self._stats['peak_in_use'],
+                'timeouts': self._stats['timeouts'],
+                'discarded': self._stats['discarded']
+            }
+
+    @staticmethod
+    def _is_healthy(conn):
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+            return False
+
+class WriteQueue:
+    """
+    Fila de escrita com uma única thread dona da conexão de escrita.
+
+    Cada job `fn(conn, *args, **kwargs)` roda dentro de BEGIN IMMEDIATE ...
+    COMMIT na thread escritora, então escritas concorrentes são serializadas
+    em vez de disputarem o lock do arquivo. O job não deve chamar commit().
+    """
+
+    def __init__(self, path=None, pragmas=None, max_pending=1000):
+        self.path = path or DATABASE_PATH
+        self.pragmas = pragmas
+        self._queue = queue.Queue(max_pending)
+        self._thread = None
+        self._conn = None
+        self._lock = threading.Lock()
+        self._stats = {
+            'submitted': 0,
+            'committed': 0,
+            'failed': 0,
+            'busy_time_ms': 0.0
+        }
+
+    def submit(self, fn, *args, **kwargs):
+        """Enfileira um job de escrita e retorna um Future com o resultado"""
+        future = Future()
+        if threading.current_thread() is self._thread:
+            # Job aninhado: já estamos na transação da thread escritora
+            future.set_result(fn(self._conn, *args, **kwargs))
+            return future
+
+        self._ensure_started()
+        with self._lock:
+            self._stats['submitted'] += 1
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        """Executa um job de escrita e aguarda o resultado (exceções são propagadas)"""
+        return self.submit(fn, *args, **kwargs).result()
+
+    def close(self):
+        """Processa os jobs pendentes e encerra a thread escritora"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def stats(self):
+        """Retorna as métricas da fila de escrita"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['busy_time_ms'] = round(stats['busy_time_ms'], 3)
+        stats['pending'] = self._queue.qsize()
+        return stats
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name='db-writer', daemon=True)
+                self._thread.start()
+
+    def _worker(self):
+        self._conn = connect(self.path, self.pragmas)
+        self._conn.isolation_level = None  # transações explícitas
+
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+
+            future, fn, args, kwargs = job
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            start = time.perf_counter()
+            try:
+                self._conn.execute('BEGIN IMMEDIATE')
+                result = fn(self._conn, *args, **kwargs)
+                self._conn.execute('COMMIT')
+            except BaseException as e:
+                if self._conn.in_transaction:
+                    self._conn.execute('ROLLBACK')
+                with self._lock:
+                    self._stats['failed'] += 1
+                future.set_exception(e)
+            else:
+                with self._lock:
+                    self._stats['committed'] += 1
+                future.set_result(result)
+            finally:
+                with self._lock:
+                    self._stats['busy_time_ms'] += (time.perf_counter() - start) * 1000
+
+        self._conn.close()
+
+def init_app(app):
+    """Registra o pool de conexões na aplicação e a devolução automática ao fim de cada contexto"""
+    app.config.setdefault('DATABASE', DATABASE_PATH)
+    app.config.setdefault('DB_POOL_SIZE', DB_POOL_SIZE)
+    app.config.setdefault('DB_POOL_TIMEOUT', DB_POOL_TIMEOUT)
+    app.config.setdefault('DB_POOL_HEALTH_CHECK', DB_POOL_HEALTH_CHECK)
+    app.config.setdefault('DB_PRAGMAS', dict(DB_PRAGMAS))
+
+    app.extensions['db_pool'] = ConnectionPool(
+        app.config['DATABASE'],
+        max_size=app.config['DB_POOL_SIZE'],
+        timeout=app.config['DB_POOL_TIMEOUT'],
+        health_check_interval=app.config['DB_POOL_HEALTH_CHECK'],
+        pragmas=app.config['DB_PRAGMAS']
+    )
+    app.extensions['db_writer'] = WriteQueue(app.config['DATABASE'], pragmas=app.config['DB_PRAGMAS'])
+    app.teardown_appcontext(close_db)
+
+def get_pool(app=None):
+    """Retorna o pool registrado na aplicação (ou None se init_app não foi chamado)"""
+    app = app or current_app
+    return app.extensions.get('db_pool')
+
+def get_db():
+    """
+    Retorna a conexão do contexto atual.
+
+    Dentro de uma requisição a conexão vem do pool e fica em `g` até o
+    teardown; fora do contexto Flask (scripts, inicialização) abre uma
+    conexão avulsa que o chamador deve fechar.
+    """
+    if not has_app_context():
+        return connect()
+
+    if 'db' not in g:
+        pool = get_pool()
+        if pool is None:
+            g.db = connect(current_app.config.get('DATABASE'))
+        else:
+            g.db = pool.acquire()
+    return g.db
+
+def get_writer(app=None):
+    """Retorna a fila de escrita registrada na aplicação (ou None se init_app não foi chamado)"""
+    app = app or current_app
+    return app.extensions.get('db_writer')
+
+def run_write(fn, *args, **kwargs):
+    """
+    Executa `fn(conn, *args, **kwargs)` como uma transação de escrita.
+
+    Dentro da aplicação o job passa pela fila de escrita; fora dela (scripts)
+    roda numa conexão avulsa com commit/rollback local.
+    """
+    writer = get_writer() if has_app_context() else None
+    if writer is not None:
+        return writer.run(fn, *args, **kwargs)
+
+    conn = connect()
+    try:
+        result = fn(conn, *args, **kwargs)
+        conn.commit()
+        return result
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def close_db(exception=None):
+    """Devolve a conexão do contexto ao pool"""
+    db = g.pop('db', None)
+    if db is None:
+        return
+
+    pool = get_pool()
+    if pool is None:
+        db.close()
+    else:
+        pool.release(db)
+
 def init_db():
     # Remover banco existente para recriar com estrutura correta
     if os.path.exists(DATABASE_PATH):
@@ -219,6 +568,9 @@ def init_db():
             print(f"⚠️ Matéria já existe: {e}")
     
     conn.commit()
+    
+    # Índices e demais migrações versionadas
+    aplicar_migracoes(conn, verbose=True)
     conn.close()
     
     print("\n🎉 Banco de dados inicializado com sucesso!")
@@ -0,0 +1,133 @@
+import csv
+import io
+import json
+
+from flask import Response, current_app, stream_with_context
+
+from database import connect, get_pool
+
+# =============================================
+# EXPORTAÇÃO EM STREAMING
+# =============================================
+# Em vez de fetchall() + lista de dicts + jsonify (memória proporcional ao
+# resultado, multiplicada), o cursor é lido em lotes com fetchmany() e cada
+# lote é codificado e enviado ao cliente antes de ler o próximo. O pico de
+# memória fica em um lote, qualquer que seja o número de linhas.
+#
+# O formato vem de ?formato=ndjson|json|csv ou do cabeçalho Accept
+# (application/x-ndjson ou text/csv). Sem nenhum dos dois a rota responde
+# como sempre.
+
+FORMATOS_EXPORTACAO = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+    'csv': 'text/csv'
+}
+
+TAMANHO_LOTE = 500
+
+class ErroExportacao(Exception):
+    """Formato de exportação não suportado"""
+
+    def __init__(self, mensagem, status_code=400):
+        super().__init__(mensagem)
+        self.status_code = status_code
+
+def formato_exportacao(req):
+    """
+    Retorna o formato de exportação pedido na requisição ou None.
+
+    `?formato=` tem precedência; pelo Accept só contam tipos citados
+    explicitamente (um `*/*` não liga a exportação).
+    """
+    formato = req.args.get('formato')
+    if formato:
+        if formato not in FORMATOS_EXPORTACAO:
+            raise ErroExportacao(
+                f"Formato inválido: {formato} (use {', '.join(FORMATOS_EXPORTACAO)})"
+            )
+        return formato
+
+    aceitos = {tipo: qualidade for tipo, qualidade in req.accept_mimetypes if qualidade > 0}
+    candidatos = [
+        (aceitos[mimetype], formato) for formato, mimetype in FORMATOS_EXPORTACAO.items()
+        if formato != 'json' and mimetype in aceitos
+    ]
+    if not candidatos:
+        return None
+    return max(candidatos)[1]
+
+def iterar_lotes(cursor, tamanho_lote=TAMANHO_LOTE):
+    """Percorre o cursor em lotes de `tamanho_lote` linhas"""
+    while True:
+        lote = cursor.fetchmany(tamanho_lote)
+        if not lote:
+            return
+        yield lote
+
+def _json(valor):
+    return json.dumps(valor, ensure_ascii=False, default=str)
+
+def codificar_ndjson(colunas, lotes):
+    """JSON Lines: um objeto por linha"""
+    for lote in lotes:
+        yield ''.join(_json(dict(zip(colunas, linha))) + '\n' for linha in lote)
+
+def codificar_json(colunas, lotes, chave, mensagem=None):
+    """Mesmo envelope de success_response, com o array escrito aos poucos"""
+    inicio = {'message': mensagem} if mensagem else {}
+    yield _json(inicio)[:-1] + (', ' if inicio else '') + f'{_json(chave)}: ['
+
+    primeiro = True
+    for lote in lotes:
+        corpo = ', '.join(_json(dict(zip(colunas, linha))) for linha in lote)
+        yield corpo if primeiro else ', ' + corpo
+        primeiro = False
+    yield ']}'
+
+def codificar_csv(colunas, lotes):
+    """CSV com cabeçalho; cada lote é escrito em um buffer reaproveitado"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(colunas)
+    for lote in lotes:
+        escritor.writerows(lote)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def gerar_exportacao(conn, sql, params, formato, chave, mensagem=None, tamanho_lote=TAMANHO_LOTE):
+    """Executa a consulta e devolve o gerador de texto no formato pedido"""
+    cursor = conn.execute(sql, params)
+    colunas = [descricao[0] for descricao in cursor.description]
+    lotes = iterar_lotes(cursor, tamanho_lote)
+
+    if formato == 'ndjson':
+        return codificar_ndjson(colunas, lotes)
+    if formato == 'csv':
+        return codificar_csv(colunas, lotes)
+    return codificar_json(colunas, lotes, chave, mensagem)
+
+def _transmitir(sql, params, formato, chave, mensagem):
+    # O teardown da requisição devolve g.db ao pool antes de o corpo ser
+    # enviado, então o streaming faz o próprio checkout e só devolve a
+    # conexão depois do último lote.
+    pool = get_pool()
+    conn = pool.acquire() if pool is not None else connect(current_app.config.get('DATABASE'))
+    try:
+        yield from gerar_exportacao(conn, sql, params, formato, chave, mensagem)
+    finally:
+        if pool is not None:
+            pool.release(conn)
+        else:
+            conn.close()
+
+def resposta_exportacao(sql, params, formato, chave, mensagem=None, nome_arquivo=None):
+    """Resposta HTTP em streaming para a consulta, no formato negociado"""
+    corpo = _transmitir(sql, params, formato, chave, mensagem)
+    resposta = Response(stream_with_context(corpo), mimetype=FORMATOS_EXPORTACAO[formato])
+    if formato == 'csv':
+        resposta.headers['Content-Disposition'] = f'attachment; filename={nome_arquivo or chave}.csv'
+    return resposta
@@ -0,0 +1,700 @@
+import json
+import multiprocessing
+import os
+import random
+import threading
+import time
+import unicodedata
+import uuid
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from flask import current_app, has_app_context
+
+from database import run_write
+from horarios import (
+    DIAS_SEMANA, ErroHorario, descrever_conflitos, formatar_minutos, intervalo_horario, mensagem_conflito,
+    normalizar_dia, run_write_horarios
+)
+
+# =============================================
+# GERADOR AUTOMÁTICO DE GRADE HORÁRIA
+# =============================================
+# Recebe as matérias que cada turma precisa (nome, professor ou professores
+# candidatos e carga_horaria_semanal em aulas de DURACAO_AULA minutos) e a
+# disponibilidade dos professores, e monta uma grade sem conflitos dentro do
+# período da turma (manhã, tarde, noite ou integral).
+#
+# A carga de cada matéria é dividida em blocos de até MAX_AULAS_SEGUIDAS
+# aulas, no máximo um bloco por dia. Cada bloco é uma variável cujo domínio
+# são os (dia, início, professor) possíveis: dentro do período da turma, com
+# o professor disponível e sem conflito com as matérias já alocadas (índice
+# de horarios.py). A busca é um backtracking com propagação: escolhe sempre
+# o bloco com menos opções válidas (MRV), volta assim que algum bloco fica
+# sem opção (forward checking) e tenta primeiro os horários menos disputados
+# pelos outros blocos. Todos os blocos de uma matéria ficam com o mesmo
+# professor.
+#
+# Turmas que não dividem professores formam problemas independentes
+# (componentes), resolvidos em paralelo em um pool de processos quando a
+# escola é grande; cada componente tem `tentativas` sementes diferentes e
+# vale a primeira que encontrar solução dentro do limite de nós.
+#
+# A geração roda em segundo plano (GeradorGrade): a rota devolve a tarefa na
+# hora e o progresso é consultado depois. O estado da tarefa (status,
+# progresso, plano) fica na tabela tarefas_grade (migração 010), gravado pela
+# fila de escrita: com vários workers, a consulta e a gravação do plano podem
+# cair em qualquer um deles, não só no que executa a geração. O plano (um item por bloco) é
+# gravado em `materias` em uma única transação, conferindo de novo os
+# conflitos dentro dela: um registro por matéria, com a carga pedida e os
+# blocos em `dias_aula` ({dia: horario}).
+
+# Aulas por período: (início, quantidade)
+PERIODOS = {
+    'manha': ('07:00', 6),
+    'tarde': ('13:00', 6),
+    'noite': ('19:00', 4)
+}
+PERIODOS_TURMA = {
+    'manha': ('manha',),
+    'tarde': ('tarde',),
+    'noite': ('noite',),
+    'integral': ('manha', 'tarde')
+}
+DIAS_LETIVOS = DIAS_SEMANA[:5]
+
+MAX_AULAS_SEGUIDAS = 2
+GRADE_PROCESSOS = int(os.environ.get('GRADE_PROCESSOS', 0))  # 0 = na thread da tarefa
+GRADE_TENTATIVAS = 4
+GRADE_LIMITE_NOS = 20000  # por tentativa
+MAX_TAREFAS = 20
+PROGRESSO_INTERVALO = 0.5  # segundos entre gravações do progresso de uma tarefa
+
+class ErroGrade(Exception):
+    """Pedido de geração inválido ou plano que não pode ser gravado"""
+
+    def __init__(self, mensagem, status_code=400):
+        super().__init__(mensagem)
+        self.status_code = status_code
+
+def normalizar_periodo(periodo):
+    """'Manhã' -> 'manha'"""
+    texto = unicodedata.normalize('NFKD', str(periodo or '')).encode('ascii', 'ignore').decode()
+    texto = texto.strip().lower()
+    if texto not in PERIODOS and texto not in PERIODOS_TURMA:
+        raise ErroGrade(f'Período inválido: {periodo}')
+    return texto
+
+def dividir_carga(carga, max_seguidas=MAX_AULAS_SEGUIDAS):
+    """4 -> [2, 2]; 5 -> [2, 2, 1]"""
+    blocos = [max_seguidas] * (carga // max_seguidas)
+    if carga % max_seguidas:
+        blocos.append(carga % max_seguidas)
+    return blocos
+
+# ---------- montagem do problema ----------
+
+def _disponibilidade(pedido, duracao):
+    """
+    {professor_id: {dia: [(início, fim)]}} a partir de
+    {'<professor_id>': {'<dia>': ['manhã', '14:00-18:00', ...]}}.
+    Professores fora do dict estão sempre disponíveis.
+    """
+    resultado = {}
+    for professor_id, dias in (pedido or {}).items():
+        try:
+            professor_id = int(professor_id)
+        except (TypeError, ValueError):
+            raise ErroGrade(f'Disponibilidade: professor inválido: {professor_id}')
+        if not isinstance(dias, dict):
+            raise ErroGrade('Disponibilidade deve ser {professor_id: {dia: [períodos ou horários]}}')
+        janelas = {}
+        for dia, faixas in dias.items():
+            intervalos = []
+            for faixa in faixas or []:
+                try:
+                    periodos = PERIODOS_TURMA[normalizar_periodo(faixa)]
+                except ErroGrade:
+                    intervalos.append(intervalo_horario(faixa))
+                    continue
+                for periodo in periodos:
+                    intervalos.append(_janela_periodo(periodo, duracao))
+            janelas[normalizar_dia(dia)] = intervalos
+        resultado[professor_id] = janelas
+    return resultado
+
+def _janela_periodo(periodo, duracao):
+    inicio, aulas = PERIODOS[periodo]
+    inicio = intervalo_horario(inicio)[0]
+    return inicio, inicio + aulas * duracao
+
+def _disponivel(janelas, dia, inicio, fim):
+    if janelas is None:
+        return True
+    return any(a <= inicio and fim <= b for a, b in janelas.get(dia, ()))
+
+def montar_problema(conn, indice, pedido):
+    """
+    Valida o pedido e monta os blocos com seus domínios.
+
+    `pedido`: {'materias': [{'turma_id', 'materia_nome', 'professor_id' ou
+    'professores': [...], 'carga_horaria_semanal'}], 'disponibilidade':
+    {...}, 'dias': [...]} (dias letivos por padrão de segunda a sexta).
+    Retorna {'blocos': [...], 'materias': [...]} pronto para resolver().
+    """
+    materias = pedido.get('materias')
+    if not isinstance(materias, list) or not materias:
+        raise ErroGrade('Lista materias é obrigatória')
+    duracao = indice.duracao
+    try:
+        dias = [normalizar_dia(dia) for dia in pedido.get('dias') or DIAS_LETIVOS]
+        disponibilidade = _disponibilidade(pedido.get('disponibilidade'), duracao)
+        max_seguidas = int(pedido.get('max_aulas_seguidas') or MAX_AULAS_SEGUIDAS)
+    except ErroHorario as e:
+        raise ErroGrade(str(e))
+    except (TypeError, ValueError):
+        raise ErroGrade('max_aulas_seguidas deve ser um número')
+    if max_seguidas < 1:
+        raise ErroGrade('max_aulas_seguidas deve ser positivo')
+    indice.sincronizar(conn)
+
+    turma_ids = set()
+    professor_ids = set()
+    normalizadas = []
+    for posicao, materia in enumerate(materias):
+        if not isinstance(materia, dict):
+            raise ErroGrade(f'Matéria {posicao}: cada matéria deve ser um objeto')
+        candidatos = materia.get('professores') or [materia.get('professor_id')]
+        try:
+            turma_id = int(materia.get('turma_id'))
+            candidatos = list(dict.fromkeys(int(professor_id) for professor_id in candidatos))
+            carga = int(materia.get('carga_horaria_semanal') or 4)
+        except (TypeError, ValueError):
+            raise ErroGrade(f'Matéria {posicao}: turma_id, professores e carga_horaria_semanal devem ser números')
+        if not materia.get('materia_nome'):
+            raise ErroGrade(f'Matéria {posicao}: campo obrigatório: materia_nome')
+        if carga <= 0 or len(dividir_carga(carga, max_seguidas)) > len(dias):
+            raise ErroGrade(
+                f"Matéria {posicao}: carga de {carga} aulas não cabe em {len(dias)} dias "
+                f"com até {max_seguidas} aulas seguidas"
+            )
+        turma_ids.add(turma_id)
+        professor_ids.update(candidatos)
+        normalizadas.append({
+            'turma_id': turma_id,
+            'materia_nome': materia['materia_nome'],
+            'professores': candidatos,
+            'carga_horaria_semanal': carga
+        })
+
+    placeholders = ', '.join('?' for _ in turma_ids)
+    periodos = {
+        row['id']: row['periodo']
+        for row in conn.execute(f'SELECT id, periodo FROM turmas WHERE id IN ({placeholders})', list(turma_ids))
+    }
+    faltando = turma_ids - set(periodos)
+    if faltando:
+        raise ErroGrade(f"Turma(s) não encontrada(s): {', '.join(map(str, sorted(faltando)))}", 404)
+    placeholders = ', '.join('?' for _ in professor_ids)
+    existentes = {
+        row[0] for row in conn.execute(
+            f"SELECT id FROM usuarios WHERE tipo = 'professor' AND id IN ({placeholders})", list(professor_ids)
+        )
+    }
+    faltando = professor_ids - existentes
+    if faltando:
+        raise ErroGrade(f"Professor(es) não encontrado(s): {', '.join(map(str, sorted(faltando)))}", 404)
+
+    # Poda imediata: a carga pedida para a turma precisa caber no período
+    aulas_por_turma = {}
+    for materia in normalizadas:
+        aulas_por_turma[materia['turma_id']] = (
+            aulas_por_turma.get(materia['turma_id'], 0) + materia['carga_horaria_semanal']
+        )
+    for turma_id, aulas in aulas_por_turma.items():
+        periodo = normalizar_periodo(periodos[turma_id])
+        vagas = len(dias) * sum(PERIODOS[nome][1] for nome in PERIODOS_TURMA[periodo])
+        if aulas > vagas:
+            raise ErroGrade(f'Turma {turma_id}: {aulas} aulas pedidas, mas o período só tem {vagas} por semana', 422)
+
+    blocos = []
+    for grupo, materia in enumerate(normalizadas):
+        turma_id = materia['turma_id']
+        periodo = normalizar_periodo(periodos[turma_id])
+        for tamanho in dividir_carga(materia['carga_horaria_semanal'], max_seguidas):
+            valores = []
+            for dia in dias:
+                for nome_periodo in PERIODOS_TURMA[periodo]:
+                    inicio_periodo, fim_periodo = _janela_periodo(nome_periodo, duracao)
+                    for inicio in range(inicio_periodo, fim_periodo - tamanho * duracao + 1, duracao):
+                        fim = inicio + tamanho * duracao
+                        for professor_id in materia['professores']:
+                            if not _disponivel(disponibilidade.get(professor_id), dia, inicio, fim):
+                                continue
+                            if indice.conflitos(turma_id, professor_id, dia, inicio, fim):
+                                continue
+                            valores.append((dia, inicio, professor_id))
+            if not valores:
+                raise ErroGrade(
+                    f"Sem horário possível para {materia['materia_nome']} na turma {turma_id} "
+                    f"(período, disponibilidade dos professores e matérias já alocadas)", 422
+                )
+            blocos.append({
+                'id': len(blocos),
+                'grupo': grupo,
+                'turma_id': turma_id,
+                'tamanho': tamanho,
+                'professores': materia['professores'],
+                'valores': valores
+            })
+
+    return {'blocos': blocos, 'materias': normalizadas, 'duracao': duracao}
+
+def componentes(blocos):
+    """Separa os blocos em grupos independentes (sem turma nem professor candidato em comum)"""
+    pai = {}
+
+    def raiz(x):
+        while pai.setdefault(x, x) != x:
+            pai[x] = pai[pai[x]]
+            x = pai[x]
+        return x
+
+    for bloco in blocos:
+        donos = [('t', bloco['turma_id'])] + [('p', professor_id) for professor_id in bloco['professores']]
+        for dono in donos[1:]:
+            pai[raiz(dono)] = raiz(donos[0])
+        raiz(donos[0])
+
+    grupos = OrderedDict()
+    for bloco in blocos:
+        grupos.setdefault(raiz(('t', bloco['turma_id'])), []).append(bloco)
+    return list(grupos.values())
+
+# ---------- busca (executada na thread da tarefa ou nos processos do pool) ----------
+
+def _chaves(bloco, valor, duracao):
+    """(chaves que precisam estar livres, chaves ocupadas ao escolher `valor`)"""
+    dia, inicio, professor_id = valor
+    aulas = [inicio + k * duracao for k in range(bloco['tamanho'])]
+    checar = [('t', bloco['turma_id'], dia, minuto) for minuto in aulas]
+    checar += [('p', professor_id, dia, minuto) for minuto in aulas]
+    checar.append(('g', bloco['grupo'], dia))
+    ocupar = list(checar)
+    if len(bloco['professores']) > 1:
+        # A matéria fica com um professor só: os outros candidatos saem do domínio dos demais blocos
+        checar.append(('x', bloco['grupo'], professor_id))
+        ocupar += [('x', bloco['grupo'], outro) for outro in bloco['professores'] if outro != professor_id]
+    return checar, ocupar
+
+def resolver(blocos, duracao, semente=0, limite_nos=GRADE_LIMITE_NOS, progresso=None):
+    """
+    Atribui um (dia, início, professor) a cada bloco sem conflitos.
+
+    Retorna {'atribuicao': {bloco_id: valor} ou None, 'nos', 'semente'};
+    None quando não há solução ou o limite de nós acabou.
+    """
+    rng = random.Random(semente)
+    valores = {bloco['id']: bloco['valores'] for bloco in blocos}
+    chaves = {
+        bloco['id']: [_chaves(bloco, valor, duracao) for valor in bloco['valores']]
+        for bloco in blocos
+    }
+    # Para cada chave, os (bloco, valor) que deixam de valer quando ela é
+    # ocupada: ocupar/liberar uma chave atualiza só esses contadores, e o
+    # número de opções válidas de cada bloco fica sempre em dia
+    observadores = {}
+    for bloco_id, por_valor in chaves.items():
+        for i, (checar, _) in enumerate(por_valor):
+            for chave in checar:
+                observadores.setdefault(chave, []).append((bloco_id, i))
+    bloqueios = {bloco_id: [0] * len(por_valor) for bloco_id, por_valor in chaves.items()}
+    validos = {bloco_id: len(por_valor) for bloco_id, por_valor in chaves.items()}
+
+    # Horários menos disputados pelos outros blocos são tentados primeiro
+    ordem = {}
+    for bloco_id, por_valor in chaves.items():
+        desempate = [rng.random() for _ in por_valor]
+        ordem[bloco_id] = sorted(
+            range(len(por_valor)),
+            key=lambda i, p=por_valor, d=desempate: (sum(len(observadores[chave]) for chave in p[i][0]), d[i])
+        )
+
+    # Empate no MRV: blocos maiores primeiro, depois ordem sorteada pela semente
+    desempate_blocos = {bloco['id']: (-bloco['tamanho'], rng.random()) for bloco in blocos}
+
+    ocupadas = {}
+    pendentes = set(chaves)
+    atribuicao = {}
+    pilha = []  # (bloco_id, opções restantes)
+    nos = 0
+
+    def ocupar(bloco_id, i):
+        for chave in chaves[bloco_id][i][1]:
+            ocupadas[chave] = ocupadas.get(chave, 0) + 1
+            if ocupadas[chave] == 1:
+                for outro, j in observadores.get(chave, ()):
+                    bloqueios[outro][j] += 1
+                    if bloqueios[outro][j] == 1:
+                        validos[outro] -= 1
+        atribuicao[bloco_id] = i
+        pendentes.discard(bloco_id)
+
+    def desocupar(bloco_id):
+        i = atribuicao.pop(bloco_id)
+        for chave in chaves[bloco_id][i][1]:
+            ocupadas[chave] -= 1
+            if not ocupadas[chave]:
+                del ocupadas[chave]
+                for outro, j in observadores.get(chave, ()):
+                    bloqueios[outro][j] -= 1
+                    if not bloqueios[outro][j]:
+                        validos[outro] += 1
+        pendentes.add(bloco_id)
+
+    while True:
+        if not pendentes:
+            return {
+                'atribuicao': {bloco_id: valores[bloco_id][i] for bloco_id, i in atribuicao.items()},
+                'nos': nos,
+                'semente': semente
+            }
+
+        # MRV: o bloco com menos opções; zero opções é beco sem saída
+        escolhido = min(pendentes, key=lambda bloco_id: (validos[bloco_id], desempate_blocos[bloco_id]))
+        if validos[escolhido]:
+            opcoes = iter([i for i in ordem[escolhido] if not bloqueios[escolhido][i]])
+            pilha.append((escolhido, opcoes))
+            ocupar(escolhido, next(opcoes))
+        else:
+            # Volta até um bloco com alternativa
+            while pilha:
+                bloco_id, restantes = pilha[-1]
+                desocupar(bloco_id)
+                proximo = next(restantes, None)
+                if proximo is not None:
+                    ocupar(bloco_id, proximo)
+                    break
+                pilha.pop()
+            else:
+                return {'atribuicao': None, 'nos': nos, 'semente': semente}
+
+        nos += 1
+        if nos >= limite_nos:
+            return {'atribuicao': None, 'nos': nos, 'semente': semente}
+        if progresso is not None and nos % 1000 == 0:
+            progresso(nos, len(atribuicao))
+
+def _resolver_componente(blocos, duracao, sementes, limite_nos):
+    """Tenta as sementes em sequência (usado dentro dos processos do pool)"""
+    nos = 0
+    for semente in sementes:
+        resultado = resolver(blocos, duracao, semente, limite_nos)
+        nos += resultado['nos']
+        if resultado['atribuicao'] is not None:
+            return dict(resultado, nos=nos)
+    return {'atribuicao': None, 'nos': nos, 'semente': None}
+
+def montar_plano(problema, atribuicao):
+    """Um item por bloco: turma, matéria (posição no pedido), professor, dia e horário"""
+    duracao = problema['duracao']
+    plano = []
+    for bloco in problema['blocos']:
+        dia, inicio, professor_id = atribuicao[bloco['id']]
+        materia = problema['materias'][bloco['grupo']]
+        plano.append({
+            'turma_id': bloco['turma_id'],
+            'materia': bloco['grupo'],
+            'materia_nome': materia['materia_nome'],
+            'professor_id': professor_id,
+            'dia_semana': dia,
+            'horario': f"{formatar_minutos(inicio)}-{formatar_minutos(inicio + bloco['tamanho'] * duracao)}",
+            'aulas': bloco['tamanho'],
+            'carga_horaria_semanal': materia['carga_horaria_semanal']
+        })
+    plano.sort(key=lambda item: (item['turma_id'], DIAS_SEMANA.index(item['dia_semana']), item['horario']))
+    return plano
+
+# ---------- gravação ----------
+
+def gravar_plano(conn, indice, plano, alteracoes):
+    """
+    Job de escrita: grava o plano inteiro em `materias` em uma transação.
+
+    Os conflitos são conferidos de novo contra o índice sincronizado dentro
+    da transação; se alguma matéria foi alocada nesse meio-tempo nada é
+    gravado. Os blocos de uma matéria viram um único registro: dia_semana e
+    horario do primeiro bloco e todos em dias_aula. Retorna os ids criados,
+    um por matéria.
+    """
+    indice.sincronizar(conn)
+    for item in plano:
+        inicio, fim = intervalo_horario(item['horario'], indice.duracao)
+        conflitos = indice.conflitos(item['turma_id'], item['professor_id'], item['dia_semana'], inicio, fim)
+        if conflitos:
+            raise ErroGrade(
+                f"Plano desatualizado: {mensagem_conflito(descrever_conflitos(conn, conflitos)[0])}", 409
+            )
+
+    materias = OrderedDict()
+    for item in plano:
+        materias.setdefault((item['turma_id'], item['materia']), []).append(item)
+
+    ids = []
+    for blocos in materias.values():
+        blocos.sort(key=lambda item: DIAS_SEMANA.index(item['dia_semana']))
+        primeiro = blocos[0]
+        dias_aula = json.dumps({item['dia_semana']: item['horario'] for item in blocos})
+        materia_id = conn.execute('''
+            INSERT INTO materias (nome, turma_id, professor_id, horario, dia_semana, dias_aula, carga_horaria_semanal, observacoes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            primeiro['materia_nome'], primeiro['turma_id'], primeiro['professor_id'], primeiro['horario'],
+            primeiro['dia_semana'], dias_aula, primeiro['carga_horaria_semanal'], 'Gerado automaticamente'
+        )).lastrowid
+        alteracoes.append(('adicionar', (
+            materia_id, primeiro['turma_id'], primeiro['professor_id'], primeiro['horario'],
+            primeiro['dia_semana'], dias_aula
+        )))
+        ids.append(materia_id)
+    return ids
+
+# ---------- tarefas em segundo plano ----------
+
+def salvar_tarefa(conn, estado, max_tarefas=MAX_TAREFAS):
+    """Job de escrita: grava o estado (to_dict) da tarefa e descarta as mais antigas além de max_tarefas"""
+    conn.execute('''
+        INSERT INTO tarefas_grade (id, status, estado, criada_em, atualizada_em) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (id) DO UPDATE SET
+            status = excluded.status, estado = excluded.estado, atualizada_em = excluded.atualizada_em
+    ''', (estado['id'], estado['status'], json.dumps(estado), estado['criada_em'], time.time()))
+    conn.execute('''
+        DELETE FROM tarefas_grade WHERE id NOT IN (
+            SELECT id FROM tarefas_grade ORDER BY criada_em DESC LIMIT ?
+        )
+    ''', (max_tarefas,))
+
+def ler_tarefa(conn, tarefa_id):
+    """Estado gravado da tarefa (mesmo formato de to_dict) ou None"""
+    row = conn.execute('SELECT estado FROM tarefas_grade WHERE id = ?', (tarefa_id,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+def gravar_tarefa(conn, indice, estado, alteracoes):
+    """Job de escrita: grava o plano da tarefa e a marca como gravada, na mesma transação"""
+    estado = dict(estado, materia_ids=gravar_plano(conn, indice, estado['plano'], alteracoes), status='gravado')
+    salvar_tarefa(conn, estado)
+    return estado
+
+def aplicar_tarefa(conn, indice, tarefa_id, alteracoes):
+    """
+    Job de escrita: grava o plano de uma tarefa concluída. A checagem do
+    status é feita dentro da transação, então o mesmo plano não é gravado
+    duas vezes mesmo com pedidos simultâneos em workers diferentes.
+    """
+    estado = ler_tarefa(conn, tarefa_id)
+    if estado is None:
+        raise ErroGrade('Tarefa não encontrada', 404)
+    if estado['status'] != 'concluido':
+        raise ErroGrade(f"Tarefa não está concluída (status: {estado['status']})", 409)
+    return gravar_tarefa(conn, indice, estado, alteracoes)
+
+class TarefaGrade:
+    """Estado de uma geração: status, progresso e, ao final, o plano"""
+
+    def __init__(self, problema, processos, tentativas, limite_nos, gravar):
+        self.id = uuid.uuid4().hex
+        self.problema = problema
+        self.processos = processos
+        self.tentativas = tentativas
+        self.limite_nos = limite_nos
+        self.gravar = gravar
+        self.status = 'pendente'
+        self.grupos = componentes(problema['blocos'])
+        self.resolvidos = 0
+        self.nos = 0
+        self.plano = None
+        self.materia_ids = None
+        self.erro = None
+        self.criada_em = time.time()
+        self.segundos = None
+        self.publicada_em = 0.0
+        self._lock = threading.Lock()
+
+    def _contar(self, nos, resolvidos=0):
+        with self._lock:
+            self.nos += nos
+            self.resolvidos += resolvidos
+
+    def to_dict(self):
+        with self._lock:
+            resultado = {
+                'id': self.id,
+                'status': self.status,
+                'progresso': {
+                    'componentes': len(self.grupos),
+                    'componentes_resolvidos': self.resolvidos,
+                    'blocos': len(self.problema['blocos']),
+                    'nos': self.nos,
+                    'percentual': round(100 * self.resolvidos / len(self.grupos), 1) if self.grupos else 100.0
+                },
+                'processos': self.processos,
+                'segundos': self.segundos,
+                'criada_em': self.criada_em
+            }
+            if self.erro:
+                resultado['erro'] = self.erro
+            if self.plano is not None:
+                resultado['plano'] = self.plano
+            if self.materia_ids is not None:
+                resultado['materia_ids'] = self.materia_ids
+            return resultado
+
+class GeradorGrade:
+    """
+    Executa as gerações em uma thread de fundo, uma por vez. Com `app`, o
+    estado de cada tarefa é gravado em tarefas_grade (as últimas
+    max_tarefas); sem ela (benchmarks), fica só no objeto TarefaGrade.
+    """
+
+    def __init__(self, processos=GRADE_PROCESSOS, max_tarefas=MAX_TAREFAS):
+        self.processos = processos
+        self.max_tarefas = max_tarefas
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='gerador-grade')
+
+    def iniciar(self, problema, app=None, processos=None, tentativas=GRADE_TENTATIVAS,
+                limite_nos=GRADE_LIMITE_NOS, gravar=False):
+        """Enfileira a geração e retorna a tarefa (gravar=True grava o plano ao final)"""
+        tarefa = TarefaGrade(
+            problema, self.processos if processos is None else processos, tentativas, limite_nos, gravar
+        )
+        # Gravada antes de responder: a consulta seguinte pode ir para outro worker
+        self._publicar(tarefa, app)
+        self._executor.submit(self._executar, tarefa, app)
+        return tarefa
+
+    def _publicar(self, tarefa, app, progresso=False):
+        """Grava o estado da tarefa; atualizações de progresso no máximo a cada PROGRESSO_INTERVALO"""
+        if app is None:
+            return
+        agora = time.monotonic()
+        if progresso and agora - tarefa.publicada_em < PROGRESSO_INTERVALO:
+            return
+        tarefa.publicada_em = agora
+        with app.app_context():
+            run_write(salvar_tarefa, tarefa.to_dict(), self.max_tarefas)
+
+    def _executar(self, tarefa, app):
+        tarefa.status = 'executando'
+        inicio = time.perf_counter()
+        try:
+            self._publicar(tarefa, app)
+            atribuicao = self._resolver(tarefa, app)
+            if atribuicao is None:
+                tarefa.erro = 'Nenhuma grade sem conflitos encontrada dentro do limite de busca'
+                tarefa.status = 'sem_solucao'
+                return
+            tarefa.plano = montar_plano(tarefa.problema, atribuicao)
+            if tarefa.gravar:
+                with app.app_context():
+                    estado = run_write_horarios(gravar_tarefa, tarefa.to_dict())
+                tarefa.materia_ids = estado['materia_ids']
+                tarefa.status = 'gravado'
+            else:
+                tarefa.status = 'concluido'
+        except Exception as e:
+            tarefa.erro = str(e)
+            tarefa.status = 'erro'
+        finally:
+            tarefa.segundos = round(time.perf_counter() - inicio, 3)
+            self._publicar(tarefa, app)
+
+    def _resolver(self, tarefa, app=None):
+        duracao = tarefa.problema['duracao']
+        sementes = list(range(tarefa.tentativas))
+        atribuicao = {}
+
+        if not tarefa.processos:
+            for blocos in tarefa.grupos:
+                resolvido = None
+                for semente in sementes:
+                    anterior = [0]
+
+                    def progresso(nos, _atribuidos):
+                        tarefa._contar(nos - anterior[0])
+                        anterior[0] = nos
+                        self._publicar(tarefa, app, progresso=True)
+
+                    resultado = resolver(blocos, duracao, semente, tarefa.limite_nos, progresso)
+                    tarefa._contar(resultado['nos'] - anterior[0])
+                    if resultado['atribuicao'] is not None:
+                        resolvido = resultado['atribuicao']
+                        break
+                if resolvido is None:
+                    return None
+                atribuicao.update(resolvido)
+                tarefa._contar(0, 1)
+                self._publicar(tarefa, app, progresso=True)
+            return atribuicao
+
+        # Um job por (componente, fatia de sementes): com mais processos que
+        # componentes, as sementes de cada componente são divididas entre
+        # eles. Vale a primeira solução de cada componente e o restante é
+        # cancelado
+        por_componente = min(max(tarefa.processos // len(tarefa.grupos), 1), len(sementes))
+        fatias = [sementes[i::por_componente] for i in range(por_componente)]
+        executor = ProcessPoolExecutor(
+            max_workers=tarefa.processos, mp_context=multiprocessing.get_context('spawn')
+        )
+        try:
+            futuros = {}
+            for indice, blocos in enumerate(tarefa.grupos):
+                for fatia in fatias:
+                    futuro = executor.submit(_resolver_componente, blocos, duracao, fatia, tarefa.limite_nos)
+                    futuros[futuro] = indice
+            pendentes_por_grupo = {indice: len(fatias) for indice in range(len(tarefa.grupos))}
+            resolvidos = set()
+            abertos = set(futuros)
+            while abertos:
+                prontos, abertos = wait(abertos, return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    if futuro.cancelled():
+                        continue
+                    indice = futuros[futuro]
+                    resultado = futuro.result()
+                    tarefa._contar(resultado['nos'])
+                    pendentes_por_grupo[indice] -= 1
+                    if indice in resolvidos:
+                        continue
+                    if resultado['atribuicao'] is not None:
+                        resolvidos.add(indice)
+                        atribuicao.update(resultado['atribuicao'])
+                        tarefa._contar(0, 1)
+                        self._publicar(tarefa, app, progresso=True)
+                        for outro, grupo in futuros.items():
+                            if grupo == indice:
+                                outro.cancel()
+                    elif not pendentes_por_grupo[indice]:
+                        return None
+                if len(resolvidos) == len(tarefa.grupos):
+                    break
+        finally:
+            # Tentativas ainda em execução não seguram a tarefa
+            executor.shutdown(wait=False, cancel_futures=True)
+        return atribuicao
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+# ---------- integração com a aplicação ----------
+
+def init_app(app):
+    """Registra o gerador de grade na aplicação (processos em GRADE_PROCESSOS)"""
+    app.config.setdefault('GRADE_PROCESSOS', GRADE_PROCESSOS)
+    app.extensions['gerador_grade'] = GeradorGrade(app.config['GRADE_PROCESSOS'])
+
+def get_gerador_grade(app=None):
+    """Retorna o gerador registrado na aplicação (ou None se init_app não foi chamado)"""
+    if app is None and not has_app_context():
+        return None
+    app = app or current_app
+    return app.extensions.get('gerador_grade')
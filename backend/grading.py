@@ -0,0 +1,134 @@
+import json
+import math
+
+# =============================================
+# LANÇAMENTO DE NOTAS EM LOTE
+# =============================================
+# Um lote inteiro vira: 1 SELECT da atividade, 1 SELECT de conjunto para
+# validar os alunos na turma e 1 executemany de upsert — em vez de um
+# SELECT + UPDATE/INSERT por aluno. Depende do índice único
+# notas(aluno_id, atividade_id) criado pela migração 002.
+
+UPSERT_NOTA_SQL = '''
+    INSERT INTO notas (aluno_id, atividade_id, nota, feedback, avaliado_por, data_avaliacao)
+    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT (aluno_id, atividade_id) DO UPDATE SET
+        nota = excluded.nota,
+        feedback = excluded.feedback,
+        avaliado_por = excluded.avaliado_por,
+        data_avaliacao = excluded.data_avaliacao
+'''
+
+class ErroLancamento(Exception):
+    """Erro que invalida o lote inteiro (atividade inexistente, payload malformado)"""
+
+    def __init__(self, mensagem, status_code=400):
+        super().__init__(mensagem)
+        self.status_code = status_code
+
+def _resultado(indice, aluno_id, status, motivo=None):
+    resultado = {'indice': indice, 'aluno_id': aluno_id, 'status': status}
+    if motivo:
+        resultado['motivo'] = motivo
+    return resultado
+
+def preparar_lote(itens):
+    """
+    Valida a estrutura do lote uma única vez.
+
+    Retorna (validos, resultados): `validos` mapeia aluno_id -> (indice, nota,
+    feedback), mantendo a última ocorrência de cada aluno; `resultados` traz
+    as linhas já descartadas.
+    """
+    if not isinstance(itens, list):
+        raise ErroLancamento('Lista de notas é obrigatória')
+
+    validos = {}
+    resultados = []
+    for indice, item in enumerate(itens):
+        if not isinstance(item, dict) or 'aluno_id' not in item or 'nota' not in item:
+            resultados.append(_resultado(indice, None, 'invalida', 'aluno_id e nota são obrigatórios'))
+            continue
+
+        try:
+            aluno_id = int(item['aluno_id'])
+            nota = float(item['nota'])
+        except (TypeError, ValueError):
+            resultados.append(_resultado(indice, item.get('aluno_id'), 'invalida', 'aluno_id ou nota inválidos'))
+            continue
+
+        if isinstance(item['nota'], bool) or math.isnan(nota) or math.isinf(nota):
+            resultados.append(_resultado(indice, aluno_id, 'invalida', 'Nota inválida'))
+            continue
+
+        if aluno_id in validos:
+            anterior = validos[aluno_id][0]
+            resultados.append(_resultado(anterior, aluno_id, 'ignorada', 'Aluno repetido no lote'))
+
+        validos[aluno_id] = (indice, nota, item.get('feedback') or '')
+
+    return validos, resultados
+
+def salvar_notas_em_lote(conn, atividade_id, itens, avaliado_por, alteracoes=None):
+    """
+    Grava as notas de uma atividade em uma única operação de conjunto.
+
+    Deve rodar dentro de uma transação de escrita (database.run_write ou
+    colunar.run_write_notas, que passa `alteracoes` para receber as notas
+    gravadas). Retorna o resumo com contagens e o resultado de cada linha.
+    """
+    validos, resultados = preparar_lote(itens)
+
+    atividade = conn.execute('''
+        SELECT a.id, a.valor, a.materia_id, m.turma_id
+        FROM atividades a
+        JOIN materias m ON a.materia_id = m.id
+        WHERE a.id = ?
+    ''', (atividade_id,)).fetchone()
+
+    if not atividade:
+        raise ErroLancamento('Atividade não encontrada', 404)
+
+    valor_maximo = atividade['valor'] if atividade['valor'] is not None else 10.0
+
+    # Uma consulta de conjunto: quais alunos do lote pertencem à turma e quais já têm nota
+    situacao = {}
+    if validos:
+        situacao = {
+            row['id']: row['tem_nota'] for row in conn.execute('''
+                SELECT al.id, n.id IS NOT NULL as tem_nota
+                FROM alunos al
+                LEFT JOIN notas n ON n.aluno_id = al.id AND n.atividade_id = ?
+                WHERE al.turma_id = ? AND al.id IN (SELECT value FROM json_each(?))
+            ''', (atividade_id, atividade['turma_id'], json.dumps(list(validos))))
+        }
+
+    linhas = []
+    for aluno_id, (indice, nota, feedback) in validos.items():
+        if aluno_id not in situacao:
+            resultados.append(_resultado(indice, aluno_id, 'rejeitada', 'Aluno não pertence à turma da atividade'))
+        elif not 0 <= nota <= valor_maximo:
+            resultados.append(_resultado(indice, aluno_id, 'invalida', f'Nota deve estar entre 0 e {valor_maximo}'))
+        else:
+            linhas.append((aluno_id, atividade_id, nota, feedback, avaliado_por))
+            resultados.append(_resultado(indice, aluno_id, 'atualizada' if situacao[aluno_id] else 'inserida'))
+
+    if linhas:
+        conn.executemany(UPSERT_NOTA_SQL, linhas)
+        if alteracoes is not None:
+            alteracoes.extend(
+                (aluno_id, atividade_id, nota, atividade['materia_id'], atividade['turma_id'])
+                for aluno_id, atividade_id, nota, _, _ in linhas
+            )
+
+    resultados.sort(key=lambda r: r['indice'])
+    contagem = {status: 0 for status in ('inserida', 'atualizada', 'rejeitada', 'invalida', 'ignorada')}
+    for resultado in resultados:
+        contagem[resultado['status']] += 1
+
+    return {
+        'inseridas': contagem['inserida'],
+        'atualizadas': contagem['atualizada'],
+        'rejeitadas': contagem['rejeitada'] + contagem['invalida'] + contagem['ignorada'],
+        'resultados': resultados
+    }
@@ -0,0 +1,517 @@
+import json
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, bisect_right
+
+from flask import current_app, has_app_context
+
+from database import run_write
+from versioning import versoes
+
+# =============================================
+# MOTOR DE HORÁRIOS
+# =============================================
+# O `horario` de cada matéria vira um intervalo em minutos [início, fim)
+# ('08:00-09:30', '08:00 - 09:30' ou só o início, '20:40', com duração de
+# DURACAO_AULA minutos) e entra em dois índices em memória: por (turma, dia)
+# e por (professor, dia). Dois horários conflitam quando os intervalos se
+# sobrepõem ('08:00-09:30' x '09:00-10:00'), não só quando o texto é igual,
+# e um professor não pode estar em duas turmas ao mesmo tempo.
+#
+# Cada agenda guarda os intervalos ordenados pelo início e o maior fim até
+# cada posição: a checagem é uma busca binária mais a comparação com esse
+# máximo, O(log n); só quando há conflito a agenda é percorrida para
+# listá-los.
+#
+# Como no armazenamento colunar, o índice é carregado no primeiro uso e
+# guarda a versão de `materias` (versoes_tabelas) em que está. Alocações e
+# desalocações feitas por run_write_horarios() são aplicadas após o COMMIT
+# sem recarga; qualquer outra mudança é percebida pela versão e provoca uma
+# recarga completa na próxima consulta. Matérias com horário ilegível ficam
+# fora do índice (contadas em `ignoradas`).
+#
+# Uma matéria pode ter aula em mais de um dia (`dias_aula`): uma lista de
+# dias no mesmo `horario` ou, na grade gerada, um objeto {dia: horario} com
+# o horário de cada dia. Cada dia entra no índice como um intervalo.
+
+TABELAS_HORARIOS = ('materias',)
+
+DIAS_SEMANA = ('segunda', 'terca', 'quarta', 'quinta', 'sexta', 'sabado', 'domingo')
+
+DURACAO_AULA = 50
+
+HORA_RE = re.compile(r'^(\d{1,2})[:hH](\d{2})$')
+
+CARGA_SQL = '''
+    SELECT id, turma_id, professor_id, horario, dia_semana, dias_aula
+    FROM materias
+'''
+
+class ErroHorario(Exception):
+    """Horário recusado (formato inválido, conflito, turma ou professor inexistente)"""
+
+    def __init__(self, mensagem, status_code=400, conflitos=None):
+        super().__init__(mensagem)
+        self.status_code = status_code
+        self.conflitos = conflitos or []
+
+def normalizar_dia(dia_semana):
+    """'Terça-feira', 'terca', 'TER' -> 'terca'"""
+    texto = unicodedata.normalize('NFKD', str(dia_semana or '')).encode('ascii', 'ignore').decode()
+    texto = texto.strip().lower().replace('-feira', '').replace(' feira', '')
+    for dia in DIAS_SEMANA:
+        if texto == dia or (len(texto) >= 3 and dia.startswith(texto)):
+            return dia
+    raise ErroHorario(f'Dia da semana inválido: {dia_semana}')
+
+def _minutos(texto):
+    encontrado = HORA_RE.match(texto.strip())
+    if not encontrado:
+        raise ErroHorario(f'Horário inválido: {texto}')
+    horas, minutos = int(encontrado.group(1)), int(encontrado.group(2))
+    if horas > 24 or minutos > 59 or horas * 60 + minutos > 24 * 60:
+        raise ErroHorario(f'Horário inválido: {texto}')
+    return horas * 60 + minutos
+
+def intervalo_horario(horario, duracao=DURACAO_AULA):
+    """'08:00-09:30' -> (480, 570); só o início ('20:40') dura `duracao` minutos"""
+    partes = str(horario or '').split('-')
+    if len(partes) == 1:
+        inicio = _minutos(partes[0])
+        return inicio, inicio + duracao
+    if len(partes) != 2:
+        raise ErroHorario(f'Horário inválido: {horario}')
+    inicio, fim = _minutos(partes[0]), _minutos(partes[1])
+    if fim <= inicio:
+        raise ErroHorario(f'Horário inválido: {horario} (fim antes do início)')
+    return inicio, fim
+
+def formatar_minutos(minutos):
+    return f'{minutos // 60:02d}:{minutos % 60:02d}'
+
+def aulas_da_materia(horario, dia_semana, dias_aula=None, duracao=DURACAO_AULA):
+    """
+    [(dia, início, fim)] da matéria, em ordem de dia. `dias_aula` é uma
+    lista de dias (JSON ou texto separado por vírgulas) no `horario` da
+    matéria ou um objeto JSON {dia: horario}; sem ela, só `dia_semana`.
+    """
+    dias = dias_aula
+    if isinstance(dias, str):
+        try:
+            dias = json.loads(dias)
+        except ValueError:
+            dias = dias.split(',')
+    if isinstance(dias, dict):
+        pares = dias.items()
+    else:
+        if not dias:
+            dias = [dia_semana]
+        elif not isinstance(dias, list):
+            dias = [dias]
+        pares = [(dia, horario) for dia in dias]
+    aulas = {normalizar_dia(dia): intervalo_horario(horario_dia, duracao) for dia, horario_dia in pares}
+    return [(dia, *aulas[dia]) for dia in DIAS_SEMANA if dia in aulas]
+
+class Agenda:
+    """Intervalos de um (turma, dia) ou (professor, dia), ordenados pelo início"""
+
+    __slots__ = ('inicios', 'itens', 'maximos')
+
+    def __init__(self):
+        self.inicios = []
+        # (início, fim, materia_id)
+        self.itens = []
+        # maximos[i] = maior fim entre itens[0..i]
+        self.maximos = []
+
+    def __len__(self):
+        return len(self.itens)
+
+    def _recalcular(self, desde):
+        maximo = self.maximos[desde - 1] if desde else -1
+        del self.maximos[desde:]
+        for _, fim, _ in self.itens[desde:]:
+            maximo = max(maximo, fim)
+            self.maximos.append(maximo)
+
+    def adicionar(self, inicio, fim, materia_id):
+        posicao = bisect_right(self.inicios, inicio)
+        self.inicios.insert(posicao, inicio)
+        self.itens.insert(posicao, (inicio, fim, materia_id))
+        self._recalcular(posicao)
+
+    def remover(self, inicio, materia_id):
+        posicao = bisect_left(self.inicios, inicio)
+        while posicao < len(self.itens) and self.itens[posicao][0] == inicio:
+            if self.itens[posicao][2] == materia_id:
+                del self.inicios[posicao]
+                del self.itens[posicao]
+                self._recalcular(posicao)
+                return True
+            posicao += 1
+        return False
+
+    def sobrepostos(self, inicio, fim, ignorar=()):
+        """materia_ids dos intervalos que se sobrepõem a [inicio, fim)"""
+        # Só os itens que começam antes de `fim` podem se sobrepor, e entre
+        # eles só há sobreposição se algum termina depois de `inicio`
+        posicao = bisect_left(self.inicios, fim) - 1
+        encontrados = []
+        while posicao >= 0 and self.maximos[posicao] > inicio:
+            _, fim_item, materia_id = self.itens[posicao]
+            if fim_item > inicio and materia_id not in ignorar:
+                encontrados.append(materia_id)
+            posicao -= 1
+        encontrados.reverse()
+        return encontrados
+
+class IndiceHorarios:
+    """Índice de intervalos das matérias por (turma, dia) e (professor, dia)"""
+
+    def __init__(self, duracao=DURACAO_AULA):
+        self.duracao = duracao
+        self._lock = threading.RLock()
+        self._versoes = None
+        self._limpar()
+        self.cargas = 0
+        self.atualizacoes = 0
+        self.consultas = 0
+
+    def _limpar(self):
+        self.turmas = {}
+        self.professores = {}
+        # {materia_id: (turma_id, professor_id, [(dia, início, fim)])}
+        self.materias = {}
+        self.ignoradas = 0
+
+    # ---------- carga e sincronização ----------
+
+    def carregar(self, conn):
+        """Recarrega o índice a partir do banco"""
+        with self._lock:
+            self._limpar()
+            versoes_carga = versoes(conn, TABELAS_HORARIOS)
+            for row in conn.execute(CARGA_SQL):
+                self._indexar(row[0], row[1], row[2], row[3], row[4], row[5])
+            self._versoes = versoes_carga
+            self.cargas += 1
+            return self
+
+    def sincronizar(self, conn):
+        """Garante que o índice reflete o banco (carga na primeira vez ou após mudança externa)"""
+        atuais = versoes(conn, TABELAS_HORARIOS)
+        with self._lock:
+            if self._versoes != atuais:
+                self.carregar(conn)
+            return self
+
+    def _indexar(self, materia_id, turma_id, professor_id, horario, dia_semana, dias_aula=None):
+        try:
+            aulas = aulas_da_materia(horario, dia_semana, dias_aula, self.duracao)
+        except ErroHorario:
+            self.ignoradas += 1
+            return
+        self.materias[materia_id] = (turma_id, professor_id, aulas)
+        for dia, inicio, fim in aulas:
+            for indice, dono in ((self.turmas, turma_id), (self.professores, professor_id)):
+                if dono is not None:
+                    indice.setdefault((dono, dia), Agenda()).adicionar(inicio, fim, materia_id)
+
+    def _desindexar(self, materia_id):
+        materia = self.materias.pop(materia_id, None)
+        if materia is None:
+            return
+        turma_id, professor_id, aulas = materia
+        for dia, inicio, _ in aulas:
+            for indice, dono in ((self.turmas, turma_id), (self.professores, professor_id)):
+                agenda = indice.get((dono, dia))
+                if agenda is not None:
+                    agenda.remover(inicio, materia_id)
+                    if not agenda:
+                        del indice[(dono, dia)]
+
+    def atualizar(self, versoes_antes, versoes_depois, alteracoes):
+        """
+        Aplica as alterações de uma transação já confirmada.
+
+        `alteracoes` traz ('adicionar', (materia_id, turma_id, professor_id,
+        horario, dia_semana[, dias_aula])) ou ('remover', materia_id). Só aplica se o
+        índice estava exatamente nas versões anteriores à transação; caso
+        contrário fica marcado para recarga.
+        """
+        with self._lock:
+            if self._versoes is None:
+                return
+            if self._versoes != versoes_antes:
+                self._versoes = None
+                return
+            for operacao, dados in alteracoes:
+                if operacao == 'adicionar':
+                    self._indexar(*dados)
+                else:
+                    self._desindexar(dados)
+            self._versoes = versoes_depois
+            self.atualizacoes += 1
+
+    # ---------- consultas ----------
+
+    def conflitos(self, turma_id, professor_id, dia, inicio, fim, ignorar=()):
+        """
+        Matérias já alocadas que se sobrepõem a [inicio, fim) no dia, na
+        mesma turma ou com o mesmo professor: [{'tipo', 'materia_id', 'dia_semana'}].
+        """
+        with self._lock:
+            self.consultas += 1
+            encontrados = []
+            for tipo, indice, dono in (
+                ('turma', self.turmas, turma_id),
+                ('professor', self.professores, professor_id),
+            ):
+                agenda = indice.get((dono, dia))
+                if agenda is not None:
+                    encontrados.extend(
+                        {'tipo': tipo, 'materia_id': materia_id, 'dia_semana': dia}
+                        for materia_id in agenda.sobrepostos(inicio, fim, ignorar)
+                    )
+            return encontrados
+
+    def materias_das_turmas(self, turma_ids):
+        """materia_ids indexados das turmas"""
+        with self._lock:
+            return {
+                materia_id for materia_id, (turma_id, *_) in self.materias.items() if turma_id in turma_ids
+            }
+
+    def stats(self):
+        """Métricas para o monitoramento"""
+        with self._lock:
+            return {
+                'carregado': self._versoes is not None,
+                'materias': len(self.materias),
+                'ignoradas': self.ignoradas,
+                'agendas_turma': len(self.turmas),
+                'agendas_professor': len(self.professores),
+                'cargas': self.cargas,
+                'atualizacoes_incrementais': self.atualizacoes,
+                'consultas': self.consultas
+            }
+
+def descrever_conflitos(conn, conflitos):
+    """Completa os conflitos com nome da matéria, professor, turma e horário"""
+    ids = list({conflito['materia_id'] for conflito in conflitos if 'materia_id' in conflito})
+    if not ids:
+        return conflitos
+    materias = {
+        row['id']: row for row in conn.execute(f'''
+            SELECT m.id, m.nome, m.turma_id, m.horario, m.dia_semana, m.dias_aula, u.nome as professor_nome
+            FROM materias m
+            LEFT JOIN usuarios u ON m.professor_id = u.id
+            WHERE m.id IN ({', '.join('?' for _ in ids)})
+        ''', ids)
+    }
+    descritos = []
+    for conflito in conflitos:
+        materia = materias.get(conflito.get('materia_id'))
+        if materia is not None:
+            dia, horario = materia['dia_semana'], materia['horario']
+            if materia['dias_aula'] and conflito.get('dia_semana'):
+                # Matéria com aula em vários dias: o horário do dia em conflito
+                try:
+                    aulas = aulas_da_materia(materia['horario'], materia['dia_semana'], materia['dias_aula'])
+                except ErroHorario:
+                    aulas = []
+                for dia_aula, inicio, fim in aulas:
+                    if dia_aula == conflito['dia_semana']:
+                        dia, horario = dia_aula, f'{formatar_minutos(inicio)}-{formatar_minutos(fim)}'
+            conflito = dict(
+                conflito,
+                materia_nome=materia['nome'],
+                professor_nome=materia['professor_nome'],
+                turma_id=materia['turma_id'],
+                horario=horario,
+                dia_semana=dia
+            )
+        descritos.append(conflito)
+    return descritos
+
+def mensagem_conflito(conflito):
+    if conflito['tipo'] == 'professor':
+        return (
+            f"Conflito de horário: o professor já dá {conflito.get('materia_nome')} "
+            f"na turma {conflito.get('turma_id')} ({conflito.get('dia_semana')} {conflito.get('horario')})"
+        )
+    return f"Conflito de horário: {conflito.get('materia_nome')} com {conflito.get('professor_nome')}"
+
+# ---------- validação em lote ----------
+
+def validar_grade(conn, indice, aulas, substituir=False):
+    """
+    Valida uma grade proposta inteira contra o índice e contra ela mesma.
+
+    `aulas` é uma lista de {'turma_id', 'professor_id', 'horario',
+    'dia_semana'} (opcionalmente 'materia_id', quando a aula substitui uma
+    matéria existente). Com `substituir`, a grade proposta substitui a grade
+    atual das turmas envolvidas e as matérias existentes delas são ignoradas.
+    Retorna um resultado por aula, na ordem recebida, e o resumo.
+    """
+    indice.sincronizar(conn)
+    dicts = [aula for aula in aulas if isinstance(aula, dict)]
+    ignorar = {aula['materia_id'] for aula in dicts if aula.get('materia_id')}
+    if substituir:
+        turma_ids = set()
+        for aula in dicts:
+            try:
+                turma_ids.add(int(aula.get('turma_id')))
+            except (TypeError, ValueError):
+                pass
+        ignorar |= indice.materias_das_turmas(turma_ids)
+
+    # Aulas já aceitas da própria proposta, no mesmo formato do índice
+    propostas = IndiceHorarios(indice.duracao)
+    resultados = []
+    for posicao, aula in enumerate(aulas):
+        if not isinstance(aula, dict):
+            resultados.append({'aula': posicao, 'valida': False, 'erros': ['Cada aula deve ser um objeto']})
+            continue
+        erros = [
+            f'Campo obrigatório: {campo}'
+            for campo in ('turma_id', 'professor_id', 'horario', 'dia_semana') if not aula.get(campo)
+        ]
+        if not erros:
+            try:
+                aula = dict(aula, turma_id=int(aula['turma_id']), professor_id=int(aula['professor_id']))
+            except (TypeError, ValueError):
+                erros.append('turma_id e professor_id devem ser números')
+        if not erros:
+            try:
+                dia = normalizar_dia(aula['dia_semana'])
+                inicio, fim = intervalo_horario(aula['horario'], indice.duracao)
+            except ErroHorario as e:
+                erros.append(str(e))
+        if erros:
+            resultados.append({'aula': posicao, 'valida': False, 'erros': erros})
+            continue
+
+        conflitos = indice.conflitos(aula['turma_id'], aula['professor_id'], dia, inicio, fim, ignorar)
+        conflitos += [
+            {'tipo': conflito['tipo'], 'aula': conflito['materia_id']}
+            for conflito in propostas.conflitos(aula['turma_id'], aula['professor_id'], dia, inicio, fim)
+        ]
+        propostas._indexar(posicao, aula['turma_id'], aula['professor_id'], aula['horario'], dia)
+        resultados.append({
+            'aula': posicao,
+            'valida': not conflitos,
+            'dia_semana': dia,
+            'inicio': formatar_minutos(inicio),
+            'fim': formatar_minutos(fim),
+            'conflitos': descrever_conflitos(conn, conflitos) if conflitos else []
+        })
+
+    invalidas = sum(1 for resultado in resultados if not resultado['valida'])
+    return {
+        'valida': not invalidas,
+        'resultados': resultados,
+        'resumo': {'aulas': len(resultados), 'validas': len(resultados) - invalidas, 'invalidas': invalidas}
+    }
+
+# ---------- jobs de escrita ----------
+
+def alocar_materia(conn, indice, turma_id, dados, alteracoes):
+    """
+    Cria a matéria do professor na turma se o horário não conflitar.
+
+    A checagem usa o índice sincronizado dentro da transação de escrita,
+    então duas alocações simultâneas não passam ambas. Retorna o id da
+    matéria criada.
+    """
+    dia = normalizar_dia(dados['dia_semana'])
+    inicio, fim = intervalo_horario(dados['horario'], indice.duracao)
+    try:
+        professor_id = int(dados['professor_id'])
+    except (TypeError, ValueError):
+        raise ErroHorario('professor_id deve ser um número')
+
+    if not conn.execute('SELECT id FROM turmas WHERE id = ?', (turma_id,)).fetchone():
+        raise ErroHorario('Turma não encontrada', 404)
+    if not conn.execute(
+        "SELECT id FROM usuarios WHERE id = ? AND tipo = 'professor'", (professor_id,)
+    ).fetchone():
+        raise ErroHorario('Professor não encontrado', 404)
+
+    conflitos = indice.sincronizar(conn).conflitos(turma_id, professor_id, dia, inicio, fim)
+    if conflitos:
+        conflitos = descrever_conflitos(conn, conflitos)
+        raise ErroHorario(mensagem_conflito(conflitos[0]), 400, conflitos)
+
+    materia_id = conn.execute('''
+        INSERT INTO materias (nome, turma_id, professor_id, horario, dia_semana, carga_horaria_semanal, data_inicio, observacoes)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        dados['materia_nome'],
+        turma_id,
+        professor_id,
+        dados['horario'],
+        dia,
+        dados.get('carga_horaria_semanal', 4),
+        dados.get('data_inicio'),
+        dados.get('observacoes')
+    )).lastrowid
+    alteracoes.append(('adicionar', (materia_id, turma_id, professor_id, dados['horario'], dia)))
+    return materia_id
+
+def desalocar_materias(conn, indice, professor_id, alteracoes, materia_id=None, turma_id=None):
+    """Remove as matérias do professor (uma matéria ou todas as dele na turma); retorna os ids removidos"""
+    filtro, params = ('id = ?', [materia_id]) if materia_id is not None else ('turma_id = ?', [turma_id])
+    ids = [
+        row[0] for row in conn.execute(
+            f'SELECT id FROM materias WHERE {filtro} AND professor_id = ?', params + [professor_id]
+        )
+    ]
+    if not ids:
+        if materia_id is not None:
+            raise ErroHorario('Matéria não encontrada ou não pertence a este professor', 404)
+        raise ErroHorario('Professor não está alocado nesta turma', 404)
+
+    conn.executemany('DELETE FROM materias WHERE id = ?', [(id_,) for id_ in ids])
+    alteracoes.extend(('remover', id_) for id_ in ids)
+    return ids
+
+# ---------- integração com a aplicação ----------
+
+def init_app(app):
+    """Registra o índice de horários na aplicação (a carga acontece no primeiro uso)"""
+    app.extensions['horarios'] = IndiceHorarios(app.config.get('DURACAO_AULA', DURACAO_AULA))
+
+def get_indice_horarios(app=None):
+    """Retorna o índice registrado na aplicação (ou None se init_app não foi chamado)"""
+    if app is None and not has_app_context():
+        return None
+    app = app or current_app
+    return app.extensions.get('horarios')
+
+def obter_indice(conn):
+    """Índice da aplicação já sincronizado com o banco de `conn`"""
+    indice = get_indice_horarios()
+    if indice is None:
+        return IndiceHorarios().carregar(conn)
+    return indice.sincronizar(conn)
+
+def run_write_horarios(fn, *args, **kwargs):
+    """
+    run_write para jobs que alocam ou removem matérias.
+
+    O job recebe o índice e `alteracoes=[]`, onde acrescenta o que gravou;
+    depois do COMMIT as alterações são aplicadas ao índice sem recarga.
+    """
+    indice = get_indice_horarios() or IndiceHorarios()
+    alteracoes = []
+
+    def job(conn):
+        antes = versoes(conn, TABELAS_HORARIOS)
+        resultado = fn(conn, indice, *args, alteracoes=alteracoes, **kwargs)
+        return resultado, antes, versoes(conn, TABELAS_HORARIOS)
+
+    resultado, antes, depois = run_write(job)
+    indice.atualizar(antes, depois, alteracoes)
+    return resultado
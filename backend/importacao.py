@@ -0,0 +1,303 @@
+import csv
+import io
+import json
+import os
+import re
+from collections import Counter
+
+from database import run_write
+from matriculas import reservar_vagas
+from senhas import LimiteSenhas, get_senhas
+
+# =============================================
+# IMPORTAÇÃO DE ALUNOS EM LOTE
+# =============================================
+# Cadastrar alunos um por requisição custa dois SELECTs de unicidade, um
+# hash de senha, dois INSERTs e um UPDATE do contador da turma por aluno.
+# Aqui o arquivo (CSV ou JSON Lines) é lido em streaming e processado em
+# lotes de TAMANHO_LOTE linhas:
+#
+# 1. validação de cada linha (campos obrigatórios, email, turma existente) e
+#    de duplicidade dentro do próprio arquivo;
+# 2. unicidade de email/matrícula contra o banco com um SELECT ... IN por
+#    lote, em vez de um SELECT por aluno;
+# 3. hash das senhas no pool de processos (senhas.gerar_lote), com o mesmo
+#    controle de admissão dos logins: pool saturado vira erro das linhas do
+#    lote, que podem ser reenviadas, e os lotes seguintes continuam;
+# 4. uma transação por lote: vagas reservadas com um UPDATE condicional por
+#    turma do lote (matriculas.reservar_vagas) e executemany em usuarios e
+#    alunos. A unicidade é conferida de novo dentro da transação, então um
+#    cadastro concorrente vira erro da linha e não derruba o lote; linhas
+#    que não cabem na turma também.
+#
+# O resultado traz um relatório por linha com os erros encontrados; linhas
+# válidas são importadas mesmo que outras falhem.
+
+FORMATOS_IMPORTACAO = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+EXTENSOES_IMPORTACAO = {'.csv': 'csv', '.jsonl': 'ndjson', '.ndjson': 'ndjson'}
+
+CAMPOS_OBRIGATORIOS = ('nome', 'email', 'matricula', 'senha')
+CAMPOS_OPCIONAIS = ('turma_id', 'data_nascimento', 'endereco', 'telefone')
+
+TAMANHO_LOTE = 500
+MAX_ERROS_RELATORIO = 1000
+
+EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+class ErroImportacao(Exception):
+    """Erro que invalida o arquivo inteiro (formato desconhecido, cabeçalho faltando)"""
+
+    def __init__(self, mensagem, status_code=400):
+        super().__init__(mensagem)
+        self.status_code = status_code
+
+def formato_importacao(formato=None, mimetype=None, nome_arquivo=None):
+    """Formato pelo parâmetro explícito, pela extensão do arquivo ou pelo Content-Type"""
+    if formato:
+        if formato not in FORMATOS_IMPORTACAO:
+            raise ErroImportacao(f"Formato inválido: {formato} (use {', '.join(FORMATOS_IMPORTACAO)})")
+        return formato
+
+    extensao = os.path.splitext(nome_arquivo or '')[1].lower()
+    if extensao in EXTENSOES_IMPORTACAO:
+        return EXTENSOES_IMPORTACAO[extensao]
+    for nome, tipo in FORMATOS_IMPORTACAO.items():
+        if mimetype == tipo:
+            return nome
+    raise ErroImportacao('Informe o formato (?formato=csv|ndjson) ou envie um arquivo .csv/.jsonl')
+
+def ler_linhas(arquivo, formato):
+    """
+    Percorre o arquivo (binário ou texto) sem carregá-lo inteiro.
+
+    Gera (numero_linha, dados, erro): `dados` é um dict com os campos da
+    linha ou None quando a linha não pôde ser lida (erro preenchido).
+    """
+    if not isinstance(arquivo, io.TextIOBase):
+        arquivo = io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+
+    if formato == 'csv':
+        leitor = csv.DictReader(arquivo)
+        faltando = [campo for campo in CAMPOS_OBRIGATORIOS if campo not in (leitor.fieldnames or [])]
+        if faltando:
+            raise ErroImportacao(f"Cabeçalho do CSV sem as colunas: {', '.join(faltando)}")
+        for dados in leitor:
+            # Linha 1 é o cabeçalho
+            yield leitor.line_num, dados, None
+        return
+
+    for numero, linha in enumerate(arquivo, start=1):
+        if not linha.strip():
+            continue
+        try:
+            dados = json.loads(linha)
+        except ValueError as e:
+            yield numero, None, f'JSON inválido: {e}'
+            continue
+        if not isinstance(dados, dict):
+            yield numero, None, 'Cada linha deve ser um objeto JSON'
+            continue
+        yield numero, dados, None
+
+def _texto(valor):
+    if valor is None:
+        return None
+    valor = str(valor).strip()
+    return valor or None
+
+def validar_linha(dados, turmas_existentes):
+    """Normaliza a linha; retorna (aluno, erros)"""
+    aluno = {campo: _texto(dados.get(campo)) for campo in CAMPOS_OBRIGATORIOS + CAMPOS_OPCIONAIS}
+    erros = [f'Campo obrigatório: {campo}' for campo in CAMPOS_OBRIGATORIOS if not aluno[campo]]
+
+    if aluno['email'] and not EMAIL_RE.match(aluno['email']):
+        erros.append('Email inválido')
+
+    if aluno['turma_id'] is not None:
+        try:
+            aluno['turma_id'] = int(aluno['turma_id'])
+        except ValueError:
+            erros.append('turma_id deve ser um número')
+        else:
+            if aluno['turma_id'] not in turmas_existentes:
+                erros.append(f"Turma {aluno['turma_id']} não encontrada")
+
+    return aluno, erros
+
+def _existentes(conn, sql, valores):
+    valores = list(valores)
+    if not valores:
+        return set()
+    placeholders = ', '.join('?' for _ in valores)
+    return {row[0] for row in conn.execute(sql.format(placeholders=placeholders), valores)}
+
+def conflitos_no_banco(conn, alunos):
+    """(emails já cadastrados, matrículas já cadastradas) entre os alunos, com um SELECT de conjunto cada"""
+    emails = _existentes(conn, 'SELECT email FROM usuarios WHERE email IN ({placeholders})',
+                         {aluno['email'] for aluno in alunos})
+    matriculas = _existentes(conn, 'SELECT matricula FROM alunos WHERE matricula IN ({placeholders})',
+                             {aluno['matricula'] for aluno in alunos})
+    return emails, matriculas
+
+def _erros_conflito(aluno, emails, matriculas):
+    erros = []
+    if aluno['email'] in emails:
+        erros.append('Email já cadastrado')
+    if aluno['matricula'] in matriculas:
+        erros.append('Matrícula já existe')
+    return erros
+
+def gravar_lote(conn, linhas):
+    """
+    Job de escrita de um lote já validado e com senhas em hash.
+
+    `linhas` traz (numero_linha, aluno). Retorna (importados, erros) com os
+    erros das linhas que passaram a conflitar desde a validação.
+    """
+    emails, matriculas = conflitos_no_banco(conn, [aluno for _, aluno in linhas])
+    erros = []
+    candidatas = []
+    for numero, aluno in linhas:
+        conflitos = _erros_conflito(aluno, emails, matriculas)
+        if conflitos:
+            erros.append((numero, aluno, conflitos))
+        else:
+            candidatas.append((numero, aluno))
+
+    # Vagas reservadas por turma com o UPDATE condicional do motor de
+    # matrículas; quem não coube na turma não é importado
+    pedidas = Counter(aluno['turma_id'] for _, aluno in candidatas if aluno['turma_id'] is not None)
+    vagas = {turma_id: reservar_vagas(conn, turma_id, quantidade) for turma_id, quantidade in pedidas.items()}
+    validas = []
+    for numero, aluno in candidatas:
+        turma_id = aluno['turma_id']
+        if turma_id is not None:
+            if not vagas[turma_id]:
+                erros.append((numero, aluno, ['Turma está lotada']))
+                continue
+            vagas[turma_id] -= 1
+        validas.append(aluno)
+    if not validas:
+        return 0, erros
+
+    conn.executemany(
+        "INSERT INTO usuarios (nome, email, senha, tipo) VALUES (?, ?, ?, 'aluno')",
+        [(aluno['nome'], aluno['email'], aluno['senha']) for aluno in validas]
+    )
+    ids = {
+        row[0]: row[1] for row in conn.execute(
+            f"SELECT email, id FROM usuarios WHERE email IN ({', '.join('?' for _ in validas)})",
+            [aluno['email'] for aluno in validas]
+        )
+    }
+    conn.executemany('''
+        INSERT INTO alunos (usuario_id, matricula, turma_id, data_nascimento, endereco, telefone)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', [
+        (ids[aluno['email']], aluno['matricula'], aluno['turma_id'],
+         aluno['data_nascimento'], aluno['endereco'], aluno['telefone'])
+        for aluno in validas
+    ])
+    return len(validas), erros
+
+class RelatorioImportacao:
+    """Acumula o resultado da importação linha a linha"""
+
+    def __init__(self, max_erros=MAX_ERROS_RELATORIO):
+        self.max_erros = max_erros
+        self.total = 0
+        self.importados = 0
+        self.com_erro = 0
+        self.lotes = 0
+        self.erros = []
+
+    def erro(self, numero, erros, aluno=None):
+        self.com_erro += 1
+        if len(self.erros) < self.max_erros:
+            item = {'linha': numero, 'erros': erros}
+            if aluno:
+                item['email'] = aluno.get('email')
+                item['matricula'] = aluno.get('matricula')
+            self.erros.append(item)
+
+    def to_dict(self):
+        return {
+            'total': self.total,
+            'importados': self.importados,
+            'com_erro': self.com_erro,
+            'lotes': self.lotes,
+            'erros': self.erros,
+            'erros_omitidos': self.com_erro - len(self.erros)
+        }
+
+def importar_alunos(linhas, conn, escrever=run_write, senhas=None, tamanho_lote=TAMANHO_LOTE, simular=False):
+    """
+    Importa os alunos de `linhas` (saída de ler_linhas).
+
+    `conn` é usada para as leituras de validação e `escrever(fn, *args)`
+    executa cada lote como uma transação (run_write na aplicação). Com
+    `simular`, só valida: nada é gravado e nenhuma senha é processada.
+    """
+    senhas = senhas or get_senhas()
+    relatorio = RelatorioImportacao()
+    turmas_existentes = {row[0] for row in conn.execute('SELECT id FROM turmas')}
+    vistos_email, vistos_matricula = set(), set()
+    lote = []
+
+    def processar(lote):
+        emails, matriculas = conflitos_no_banco(conn, [aluno for _, aluno in lote])
+        pendentes = []
+        for numero, aluno in lote:
+            conflitos = _erros_conflito(aluno, emails, matriculas)
+            if conflitos:
+                relatorio.erro(numero, conflitos, aluno)
+            else:
+                pendentes.append((numero, aluno))
+        if not pendentes:
+            return
+        if simular:
+            relatorio.importados += len(pendentes)
+            return
+
+        try:
+            hashes = senhas.gerar_lote(aluno['senha'] for _, aluno in pendentes)
+        except LimiteSenhas as e:
+            for numero, aluno in pendentes:
+                relatorio.erro(numero, [e.message], aluno)
+            return
+        for (_, aluno), hash_senha in zip(pendentes, hashes):
+            aluno['senha'] = hash_senha
+        importados, erros = escrever(gravar_lote, pendentes)
+        relatorio.importados += importados
+        relatorio.lotes += 1
+        for numero, aluno, conflitos in erros:
+            relatorio.erro(numero, conflitos, aluno)
+
+    for numero, dados, erro in linhas:
+        relatorio.total += 1
+        if erro:
+            relatorio.erro(numero, [erro])
+            continue
+
+        aluno, erros = validar_linha(dados, turmas_existentes)
+        if aluno['email'] in vistos_email:
+            erros.append('Email repetido no arquivo')
+        if aluno['matricula'] in vistos_matricula:
+            erros.append('Matrícula repetida no arquivo')
+        if erros:
+            relatorio.erro(numero, erros, aluno)
+            continue
+
+        vistos_email.add(aluno['email'])
+        vistos_matricula.add(aluno['matricula'])
+        lote.append((numero, aluno))
+        if len(lote) >= tamanho_lote:
+            processar(lote)
+            lote = []
+
+    if lote:
+        processar(lote)
+    return relatorio.to_dict()
@@ -0,0 +1,254 @@
+# =============================================
+# MOTOR DE MATRÍCULAS
+# =============================================
+# A vaga é reservada e o contador `turmas.alunos_matriculados` incrementado
+# em um único UPDATE condicional (`... WHERE alunos_matriculados + n <=
+# capacidade_max`), dentro da transação de escrita (BEGIN IMMEDIATE na fila
+# de escrita): duas matrículas simultâneas não conseguem passar ambas pela
+# checagem de capacidade, nem entre processos diferentes. Antes a rota lia o
+# contador, comparava em Python e só depois atualizava.
+#
+# Todas as mudanças de turma de um aluno (matrícula, remoção, troca,
+# cadastro e exclusão) passam por aqui, sempre como jobs de run_write: as
+# funções recebem a conexão da transação e não fazem commit. Quando uma vaga
+# é liberada, o primeiro aluno da lista de espera da turma (migração 008)
+# que ainda não tem turma é matriculado na mesma transação.
+
+class ErroMatricula(Exception):
+    """Matrícula recusada (turma ou aluno inexistente, turma lotada, aluno já matriculado)"""
+
+    def __init__(self, mensagem, status_code=400):
+        super().__init__(mensagem)
+        self.status_code = status_code
+
+def ler_turma_id(valor):
+    """turma_id vindo do JSON: vazio vira None e texto numérico ("1") vira int
+
+    O formulário envia o id como texto; sem a conversão, "1" != 1 e trocar o
+    aluno para a própria turma tentaria reservar uma segunda vaga nela.
+    """
+    if valor is None or valor == '':
+        return None
+    if isinstance(valor, bool):
+        raise ErroMatricula('turma_id inválido')
+    if isinstance(valor, int):
+        return valor
+    if isinstance(valor, str) and valor.strip().isdigit():
+        return int(valor)
+    raise ErroMatricula('turma_id inválido')
+
+RESERVAR_VAGAS_SQL = '''
+    UPDATE turmas SET alunos_matriculados = alunos_matriculados + ?
+    WHERE id = ? AND (capacidade_max IS NULL OR alunos_matriculados + ? <= capacidade_max)
+'''
+
+LIBERAR_VAGAS_SQL = '''
+    UPDATE turmas SET alunos_matriculados = MAX(alunos_matriculados - ?, 0)
+    WHERE id = ?
+'''
+
+def _turma(conn, turma_id):
+    turma = conn.execute(
+        'SELECT id, capacidade_max, alunos_matriculados FROM turmas WHERE id = ?', (turma_id,)
+    ).fetchone()
+    if not turma:
+        raise ErroMatricula('Turma não encontrada', 404)
+    return turma
+
+def reservar_vagas(conn, turma_id, quantidade):
+    """
+    Reserva até `quantidade` vagas na turma e retorna quantas conseguiu.
+
+    A capacidade é conferida pelo próprio UPDATE, então o resultado vale
+    mesmo com outras transações reservando vagas ao mesmo tempo.
+    """
+    if quantidade <= 0:
+        return 0
+    if conn.execute(RESERVAR_VAGAS_SQL, (quantidade, turma_id, quantidade)).rowcount:
+        return quantidade
+
+    turma = _turma(conn, turma_id)
+    livres = turma['capacidade_max'] - turma['alunos_matriculados']
+    if livres > 0 and conn.execute(RESERVAR_VAGAS_SQL, (livres, turma_id, livres)).rowcount:
+        return livres
+    return 0
+
+def liberar_vagas(conn, turma_id, quantidade=1):
+    """Devolve vagas à turma (o contador nunca fica negativo)"""
+    if turma_id is not None and quantidade > 0:
+        conn.execute(LIBERAR_VAGAS_SQL, (quantidade, turma_id))
+
+def _aluno(conn, aluno_id):
+    aluno = conn.execute('SELECT id, turma_id FROM alunos WHERE id = ?', (aluno_id,)).fetchone()
+    if not aluno:
+        raise ErroMatricula('Aluno não encontrado', 404)
+    return aluno
+
+def entrar_lista_espera(conn, turma_id, aluno_id):
+    """Coloca o aluno na lista de espera da turma e retorna sua posição"""
+    conn.execute(
+        'INSERT OR IGNORE INTO lista_espera (turma_id, aluno_id) VALUES (?, ?)', (turma_id, aluno_id)
+    )
+    return conn.execute('''
+        SELECT COUNT(*) FROM lista_espera
+        WHERE turma_id = ? AND id <= (SELECT id FROM lista_espera WHERE turma_id = ? AND aluno_id = ?)
+    ''', (turma_id, turma_id, aluno_id)).fetchone()[0]
+
+def sair_lista_espera(conn, turma_id, aluno_id):
+    """Remove o aluno da lista de espera; retorna se ele estava nela"""
+    return conn.execute(
+        'DELETE FROM lista_espera WHERE turma_id = ? AND aluno_id = ?', (turma_id, aluno_id)
+    ).rowcount > 0
+
+def listar_espera(conn, turma_id):
+    """Alunos na lista de espera da turma, na ordem de chegada"""
+    _turma(conn, turma_id)
+    return [
+        dict(row, posicao=posicao) for posicao, row in enumerate(conn.execute('''
+            SELECT le.aluno_id, a.matricula, u.nome, le.criado_em
+            FROM lista_espera le
+            JOIN alunos a ON a.id = le.aluno_id
+            JOIN usuarios u ON u.id = a.usuario_id
+            WHERE le.turma_id = ?
+            ORDER BY le.id
+        ''', (turma_id,)).fetchall(), start=1)
+    ]
+
+def _ocupar(conn, turma_id, aluno_ids):
+    conn.executemany(
+        'UPDATE alunos SET turma_id = ? WHERE id = ? AND turma_id IS NULL',
+        [(turma_id, aluno_id) for aluno_id in aluno_ids]
+    )
+    # Quem entrou na turma sai de todas as listas de espera
+    conn.executemany('DELETE FROM lista_espera WHERE aluno_id = ?', [(aluno_id,) for aluno_id in aluno_ids])
+
+def matricular(conn, turma_id, aluno_id, lista_espera=False):
+    """
+    Matricula o aluno (sem turma) na turma.
+
+    Retorna {'status': 'matriculado'} ou, com a turma lotada e
+    `lista_espera`, {'status': 'lista_espera', 'posicao': n}. Sem lista de
+    espera, turma lotada é ErroMatricula.
+    """
+    aluno = _aluno(conn, aluno_id)
+    if aluno['turma_id'] == turma_id:
+        raise ErroMatricula('Aluno já está matriculado nesta turma')
+    if aluno['turma_id']:
+        raise ErroMatricula('Aluno já está matriculado em outra turma')
+
+    if reservar_vagas(conn, turma_id, 1):
+        _ocupar(conn, turma_id, [aluno_id])
+        return {'status': 'matriculado'}
+
+    if not lista_espera:
+        raise ErroMatricula('Turma está lotada')
+    return {'status': 'lista_espera', 'posicao': entrar_lista_espera(conn, turma_id, aluno_id)}
+
+def matricular_em_lote(conn, turma_id, aluno_ids, lista_espera=False):
+    """
+    Matricula vários alunos na turma em uma transação.
+
+    Alunos inexistentes ou já com turma são recusados; os demais ocupam as
+    vagas livres na ordem recebida e os que sobrarem vão para a lista de
+    espera (ou são recusados). Retorna um resultado por aluno e o resumo.
+    """
+    _turma(conn, turma_id)
+    ids = list(dict.fromkeys(aluno_ids))
+    turmas = {}
+    if ids:
+        turmas = {
+            row['id']: row['turma_id'] for row in conn.execute(
+                f"SELECT id, turma_id FROM alunos WHERE id IN ({', '.join('?' for _ in ids)})", ids
+            )
+        }
+
+    resultados = {}
+    elegiveis = []
+    for aluno_id in ids:
+        if aluno_id not in turmas:
+            resultados[aluno_id] = {'status': 'recusado', 'motivo': 'Aluno não encontrado'}
+        elif turmas[aluno_id] == turma_id:
+            resultados[aluno_id] = {'status': 'recusado', 'motivo': 'Aluno já está matriculado nesta turma'}
+        elif turmas[aluno_id]:
+            resultados[aluno_id] = {'status': 'recusado', 'motivo': 'Aluno já está matriculado em outra turma'}
+        else:
+            elegiveis.append(aluno_id)
+
+    vagas = reservar_vagas(conn, turma_id, len(elegiveis))
+    _ocupar(conn, turma_id, elegiveis[:vagas])
+    for aluno_id in elegiveis[:vagas]:
+        resultados[aluno_id] = {'status': 'matriculado'}
+    for aluno_id in elegiveis[vagas:]:
+        if lista_espera:
+            resultados[aluno_id] = {'status': 'lista_espera', 'posicao': entrar_lista_espera(conn, turma_id, aluno_id)}
+        else:
+            resultados[aluno_id] = {'status': 'recusado', 'motivo': 'Turma está lotada'}
+
+    lista = [dict(resultados[aluno_id], aluno_id=aluno_id) for aluno_id in ids]
+    resumo = {
+        status: sum(1 for resultado in lista if resultado['status'] == status)
+        for status in ('matriculado', 'lista_espera', 'recusado')
+    }
+    return {'resultados': lista, 'resumo': resumo}
+
+def promover_lista_espera(conn, turma_id):
+    """Ocupa as vagas livres da turma com a lista de espera; retorna os alunos matriculados"""
+    candidatos = [
+        row['aluno_id'] for row in conn.execute('''
+            SELECT le.aluno_id FROM lista_espera le
+            JOIN alunos a ON a.id = le.aluno_id
+            WHERE le.turma_id = ? AND a.turma_id IS NULL
+            ORDER BY le.id
+        ''', (turma_id,))
+    ]
+    if not candidatos:
+        return []
+    vagas = reservar_vagas(conn, turma_id, len(candidatos))
+    _ocupar(conn, turma_id, candidatos[:vagas])
+    return candidatos[:vagas]
+
+def desmatricular(conn, turma_id, aluno_id):
+    """Tira o aluno da turma, libera a vaga e promove a lista de espera"""
+    if not conn.execute(
+        'UPDATE alunos SET turma_id = NULL WHERE id = ? AND turma_id = ?', (aluno_id, turma_id)
+    ).rowcount:
+        raise ErroMatricula('Aluno não encontrado nesta turma', 404)
+    liberar_vagas(conn, turma_id)
+    return {'promovidos': promover_lista_espera(conn, turma_id)}
+
+def transferir(conn, aluno_id, turma_destino):
+    """
+    Troca a turma do aluno (turma_destino None tira o aluno da turma).
+
+    A vaga no destino é reservada antes de liberar a de origem; com o
+    destino lotado nada muda e a transação é abortada com ErroMatricula.
+    """
+    aluno = _aluno(conn, aluno_id)
+    origem = aluno['turma_id']
+    if origem == turma_destino:
+        return {'promovidos': []}
+
+    if turma_destino is not None and not reservar_vagas(conn, turma_destino, 1):
+        raise ErroMatricula('Turma está lotada')
+    conn.execute('UPDATE alunos SET turma_id = ? WHERE id = ?', (turma_destino, aluno_id))
+    if turma_destino is not None:
+        conn.execute('DELETE FROM lista_espera WHERE aluno_id = ?', (aluno_id,))
+
+    promovidos = []
+    if origem is not None:
+        liberar_vagas(conn, origem)
+        promovidos = promover_lista_espera(conn, origem)
+    return {'promovidos': promovidos}
+
+def excluir_aluno(conn, aluno_id):
+    """Exclui o aluno e seu usuário, liberando a vaga da turma"""
+    aluno = conn.execute('SELECT usuario_id, turma_id FROM alunos WHERE id = ?', (aluno_id,)).fetchone()
+    if not aluno:
+        raise ErroMatricula('Aluno não encontrado', 404)
+    conn.execute('DELETE FROM lista_espera WHERE aluno_id = ?', (aluno_id,))
+    conn.execute('DELETE FROM alunos WHERE id = ?', (aluno_id,))
+    conn.execute('DELETE FROM usuarios WHERE id = ?', (aluno['usuario_id'],))
+    if aluno['turma_id'] is not None:
+        liberar_vagas(conn, aluno['turma_id'])
+        return {'promovidos': promover_lista_espera(conn, aluno['turma_id'])}
+    return {'promovidos': []}
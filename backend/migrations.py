@@ -0,0 +1,742 @@
+import re
+import sqlite3
+from stats import recalcular_estatisticas
+from versioning import TABELAS_VERSIONADAS
+from search import PESOS_BM25, reconstruir_indice
+from agregados import DIMENSOES_AGREGADOS, recalcular_agregados, sql_extremo
+
+# =============================================
+# MIGRAÇÕES VERSIONADAS DO SCHEMA
+# =============================================
+# A versão aplicada fica em PRAGMA user_version. Cada migração roda em uma
+# única transação e só avança a versão se terminar sem erros.
+
+def _garantir_colunas(conn, tabela, colunas):
+    """Adiciona colunas ausentes em bancos criados por versões antigas do schema"""
+    existentes = {row[1] for row in conn.execute(f'PRAGMA table_info({tabela})')}
+    for nome, definicao in colunas.items():
+        if nome not in existentes:
+            conn.execute(f'ALTER TABLE {tabela} ADD COLUMN {nome} {definicao}')
+
+def migracao_001_schema_base(conn):
+    """Schema base (mesma estrutura de database.init_db)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            senha TEXT NOT NULL,
+            tipo TEXT NOT NULL CHECK(tipo IN ('aluno', 'professor', 'admin')),
+            telefone TEXT,
+            formacao TEXT,
+            experiencia INTEGER,
+            criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS turmas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            codigo TEXT UNIQUE NOT NULL,
+            descricao TEXT,
+            ano_letivo TEXT NOT NULL,
+            periodo TEXT NOT NULL,
+            capacidade_min INTEGER DEFAULT 30,
+            capacidade_max INTEGER DEFAULT 90,
+            alunos_matriculados INTEGER DEFAULT 0,
+            criado_por INTEGER,
+            criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (criado_por) REFERENCES usuarios (id)
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS alunos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER UNIQUE,
+            matricula TEXT UNIQUE NOT NULL,
+            turma_id INTEGER,
+            data_nascimento DATE,
+            endereco TEXT,
+            telefone TEXT,
+            criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios (id),
+            FOREIGN KEY (turma_id) REFERENCES turmas (id)
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS materias (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            descricao TEXT,
+            turma_id INTEGER,
+            professor_id INTEGER,
+            horario TEXT,
+            dia_semana TEXT,
+            carga_horaria_semanal INTEGER DEFAULT 4,
+            data_inicio DATE,
+            dias_aula TEXT,
+            observacoes TEXT,
+            criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (turma_id) REFERENCES turmas (id),
+            FOREIGN KEY (professor_id) REFERENCES usuarios (id)
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS atividades (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            titulo TEXT NOT NULL,
+            descricao TEXT,
+            materia_id INTEGER,
+            data_entrega DATE,
+            valor DECIMAL(5,2),
+            criado_por INTEGER,
+            criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (materia_id) REFERENCES materias (id),
+            FOREIGN KEY (criado_por) REFERENCES usuarios (id)
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS notas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            aluno_id INTEGER,
+            atividade_id INTEGER,
+            nota DECIMAL(5,2),
+            feedback TEXT,
+            data_avaliacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            avaliado_por INTEGER,
+            FOREIGN KEY (aluno_id) REFERENCES alunos (id),
+            FOREIGN KEY (atividade_id) REFERENCES atividades (id),
+            FOREIGN KEY (avaliado_por) REFERENCES usuarios (id)
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS feedback (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            user_type TEXT,
+            feedback TEXT,
+            rating INTEGER,
+            suggestions TEXT,
+            criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES usuarios (id)
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS dias_sem_aula (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data DATE NOT NULL,
+            motivo TEXT,
+            turma_id INTEGER,
+            criado_por INTEGER,
+            FOREIGN KEY (turma_id) REFERENCES turmas (id),
+            FOREIGN KEY (criado_por) REFERENCES usuarios (id)
+        )
+    ''')
+
+    # Bancos criados pelo init_db do app.py ou pelo database/init_db.py
+    _garantir_colunas(conn, 'usuarios', {
+        'telefone': 'TEXT',
+        'formacao': 'TEXT',
+        'experiencia': 'INTEGER'
+    })
+    _garantir_colunas(conn, 'turmas', {'capacidade_min': 'INTEGER DEFAULT 30'})
+    _garantir_colunas(conn, 'materias', {
+        'descricao': 'TEXT',
+        'carga_horaria_semanal': 'INTEGER DEFAULT 4',
+        'data_inicio': 'DATE',
+        'dias_aula': 'TEXT',
+        'observacoes': 'TEXT'
+    })
+
+def migracao_002_indices(conn):
+    """Índices para chaves estrangeiras e colunas de filtro"""
+    # Notas duplicadas impediriam o índice único: mantém a avaliação mais recente
+    conn.execute('''
+        DELETE FROM notas
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM notas GROUP BY aluno_id, atividade_id
+        )
+    ''')
+
+    indices = [
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_notas_aluno_atividade ON notas (aluno_id, atividade_id)',
+        'CREATE INDEX IF NOT EXISTS idx_notas_atividade ON notas (atividade_id)',
+        'CREATE INDEX IF NOT EXISTS idx_alunos_turma ON alunos (turma_id)',
+        'CREATE INDEX IF NOT EXISTS idx_materias_professor_turma ON materias (professor_id, turma_id)',
+        'CREATE INDEX IF NOT EXISTS idx_materias_turma_dia ON materias (turma_id, dia_semana, horario)',
+        'CREATE INDEX IF NOT EXISTS idx_atividades_materia ON atividades (materia_id, data_entrega)',
+        'CREATE INDEX IF NOT EXISTS idx_atividades_criado_por ON atividades (criado_por)',
+        'CREATE INDEX IF NOT EXISTS idx_dias_sem_aula_turma_data ON dias_sem_aula (turma_id, data)',
+        'CREATE INDEX IF NOT EXISTS idx_usuarios_tipo_nome ON usuarios (tipo, nome)'
+    ]
+    for sql in indices:
+        conn.execute(sql)
+
+def migracao_003_estatisticas(conn):
+    """Contadores do dashboard mantidos por triggers"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS estatisticas (
+            chave TEXT PRIMARY KEY,
+            valor INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS estatisticas_professores (
+            professor_id INTEGER PRIMARY KEY,
+            total_materias INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_estatisticas_professores_total
+        ON estatisticas_professores (total_materias DESC)
+    ''')
+
+    # Contadores simples: +1 na inserção, -1 na exclusão
+    for tabela, chave in [('alunos', 'total_alunos'), ('turmas', 'total_turmas'), ('atividades', 'total_atividades')]:
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{tabela}_estatisticas_ins AFTER INSERT ON {tabela}
+            BEGIN
+                UPDATE estatisticas SET valor = valor + 1 WHERE chave = '{chave}';
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{tabela}_estatisticas_del AFTER DELETE ON {tabela}
+            BEGIN
+                UPDATE estatisticas SET valor = valor - 1 WHERE chave = '{chave}';
+            END
+        ''')
+
+    # Professores: contador global e linha própria com o total de matérias
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_usuarios_estatisticas_ins
+        AFTER INSERT ON usuarios WHEN NEW.tipo = 'professor'
+        BEGIN
+            UPDATE estatisticas SET valor = valor + 1 WHERE chave = 'total_professores';
+            INSERT OR IGNORE INTO estatisticas_professores (professor_id, total_materias)
+            VALUES (NEW.id, (SELECT COUNT(*) FROM materias WHERE professor_id = NEW.id));
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_usuarios_estatisticas_del
+        AFTER DELETE ON usuarios WHEN OLD.tipo = 'professor'
+        BEGIN
+            UPDATE estatisticas SET valor = valor - 1 WHERE chave = 'total_professores';
+            DELETE FROM estatisticas_professores WHERE professor_id = OLD.id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_usuarios_virou_professor
+        AFTER UPDATE OF tipo ON usuarios WHEN NEW.tipo = 'professor' AND OLD.tipo <> 'professor'
+        BEGIN
+            UPDATE estatisticas SET valor = valor + 1 WHERE chave = 'total_professores';
+            INSERT OR IGNORE INTO estatisticas_professores (professor_id, total_materias)
+            VALUES (NEW.id, (SELECT COUNT(*) FROM materias WHERE professor_id = NEW.id));
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_usuarios_deixou_professor
+        AFTER UPDATE OF tipo ON usuarios WHEN OLD.tipo = 'professor' AND NEW.tipo <> 'professor'
+        BEGIN
+            UPDATE estatisticas SET valor = valor - 1 WHERE chave = 'total_professores';
+            DELETE FROM estatisticas_professores WHERE professor_id = OLD.id;
+        END
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_materias_estatisticas_ins AFTER INSERT ON materias
+        BEGIN
+            UPDATE estatisticas_professores SET total_materias = total_materias + 1
+            WHERE professor_id = NEW.professor_id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_materias_estatisticas_del AFTER DELETE ON materias
+        BEGIN
+            UPDATE estatisticas_professores SET total_materias = total_materias - 1
+            WHERE professor_id = OLD.professor_id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_materias_estatisticas_upd
+        AFTER UPDATE OF professor_id ON materias WHEN OLD.professor_id IS NOT NEW.professor_id
+        BEGIN
+            UPDATE estatisticas_professores SET total_materias = total_materias - 1
+            WHERE professor_id = OLD.professor_id;
+            UPDATE estatisticas_professores SET total_materias = total_materias + 1
+            WHERE professor_id = NEW.professor_id;
+        END
+    ''')
+
+    recalcular_estatisticas(conn)
+
+def migracao_004_versoes_e_snapshots(conn):
+    """Contadores de versão por tabela e snapshots de relatórios"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS versoes_tabelas (
+            tabela TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+
+    for tabela in TABELAS_VERSIONADAS:
+        conn.execute('INSERT OR IGNORE INTO versoes_tabelas (tabela, versao) VALUES (?, 0)', (tabela,))
+        for evento in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{tabela}_versao_{evento.lower()} AFTER {evento} ON {tabela}
+                BEGIN
+                    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = '{tabela}';
+                END
+            ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS snapshots_relatorios (
+            nome TEXT PRIMARY KEY,
+            assinatura TEXT NOT NULL,
+            gerado_em TIMESTAMP NOT NULL,
+            conteudo TEXT NOT NULL
+        )
+    ''')
+
+def migracao_005_indices_paginacao(conn):
+    """Índices de ordenação usados pela paginação por cursor (pagination.py)"""
+    indices = [
+        'CREATE INDEX IF NOT EXISTS idx_usuarios_nome ON usuarios (nome)',
+        'CREATE INDEX IF NOT EXISTS idx_turmas_nome ON turmas (nome)',
+        'CREATE INDEX IF NOT EXISTS idx_materias_nome ON materias (nome)',
+        'CREATE INDEX IF NOT EXISTS idx_atividades_entrega ON atividades (data_entrega)'
+    ]
+    for sql in indices:
+        conn.execute(sql)
+
+def migracao_006_busca_alunos(conn):
+    """Índice FTS5 de alunos (nome, email, matrícula) mantido por triggers"""
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS alunos_busca USING fts5(
+            nome, email, matricula,
+            tokenize = "unicode61 remove_diacritics 2",
+            prefix = '2 3'
+        )
+    ''')
+    pesos = ', '.join(str(peso) for peso in PESOS_BM25)
+    conn.execute(
+        "INSERT INTO alunos_busca (alunos_busca, rank) VALUES ('rank', ?)", (f'bm25({pesos})',)
+    )
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_alunos_busca_ins AFTER INSERT ON alunos
+        BEGIN
+            INSERT INTO alunos_busca (rowid, nome, email, matricula)
+            SELECT NEW.id, u.nome, u.email, NEW.matricula FROM usuarios u WHERE u.id = NEW.usuario_id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_alunos_busca_del AFTER DELETE ON alunos
+        BEGIN
+            DELETE FROM alunos_busca WHERE rowid = OLD.id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_alunos_busca_upd AFTER UPDATE OF usuario_id, matricula ON alunos
+        BEGIN
+            DELETE FROM alunos_busca WHERE rowid = OLD.id;
+            INSERT INTO alunos_busca (rowid, nome, email, matricula)
+            SELECT NEW.id, u.nome, u.email, NEW.matricula FROM usuarios u WHERE u.id = NEW.usuario_id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_usuarios_busca_upd AFTER UPDATE OF nome, email ON usuarios
+        BEGIN
+            UPDATE alunos_busca SET nome = NEW.nome, email = NEW.email
+            WHERE rowid IN (SELECT id FROM alunos WHERE usuario_id = NEW.id);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_usuarios_busca_del AFTER DELETE ON usuarios
+        BEGIN
+            DELETE FROM alunos_busca WHERE rowid IN (SELECT id FROM alunos WHERE usuario_id = OLD.id);
+        END
+    ''')
+
+    reconstruir_indice(conn)
+
+# Evento do diário com matéria e turma resolvidas pela atividade no momento da mudança
+_EVENTO_NOTA_SQL = '''
+    INSERT INTO notas_eventos
+        (nota_id, operacao, aluno_id, atividade_id, materia_id, turma_id, nota_anterior, nota_nova)
+    VALUES (
+        {linha}.id, '{operacao}', {linha}.aluno_id, {linha}.atividade_id,
+        (SELECT materia_id FROM atividades WHERE id = {linha}.atividade_id),
+        (SELECT m.turma_id FROM atividades a JOIN materias m ON m.id = a.materia_id
+         WHERE a.id = {linha}.atividade_id),
+        {anterior}, {nova}
+    );
+'''
+
+def migracao_007_diario_notas(conn):
+    """Diário de mudanças de notas e agregados incrementais por aluno, turma e matéria"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS notas_eventos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nota_id INTEGER NOT NULL,
+            operacao TEXT NOT NULL CHECK (operacao IN ('INSERT', 'UPDATE', 'DELETE')),
+            aluno_id INTEGER,
+            atividade_id INTEGER,
+            materia_id INTEGER,
+            turma_id INTEGER,
+            nota_anterior REAL,
+            nota_nova REAL,
+            registrado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS agregados_notas (
+            dimensao TEXT NOT NULL,
+            chave INTEGER NOT NULL,
+            soma REAL NOT NULL DEFAULT 0,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            registros INTEGER NOT NULL DEFAULT 0,
+            minimo REAL,
+            maximo REAL,
+            PRIMARY KEY (dimensao, chave)
+        ) WITHOUT ROWID
+    ''')
+
+    # Diário: uma linha por mudança de nota, vinda de qualquer caminho de escrita
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_notas_diario_ins AFTER INSERT ON notas
+        BEGIN
+            {_EVENTO_NOTA_SQL.format(linha='NEW', operacao='INSERT', anterior='NULL', nova='NEW.nota')}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_notas_diario_del AFTER DELETE ON notas
+        BEGIN
+            {_EVENTO_NOTA_SQL.format(linha='OLD', operacao='DELETE', anterior='OLD.nota', nova='NULL')}
+        END
+    ''')
+    # Upserts que regravam a mesma nota não geram evento
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_notas_diario_upd AFTER UPDATE OF nota ON notas
+        WHEN OLD.aluno_id IS NEW.aluno_id AND OLD.atividade_id IS NEW.atividade_id
+             AND OLD.nota IS NOT NEW.nota
+        BEGIN
+            {_EVENTO_NOTA_SQL.format(linha='NEW', operacao='UPDATE', anterior='OLD.nota', nova='NEW.nota')}
+        END
+    ''')
+    # Nota movida para outro aluno/atividade: sai de um grupo e entra em outro
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_notas_diario_mov AFTER UPDATE OF aluno_id, atividade_id ON notas
+        WHEN OLD.aluno_id IS NOT NEW.aluno_id OR OLD.atividade_id IS NOT NEW.atividade_id
+        BEGIN
+            {_EVENTO_NOTA_SQL.format(linha='OLD', operacao='DELETE', anterior='OLD.nota', nova='NULL')}
+            {_EVENTO_NOTA_SQL.format(linha='NEW', operacao='INSERT', anterior='NULL', nova='NEW.nota')}
+        END
+    ''')
+
+    # As notas existentes entram no diário como inserções iniciais
+    conn.execute('''
+        INSERT INTO notas_eventos
+            (nota_id, operacao, aluno_id, atividade_id, materia_id, turma_id, nota_anterior, nota_nova)
+        SELECT n.id, 'INSERT', n.aluno_id, n.atividade_id, a.materia_id, m.turma_id, NULL, n.nota
+        FROM notas n
+        LEFT JOIN atividades a ON a.id = n.atividade_id
+        LEFT JOIN materias m ON m.id = a.materia_id
+        ORDER BY n.id
+    ''')
+
+    # Agregados: cada evento aplica a diferença (nota nova - nota anterior) nas
+    # três dimensões; mínimo/máximo só são relidos quando o extremo saiu
+    for dimensao in DIMENSOES_AGREGADOS:
+        coluna = f'NEW.{dimensao}_id'
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_notas_eventos_{dimensao} AFTER INSERT ON notas_eventos
+            WHEN {coluna} IS NOT NULL
+            BEGIN
+                -- Sem OR IGNORE: a política de conflito do comando externo (upsert) prevaleceria
+                INSERT INTO agregados_notas (dimensao, chave)
+                SELECT '{dimensao}', {coluna}
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM agregados_notas WHERE dimensao = '{dimensao}' AND chave = {coluna}
+                );
+                UPDATE agregados_notas SET
+                    soma = soma - COALESCE(NEW.nota_anterior, 0) + COALESCE(NEW.nota_nova, 0),
+                    quantidade = quantidade - (NEW.nota_anterior IS NOT NULL) + (NEW.nota_nova IS NOT NULL),
+                    registros = registros + (NEW.operacao = 'INSERT') - (NEW.operacao = 'DELETE'),
+                    minimo = CASE
+                        WHEN NEW.nota_anterior IS NOT NULL AND NEW.nota_anterior <= minimo
+                            THEN {sql_extremo(dimensao, 'MIN', coluna)}
+                        WHEN NEW.nota_nova IS NULL THEN minimo
+                        WHEN minimo IS NULL OR NEW.nota_nova < minimo THEN NEW.nota_nova
+                        ELSE minimo
+                    END,
+                    maximo = CASE
+                        WHEN NEW.nota_anterior IS NOT NULL AND NEW.nota_anterior >= maximo
+                            THEN {sql_extremo(dimensao, 'MAX', coluna)}
+                        WHEN NEW.nota_nova IS NULL THEN maximo
+                        WHEN maximo IS NULL OR NEW.nota_nova > maximo THEN NEW.nota_nova
+                        ELSE maximo
+                    END
+                WHERE dimensao = '{dimensao}' AND chave = {coluna};
+            END
+        ''')
+
+    recalcular_agregados(conn)
+
+def migracao_008_lista_espera(conn):
+    """Lista de espera de matrículas e recontagem de alunos_matriculados"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS lista_espera (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            turma_id INTEGER NOT NULL,
+            aluno_id INTEGER NOT NULL,
+            criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (turma_id, aluno_id),
+            FOREIGN KEY (turma_id) REFERENCES turmas (id),
+            FOREIGN KEY (aluno_id) REFERENCES alunos (id)
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_lista_espera_aluno ON lista_espera (aluno_id)')
+
+    # O contador era mantido por comandos separados em cada rota e pode ter
+    # divergido; a partir daqui só o motor de matrículas o altera
+    conn.execute('''
+        UPDATE turmas SET alunos_matriculados = (
+            SELECT COUNT(*) FROM alunos WHERE alunos.turma_id = turmas.id
+        )
+    ''')
+
+def migracao_009_momento_versoes(conn):
+    """Momento da última escrita por tabela versionada (Last-Modified das respostas)"""
+    _garantir_colunas(conn, 'versoes_tabelas', {'atualizado_em': 'INTEGER'})
+    conn.execute("UPDATE versoes_tabelas SET atualizado_em = CAST(strftime('%s', 'now') AS INTEGER)")
+
+    # Os triggers da migração 004 passam a registrar também o momento (segundos UTC)
+    for tabela in TABELAS_VERSIONADAS:
+        for evento in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(f'DROP TRIGGER IF EXISTS trg_{tabela}_versao_{evento.lower()}')
+            conn.execute(f'''
+                CREATE TRIGGER trg_{tabela}_versao_{evento.lower()} AFTER {evento} ON {tabela}
+                BEGIN
+                    UPDATE versoes_tabelas
+                    SET versao = versao + 1, atualizado_em = CAST(strftime('%s', 'now') AS INTEGER)
+                    WHERE tabela = '{tabela}';
+                END
+            ''')
+
+def migracao_010_tarefas_grade(conn):
+    """Estado das gerações de grade, visível a todos os workers"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tarefas_grade (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            estado TEXT NOT NULL,
+            criada_em REAL NOT NULL,
+            atualizada_em REAL NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_tarefas_grade_criada_em ON tarefas_grade (criada_em)')
+
+def migracao_011_feeds_calendario(conn):
+    """Versão do link do feed iCalendar de cada aluno (renovar invalida o anterior)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS calendario_feeds (
+            aluno_id INTEGER PRIMARY KEY,
+            versao INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (aluno_id) REFERENCES alunos (id)
+        )
+    ''')
+
+def migracao_012_logins_em_andamento(conn):
+    """Verificações de senha em andamento por conta e por IP, somadas entre os workers"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS logins_em_andamento (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            conta TEXT,
+            ip TEXT,
+            expira_em REAL NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_logins_em_andamento_conta ON logins_em_andamento (conta)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_logins_em_andamento_ip ON logins_em_andamento (ip)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_logins_em_andamento_expira ON logins_em_andamento (expira_em)')
+
+def migracao_013_chave_atividades(conn):
+    """Índice da chave de paginação de atividades, que trata data_entrega NULL como ''"""
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_atividades_entrega_chave ON atividades (COALESCE(data_entrega, ''))"
+    )
+
+MIGRACOES = [
+    (1, 'schema base', migracao_001_schema_base),
+    (2, 'índices de chaves estrangeiras e filtros', migracao_002_indices),
+    (3, 'estatísticas materializadas do dashboard', migracao_003_estatisticas),
+    (4, 'versões de tabelas e snapshots de relatórios', migracao_004_versoes_e_snapshots),
+    (5, 'índices de paginação por cursor', migracao_005_indices_paginacao),
+    (6, 'busca de alunos (FTS5)', migracao_006_busca_alunos),
+    (7, 'diário de notas e agregados incrementais', migracao_007_diario_notas),
+    (8, 'lista de espera de matrículas', migracao_008_lista_espera),
+    (9, 'momento da última escrita por tabela versionada', migracao_009_momento_versoes),
+    (10, 'tarefas de geração de grade', migracao_010_tarefas_grade),
+    (11, 'links do feed do calendário', migracao_011_feeds_calendario),
+    (12, 'logins em andamento por conta e por IP', migracao_012_logins_em_andamento),
+    (13, 'chave de paginação de atividades sem NULL', migracao_013_chave_atividades)
+]
+
+def versao_atual(conn):
+    """Retorna a versão de schema registrada no banco"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def aplicar_migracoes(conn, verbose=False, analisar=True):
+    """Aplica as migrações pendentes e retorna a lista de versões aplicadas"""
+    if conn.in_transaction:
+        conn.commit()
+
+    aplicadas = []
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None  # controle explícito da transação
+    try:
+        for versao, descricao, migracao in MIGRACOES:
+            if versao <= versao_atual(conn):
+                continue
+
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                migracao(conn)
+                conn.execute(f'PRAGMA user_version = {versao}')
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+            aplicadas.append(versao)
+            if verbose:
+                print(f"✅ Migração {versao:03d} aplicada: {descricao}")
+    finally:
+        conn.isolation_level = isolation_level
+
+    if aplicadas and analisar:
+        conn.execute('ANALYZE')
+    return aplicadas
+
+# =============================================
+# REGRESSÃO DE PLANOS DE CONSULTA
+# =============================================
+# Consultas quentes que precisam usar índice. verificar_planos() falha se o
+# EXPLAIN QUERY PLAN de alguma delas cair em SCAN de tabela.
+
+CONSULTAS_CRITICAS = {
+    'nota_por_aluno_atividade': (
+        'SELECT id FROM notas WHERE aluno_id = ? AND atividade_id = ?', (1, 1)
+    ),
+    'agregado_do_aluno': (
+        "SELECT soma / quantidade FROM agregados_notas WHERE dimensao = 'aluno' AND chave = ?", (1,)
+    ),
+    'extremo_da_turma': (
+        'SELECT MIN(n.nota) FROM notas n JOIN atividades a ON a.id = n.atividade_id '
+        'JOIN materias m ON m.id = a.materia_id WHERE m.turma_id = ?', (1,)
+    ),
+    'notas_por_aluno': (
+        'SELECT AVG(nota) FROM notas WHERE aluno_id = ?', (1,)
+    ),
+    'notas_por_atividade': (
+        'SELECT COUNT(*), AVG(nota), MIN(nota), MAX(nota) FROM notas WHERE atividade_id = ?', (1,)
+    ),
+    'alunos_por_turma': (
+        'SELECT id FROM alunos WHERE turma_id = ?', (1,)
+    ),
+    'alunos_por_usuario': (
+        'SELECT id, turma_id FROM alunos WHERE usuario_id = ?', (1,)
+    ),
+    'lista_espera_da_turma': (
+        'SELECT aluno_id FROM lista_espera WHERE turma_id = ? ORDER BY id', (1,)
+    ),
+    'lista_espera_do_aluno': (
+        'SELECT turma_id FROM lista_espera WHERE aluno_id = ?', (1,)
+    ),
+    'materias_por_professor': (
+        'SELECT id FROM materias WHERE professor_id = ?', (1,)
+    ),
+    'materia_do_professor_na_turma': (
+        'SELECT id FROM materias WHERE turma_id = ? AND professor_id = ?', (1, 1)
+    ),
+    'materias_por_turma': (
+        'SELECT id FROM materias WHERE turma_id = ?', (1,)
+    ),
+    'atividades_por_materia': (
+        'SELECT id FROM atividades WHERE materia_id = ?', (1,)
+    ),
+    'dias_sem_aula_por_turma': (
+        'SELECT data, motivo FROM dias_sem_aula WHERE turma_id = ? AND data >= ?', (1, '2024-01-01')
+    ),
+    'professores_por_nome': (
+        "SELECT id FROM usuarios WHERE tipo = 'professor' ORDER BY nome", ()
+    ),
+    'pagina_de_alunos': (
+        '''
+        SELECT a.id, u.nome FROM alunos a
+        JOIN usuarios u ON a.usuario_id = u.id
+        WHERE (u.nome, u.id) > (?, ?)
+        ORDER BY u.nome, u.id LIMIT 51
+        ''', ('', 0)
+    ),
+    'pagina_de_turmas': (
+        'SELECT id FROM turmas WHERE (nome, id) > (?, ?) ORDER BY nome, id LIMIT 51', ('', 0)
+    ),
+    'pagina_de_atividades': (
+        '''
+        SELECT a.id FROM atividades a
+        WHERE COALESCE(a.data_entrega, '') <= ? AND (COALESCE(a.data_entrega, ''), a.id) < (?, ?)
+        ORDER BY COALESCE(a.data_entrega, '') DESC, a.id DESC LIMIT 51
+        ''', ('9999-12-31', '9999-12-31', 0)
+    ),
+    'avaliacoes_da_atividade': (
+        '''
+        SELECT n.*, u.nome FROM notas n
+        JOIN alunos al ON n.aluno_id = al.id
+        JOIN usuarios u ON al.usuario_id = u.id
+        WHERE n.atividade_id = ?
+        ''', (1,)
+    ),
+    'atividades_da_turma_do_aluno': (
+        '''
+        SELECT a.id FROM atividades a
+        JOIN materias m ON a.materia_id = m.id
+        LEFT JOIN notas n ON a.id = n.atividade_id AND n.aluno_id = ?
+        WHERE m.turma_id = ?
+        ''', (1, 1)
+    )
+}
+
+_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?\w+')
+
+def explicar(conn, sql, params=()):
+    """Retorna as linhas de detalhe do EXPLAIN QUERY PLAN de uma consulta"""
+    return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+
+def verificar_planos(conn=None, consultas=None):
+    """
+    Verifica as consultas críticas e retorna as que fazem SCAN de tabela.
+
+    Sem conexão, usa um banco em memória com todas as migrações aplicadas e
+    sem estatísticas do ANALYZE, para que o resultado dependa só dos índices
+    e não do volume de dados. Retorna uma lista de (nome, detalhe) — vazia
+    quando todas usam índice.
+    """
+    if conn is None:
+        conn = sqlite3.connect(':memory:')
+        aplicar_migracoes(conn, analisar=False)
+
+    falhas = []
+    for nome, (sql, params) in (consultas or CONSULTAS_CRITICAS).items():
+        for detalhe in explicar(conn, sql, params):
+            if _SCAN_RE.match(detalhe):
+                falhas.append((nome, detalhe))
+    return falhas
@@ -0,0 +1,405 @@
+import base64
+import binascii
+import json
+
+from stats import obter_estatisticas
+
+# =============================================
+# PAGINAÇÃO POR CURSOR, PROJEÇÃO E FILTROS
+# =============================================
+# Cada listagem é descrita uma vez (origem, campos projetáveis, chave de
+# ordenação e filtros aceitos) e executada por listar(), que lê da query
+# string:
+#
+#   ?limit=50               tamanho da página (máximo LIMITE_MAXIMO)
+#   ?cursor=<opaco>         continua depois da última linha da página anterior
+#   ?fields=id,nome,email   devolve só esses campos
+#   ?turma_id=3&sem_turma=1 filtros declarados na listagem
+#
+# A paginação é por keyset: o cursor guarda os valores da chave da última
+# linha e a próxima página começa com `(nome, id) > (?, ?)`, então o custo de
+# cada página não cresce com o deslocamento como num OFFSET. Sem `limit` nem
+# `cursor` a listagem inteira é devolvida, como antes.
+
+LIMITE_MAXIMO = 500
+VALORES_VERDADEIROS = ('1', 'true', 'sim')
+
+class ErroPaginacao(Exception):
+    """Parâmetro de listagem inválido (limit, cursor, fields ou filtro)"""
+
+    def __init__(self, mensagem, status_code=400):
+        super().__init__(mensagem)
+        self.status_code = status_code
+
+class Listagem:
+    """
+    Descrição de uma listagem paginável.
+
+    `campos` mapeia nome de saída -> expressão SQL, na ordem de saída;
+    `padrao` lista os campos devolvidos quando não há `fields=`; `chave` são
+    as expressões de ordenação (a última deve ser única e nenhuma pode ser
+    NULL: a comparação de linha com NULL nunca é verdadeira e a linha some
+    das páginas seguintes); `filtros` mapeia
+    parâmetro -> (condição SQL, conversor), com conversor None para filtros
+    booleanos sem valor; `contador` é a chave de `estatisticas` com o total
+    da listagem sem filtros; `origem_total` é uma origem mais barata para o
+    COUNT quando a query string não traz filtros (os JOINs só de projeção
+    ficam de fora).
+    """
+
+    def __init__(self, origem, campos, chave, padrao=None, filtros=None,
+                 condicoes=(), descendente=False, contador=None, origem_total=None):
+        self.origem = origem
+        self.campos = campos
+        self.chave = chave
+        self.padrao = padrao or list(campos)
+        self.filtros = filtros or {}
+        self.condicoes = list(condicoes)
+        self.descendente = descendente
+        self.contador = contador
+        self.origem_total = origem_total
+
+def codificar_cursor(valores):
+    """Serializa os valores da chave da última linha em um cursor opaco"""
+    bruto = json.dumps(list(valores), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(bruto).decode('ascii').rstrip('=')
+
+def decodificar_cursor(cursor, tamanho):
+    """Valida e desserializa um cursor gerado por codificar_cursor"""
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+    except (binascii.Error, ValueError):
+        raise ErroPaginacao('Cursor inválido')
+
+    if not isinstance(valores, list) or len(valores) != tamanho:
+        raise ErroPaginacao('Cursor inválido')
+    return valores
+
+def ler_limite(args, limite_padrao=None):
+    """
+    Lê `limit` da query string.
+
+    Retorna None quando a paginação não foi pedida, a menos que a rota tenha
+    um `limite_padrao` (listagens que sempre paginam, como a busca).
+    """
+    if 'limit' not in args and 'cursor' not in args and limite_padrao is None:
+        return None
+
+    try:
+        limite = int(args.get('limit', limite_padrao or 50))
+    except (TypeError, ValueError):
+        raise ErroPaginacao('Parâmetro limit inválido')
+
+    if limite < 1:
+        raise ErroPaginacao('Parâmetro limit deve ser maior que zero')
+    return min(limite, LIMITE_MAXIMO)
+
+def _projecao(listagem, fields, padrao):
+    if not fields:
+        return padrao or listagem.padrao
+
+    nomes = [nome.strip() for nome in fields.split(',') if nome.strip()]
+    desconhecidos = [nome for nome in nomes if nome not in listagem.campos]
+    if desconhecidos:
+        raise ErroPaginacao(f"Campos desconhecidos: {', '.join(desconhecidos)}")
+    return list(dict.fromkeys(nomes))
+
+def _filtros(listagem, args):
+    condicoes, valores = [], []
+    for nome, (sql, conversor) in listagem.filtros.items():
+        bruto = args.get(nome)
+        if bruto is None or bruto == '':
+            continue
+
+        if conversor is None:
+            if bruto.lower() in VALORES_VERDADEIROS:
+                condicoes.append(sql)
+            continue
+
+        try:
+            valor = conversor(bruto)
+        except (TypeError, ValueError):
+            raise ErroPaginacao(f'Filtro inválido: {nome}')
+        condicoes.append(sql)
+        valores.extend([valor] * sql.count('?'))
+    return condicoes, valores
+
+def _where(condicoes):
+    return f" WHERE {' AND '.join(condicoes)}" if condicoes else ''
+
+def _restricoes(listagem, args, condicoes):
+    where, valores = list(listagem.condicoes), []
+    for sql, *parametros in condicoes:
+        where.append(sql)
+        valores.extend(parametros)
+    filtros, valores_filtros = _filtros(listagem, args)
+    return where + filtros, valores + valores_filtros, bool(filtros)
+
+def consulta_listagem(listagem, args, condicoes=(), padrao=None):
+    """
+    SQL da listagem completa (filtros e projeção, sem paginação).
+
+    Usado pela exportação em streaming (export.py), que percorre o cursor em
+    lotes em vez de paginar. Retorna (sql, valores).
+    """
+    nomes = _projecao(listagem, args.get('fields'), padrao)
+    where, valores, _ = _restricoes(listagem, args, condicoes)
+    direcao = 'DESC' if listagem.descendente else 'ASC'
+    sql = (
+        f"SELECT {', '.join(f'{listagem.campos[nome]} AS {nome}' for nome in nomes)} "
+        f"{listagem.origem}{_where(where)} "
+        f"ORDER BY {', '.join(f'{expressao} {direcao}' for expressao in listagem.chave)}"
+    )
+    return sql, valores
+
+def listar(conn, listagem, args, condicoes=(), padrao=None, limite_padrao=None):
+    """
+    Executa a listagem com os parâmetros da query string.
+
+    `condicoes` são restrições fixas da rota, como tuplas (sql, *valores).
+    Retorna (itens, paginacao); paginacao é None quando a rota foi chamada
+    sem `limit`/`cursor` e, nesse caso, `itens` traz todas as linhas.
+    """
+    limite = ler_limite(args, limite_padrao)
+    nomes = _projecao(listagem, args.get('fields'), padrao)
+    where, valores, filtros = _restricoes(listagem, args, condicoes)
+
+    cursor = args.get('cursor')
+    where_pagina, valores_pagina = list(where), list(valores)
+    if cursor:
+        chave = decodificar_cursor(cursor, len(listagem.chave))
+        comparacao = '<' if listagem.descendente else '>'
+        # O limite redundante na primeira expressão deixa o SQLite buscar por
+        # faixa no índice também quando a chave é uma expressão (COALESCE),
+        # caso em que a comparação de linha sozinha vira SCAN
+        where_pagina.append(f'{listagem.chave[0]} {comparacao}= ?')
+        where_pagina.append(
+            f"({', '.join(listagem.chave)}) {comparacao} ({', '.join('?' * len(chave))})"
+        )
+        valores_pagina.append(chave[0])
+        valores_pagina.extend(chave)
+
+    colunas = [f'{listagem.campos[nome]} AS {nome}' for nome in nomes]
+    colunas += [f'{expressao} AS _chave_{i}' for i, expressao in enumerate(listagem.chave)]
+    direcao = 'DESC' if listagem.descendente else 'ASC'
+    sql = (
+        f"SELECT {', '.join(colunas)} {listagem.origem}{_where(where_pagina)} "
+        f"ORDER BY {', '.join(f'{expressao} {direcao}' for expressao in listagem.chave)}"
+    )
+    if limite is not None:
+        # Uma linha a mais indica se existe próxima página
+        sql += ' LIMIT ?'
+        valores_pagina.append(limite + 1)
+
+    linhas = conn.execute(sql, valores_pagina).fetchall()
+
+    tem_mais = limite is not None and len(linhas) > limite
+    if tem_mais:
+        linhas = linhas[:limite]
+
+    itens = [{nome: linha[nome] for nome in nomes} for linha in linhas]
+    if limite is None:
+        return itens, None
+
+    proximo_cursor = None
+    if tem_mais:
+        ultima = linhas[-1]
+        proximo_cursor = codificar_cursor(ultima[f'_chave_{i}'] for i in range(len(listagem.chave)))
+
+    return itens, {
+        'limit': limite,
+        'proximo_cursor': proximo_cursor,
+        'total': _total(conn, listagem, where, valores, bool(condicoes), filtros, not cursor)
+    }
+
+def _total(conn, listagem, where, valores, restrito, filtros, primeira_pagina):
+    """
+    Total da listagem sem custo de varredura sempre que possível.
+
+    Sem filtros, vem dos contadores materializados (stats.py). Com filtros, é
+    contado só na primeira página — as seguintes devolvem None e o cliente
+    mantém o total que já recebeu.
+    """
+    if not restrito and not filtros and listagem.contador:
+        return obter_estatisticas(conn)[listagem.contador]
+    if primeira_pagina:
+        origem = listagem.origem_total if listagem.origem_total and not filtros else listagem.origem
+        return conn.execute(f'SELECT COUNT(*) {origem}{_where(where)}', valores).fetchone()[0]
+    return None
+
+def resposta_listagem(chave, itens, paginacao):
+    """Monta o payload da listagem, incluindo `paginacao` só quando pedida"""
+    dados = {chave: itens}
+    if paginacao is not None:
+        dados['paginacao'] = paginacao
+    return dados
+
+# =============================================
+# LISTAGENS DA API
+# =============================================
+
+LISTAGEM_ALUNOS = Listagem(
+    origem='''
+        FROM alunos a
+        JOIN usuarios u ON a.usuario_id = u.id
+        LEFT JOIN turmas t ON a.turma_id = t.id
+    ''',
+    campos={
+        'id': 'a.id',
+        'usuario_id': 'a.usuario_id',
+        'nome': 'u.nome',
+        'email': 'u.email',
+        'matricula': 'a.matricula',
+        'data_nascimento': 'a.data_nascimento',
+        'endereco': 'a.endereco',
+        'telefone': 'a.telefone',
+        'turma_nome': 't.nome',
+        'turma_id': 'a.turma_id',
+        'criado_em': 'a.criado_em',
+        # Leituras por chave primária nos agregados incrementais (agregados.py),
+        # só para as linhas da página
+        'total_avaliacoes': (
+            "COALESCE((SELECT ag.registros FROM agregados_notas ag "
+            "WHERE ag.dimensao = 'aluno' AND ag.chave = a.id), 0)"
+        ),
+        'media_geral': (
+            "(SELECT ag.soma / ag.quantidade FROM agregados_notas ag "
+            "WHERE ag.dimensao = 'aluno' AND ag.chave = a.id AND ag.quantidade > 0)"
+        )
+    },
+    padrao=[
+        'id', 'nome', 'email', 'matricula', 'data_nascimento', 'endereco',
+        'telefone', 'turma_nome', 'turma_id', 'total_avaliacoes', 'media_geral'
+    ],
+    # u.id acompanha a ordem do índice idx_usuarios_nome (nome, rowid)
+    chave=('u.nome', 'u.id'),
+    filtros={
+        'turma_id': ('a.turma_id = ?', int),
+        'sem_turma': ('a.turma_id IS NULL', None)
+    },
+    contador='total_alunos'
+)
+
+LISTAGEM_TURMAS = Listagem(
+    origem='''
+        FROM turmas t
+        LEFT JOIN usuarios u ON t.criado_por = u.id
+    ''',
+    campos={
+        'id': 't.id',
+        'nome': 't.nome',
+        'codigo': 't.codigo',
+        'descricao': 't.descricao',
+        'ano_letivo': 't.ano_letivo',
+        'periodo': 't.periodo',
+        'capacidade_min': 't.capacidade_min',
+        'capacidade_max': 't.capacidade_max',
+        'alunos_matriculados': 't.alunos_matriculados',
+        'criado_por': 't.criado_por',
+        'criado_em': 't.criado_em',
+        'criado_por_nome': 'u.nome'
+    },
+    chave=('t.nome', 't.id'),
+    filtros={
+        'ano_letivo': ('t.ano_letivo = ?', str),
+        'periodo': ('t.periodo = ?', str),
+        'com_vagas': ('t.alunos_matriculados < t.capacidade_max', None)
+    },
+    contador='total_turmas'
+)
+
+LISTAGEM_PROFESSORES = Listagem(
+    origem='FROM usuarios u',
+    campos={
+        'id': 'u.id',
+        'nome': 'u.nome',
+        'email': 'u.email',
+        'tipo': 'u.tipo',
+        'telefone': 'u.telefone',
+        'formacao': 'u.formacao',
+        'experiencia': 'u.experiencia',
+        'criado_em': 'u.criado_em',
+        'total_turmas': '(SELECT COUNT(*) FROM materias m WHERE m.professor_id = u.id)',
+        'materias_lecionadas': (
+            '(SELECT GROUP_CONCAT(DISTINCT m.nome) FROM materias m WHERE m.professor_id = u.id)'
+        )
+    },
+    # idx_usuarios_tipo_nome (tipo, nome, rowid) entrega a ordem pronta
+    chave=('u.nome', 'u.id'),
+    condicoes=["u.tipo = 'professor'"],
+    filtros={
+        'sem_alocacao': (
+            'NOT EXISTS (SELECT 1 FROM materias m WHERE m.professor_id = u.id)', None
+        )
+    },
+    contador='total_professores'
+)
+
+LISTAGEM_MATERIAS = Listagem(
+    origem='''
+        FROM materias m
+        JOIN turmas t ON m.turma_id = t.id
+        JOIN usuarios u ON m.professor_id = u.id
+    ''',
+    campos={
+        'id': 'm.id',
+        'nome': 'm.nome',
+        'descricao': 'm.descricao',
+        'turma_id': 'm.turma_id',
+        'professor_id': 'm.professor_id',
+        'horario': 'm.horario',
+        'dia_semana': 'm.dia_semana',
+        'carga_horaria_semanal': 'm.carga_horaria_semanal',
+        'data_inicio': 'm.data_inicio',
+        'dias_aula': 'm.dias_aula',
+        'observacoes': 'm.observacoes',
+        'criado_em': 'm.criado_em',
+        'turma_nome': 't.nome',
+        'professor_nome': 'u.nome'
+    },
+    chave=('m.nome', 'm.id'),
+    filtros={
+        'turma_id': ('m.turma_id = ?', int),
+        'professor_id': ('m.professor_id = ?', int),
+        'dia_semana': ('m.dia_semana = ?', str)
+    }
+)
+
+LISTAGEM_ATIVIDADES = Listagem(
+    origem='''
+        FROM atividades a
+        JOIN materias m ON a.materia_id = m.id
+        JOIN turmas t ON m.turma_id = t.id
+        LEFT JOIN usuarios u ON a.criado_por = u.id
+    ''',
+    campos={
+        'id': 'a.id',
+        'titulo': 'a.titulo',
+        'descricao': 'a.descricao',
+        'materia_id': 'a.materia_id',
+        'data_entrega': 'a.data_entrega',
+        'valor': 'a.valor',
+        'criado_por': 'a.criado_por',
+        'criado_em': 'a.criado_em',
+        'materia_nome': 'm.nome',
+        'turma_id': 'm.turma_id',
+        'turma_nome': 't.nome',
+        'professor_nome': 'u.nome'
+    },
+    padrao=[
+        'id', 'titulo', 'descricao', 'materia_id', 'data_entrega', 'valor',
+        'criado_por', 'criado_em', 'materia_nome', 'turma_nome', 'professor_nome'
+    ],
+    # Mais recentes primeiro. data_entrega aceita NULL no schema: a chave usa
+    # COALESCE (índice idx_atividades_entrega_chave, migração 013) e as
+    # atividades sem data vêm por último
+    chave=("COALESCE(a.data_entrega, '')", 'a.id'),
+    descendente=True,
+    filtros={
+        'materia_id': ('a.materia_id = ?', int),
+        'turma_id': ('m.turma_id = ?', int),
+        'professor_id': ('m.professor_id = ?', int)
+    },
+    contador='total_atividades'
+)
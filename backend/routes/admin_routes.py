@@ -1,6 +1,11 @@
 from flask import Blueprint, request, jsonify, g
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from database import get_db
+from database import get_db, run_write
+from export import ErroExportacao, formato_exportacao, resposta_exportacao
+from senhas import get_senhas
+from pagination import (
+    ErroPaginacao, listar, resposta_listagem, LISTAGEM_ALUNOS, LISTAGEM_TURMAS, LISTAGEM_PROFESSORES
+)
 from utils.algorithms import quick_sort, binary_search
 
 admin_bp = Blueprint('admin', __name__)
@@ -12,20 +17,26 @@ def check_admin():
     if current_user['tipo'] != 'admin':
         return jsonify({'error': 'Acesso negado'}), 403
 
+@admin_bp.errorhandler(ErroPaginacao)
+@admin_bp.errorhandler(ErroExportacao)
+def erro_paginacao(e):
+    return jsonify({'error': str(e)}), e.status_code
+
+def _criar_turma(conn, data, criado_por):
+    conn.execute('''
+        INSERT INTO turmas (nome, codigo, descricao, ano_letivo, periodo, criado_por)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (data['nome'], data['codigo'], data.get('descricao'), 
+          data['ano_letivo'], data['periodo'], criado_por))
+
 @admin_bp.route('/turmas', methods=['GET', 'POST'])
 def manage_turmas():
     db = get_db()
     
     if request.method == 'GET':
-        turmas = db.execute('''
-            SELECT t.*, u.nome as criado_por_nome 
-            FROM turmas t 
-            LEFT JOIN usuarios u ON t.criado_por = u.id
-        ''').fetchall()
+        turmas, paginacao = listar(db, LISTAGEM_TURMAS, request.args)
         
-        return jsonify({
-            'turmas': [dict(turma) for turma in turmas]
-        })
+        return jsonify(resposta_listagem('turmas', turmas, paginacao))
     
     elif request.method == 'POST':
         data = request.get_json()
@@ -39,15 +50,13 @@ def manage_turmas():
         if existing:
             return jsonify({'error': 'Código de turma já existe'}), 400
         
-        db.execute('''
-            INSERT INTO turmas (nome, codigo, descricao, ano_letivo, periodo, criado_por)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (data['nome'], data['codigo'], data.get('descricao'), 
-              data['ano_letivo'], data['periodo'], current_user['id']))
-        db.commit()
+        run_write(_criar_turma, data, current_user['id'])
         
         return jsonify({'message': 'Turma criada com sucesso'})
 
+def _excluir_turma(conn, turma_id):
+    conn.execute('DELETE FROM turmas WHERE id = ?', (turma_id,))
+
 @admin_bp.route('/turmas/<int:turma_id>', methods=['DELETE'])
 def delete_turma(turma_id):
     db = get_db()
@@ -60,8 +69,7 @@ def delete_turma(turma_id):
     if alunos_count > 0:
         return jsonify({'error': 'Não é possível excluir turma com alunos matriculados'}), 400
     
-    db.execute('DELETE FROM turmas WHERE id = ?', (turma_id,))
-    db.commit()
+    run_write(_excluir_turma, turma_id)
     
     return jsonify({'message': 'Turma excluída com sucesso'})
 
@@ -69,75 +77,75 @@ def delete_turma(turma_id):
 def get_alunos():
     db = get_db()
     
-    alunos = db.execute('''
-        SELECT a.*, u.nome, u.email, t.nome as turma_nome
-        FROM alunos a
-        JOIN usuarios u ON a.usuario_id = u.id
-        LEFT JOIN turmas t ON a.turma_id = t.id
-    ''').fetchall()
+    alunos, paginacao = listar(db, LISTAGEM_ALUNOS, request.args, padrao=[
+        'id', 'usuario_id', 'matricula', 'turma_id', 'data_nascimento', 'endereco',
+        'telefone', 'criado_em', 'nome', 'email', 'turma_nome'
+    ])
     
-    return jsonify({
-        'alunos': [dict(aluno) for aluno in alunos]
-    })
+    return jsonify(resposta_listagem('alunos', alunos, paginacao))
+
+def _criar_professor(conn, data, senha):
+    conn.execute('''
+        INSERT INTO usuarios (nome, email, senha, tipo)
+        VALUES (?, ?, ?, 'professor')
+    ''', (data['nome'], data['email'], senha))
 
 @admin_bp.route('/professores', methods=['GET', 'POST'])
 def manage_professores():
     db = get_db()
     
     if request.method == 'GET':
-        professores = db.execute('''
-            SELECT u.*, COUNT(m.id) as materias_count
-            FROM usuarios u
-            LEFT JOIN materias m ON u.id = m.professor_id
-            WHERE u.tipo = 'professor'
-            GROUP BY u.id
-        ''').fetchall()
+        professores, paginacao = listar(db, LISTAGEM_PROFESSORES, request.args)
         
-        return jsonify({
-            'professores': [dict(prof) for prof in professores]
-        })
+        return jsonify(resposta_listagem('professores', professores, paginacao))
     
     elif request.method == 'POST':
         data = request.get_json()
         
         # Criar usuário professor
-        from werkzeug.security import generate_password_hash
-        db.execute('''
-            INSERT INTO usuarios (nome, email, senha, tipo)
-            VALUES (?, ?, ?, 'professor')
-        ''', (data['nome'], data['email'], generate_password_hash(data['senha'])))
-        db.commit()
+        run_write(_criar_professor, data, get_senhas().gerar(data['senha']))
         
         return jsonify({'message': 'Professor criado com sucesso'})
 
-@admin_bp.route('/alocacao-professores', methods=['POST'])
-def alocar_professor():
-    data = request.get_json()
-    db = get_db()
-    
-    db.execute('''
+def _alocar_professor(conn, data):
+    conn.execute('''
         INSERT INTO materias (nome, descricao, turma_id, professor_id, horario, dia_semana)
         VALUES (?, ?, ?, ?, ?, ?)
     ''', (data['materia'], data.get('descricao'), data['turma_id'], 
           data['professor_id'], data['horario'], data['dia_semana']))
-    db.commit()
+
+@admin_bp.route('/alocacao-professores', methods=['POST'])
+def alocar_professor():
+    data = request.get_json()
+    
+    run_write(_alocar_professor, data)
     
     return jsonify({'message': 'Professor alocado com sucesso'})
 
+RELATORIO_DESEMPENHO_SQL = '''
+    SELECT a.id, u.nome, t.nome as turma, 
+           ag.soma / NULLIF(ag.quantidade, 0) as media,
+           COALESCE(ag.registros, 0) as atividades_entregues
+    FROM alunos a
+    JOIN usuarios u ON a.usuario_id = u.id
+    LEFT JOIN turmas t ON a.turma_id = t.id
+    LEFT JOIN agregados_notas ag ON ag.dimensao = 'aluno' AND ag.chave = a.id
+'''
+
 @admin_bp.route('/relatorios/desempenho', methods=['GET'])
 def relatorio_desempenho():
     db = get_db()
     
+    # Exportação em streaming: a ordenação por desempenho fica no SQL
+    formato = formato_exportacao(request)
+    if formato:
+        return resposta_exportacao(
+            RELATORIO_DESEMPENHO_SQL + ' ORDER BY COALESCE(media, 0), u.nome', (),
+            formato, 'alunos', nome_arquivo='relatorio_desempenho'
+        )
+    
     # Obter dados para relatório
-    alunos_data = db.execute('''
-        SELECT a.id, u.nome, t.nome as turma, 
-               AVG(n.nota) as media, COUNT(n.id) as atividades_entregues
-        FROM alunos a
-        JOIN usuarios u ON a.usuario_id = u.id
-        LEFT JOIN turmas t ON a.turma_id = t.id
-        LEFT JOIN notas n ON a.id = n.aluno_id
-        GROUP BY a.id
-    ''').fetchall()
+    alunos_data = db.execute(RELATORIO_DESEMPENHO_SQL).fetchall()
     
     alunos_list = [dict(aluno) for aluno in alunos_data]
     
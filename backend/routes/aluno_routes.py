@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from database import get_db
+from agregados import media_aluno
+from calendario import ErroCalendario, formato_calendario, intervalo_calendario, resposta_calendario
 from datetime import datetime
 
 aluno_bp = Blueprint('aluno', __name__)
@@ -36,14 +38,12 @@ def get_minhas_notas():
         ORDER BY n.data_avaliacao DESC
     ''', (aluno['id'],)).fetchall()
     
-    # Calcular média geral
-    media_geral = db.execute('''
-        SELECT AVG(nota) as media FROM notas WHERE aluno_id = ?
-    ''', (aluno['id'],)).fetchone()
+    # Média geral lida dos agregados incrementais
+    media_geral = media_aluno(db, aluno['id'])
     
     return jsonify({
         'notas': [dict(nota) for nota in notas],
-        'media_geral': media_geral['media'] if media_geral['media'] else 0
+        'media_geral': media_geral if media_geral else 0
     })
 
 @aluno_bp.route('/minha-turma', methods=['GET'])
@@ -75,39 +75,15 @@ def get_calendario_aulas():
         'SELECT turma_id FROM alunos WHERE usuario_id = ?', (current_user['id'],)
     ).fetchone()
     
-    if not aluno_turma:
+    if not aluno_turma or aluno_turma['turma_id'] is None:
         return jsonify({'error': 'Aluno não matriculado em turma'}), 400
     
-    # Dias com aula
-    dias_aula = db.execute('''
-        SELECT m.nome as materia, m.horario, m.dia_semana, u.nome as professor
-        FROM materias m
-        JOIN usuarios u ON m.professor_id = u.id
-        WHERE m.turma_id = ?
-        ORDER BY 
-            CASE m.dia_semana 
-                WHEN 'segunda' THEN 1
-                WHEN 'terca' THEN 2
-                WHEN 'quarta' THEN 3
-                WHEN 'quinta' THEN 4
-                WHEN 'sexta' THEN 5
-                WHEN 'sabado' THEN 6
-                ELSE 7
-            END
-    ''', (aluno_turma['turma_id'],)).fetchall()
-    
-    # Dias sem aula
-    dias_sem_aula = db.execute('''
-        SELECT data, motivo 
-        FROM dias_sem_aula 
-        WHERE turma_id = ? AND data >= DATE('now')
-        ORDER BY data
-    ''', (aluno_turma['turma_id'],)).fetchall()
-    
-    return jsonify({
-        'dias_aula': [dict(dia) for dia in dias_aula],
-        'dias_sem_aula': [dict(dia) for dia in dias_sem_aula]
-    })
+    # Mesmo motor (e mesmo formato de resposta) de /api/aluno/calendario-aulas
+    try:
+        inicio, fim = intervalo_calendario(request.args)
+        return resposta_calendario(db, aluno_turma['turma_id'], formato_calendario(request), inicio, fim)
+    except ErroCalendario as e:
+        return jsonify({'error': str(e)}), e.status_code
 
 @aluno_bp.route('/atividades-pendentes', methods=['GET'])
 def get_atividades_pendentes():
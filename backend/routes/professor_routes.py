@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from database import get_db
+from database import get_db, run_write
+from colunar import run_write_notas
+from grading import ErroLancamento, salvar_notas_em_lote
+from pagination import ErroPaginacao, listar, resposta_listagem, LISTAGEM_ALUNOS, LISTAGEM_ATIVIDADES
 from utils.algorithms import quick_sort
 
 professor_bp = Blueprint('professor', __name__)
@@ -12,6 +15,10 @@ def check_professor():
     if current_user['tipo'] not in ['professor', 'admin']:
         return jsonify({'error': 'Acesso negado'}), 403
 
+@professor_bp.errorhandler(ErroPaginacao)
+def erro_paginacao(e):
+    return jsonify({'error': str(e)}), e.status_code
+
 @professor_bp.route('/minhas-turmas', methods=['GET'])
 def get_minhas_turmas():
     current_user = get_jwt_identity()
@@ -32,16 +39,20 @@ def get_minhas_turmas():
 def get_alunos_turma(turma_id):
     db = get_db()
     
-    alunos = db.execute('''
-        SELECT a.id, u.nome, u.email, a.matricula
-        FROM alunos a
-        JOIN usuarios u ON a.usuario_id = u.id
-        WHERE a.turma_id = ?
-    ''', (turma_id,)).fetchall()
+    alunos, paginacao = listar(
+        db, LISTAGEM_ALUNOS, request.args,
+        condicoes=[('a.turma_id = ?', turma_id)],
+        padrao=['id', 'nome', 'email', 'matricula']
+    )
     
-    return jsonify({
-        'alunos': [dict(aluno) for aluno in alunos]
-    })
+    return jsonify(resposta_listagem('alunos', alunos, paginacao))
+
+def _criar_atividade(conn, data, criado_por):
+    conn.execute('''
+        INSERT INTO atividades (titulo, descricao, materia_id, data_entrega, valor, criado_por)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (data['titulo'], data.get('descricao'), data['materia_id'], 
+          data['data_entrega'], data.get('valor', 10), criado_por))
 
 @professor_bp.route('/atividades', methods=['GET', 'POST'])
 def manage_atividades():
@@ -49,28 +60,17 @@ def manage_atividades():
     db = get_db()
     
     if request.method == 'GET':
-        atividades = db.execute('''
-            SELECT a.*, m.nome as materia_nome, t.nome as turma_nome
-            FROM atividades a
-            JOIN materias m ON a.materia_id = m.id
-            JOIN turmas t ON m.turma_id = t.id
-            WHERE a.criado_por = ?
-            ORDER BY a.data_entrega
-        ''', (current_user['id'],)).fetchall()
+        atividades, paginacao = listar(
+            db, LISTAGEM_ATIVIDADES, request.args,
+            condicoes=[('a.criado_por = ?', current_user['id'])]
+        )
         
-        return jsonify({
-            'atividades': [dict(atividade) for atividade in atividades]
-        })
+        return jsonify(resposta_listagem('atividades', atividades, paginacao))
     
     elif request.method == 'POST':
         data = request.get_json()
         
-        db.execute('''
-            INSERT INTO atividades (titulo, descricao, materia_id, data_entrega, valor, criado_por)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (data['titulo'], data.get('descricao'), data['materia_id'], 
-              data['data_entrega'], data.get('valor', 10), current_user['id']))
-        db.commit()
+        run_write(_criar_atividade, data, current_user['id'])
         
         return jsonify({'message': 'Atividade criada com sucesso'})
 
@@ -78,29 +78,19 @@ def manage_atividades():
 def avaliar_atividade():
     current_user = get_jwt_identity()
     data = request.get_json()
-    db = get_db()
-    
-    # Verificar se já existe avaliação
-    existing = db.execute(
-        'SELECT id FROM notas WHERE aluno_id = ? AND atividade_id = ?',
-        (data['aluno_id'], data['atividade_id'])
-    ).fetchone()
     
-    if existing:
-        # Atualizar avaliação existente
-        db.execute('''
-            UPDATE notas SET nota = ?, feedback = ?, avaliado_por = ?
-            WHERE id = ?
-        ''', (data['nota'], data.get('feedback'), current_user['id'], existing['id']))
-    else:
-        # Criar nova avaliação
-        db.execute('''
-            INSERT INTO notas (aluno_id, atividade_id, nota, feedback, avaliado_por)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (data['aluno_id'], data['atividade_id'], data['nota'], 
-              data.get('feedback'), current_user['id']))
+    # Mesmo motor de upsert em lote das rotas de avaliação, com um único item
+    try:
+        resumo = run_write_notas(
+            salvar_notas_em_lote, data['atividade_id'],
+            [{'aluno_id': data['aluno_id'], 'nota': data['nota'], 'feedback': data.get('feedback')}],
+            current_user['id']
+        )
+    except ErroLancamento as e:
+        return jsonify({'error': str(e)}), e.status_code
     
-    db.commit()
+    if resumo['rejeitadas']:
+        return jsonify({'error': resumo['resultados'][0]['motivo']}), 400
     
     return jsonify({'message': 'Atividade avaliada com sucesso'})
 
@@ -0,0 +1,59 @@
+import re
+
+from pagination import Listagem, LISTAGEM_ALUNOS
+
+# =============================================
+# BUSCA DE ALUNOS (FTS5)
+# =============================================
+# A tabela virtual `alunos_busca` (migração 006) indexa nome, email e
+# matrícula com rowid = alunos.id. O tokenizador unicode61 com
+# remove_diacritics ignora acentos e caixa ("joao" encontra "João"), e os
+# índices de prefixo de 2 e 3 caracteres deixam a busca por começo de palavra
+# ("mar" -> "Maria", "2024" -> "20240001") sem varrer o índice inteiro.
+# Triggers em alunos e usuarios mantêm o índice em dia.
+
+# Peso de cada coluna no bm25: nome > matrícula > email
+PESOS_BM25 = (10.0, 5.0, 2.0)
+
+LIMITE_BUSCA = 20
+
+_TERMO_RE = re.compile(r'\w+', re.UNICODE)
+
+def montar_consulta_fts(texto):
+    """
+    Converte o texto digitado em uma consulta FTS5 segura.
+
+    Cada palavra vira um termo entre aspas com prefixo ("mar"*), todos
+    obrigatórios. Operadores do FTS5 digitados pelo usuário são tratados como
+    texto. Retorna None se não sobrar nenhum termo.
+    """
+    termos = _TERMO_RE.findall(texto or '')
+    if not termos:
+        return None
+    return ' '.join(f'"{termo}"*' for termo in termos)
+
+def reconstruir_indice(conn):
+    """Recria o conteúdo de alunos_busca a partir de alunos + usuarios"""
+    conn.execute('DELETE FROM alunos_busca')
+    conn.execute('''
+        INSERT INTO alunos_busca (rowid, nome, email, matricula)
+        SELECT a.id, u.nome, u.email, a.matricula
+        FROM alunos a
+        JOIN usuarios u ON a.usuario_id = u.id
+    ''')
+
+LISTAGEM_BUSCA_ALUNOS = Listagem(
+    origem='''
+        FROM alunos_busca b
+        JOIN alunos a ON a.id = b.rowid
+        JOIN usuarios u ON a.usuario_id = u.id
+        LEFT JOIN turmas t ON a.turma_id = t.id
+    ''',
+    campos={**LISTAGEM_ALUNOS.campos, 'relevancia': '-b.rank'},
+    padrao=LISTAGEM_ALUNOS.padrao + ['relevancia'],
+    # `rank` é o bm25 configurado na migração (menor = mais relevante)
+    chave=('b.rank', 'a.id'),
+    filtros=LISTAGEM_ALUNOS.filtros,
+    # Sem filtros de turma o total é contado só no índice FTS
+    origem_total='FROM alunos_busca b'
+)
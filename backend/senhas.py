@@ -0,0 +1,373 @@
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# =============================================
+# HASH DE SENHAS FORA DA THREAD DA REQUISIÇÃO
+# =============================================
+# scrypt/pbkdf2 custam dezenas de milissegundos de CPU por senha; feitos na
+# thread da requisição, a onda de logins do início das aulas ocupa todos os
+# workers. VerificadorSenhas manda a verificação (e a geração de hashes) para
+# um pool de processos do tamanho dos núcleos, e a thread da requisição só
+# espera o resultado, sem segurar o GIL.
+#
+# A política de hash (SENHA_METODO, no formato de werkzeug: 'scrypt',
+# 'scrypt:32768:8:1', 'pbkdf2:sha256:600000'...) vale para senhas novas; um
+# login bem-sucedido com hash em outra política devolve o hash regerado, que
+# o chamador grava no lugar do antigo.
+#
+# Limites de concorrência por conta e por IP impedem que um cliente (ou um
+# ataque de força bruta a uma conta) ocupe o pool inteiro; acima do limite o
+# login é recusado na hora com LimiteSenhas (HTTP 429). Na aplicação esses
+# contadores ficam no SQLite (tabela logins_em_andamento, migração 012,
+# gravada pela fila de escrita), então o limite vale somado entre todos os
+# workers; a reserva de um worker que morreu expira em SENHA_RESERVA_VALIDADE.
+# Sem aplicação (scripts, benchmarks) os contadores ficam em memória.
+#
+# Todo job no pool ocupa uma vaga de SENHA_MAX_PENDENTES até terminar de
+# fato (uma espera que passou de SENHA_TIMEOUT cancela o job se ele ainda
+# está na fila; se já começou, a vaga só volta quando ele acaba). Lotes de
+# hashes (importação de alunos) passam pelo mesmo controle, em blocos
+# pequenos e com no máximo SENHA_LOTE_SIMULTANEOS blocos no pool por vez:
+# um lote de milhares de senhas não enfileira minutos de scrypt à frente
+# dos logins.
+
+SENHA_METODO = os.environ.get('SENHA_METODO', 'scrypt')
+SENHA_PROCESSOS = int(os.environ.get('SENHA_PROCESSOS', os.cpu_count() or 1))  # 0 = na própria thread
+SENHA_LIMITE_CONTA = int(os.environ.get('SENHA_LIMITE_CONTA', 2))
+SENHA_LIMITE_IP = int(os.environ.get('SENHA_LIMITE_IP', 8))
+SENHA_MAX_PENDENTES = int(os.environ.get('SENHA_MAX_PENDENTES', 256))
+SENHA_TIMEOUT = float(os.environ.get('SENHA_TIMEOUT', 10))
+SENHA_LOTE_BLOCO = int(os.environ.get('SENHA_LOTE_BLOCO', 16))
+SENHA_LOTE_SIMULTANEOS = int(os.environ.get('SENHA_LOTE_SIMULTANEOS', 0))  # 0 = metade dos processos
+SENHA_RESERVA_VALIDADE = float(os.environ.get('SENHA_RESERVA_VALIDADE', 60))
+
+class LimiteSenhas(Exception):
+    """Verificação recusada por excesso de tentativas simultâneas"""
+
+    def __init__(self, message, status=429):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+def prefixo_politica(metodo):
+    """Prefixo 'metodo:parametros' dos hashes gerados com a política (ex.: 'scrypt:32768:8:1')"""
+    return generate_password_hash('', method=metodo).split('$', 1)[0]
+
+def precisa_rehash(hash_senha, prefixo):
+    return hash_senha.split('$', 1)[0] != prefixo
+
+# ---------- funções executadas nos processos do pool ----------
+
+def _verificar(hash_senha, senha, metodo, prefixo):
+    """(senha confere, novo hash ou None) — o novo hash só quando a política mudou"""
+    if not check_password_hash(hash_senha, senha):
+        return False, None
+    if precisa_rehash(hash_senha, prefixo):
+        return True, generate_password_hash(senha, method=metodo)
+    return True, None
+
+def _gerar(senhas, metodo):
+    return [generate_password_hash(senha, method=metodo) for senha in senhas]
+
+# ---------- limites compartilhados entre workers ----------
+
+def _reservar_login(conn, conta, ip, limite_conta, limite_ip, validade):
+    """Job de escrita: (id da reserva, None) ou (None, 'conta'/'ip') se o limite já foi atingido"""
+    agora = time.time()
+    conn.execute('DELETE FROM logins_em_andamento WHERE expira_em < ?', (agora,))
+    for tipo, valor, limite in (('conta', conta, limite_conta), ('ip', ip, limite_ip)):
+        if valor is None:
+            continue
+        em_andamento = conn.execute(
+            f'SELECT COUNT(*) FROM logins_em_andamento WHERE {tipo} = ?', (valor,)
+        ).fetchone()[0]
+        if em_andamento >= limite:
+            return None, tipo
+    reserva_id = conn.execute(
+        'INSERT INTO logins_em_andamento (conta, ip, expira_em) VALUES (?, ?, ?)', (conta, ip, agora + validade)
+    ).lastrowid
+    return reserva_id, None
+
+def _liberar_login(conn, reserva_id):
+    conn.execute('DELETE FROM logins_em_andamento WHERE id = ?', (reserva_id,))
+
+class LimitesCompartilhados:
+    """Verificações em andamento por conta e por IP em logins_em_andamento, via fila de escrita"""
+
+    def __init__(self, writer, validade=SENHA_RESERVA_VALIDADE):
+        self.writer = writer
+        self.validade = validade
+
+    def reservar(self, conta, ip, limite_conta, limite_ip):
+        return self.writer.run(_reservar_login, conta, ip, limite_conta, limite_ip, self.validade)
+
+    def liberar(self, reserva_id):
+        # Sem esperar o COMMIT: chamado também do callback de fim do job no pool
+        self.writer.submit(_liberar_login, reserva_id)
+
+class VerificadorSenhas:
+    """Pool de processos para hash de senhas com limites por conta e por IP"""
+
+    def __init__(self, metodo=SENHA_METODO, processos=SENHA_PROCESSOS, limite_conta=SENHA_LIMITE_CONTA,
+                 limite_ip=SENHA_LIMITE_IP, max_pendentes=SENHA_MAX_PENDENTES, timeout=SENHA_TIMEOUT,
+                 lote_simultaneos=SENHA_LOTE_SIMULTANEOS, limites=None):
+        self.metodo = metodo
+        self.prefixo = prefixo_politica(metodo)
+        self.processos = processos
+        self.limite_conta = limite_conta
+        self.limite_ip = limite_ip
+        self.max_pendentes = max_pendentes
+        self.timeout = timeout
+        self.lote_simultaneos = lote_simultaneos or max(1, processos // 2)
+        # LimitesCompartilhados ou None (contadores em memória, só deste processo)
+        self.limites = limites
+        self._executor = None
+        self._lock = threading.Lock()
+        self._em_andamento = {}  # ('conta', email) / ('ip', endereço) -> verificações em curso
+        self._pendentes = 0
+        self._stats = {
+            'verificacoes': 0,
+            'recusadas_conta': 0,
+            'recusadas_ip': 0,
+            'recusadas_pool': 0,
+            'tempo_esgotado': 0,
+            'pool_reiniciado': 0,
+            'rehashes': 0,
+            'hashes_gerados': 0,
+            'tempo_total_ms': 0.0
+        }
+
+    def _obter_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: os workers não herdam threads/conexões do servidor
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processos, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _descartar_executor(self, executor):
+        # Um worker morto inutiliza o pool inteiro; o próximo uso sobe outro
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self._stats['pool_reiniciado'] += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submeter(self, vaga, fn, *args):
+        """
+        Envia fn(*args) ao pool com a `vaga` já reservada; a vaga é
+        devolvida quando o job termina ou é cancelado. Retorna (executor, futuro).
+        """
+        executor = self._obter_executor()
+        try:
+            futuro = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._liberar(vaga)
+            self._descartar_executor(executor)
+            raise LimiteSenhas('Serviço de senhas indisponível, tente novamente', 503)
+        except BaseException:
+            self._liberar(vaga)
+            raise
+        futuro.add_done_callback(lambda _: self._liberar(vaga))
+        return executor, futuro
+
+    def _aguardar(self, executor, futuro):
+        """Resultado do job com espera limitada a `timeout`; LimiteSenhas (503) se esgotar ou o pool quebrar"""
+        try:
+            return futuro.result(timeout=self.timeout)
+        except FuturesTimeout:
+            # Ainda na fila: cancelado, nem chega a rodar. Já em execução: a
+            # vaga continua ocupada até ele terminar
+            futuro.cancel()
+            with self._lock:
+                self._stats['tempo_esgotado'] += 1
+            raise LimiteSenhas('Tempo esgotado no serviço de senhas', 503)
+        except BrokenProcessPool:
+            self._descartar_executor(executor)
+            raise LimiteSenhas('Serviço de senhas indisponível, tente novamente', 503)
+
+    def _executar(self, vaga, fn, *args):
+        """Executa fn(*args) com a `vaga` já reservada"""
+        if not self.processos:
+            try:
+                return fn(*args)
+            finally:
+                self._liberar(vaga)
+        return self._aguardar(*self._submeter(vaga, fn, *args))
+
+    def _reservar(self, chaves):
+        """
+        Reserva uma vaga no pool e, para `chaves` (('conta', email), ('ip',
+        endereço)), nos limites por conta e por IP. Retorna a vaga, que volta
+        em _liberar: (chaves contadas em memória, id da reserva compartilhada).
+        """
+        compartilhado = self.limites is not None and any(valor is not None for _, valor in chaves)
+        with self._lock:
+            if self._pendentes >= self.max_pendentes:
+                self._stats['recusadas_pool'] += 1
+                raise LimiteSenhas('Servidor ocupado, tente novamente em instantes', 503)
+            if not compartilhado:
+                for (tipo, valor), limite in zip(chaves, (self.limite_conta, self.limite_ip)):
+                    if valor is not None and self._em_andamento.get((tipo, valor), 0) >= limite:
+                        self._stats[f'recusadas_{tipo}'] += 1
+                        raise LimiteSenhas('Muitas tentativas de login simultâneas, aguarde')
+                for chave in chaves:
+                    if chave[1] is not None:
+                        self._em_andamento[chave] = self._em_andamento.get(chave, 0) + 1
+            self._pendentes += 1
+        if not compartilhado:
+            return chaves, None
+
+        valores = dict(chaves)
+        try:
+            reserva_id, recusada = self.limites.reservar(
+                valores.get('conta'), valores.get('ip'), self.limite_conta, self.limite_ip
+            )
+        except sqlite3.Error:
+            self._liberar(((), None))
+            raise LimiteSenhas('Servidor ocupado, tente novamente em instantes', 503)
+        except BaseException:
+            self._liberar(((), None))
+            raise
+        if recusada:
+            with self._lock:
+                self._stats[f'recusadas_{recusada}'] += 1
+            self._liberar(((), None))
+            raise LimiteSenhas('Muitas tentativas de login simultâneas, aguarde')
+        return (), reserva_id
+
+    def _liberar(self, vaga):
+        chaves, reserva_id = vaga
+        with self._lock:
+            for chave in chaves:
+                if chave[1] is None:
+                    continue
+                restantes = self._em_andamento.pop(chave) - 1
+                if restantes:
+                    self._em_andamento[chave] = restantes
+            self._pendentes -= 1
+        if reserva_id is not None:
+            self.limites.liberar(reserva_id)
+
+    def verificar(self, hash_senha, senha, conta=None, ip=None):
+        """
+        Confere `senha` contra `hash_senha` em um processo do pool.
+
+        Retorna (confere, novo_hash); novo_hash não é None quando a senha
+        confere mas o hash foi gerado com outra política e deve ser
+        substituído. Levanta LimiteSenhas se a conta ou o IP já têm
+        verificações demais em andamento ou se a fila do pool está cheia.
+        """
+        vaga = self._reservar((('conta', conta), ('ip', ip)))
+        inicio = time.perf_counter()
+        try:
+            confere, novo_hash = self._executar(vaga, _verificar, hash_senha, senha, self.metodo, self.prefixo)
+        finally:
+            with self._lock:
+                self._stats['verificacoes'] += 1
+                self._stats['tempo_total_ms'] += (time.perf_counter() - inicio) * 1000
+        if novo_hash:
+            with self._lock:
+                self._stats['rehashes'] += 1
+        return confere, novo_hash
+
+    def gerar(self, senha):
+        """Hash de uma senha nova com a política atual"""
+        return self.gerar_lote([senha])[0]
+
+    def gerar_lote(self, senhas, tamanho_bloco=SENHA_LOTE_BLOCO):
+        """
+        Hashes de várias senhas, em blocos no pool. Cada bloco ocupa uma vaga
+        como um login e no máximo `lote_simultaneos` ficam no pool por vez.
+        Levanta LimiteSenhas (503) se o pool está cheio ou um bloco passa do
+        tempo; os blocos ainda na fila são cancelados.
+        """
+        senhas = list(senhas)
+        if not self.processos:
+            hashes = _gerar(senhas, self.metodo)
+        else:
+            tamanho = max(1, min(tamanho_bloco, -(-len(senhas) // self.processos)))
+            enviados = deque()
+            hashes = []
+            try:
+                for i in range(0, len(senhas), tamanho):
+                    if len(enviados) >= self.lote_simultaneos:
+                        hashes.extend(self._aguardar(*enviados.popleft()))
+                    vaga = self._reservar(())
+                    enviados.append(self._submeter(vaga, _gerar, senhas[i:i + tamanho], self.metodo))
+                while enviados:
+                    hashes.extend(self._aguardar(*enviados.popleft()))
+            finally:
+                for _, futuro in enviados:
+                    futuro.cancel()
+        with self._lock:
+            self._stats['hashes_gerados'] += len(hashes)
+        return hashes
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self):
+        """Métricas para o monitoramento"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['metodo'] = self.prefixo
+            stats['processos'] = self.processos
+            stats['lote_simultaneos'] = self.lote_simultaneos
+            stats['limites'] = 'compartilhados' if self.limites is not None else 'locais'
+            stats['em_andamento'] = self._pendentes
+            stats['tempo_medio_ms'] = (
+                round(stats['tempo_total_ms'] / stats['verificacoes'], 2) if stats['verificacoes'] else None
+            )
+            stats['tempo_total_ms'] = round(stats['tempo_total_ms'], 1)
+            return stats
+
+def atualizar_hash_senha(conn, usuario_id, hash_antigo, hash_novo):
+    """Job de escrita do rehash; não sobrescreve uma senha trocada nesse meio-tempo"""
+    conn.execute(
+        'UPDATE usuarios SET senha = ? WHERE id = ? AND senha = ?', (hash_novo, usuario_id, hash_antigo)
+    )
+
+# ---------- integração com a aplicação ----------
+
+def init_app(app):
+    """Registra o verificador de senhas na aplicação (o pool sobe no primeiro login)"""
+    app.config.setdefault('SENHA_METODO', SENHA_METODO)
+    app.config.setdefault('SENHA_PROCESSOS', SENHA_PROCESSOS)
+    app.config.setdefault('SENHA_LIMITE_CONTA', SENHA_LIMITE_CONTA)
+    app.config.setdefault('SENHA_LIMITE_IP', SENHA_LIMITE_IP)
+    app.config.setdefault('SENHA_RESERVA_VALIDADE', SENHA_RESERVA_VALIDADE)
+    app.extensions['senhas'] = VerificadorSenhas(
+        metodo=app.config['SENHA_METODO'],
+        processos=app.config['SENHA_PROCESSOS'],
+        limite_conta=app.config['SENHA_LIMITE_CONTA'],
+        limite_ip=app.config['SENHA_LIMITE_IP'],
+        # Limites por conta e por IP somados entre os workers (logins_em_andamento)
+        limites=LimitesCompartilhados(app.extensions['db_writer'], app.config['SENHA_RESERVA_VALIDADE'])
+    )
+
+_verificador_local = None
+
+def get_senhas(app=None):
+    """Verificador registrado na aplicação; sem aplicação (scripts), um verificador sem pool"""
+    global _verificador_local
+    if app is not None or has_app_context():
+        verificador = (app or current_app).extensions.get('senhas')
+        if verificador is not None:
+            return verificador
+    if _verificador_local is None:
+        _verificador_local = VerificadorSenhas(processos=0)
+    return _verificador_local
@@ -0,0 +1,412 @@
+"""
+Servidor de produção do sistema acadêmico.
+
+`python backend/app.py` sobe o servidor de desenvolvimento do Flask: um
+processo só, sem controle de workers, e ainda rodava a criação das tabelas
+a cada início. Este módulo separa as duas coisas:
+
+- migração: app.init_db roda uma vez, no processo mestre, antes de subir
+  os workers (ou sozinha com --migrar);
+- serviço: N processos workers, cada um com M threads, todos aceitando no
+  mesmo socket. Cada worker chama app.create_app depois do fork, então pools
+  de conexões, fila de escrita e pools de processos são do próprio worker.
+
+Com gunicorn instalado ele é usado (worker gthread); sem ele, um pré-fork
+próprio sobre o servidor WSGI do werkzeug faz o mesmo papel. Há também o
+modo uvicorn (ASGI, via asgiref). Sinais no processo mestre:
+
+- SIGTERM/SIGINT: parada graciosa (os workers terminam as requisições em
+  andamento, até SERVIDOR_TIMEOUT_PARADA segundos);
+- SIGHUP: recarga graciosa (roda a migração, sobe uma nova geração de
+  workers com o código atual e só então encerra a anterior).
+
+Estado em memória é de cada worker e não é compartilhado entre eles: o que
+precisa valer para todos fica no SQLite. Assim, o estado das gerações de
+grade fica em tarefas_grade, os links do calendário em calendario_feeds e
+os limites de login simultâneo por conta e por IP em logins_em_andamento.
+Caches em memória (tokens, consultas, índice de horários, armazenamento
+colunar, semanas do calendário) são por worker, mas cada um confere a
+versão das tabelas antes de responder. Já as métricas de
+/api/admin/monitoramento e os contadores de 304 descrevem só o worker que
+atendeu.
+
+Os pools de processos de senha (SENHA_PROCESSOS) e de geração de grade
+(GRADE_PROCESSOS) também são por worker. Por isso o valor configurado é o
+total da máquina, dividido entre os workers (pelo menos 1 cada): com N
+workers e os padrões, são N processos de senha, não N x núcleos.
+
+Uso: python backend/servidor.py [--workers 4] [--threads 8] [--porta 8000] [--servidor auto|gunicorn|prefork|uvicorn]
+     python backend/servidor.py --migrar
+     gunicorn --chdir backend -w 4 --threads 8 'servidor:criar_aplicacao(workers=4)'
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+HOST_PADRAO = os.environ.get('SERVIDOR_HOST', '0.0.0.0')
+PORTA_PADRAO = int(os.environ.get('SERVIDOR_PORTA', 8000))
+WORKERS_PADRAO = int(os.environ.get('SERVIDOR_WORKERS', os.cpu_count() or 1))
+THREADS_PADRAO = int(os.environ.get('SERVIDOR_THREADS', 8))
+TIMEOUT_PARADA = float(os.environ.get('SERVIDOR_TIMEOUT_PARADA', 30))
+# Conexões keep-alive ociosas liberam a thread depois deste tempo
+TIMEOUT_KEEPALIVE = float(os.environ.get('SERVIDOR_TIMEOUT_KEEPALIVE', 5))
+BANCO_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database', 'sistema_academico.db')
+
+def _banco(banco=None):
+    return os.path.abspath(banco or os.environ.get('SERVIDOR_BANCO') or BANCO_PADRAO)
+
+# =============================================
+# FÁBRICAS (WSGI / ASGI)
+# =============================================
+
+def processos_por_worker(total, workers):
+    """Parte de cada worker num total de processos auxiliares (0 continua 0; senão pelo menos 1)"""
+    if total <= 0:
+        return 0
+    return max(1, total // max(1, workers))
+
+def criar_aplicacao(banco=None, workers=None):
+    """
+    Aplicação WSGI pronta para o worker. Também é o alvo do gunicorn:
+    gunicorn --chdir backend -w 4 'servidor:criar_aplicacao(workers=4)'.
+    `workers` (padrão: SERVIDOR_WORKERS ou 1) divide os pools de processos.
+    """
+    from app import create_app
+    from gerador_grade import GRADE_PROCESSOS
+    from senhas import SENHA_PROCESSOS
+    if workers is None:
+        workers = int(os.environ.get('SERVIDOR_WORKERS', 1))
+    return create_app({
+        'DATABASE': _banco(banco),
+        'SENHA_PROCESSOS': processos_por_worker(SENHA_PROCESSOS, workers),
+        'GRADE_PROCESSOS': processos_por_worker(GRADE_PROCESSOS, workers)
+    })
+
+def criar_asgi(banco=None):
+    """Aplicação ASGI (uvicorn --factory servidor:criar_asgi), via asgiref"""
+    from asgiref.wsgi import WsgiToAsgi
+    return WsgiToAsgi(criar_aplicacao(banco))
+
+def _encerrar_aplicacao(app):
+    """Fecha os pools do worker: processos de senha e de grade, fila de escrita e conexões"""
+    for nome in ('senhas', 'gerador_grade', 'db_writer', 'db_pool'):
+        extensao = app.extensions.get(nome)
+        if extensao is not None:
+            extensao.close()
+
+# =============================================
+# MIGRAÇÃO
+# =============================================
+
+def migrar(banco=None):
+    """Passo de migração: cria/atualiza as tabelas uma única vez"""
+    from app import init_db
+    init_db(_banco(banco))
+
+def _migrar_em_processo(banco):
+    """
+    Roda a migração num interpretador novo (spawn): o mestre nunca importa a
+    aplicação, então não leva threads para o fork e, na recarga, os workers
+    novos carregam o código atual.
+    """
+    processo = multiprocessing.get_context('spawn').Process(target=migrar, args=(banco,), name='migracao')
+    processo.start()
+    processo.join()
+    if processo.exitcode != 0:
+        raise RuntimeError(f'Migração falhou (código {processo.exitcode})')
+
+# =============================================
+# PRÉ-FORK (sem gunicorn)
+# =============================================
+
+def _servidor_wsgi():
+    # Importado só quando usado: o modo gunicorn não precisa do werkzeug aqui
+    from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+    class Handler(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        timeout = TIMEOUT_KEEPALIVE
+
+        def handle_one_request(self):
+            super().handle_one_request()
+            # Cada conexão keep-alive prende uma thread do pool: se há conexões
+            # esperando thread, fecha esta depois da resposta para não deixá-las paradas
+            if self.server.esperando():
+                self.close_connection = True
+
+    class ServidorThreads(BaseWSGIServer):
+        """Servidor WSGI do werkzeug com um pool fixo de threads por worker"""
+        multithread = True
+
+        def __init__(self, host, porta, app, threads, fd):
+            super().__init__(host, porta, app, handler=Handler, fd=fd)
+            self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='http')
+            self._lock = threading.Lock()
+            self._esperando = 0
+
+        def esperando(self):
+            """Conexões aceitas que ainda não ganharam uma thread"""
+            return self._esperando > 0
+
+        def process_request(self, request, client_address):
+            with self._lock:
+                self._esperando += 1
+            self._executor.submit(self._atender, request, client_address)
+
+        def _atender(self, request, client_address):
+            with self._lock:
+                self._esperando -= 1
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+        def serve_forever(self, poll_interval=0.5):
+            try:
+                super().serve_forever(poll_interval=poll_interval)
+            finally:
+                # Socket de escuta já fechado: termina as requisições em andamento
+                self._executor.shutdown(wait=True)
+
+    return ServidorThreads
+
+def _worker(sock, host, porta, threads, banco, workers):
+    """Corpo do processo worker: carrega a aplicação e atende até receber SIGTERM"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    app = criar_aplicacao(banco, workers)
+    servidor = _servidor_wsgi()(host, porta, app, threads, sock.fileno())
+    # shutdown() espera o loop terminar: chamado de outra thread
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=servidor.shutdown, daemon=True).start())
+    try:
+        servidor.serve_forever(poll_interval=0.2)
+    finally:
+        _encerrar_aplicacao(app)
+
+class Mestre:
+    """Processo mestre do pré-fork: abre o socket, cria, vigia e recarrega os workers"""
+
+    def __init__(self, host, porta, workers, threads, banco, migracao=True):
+        self.host = host
+        self.porta = porta
+        self.workers = workers
+        self.threads = threads
+        self.banco = banco
+        self.migracao = migracao
+        self.geracao = 0
+        self._filhos = {}  # pid -> geração
+        self._parar = False
+        self._recarregar = False
+        self.socket = None
+
+    def _abrir_socket(self):
+        sock = socket.create_server((self.host, self.porta), backlog=2048)
+        # Não bloqueante: vários workers acordam para a mesma conexão e só um
+        # a aceita; os outros voltam ao loop em vez de ficarem presos no accept
+        sock.setblocking(False)
+        return sock
+
+    def _iniciar_worker(self):
+        pid = os.fork()
+        if pid == 0:
+            codigo = 1
+            try:
+                _worker(self.socket, self.host, self.porta, self.threads, self.banco, self.workers)
+                codigo = 0
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                os._exit(codigo)
+        self._filhos[pid] = self.geracao
+        return pid
+
+    def _colher(self):
+        """Recolhe workers encerrados; devolve os que morreram da geração atual"""
+        mortos = []
+        while self._filhos:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            geracao = self._filhos.pop(pid, None)
+            if geracao == self.geracao:
+                mortos.append((pid, status))
+        return mortos
+
+    def _sinalizar(self, pids, sinal):
+        for pid in pids:
+            try:
+                os.kill(pid, sinal)
+            except ProcessLookupError:
+                pass
+
+    def _aguardar(self, pids, timeout):
+        """Espera os workers `pids` saírem; os que passarem do prazo recebem SIGKILL"""
+        limite = time.monotonic() + timeout
+        pids = set(pids)
+        while pids & set(self._filhos) and time.monotonic() < limite:
+            self._colher()
+            time.sleep(0.05)
+        restantes = pids & set(self._filhos)
+        if restantes:
+            print(f'⚠️  {len(restantes)} worker(s) não terminaram em {timeout:.0f}s; encerrando à força')
+            self._sinalizar(restantes, signal.SIGKILL)
+            for pid in restantes:
+                try:
+                    os.waitpid(pid, 0)
+                except ChildProcessError:
+                    pass
+                self._filhos.pop(pid, None)
+
+    def recarregar(self):
+        """Nova geração de workers com o código atual; a anterior termina o que estava atendendo"""
+        antigos = list(self._filhos)
+        if self.migracao:
+            try:
+                _migrar_em_processo(self.banco)
+            except RuntimeError as e:
+                print(f'❌ Recarga cancelada: {e}')
+                return
+        self.geracao += 1
+        for _ in range(self.workers):
+            self._iniciar_worker()
+        self._sinalizar(antigos, signal.SIGTERM)
+        print(f'🔄 Geração {self.geracao}: {self.workers} worker(s) novos, {len(antigos)} em encerramento')
+
+    def executar(self):
+        if self.migracao:
+            print('🔄 Migrando banco de dados...')
+            _migrar_em_processo(self.banco)
+        self.socket = self._abrir_socket()
+
+        signal.signal(signal.SIGTERM, self._sinal_parar)
+        signal.signal(signal.SIGINT, self._sinal_parar)
+        signal.signal(signal.SIGHUP, self._sinal_recarregar)
+
+        for _ in range(self.workers):
+            self._iniciar_worker()
+        print(f'🚀 Servidor em http://{self.host}:{self.porta} '
+              f'({self.workers} worker(s) x {self.threads} threads, pid {os.getpid()})')
+        print('📊 Banco de dados:', self.banco)
+
+        try:
+            while not self._parar:
+                if self._recarregar:
+                    self._recarregar = False
+                    self.recarregar()
+                for pid, status in self._colher():
+                    print(f'⚠️  Worker {pid} saiu (status {status}); iniciando outro')
+                    time.sleep(0.5)  # evita laço de forks se o worker falha ao subir
+                    self._iniciar_worker()
+                time.sleep(0.2)
+        finally:
+            print('🛑 Encerrando workers...')
+            pids = list(self._filhos)
+            self._sinalizar(pids, signal.SIGTERM)
+            self._aguardar(pids, TIMEOUT_PARADA)
+            self.socket.close()
+
+    def _sinal_parar(self, *_):
+        self._parar = True
+
+    def _sinal_recarregar(self, *_):
+        self._recarregar = True
+
+# =============================================
+# GUNICORN / UVICORN
+# =============================================
+
+def _gunicorn(host, porta, workers, threads, banco):
+    from gunicorn.app.base import BaseApplication
+
+    class AplicacaoGunicorn(BaseApplication):
+        def load_config(self):
+            opcoes = {
+                'bind': f'{host}:{porta}',
+                'workers': workers,
+                'threads': threads,
+                'worker_class': 'gthread',
+                'graceful_timeout': TIMEOUT_PARADA,
+                'keepalive': TIMEOUT_KEEPALIVE,
+                # Sem preload: cada worker cria a aplicação depois do fork
+                'preload_app': False,
+            }
+            for chave, valor in opcoes.items():
+                self.cfg.set(chave, valor)
+
+        def load(self):
+            return criar_aplicacao(banco, workers)
+
+    AplicacaoGunicorn().run()
+
+def _uvicorn(host, porta, workers, banco):
+    import uvicorn
+    # Os workers do uvicorn importam a fábrica de novo: banco e workers vão pelo ambiente
+    os.environ['SERVIDOR_BANCO'] = banco
+    os.environ['SERVIDOR_WORKERS'] = str(workers)
+    uvicorn.run('servidor:criar_asgi', factory=True, host=host, port=porta, workers=workers,
+                app_dir=os.path.dirname(os.path.abspath(__file__)))
+
+def _tem_gunicorn():
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Servidor de produção do sistema acadêmico')
+    parser.add_argument('--host', default=HOST_PADRAO)
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser.add_argument('--workers', type=int, default=WORKERS_PADRAO, help='processos workers')
+    parser.add_argument('--threads', type=int, default=THREADS_PADRAO, help='threads por worker')
+    parser.add_argument('--servidor', choices=('auto', 'gunicorn', 'prefork', 'uvicorn'), default='auto',
+                        help='auto: gunicorn se instalado, senão o pré-fork próprio')
+    parser.add_argument('--banco', default=None, help='arquivo SQLite (padrão: SERVIDOR_BANCO ou database/sistema_academico.db)')
+    parser.add_argument('--sem-migracao', action='store_true', help='não roda a migração antes de subir')
+    parser.add_argument('--migrar', action='store_true', help='só roda a migração e sai')
+    args = parser.parse_args(argv)
+
+    banco = _banco(args.banco)
+    if args.migrar:
+        migrar(banco)
+        print('✅ Banco migrado:', banco)
+        return 0
+
+    servidor = args.servidor
+    if servidor == 'auto':
+        servidor = 'gunicorn' if _tem_gunicorn() and hasattr(os, 'fork') else 'prefork'
+
+    if servidor == 'prefork' and not hasattr(os, 'fork'):
+        print('❌ Pré-fork requer os.fork (use --servidor uvicorn neste sistema)')
+        return 1
+
+    if servidor == 'prefork':
+        Mestre(args.host, args.porta, args.workers, args.threads, banco, not args.sem_migracao).executar()
+        return 0
+
+    if not args.sem_migracao:
+        print('🔄 Migrando banco de dados...')
+        _migrar_em_processo(banco)
+    if servidor == 'gunicorn':
+        _gunicorn(args.host, args.porta, args.workers, args.threads, banco)
+    else:
+        _uvicorn(args.host, args.porta, args.workers, banco)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,43 @@
+import json
+from datetime import datetime
+from database import run_write
+from versioning import assinatura
+
+# =============================================
+# SNAPSHOTS DE RELATÓRIOS
+# =============================================
+# Um relatório caro é gerado uma vez e guardado em `snapshots_relatorios`
+# junto com a assinatura das versões das tabelas de que depende. Enquanto
+# nenhuma dessas tabelas mudar, o snapshot é servido sem reexecutar a
+# consulta — inclusive por outros processos, já que fica no banco.
+
+def _salvar_snapshot(conn, nome, chave, gerado_em, conteudo):
+    conn.execute('''
+        INSERT INTO snapshots_relatorios (nome, assinatura, gerado_em, conteudo)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (nome) DO UPDATE SET
+            assinatura = excluded.assinatura,
+            gerado_em = excluded.gerado_em,
+            conteudo = excluded.conteudo
+    ''', (nome, chave, gerado_em, conteudo))
+
+def obter_snapshot(conn, nome, tabelas, gerar):
+    """
+    Retorna (conteudo, gerado_em, reaproveitado) do relatório `nome`.
+
+    `gerar(conn)` só é chamado quando alguma das `tabelas` mudou desde o
+    último snapshot. A assinatura é lida antes de gerar, então um snapshot
+    nunca fica marcado com versões mais novas que os dados que contém.
+    """
+    chave = assinatura(conn, tabelas)
+
+    salvo = conn.execute(
+        'SELECT assinatura, gerado_em, conteudo FROM snapshots_relatorios WHERE nome = ?', (nome,)
+    ).fetchone()
+    if salvo and salvo[0] == chave:
+        return json.loads(salvo[2]), salvo[1], True
+
+    conteudo = gerar(conn)
+    gerado_em = datetime.now().isoformat()
+    run_write(_salvar_snapshot, nome, chave, gerado_em, json.dumps(conteudo))
+    return conteudo, gerado_em, False
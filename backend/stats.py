@@ -0,0 +1,62 @@
+# =============================================
+# ESTATÍSTICAS MATERIALIZADAS DO DASHBOARD
+# =============================================
+# As tabelas `estatisticas` e `estatisticas_professores` (migração 003) são
+# mantidas por triggers em alunos, usuarios, turmas, atividades e materias,
+# então qualquer caminho de escrita (app.py, blueprints, scripts) as atualiza.
+
+CHAVES_ESTATISTICAS = {
+    'total_alunos': 'SELECT COUNT(*) FROM alunos',
+    'total_professores': "SELECT COUNT(*) FROM usuarios WHERE tipo = 'professor'",
+    'total_turmas': 'SELECT COUNT(*) FROM turmas',
+    'total_atividades': 'SELECT COUNT(*) FROM atividades'
+}
+
+def obter_estatisticas(conn):
+    """Retorna os contadores do dashboard (uma leitura por chave primária)"""
+    estatisticas = {chave: 0 for chave in CHAVES_ESTATISTICAS}
+    for chave, valor in conn.execute('SELECT chave, valor FROM estatisticas'):
+        estatisticas[chave] = valor
+    return estatisticas
+
+def professores_mais_ativos(conn, limite=5):
+    """Professores com mais matérias, lidos do índice de estatisticas_professores"""
+    return conn.execute('''
+        SELECT u.nome, e.total_materias
+        FROM estatisticas_professores e
+        JOIN usuarios u ON u.id = e.professor_id
+        ORDER BY e.total_materias DESC
+        LIMIT ?
+    ''', (limite,)).fetchall()
+
+def recalcular_estatisticas(conn):
+    """
+    Recalcula todos os contadores a partir das tabelas de origem.
+
+    Retorna as diferenças encontradas em relação aos valores materializados
+    ({chave: (antes, depois)}), útil para detectar desvios.
+    """
+    antes = {row[0]: row[1] for row in conn.execute('SELECT chave, valor FROM estatisticas')}
+    desvios = {}
+
+    for chave, sql in CHAVES_ESTATISTICAS.items():
+        valor = conn.execute(sql).fetchone()[0]
+        conn.execute(
+            'INSERT INTO estatisticas (chave, valor) VALUES (?, ?) '
+            'ON CONFLICT (chave) DO UPDATE SET valor = excluded.valor',
+            (chave, valor)
+        )
+        if antes.get(chave) != valor:
+            desvios[chave] = (antes.get(chave), valor)
+
+    conn.execute('DELETE FROM estatisticas_professores')
+    conn.execute('''
+        INSERT INTO estatisticas_professores (professor_id, total_materias)
+        SELECT u.id, COUNT(m.id)
+        FROM usuarios u
+        LEFT JOIN materias m ON m.professor_id = u.id
+        WHERE u.tipo = 'professor'
+        GROUP BY u.id
+    ''')
+
+    return desvios
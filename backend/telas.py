@@ -0,0 +1,324 @@
+import hashlib
+from datetime import date, timedelta
+
+from agregados import media_aluno
+from cache_consultas import consultas_cacheadas
+from calendario import DIAS_PADRAO, TABELAS_CALENDARIO, get_calendario
+from stats import obter_estatisticas, professores_mais_ativos
+from versioning import versoes
+
+# =============================================
+# TELAS AGREGADAS (BOOTSTRAP)
+# =============================================
+# Cada tela do frontend disparava várias requisições em sequência (detalhe
+# do professor: professor e depois as turmas; início do aluno: notas,
+# atividades e calendário). Uma tela aqui é uma lista de seções, cada uma
+# com as tabelas de que depende e uma função que a carrega; montar_tela()
+# carrega as seções pedidas na mesma conexão e devolve um único payload.
+#
+# Atualização parcial: a resposta traz, por seção, uma versão (hash das
+# versões das suas tabelas e do contexto da tela). O cliente pode pedir só
+# algumas seções (?secoes=notas,atividades) e informar as versões que já
+# tem (?versoes=notas:ab12...,atividades:cd34...); seções cuja versão não
+# mudou não são consultadas e voltam listadas em `inalteradas`. As versões
+# de todas as tabelas da tela são lidas em uma consulta, antes das seções.
+
+class ErroTela(Exception):
+    """Tela, seção ou registro inexistente"""
+
+    def __init__(self, mensagem, status_code=400):
+        super().__init__(mensagem)
+        self.status_code = status_code
+
+class Secao:
+    """Parte de uma tela: `carregar(conn, contexto, chave)` devolve os dados; `chave` é a assinatura das tabelas"""
+
+    def __init__(self, nome, tabelas, carregar):
+        self.nome = nome
+        self.tabelas = tuple(sorted(tabelas))
+        self.carregar = carregar
+
+class Tela:
+    """Seções de uma tela e, opcionalmente, `verificar(conn, contexto)`, chamada sempre (404 do registro)"""
+
+    def __init__(self, nome, secoes, verificar=None):
+        self.nome = nome
+        self.secoes = {secao.nome: secao for secao in secoes}
+        self.verificar = verificar
+
+    @property
+    def tabelas(self):
+        return tuple(sorted({tabela for secao in self.secoes.values() for tabela in secao.tabelas}))
+
+# ---------- consultas das seções (também usadas pelas rotas individuais) ----------
+
+def notas_do_aluno(conn, aluno_id):
+    """Notas lançadas para o aluno, mais recentes primeiro, e a média geral dos agregados"""
+    notas = conn.execute('''
+        SELECT
+            n.*,
+            a.titulo as atividade_titulo,
+            a.valor as valor_atividade,
+            m.nome as materia_nome,
+            u.nome as professor_nome
+        FROM notas n
+        JOIN atividades a ON n.atividade_id = a.id
+        JOIN materias m ON a.materia_id = m.id
+        JOIN usuarios u ON n.avaliado_por = u.id
+        WHERE n.aluno_id = ?
+        ORDER BY n.data_avaliacao DESC
+    ''', (aluno_id,)).fetchall()
+    media_geral = media_aluno(conn, aluno_id)
+    return {
+        'notas': [dict(nota) for nota in notas],
+        'media_geral': round(media_geral, 1) if media_geral else 0
+    }
+
+def atividades_do_aluno(conn, aluno_id, turma_id):
+    """Atividades da turma do aluno com a situação de entrega dele"""
+    atividades = conn.execute('''
+        SELECT
+            a.id,
+            a.titulo,
+            a.descricao,
+            a.valor,
+            a.data_entrega,
+            m.nome as materia_nome,
+            t.nome as turma_nome,
+            -- Verificar se o aluno já entregou esta atividade
+            CASE WHEN n.id IS NOT NULL THEN 1 ELSE 0 END as entregue,
+            n.nota,
+            n.feedback
+        FROM atividades a
+        JOIN materias m ON a.materia_id = m.id
+        JOIN turmas t ON m.turma_id = t.id
+        LEFT JOIN notas n ON a.id = n.atividade_id AND n.aluno_id = ?
+        WHERE t.id = ?  -- Apenas atividades da turma do aluno
+        ORDER BY a.data_entrega ASC
+    ''', (aluno_id, turma_id)).fetchall()
+    return {
+        'atividades': [dict(atividade) for atividade in atividades],
+        'total': len(atividades),
+        'pendentes': len([a for a in atividades if not a['entregue']])
+    }
+
+def turma_detalhada(conn, turma_id):
+    """Turma com o nome de quem a criou, ou None"""
+    turma = conn.execute('''
+        SELECT t.*, u.nome as criado_por_nome
+        FROM turmas t
+        LEFT JOIN usuarios u ON t.criado_por = u.id
+        WHERE t.id = ?
+    ''', (turma_id,)).fetchone()
+    return dict(turma) if turma else None
+
+def alunos_da_turma(conn, turma_id):
+    """Alunos da turma com média e total de avaliações dos agregados"""
+    return [dict(aluno) for aluno in conn.execute('''
+        SELECT a.id, u.nome, u.email, a.matricula, a.telefone,
+               ag.soma / NULLIF(ag.quantidade, 0) as media_geral,
+               COALESCE(ag.registros, 0) as total_avaliacoes
+        FROM alunos a
+        JOIN usuarios u ON a.usuario_id = u.id
+        LEFT JOIN agregados_notas ag ON ag.dimensao = 'aluno' AND ag.chave = a.id
+        WHERE a.turma_id = ?
+    ''', (turma_id,))]
+
+def professores_da_turma(conn, turma_id):
+    """Professores alocados na turma, um por matéria"""
+    return [dict(professor) for professor in conn.execute('''
+        SELECT
+            u.id,
+            u.nome,
+            u.email,
+            u.telefone,
+            u.formacao,
+            m.nome as materia_nome,
+            m.horario,
+            m.dia_semana,
+            m.carga_horaria_semanal,
+            m.data_inicio
+        FROM materias m
+        JOIN usuarios u ON m.professor_id = u.id
+        WHERE m.turma_id = ? AND u.tipo = 'professor'
+    ''', (turma_id,))]
+
+def professores_disponiveis(conn):
+    """Todos os professores com o número de matérias de cada um"""
+    professores = []
+    for professor in conn.execute('''
+        SELECT
+            u.id,
+            u.nome,
+            u.email,
+            u.telefone,
+            u.formacao,
+            u.experiencia,
+            COUNT(m.id) as turmas_count
+        FROM usuarios u
+        LEFT JOIN materias m ON u.id = m.professor_id
+        WHERE u.tipo = 'professor'
+        GROUP BY u.id
+        ORDER BY u.nome
+    '''):
+        professor = dict(professor)
+        professor['turmas_count'] = professor['turmas_count'] or 0
+        professores.append(professor)
+    return professores
+
+def professor_detalhado(conn, professor_id):
+    """Professor com total de matérias, ou None"""
+    professor = conn.execute('''
+        SELECT u.*,
+               COUNT(DISTINCT m.id) as total_turmas
+        FROM usuarios u
+        LEFT JOIN materias m ON u.id = m.professor_id
+        WHERE u.id = ? AND u.tipo = 'professor'
+        GROUP BY u.id
+    ''', (professor_id,)).fetchone()
+    if not professor:
+        return None
+    professor = dict(professor)
+    professor.pop('senha', None)
+    return professor
+
+def turmas_do_professor(conn, professor_id):
+    """Matérias do professor com a turma de cada uma"""
+    return [dict(turma) for turma in conn.execute('''
+        SELECT
+            t.id,
+            t.nome as turma_nome,
+            t.codigo,
+            m.id as materia_id,
+            m.nome as materia_nome,
+            m.horario,
+            m.dia_semana,
+            m.carga_horaria_semanal,
+            m.data_inicio
+        FROM materias m
+        JOIN turmas t ON m.turma_id = t.id
+        WHERE m.professor_id = ?
+        ORDER BY t.nome, m.nome
+    ''', (professor_id,))]
+
+# ---------- telas ----------
+
+def _estatisticas(conn, contexto, chave):
+    return obter_estatisticas(conn)
+
+def _turmas_recentes(conn, contexto, chave):
+    return [dict(turma) for turma in conn.execute('''
+        SELECT id, nome, codigo, ano_letivo, periodo, alunos_matriculados, capacidade_max
+        FROM turmas
+        ORDER BY nome
+        LIMIT 5
+    ''')]
+
+def _turmas_capacidade(conn, contexto, chave):
+    return [dict(turma) for turma in conn.execute('''
+        SELECT nome, alunos_matriculados, capacidade_max,
+               ROUND((alunos_matriculados * 100.0 / capacidade_max), 1) as percentual
+        FROM turmas
+        ORDER BY percentual DESC
+    ''')]
+
+def _professores_ativos(conn, contexto, chave):
+    return [dict(professor) for professor in professores_mais_ativos(conn, 5)]
+
+def _verificar_turma(conn, contexto):
+    if conn.execute('SELECT 1 FROM turmas WHERE id = ?', (contexto['turma_id'],)).fetchone() is None:
+        raise ErroTela('Turma não encontrada', 404)
+
+def _verificar_professor(conn, contexto):
+    if conn.execute(
+        "SELECT 1 FROM usuarios WHERE id = ? AND tipo = 'professor'", (contexto['professor_id'],)
+    ).fetchone() is None:
+        raise ErroTela('Professor não encontrado', 404)
+
+def _materias_nomes(conn, contexto, chave):
+    # Opções do formulário de alocação; dado de referência, do cache de consultas
+    return [dict(materia) for materia in consultas_cacheadas(conn, ('materias',)).execute(
+        'SELECT id, nome FROM materias ORDER BY nome'
+    )]
+
+def _calendario(conn, contexto, chave):
+    inicio = date.fromisoformat(contexto['hoje'])
+    fim = inicio + timedelta(days=DIAS_PADRAO - 1)
+    aulas = list(get_calendario().ocorrencias(conn, contexto['turma_id'], inicio, fim, chave))
+    return {'dias_aula': aulas, 'total_aulas': len(aulas), 'inicio': inicio.isoformat(), 'fim': fim.isoformat()}
+
+ESTATISTICAS = ('alunos', 'usuarios', 'turmas', 'atividades', 'materias')
+
+TELAS = {
+    'admin_dashboard': Tela('admin_dashboard', (
+        Secao('estatisticas', ESTATISTICAS, _estatisticas),
+        Secao('turmas_recentes', ('turmas',), _turmas_recentes),
+        Secao('turmas_capacidade', ('turmas',), _turmas_capacidade),
+        Secao('professores_ativos', ('materias', 'usuarios'), _professores_ativos)
+    )),
+    'turma': Tela('turma', (
+        Secao('turma', ('turmas', 'usuarios'), lambda conn, contexto, chave: turma_detalhada(conn, contexto['turma_id'])),
+        Secao('alunos', ('alunos', 'usuarios', 'notas'),
+              lambda conn, contexto, chave: alunos_da_turma(conn, contexto['turma_id'])),
+        Secao('professores', ('materias', 'usuarios'),
+              lambda conn, contexto, chave: professores_da_turma(conn, contexto['turma_id'])),
+        Secao('professores_disponiveis', ('materias', 'usuarios'),
+              lambda conn, contexto, chave: professores_disponiveis(
+                  consultas_cacheadas(conn, ('materias', 'usuarios'))
+              )),
+        Secao('materias', ('materias',), _materias_nomes)
+    ), verificar=_verificar_turma),
+    'professor': Tela('professor', (
+        Secao('professor', ('materias', 'usuarios'),
+              lambda conn, contexto, chave: professor_detalhado(conn, contexto['professor_id'])),
+        Secao('turmas', ('materias', 'turmas'),
+              lambda conn, contexto, chave: turmas_do_professor(conn, contexto['professor_id']))
+    ), verificar=_verificar_professor),
+    'aluno_inicio': Tela('aluno_inicio', (
+        Secao('notas', ('notas', 'atividades', 'materias', 'usuarios'),
+              lambda conn, contexto, chave: notas_do_aluno(conn, contexto['aluno_id'])),
+        Secao('atividades', ('atividades', 'materias', 'turmas', 'notas'),
+              lambda conn, contexto, chave: atividades_do_aluno(conn, contexto['aluno_id'], contexto['turma_id'])),
+        Secao('calendario', TABELAS_CALENDARIO, _calendario)
+    ))
+}
+
+def ler_secoes(args, tela):
+    """(seções pedidas, {seção: versão conhecida}) de ?secoes= e ?versoes=; todas por padrão"""
+    pedidas = [nome for nome in args.get('secoes', '').split(',') if nome] or list(tela.secoes)
+    desconhecidas = [nome for nome in pedidas if nome not in tela.secoes]
+    if desconhecidas:
+        raise ErroTela(
+            f"Seção(ões) inválida(s): {', '.join(desconhecidas)} (disponíveis: {', '.join(tela.secoes)})"
+        )
+    conhecidas = {}
+    for item in args.get('versoes', '').split(','):
+        nome, _, versao = item.partition(':')
+        if nome and versao:
+            conhecidas[nome] = versao
+    return pedidas, conhecidas
+
+def montar_tela(conn, nome, contexto, args):
+    """Payload da tela: {'tela', 'secoes', 'versoes', 'inalteradas'}"""
+    tela = TELAS.get(nome)
+    if tela is None:
+        raise ErroTela(f'Tela desconhecida: {nome}', 404)
+    pedidas, conhecidas = ler_secoes(args, tela)
+
+    atuais = versoes(conn, tela.tabelas)
+    if tela.verificar is not None:
+        tela.verificar(conn, contexto)
+
+    contexto_texto = '|'.join(f'{chave}={contexto[chave]}' for chave in sorted(contexto))
+    secoes, versoes_secoes, inalteradas = {}, {}, []
+    for nome_secao in pedidas:
+        secao = tela.secoes[nome_secao]
+        chave = ','.join(f'{tabela}:{atuais[tabela]}' for tabela in secao.tabelas)
+        versao = hashlib.sha256(f'{nome}|{nome_secao}|{contexto_texto}|{chave}'.encode()).hexdigest()[:16]
+        versoes_secoes[nome_secao] = versao
+        if conhecidas.get(nome_secao) == versao:
+            inalteradas.append(nome_secao)
+            continue
+        secoes[nome_secao] = secao.carregar(conn, contexto, chave)
+
+    return {'tela': nome, 'secoes': secoes, 'versoes': versoes_secoes, 'inalteradas': inalteradas}
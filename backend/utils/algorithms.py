@@ -1,14 +1,15 @@
+from .ranking import ordenar
+
 def quick_sort(arr, key=lambda x: x):
     """
-    Implementação do algoritmo Quick Sort para ordenação eficiente
+    Ordenação crescente por `key`, mantida por compatibilidade.
+
+    Delega ao Timsort (sorted): estável, chave calculada uma vez por
+    elemento, sem listas intermediárias por nível e sem recursão (a versão
+    recursiva chegava a profundidade O(n) com pivôs ruins). Para rankings use
+    utils.ranking.
     """
-    if len(arr) <= 1:
-        return arr
-    pivot = arr[len(arr) // 2]
-    left = [x for x in arr if key(x) < key(pivot)]
-    middle = [x for x in arr if key(x) == key(pivot)]
-    right = [x for x in arr if key(x) > key(pivot)]
-    return quick_sort(left, key) + middle + quick_sort(right, key)
+    return sorted(arr, key=key)
 
 def binary_search(arr, target, key=lambda x: x):
     """
@@ -32,7 +33,9 @@ def binary_search(arr, target, key=lambda x: x):
 
 def search_students(students, query, field='nome'):
     """
-    Busca de alunos com diferentes critérios
+    Busca de alunos com diferentes critérios (varredura linear em memória).
+
+    A API usa o índice FTS5 de search.py (/api/admin/alunos/search).
     """
     results = []
     query = query.lower()
@@ -47,4 +50,4 @@ def sort_by_performance(students_data):
     """
     Ordena alunos por desempenho (média de notas)
     """
-    return quick_sort(students_data, key=lambda x: x.get('media', 0))
\ No newline at end of file
+    return ordenar(students_data, ['media'])
\ No newline at end of file
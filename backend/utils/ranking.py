@@ -0,0 +1,112 @@
+import heapq
+
+from .vetorial import como_array, ordenar_indices
+
+# =============================================
+# RANKING DE ALUNOS
+# =============================================
+# A chave de cada registro é montada uma única vez (decorate-sort-undecorate
+# do próprio sorted/heapq) como uma tupla com todos os critérios, e a
+# ordenação fica com o Timsort: estável, O(n log n) no pior caso, O(n) em
+# entradas já ordenadas e sem recursão. Quando só os N primeiros interessam,
+# top_k() usa um heap de tamanho N em vez de ordenar tudo.
+#
+# Com um único critério numérico, ordenar() ordena só pelo nome e passa as
+# notas para utils/vetorial.py (radix sort estável em C, se compilado).
+#
+# Critérios aceitos: 'media' (crescente), '-media' (decrescente) ou a tupla
+# ('media', True). Empates são desfeitos pelo nome, sem diferenciar
+# maiúsculas de minúsculas.
+
+class _Invertido:
+    """Inverte a comparação de valores que não podem ser negados (textos)"""
+
+    __slots__ = ('valor',)
+
+    def __init__(self, valor):
+        self.valor = valor
+
+    def __lt__(self, outro):
+        return outro.valor < self.valor
+
+    def __eq__(self, outro):
+        return self.valor == outro.valor
+
+def _normalizar(criterio):
+    if isinstance(criterio, str):
+        if criterio.startswith('-'):
+            return criterio[1:], True
+        return criterio, False
+    campo, descendente = criterio
+    return campo, bool(descendente)
+
+def montar_chave(criterios, desempate='nome', padrao=0):
+    """
+    Função de chave para sorted/heapq a partir da lista de critérios.
+
+    Valores ausentes (ou None) valem `padrao` — o mesmo `x.get('media', 0)`
+    do código antigo; no campo de desempate valem ''.
+    """
+    criterios = [_normalizar(criterio) for criterio in criterios]
+    if desempate and desempate not in {campo for campo, _ in criterios}:
+        criterios.append((desempate, False))
+
+    def chave(item):
+        partes = []
+        for campo, descendente in criterios:
+            valor = item.get(campo)
+            if valor is None:
+                valor = '' if campo == desempate else padrao
+            if isinstance(valor, str):
+                valor = valor.casefold()
+                if descendente:
+                    valor = _Invertido(valor)
+            elif descendente:
+                valor = -valor
+            partes.append(valor)
+        return tuple(partes)
+
+    return chave
+
+def _ordenar_numerico(itens, campo, descendente, desempate, padrao):
+    # Ordena pelo desempate e depois, de forma estável, pelos valores em um
+    # array('d') (radix sort da extensão C quando disponível)
+    itens = sorted(itens, key=montar_chave([], desempate)) if desempate else list(itens)
+    try:
+        valores = como_array((item.get(campo) for item in itens), padrao)
+    except TypeError:
+        return None
+    return [itens[i] for i in ordenar_indices(valores, descendente)]
+
+def ordenar(itens, criterios, desempate='nome', padrao=0):
+    """Retorna uma nova lista ordenada pelos critérios (ordenação estável)"""
+    if len(criterios) == 1:
+        campo, descendente = _normalizar(criterios[0])
+        if campo != desempate:
+            ordenados = _ordenar_numerico(itens, campo, descendente, desempate, padrao)
+            if ordenados is not None:
+                return ordenados
+    return sorted(itens, key=montar_chave(criterios, desempate, padrao))
+
+def top_k(itens, k, criterios, desempate='nome', padrao=0):
+    """
+    Os `k` primeiros pelos critérios, já ordenados.
+
+    Usa um heap de tamanho k (O(n log k)); se k cobre a lista inteira, cai na
+    ordenação completa.
+    """
+    if k <= 0:
+        return []
+
+    chave = montar_chave(criterios, desempate, padrao)
+    if hasattr(itens, '__len__') and k >= len(itens):
+        return sorted(itens, key=chave)
+    return heapq.nsmallest(k, itens, key=chave)
+
+def melhores(itens, k, campo='media', desempate='nome'):
+    """Os `k` melhores por `campo` (maior primeiro)"""
+    return top_k(itens, k, [(campo, True)], desempate)
+
+def piores(itens, k, campo='media', desempate='nome'):
+    """Os `k` piores por `campo` (menor primeiro)"""
+    return top_k(itens, k, [(campo, False)], desempate)
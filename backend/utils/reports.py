@@ -1,6 +1,8 @@
 import json
+from bisect import bisect_left
 from datetime import datetime, timedelta
-from .algorithms import quick_sort
+from .ranking import ordenar
+from .vetorial import FAIXAS_DESEMPENHO, LIMITES_DESEMPENHO, como_array, estatisticas
 
 def generate_report(report_type, data):
     """
@@ -8,6 +10,8 @@ def generate_report(report_type, data):
     """
     if report_type == 'desempenho_turma':
         return generate_desempenho_turma_report(data)
+    elif report_type == 'desempenho_turmas':
+        return generate_desempenho_turmas_report(data)
     elif report_type == 'frequencia':
         return generate_frequencia_report(data)
     elif report_type == 'sustentabilidade':
@@ -15,29 +19,121 @@ def generate_report(report_type, data):
     else:
         return {'error': 'Tipo de relatório não suportado'}
 
-def generate_desempenho_turma_report(data):
+# Faixas de desempenho: nome -> média mínima (a menor faixa recebe tudo abaixo da seguinte)
+FAIXAS_PADRAO = dict(zip(FAIXAS_DESEMPENHO, (0.0,) + LIMITES_DESEMPENHO))
+PERCENTIS_PADRAO = (25, 50, 75, 90)
+
+def normalizar_faixas(faixas=None):
+    """
+    Converte {nome: mínimo} em (nomes, limites), em ordem crescente de mínimo.
+
+    `limites` são os mínimos a partir da segunda faixa, no formato de
+    utils/vetorial.distribuicao.
+    """
+    faixas = FAIXAS_PADRAO if faixas is None else faixas
+    if not faixas:
+        raise ValueError('Informe ao menos uma faixa de desempenho')
+    ordenadas = sorted(((float(minimo), nome) for nome, minimo in faixas.items()))
+    return tuple(nome for _, nome in ordenadas), tuple(minimo for minimo, _ in ordenadas[1:])
+
+def _percentil(ordenados, p):
+    # Interpolação linear entre as posições vizinhas (mesmo critério do numpy)
+    posicao = (len(ordenados) - 1) * p / 100
+    baixo = int(posicao)
+    alto = min(baixo + 1, len(ordenados) - 1)
+    return ordenados[baixo] + (ordenados[alto] - ordenados[baixo]) * (posicao - baixo)
+
+def resumo_medias(medias_ordenadas, nomes_faixas, limites, percentis=PERCENTIS_PADRAO):
+    """
+    Resumo de um array('d') de médias já em ordem crescente.
+
+    Média, mediana e desvio padrão saem de uma passada
+    (utils/vetorial.estatisticas); percentis e contagens por faixa são lidos
+    direto das posições do array ordenado (bisect nos limites).
+    """
+    for p in percentis:
+        if not 0 <= p <= 100:
+            raise ValueError(f'Percentil inválido: {p}')
+
+    base = estatisticas(medias_ordenadas)
+    cortes = [0] + [bisect_left(medias_ordenadas, limite) for limite in limites] + [len(medias_ordenadas)]
+    contagem = {nome: cortes[i + 1] - cortes[i] for i, nome in enumerate(nomes_faixas)}
+
+    return {
+        'media_geral': base['media'] or 0,
+        'mediana': base['mediana'],
+        'desvio_padrao': base['desvio_padrao'],
+        'percentis': {
+            f'p{p:g}': _percentil(medias_ordenadas, p) if medias_ordenadas else None
+            for p in percentis
+        },
+        # Da melhor para a pior faixa, como no relatório original
+        'faixas': {nome: contagem[nome] for nome in reversed(nomes_faixas)}
+    }
+
+def generate_desempenho_turma_report(data, faixas=None, percentis=PERCENTIS_PADRAO,
+                                     incluir_ranking=True, ranking_offset=0, ranking_limite=None):
     """
     Gera relatório de desempenho da turma
+
+    `faixas` ({nome: média mínima}) substitui excelente/bom/regular/
+    insuficiente; `incluir_ranking=False` omite o ranking e
+    `ranking_limite`/`ranking_offset` devolvem só uma página dele.
+    """
+    return _relatorio_desempenho(
+        data, normalizar_faixas(faixas), percentis, incluir_ranking, ranking_offset, ranking_limite
+    )
+
+def generate_desempenho_turmas_report(turmas, faixas=None, percentis=PERCENTIS_PADRAO,
+                                      incluir_ranking=True, ranking_offset=0, ranking_limite=None):
+    """
+    Relatórios de desempenho de várias turmas em uma chamada.
+
+    `turmas` é uma lista de `data` no formato de generate_desempenho_turma_report;
+    as faixas são validadas uma única vez para todas.
     """
-    alunos_ordenados = quick_sort(data['alunos'], key=lambda x: x.get('media', 0))
+    faixas_normalizadas = normalizar_faixas(faixas)
+    return [
+        _relatorio_desempenho(data, faixas_normalizadas, percentis, incluir_ranking, ranking_offset, ranking_limite)
+        for data in turmas
+    ]
+
+def _relatorio_desempenho(data, faixas, percentis, incluir_ranking, ranking_offset, ranking_limite):
+    nomes_faixas, limites = faixas
+    if ranking_offset < 0 or (ranking_limite is not None and ranking_limite < 0):
+        raise ValueError('Paginação do ranking inválida')
+
+    alunos_ordenados = ordenar(data['alunos'], ['media'])
+    
+    # Médias em ordem crescente em um array contíguo (utils/vetorial.py)
+    medias = como_array(aluno.get('media') for aluno in alunos_ordenados)
+    resumo = resumo_medias(medias, nomes_faixas, limites, percentis)
     
     report = {
         'turma': data['turma_info'],
         'resumo': {
             'total_alunos': len(alunos_ordenados),
-            'media_geral': sum(aluno.get('media', 0) for aluno in alunos_ordenados) / len(alunos_ordenados) if alunos_ordenados else 0,
+            'media_geral': resumo['media_geral'],
+            'mediana': resumo['mediana'],
+            'desvio_padrao': resumo['desvio_padrao'],
+            'percentis': resumo['percentis'],
             'melhor_desempenho': alunos_ordenados[-1] if alunos_ordenados else None,
             'pior_desempenho': alunos_ordenados[0] if alunos_ordenados else None
         },
-        'alunos_por_desempenho': {
-            'excelente': len([a for a in alunos_ordenados if a.get('media', 0) >= 9]),
-            'bom': len([a for a in alunos_ordenados if 7 <= a.get('media', 0) < 9]),
-            'regular': len([a for a in alunos_ordenados if 5 <= a.get('media', 0) < 7]),
-            'insuficiente': len([a for a in alunos_ordenados if a.get('media', 0) < 5])
-        },
-        'ranking': alunos_ordenados
+        'alunos_por_desempenho': resumo['faixas']
     }
     
+    if incluir_ranking:
+        if ranking_limite is None:
+            report['ranking'] = alunos_ordenados[ranking_offset:]
+        else:
+            report['ranking'] = alunos_ordenados[ranking_offset:ranking_offset + ranking_limite]
+            report['ranking_paginacao'] = {
+                'offset': ranking_offset,
+                'limit': ranking_limite,
+                'total': len(alunos_ordenados)
+            }
+    
     return report
 
 def generate_sustentabilidade_report(data):
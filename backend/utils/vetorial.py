@@ -0,0 +1,177 @@
+import heapq
+import math
+from array import array
+
+# =============================================
+# OPERAÇÕES VETORIAIS SOBRE NOTAS
+# =============================================
+# As notas ficam em array('d') contíguo (8 bytes por nota, em vez de um
+# float + dict por registro) e as operações pesadas rodam na extensão C
+# c_modules/notas_c quando ela foi compilada:
+#
+#   cd backend/c_modules && python setup.py build_ext --inplace
+#
+# Sem a extensão, as mesmas funções usam as implementações em Python abaixo,
+# com os mesmos resultados (ordem estável, empates pelo menor índice).
+
+try:
+    from c_modules import notas_c as _c
+except ImportError:
+    _c = None
+
+USANDO_C = _c is not None
+
+# Faixas de desempenho usadas nos relatórios
+LIMITES_DESEMPENHO = (5.0, 7.0, 9.0)
+FAIXAS_DESEMPENHO = ('insuficiente', 'regular', 'bom', 'excelente')
+
+def como_array(valores, padrao=0.0):
+    """array('d') a partir de qualquer iterável de números (None vira `padrao`)"""
+    if isinstance(valores, array) and valores.typecode == 'd':
+        return valores
+    return array('d', (padrao if valor is None else valor for valor in valores))
+
+def _indices(bruto):
+    indices = array('q')
+    indices.frombytes(bruto)
+    return indices
+
+# ---------- implementações em Python ----------
+
+def _ordenar_py(valores, descendente=False):
+    return array('q', sorted(range(len(valores)), key=valores.__getitem__, reverse=descendente))
+
+def _top_k_py(valores, k, descendente=True):
+    selecionar = heapq.nlargest if descendente else heapq.nsmallest
+    return array('q', selecionar(max(k, 0), range(len(valores)), key=valores.__getitem__))
+
+def _estatisticas_py(valores):
+    n = len(valores)
+    if n == 0:
+        return {
+            'quantidade': 0, 'media': None, 'mediana': None,
+            'desvio_padrao': None, 'minimo': None, 'maximo': None
+        }
+
+    media = math.fsum(valores) / n
+    ordenados = sorted(valores)
+    meio = n // 2
+    mediana = ordenados[meio] if n % 2 else (ordenados[meio - 1] + ordenados[meio]) / 2
+    return {
+        'quantidade': n,
+        'media': media,
+        'mediana': mediana,
+        'desvio_padrao': math.sqrt(math.fsum((x - media) ** 2 for x in valores) / n),
+        'minimo': ordenados[0],
+        'maximo': ordenados[-1]
+    }
+
+def _distribuicao_py(valores, limites):
+    from bisect import bisect_right
+
+    contagem = [0] * (len(limites) + 1)
+    for valor in valores:
+        contagem[bisect_right(limites, valor)] += 1
+    return contagem
+
+def _agrupar_py(codigos, valores, grupos, limites=None):
+    from bisect import bisect_right
+
+    somas = array('d', bytes(8 * grupos))
+    contagens = array('q', bytes(8 * grupos))
+    faixas = None if limites is None else len(limites) + 1
+    contagem_faixas = None if limites is None else array('q', bytes(8 * grupos * faixas))
+    for grupo, valor in zip(codigos, valores):
+        if not 0 <= grupo < grupos:
+            continue
+        somas[grupo] += valor
+        contagens[grupo] += 1
+        if contagem_faixas is not None:
+            contagem_faixas[grupo * faixas + bisect_right(limites, valor)] += 1
+    return somas, contagens, contagem_faixas
+
+# ---------- API ----------
+
+def ordenar_indices(valores, descendente=False):
+    """Índices que ordenam `valores` (estável; em C é um radix sort O(n))"""
+    valores = como_array(valores)
+    if _c is not None:
+        return _indices(_c.ordenar(valores, descendente))
+    return _ordenar_py(valores, descendente)
+
+def top_k_indices(valores, k, descendente=True):
+    """Índices dos `k` primeiros (maiores, por padrão), já em ordem"""
+    valores = como_array(valores)
+    if _c is not None:
+        return _indices(_c.top_k(valores, k, descendente))
+    return _top_k_py(valores, k, descendente)
+
+def estatisticas(valores):
+    """Quantidade, média, mediana, desvio padrão populacional, mínimo e máximo"""
+    valores = como_array(valores)
+    if _c is not None:
+        return _c.estatisticas(valores)
+    return _estatisticas_py(valores)
+
+def distribuicao(valores, limites=LIMITES_DESEMPENHO):
+    """
+    Contagem por faixa: len(limites) + 1 faixas, a faixa i cobre
+    [limites[i-1], limites[i]). Com os limites padrão, a ordem é a de
+    FAIXAS_DESEMPENHO.
+    """
+    valores = como_array(valores)
+    limites = como_array(limites)
+    if _c is not None:
+        return _c.distribuicao(valores, limites)
+    return _distribuicao_py(valores, limites)
+
+def agrupar(codigos, valores, grupos, limites=None):
+    """
+    Soma e contagem de `valores` por grupo em uma passada.
+
+    `codigos` é um array('q') com o grupo (0..grupos-1) de cada valor; códigos
+    fora do intervalo são ignorados. Com `limites`, também conta as faixas de
+    cada grupo (array plano de grupos * (len(limites) + 1) posições).
+    Retorna (somas, contagens, faixas ou None).
+    """
+    valores = como_array(valores)
+    if limites is not None:
+        limites = como_array(limites)
+    if _c is not None:
+        brutos = _c.agrupar(codigos, valores, grupos, limites)
+        somas = array('d')
+        somas.frombytes(brutos[0])
+        return somas, _indices(brutos[1]), _indices(brutos[2]) if limites is not None else None
+    return _agrupar_py(codigos, valores, grupos, limites)
+
+def distribuicao_desempenho(valores):
+    """Distribuição nas faixas dos relatórios, de excelente a insuficiente"""
+    contagem = dict(zip(FAIXAS_DESEMPENHO, distribuicao(valores, LIMITES_DESEMPENHO)))
+    return {faixa: contagem[faixa] for faixa in reversed(FAIXAS_DESEMPENHO)}
+
+class TabelaNomes:
+    """
+    Nomes empacotados em um único buffer para buscas repetidas por substring.
+
+    Os nomes são normalizados com casefold() e separados por '\\0'; cada busca
+    é uma varredura do buffer (em C, memchr + memcmp) em vez de um lower()
+    por registro por consulta.
+    """
+
+    def __init__(self, nomes):
+        partes = [(nome or '').casefold().encode('utf-8') for nome in nomes]
+        self.offsets = array('q', [0])
+        for parte in partes:
+            self.offsets.append(self.offsets[-1] + len(parte) + 1)
+        self.tabela = b'\0'.join(partes) + b'\0'
+        self._partes = partes if _c is None else None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def buscar(self, termo):
+        """Índices dos nomes que contêm `termo` (sem diferenciar maiúsculas)"""
+        termo = (termo or '').casefold().encode('utf-8')
+        if _c is not None:
+            return _indices(_c.buscar(self.tabela, self.offsets, termo))
+        return array('q', (i for i, parte in enumerate(self._partes) if termo in parte))
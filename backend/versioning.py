@@ -0,0 +1,84 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+# =============================================
+# VERSÕES DE TABELAS
+# =============================================
+# Cada tabela versionada tem um contador em `versoes_tabelas` incrementado
+# por triggers (migração 004) em todo INSERT/UPDATE/DELETE. Comparar as
+# versões permite saber se um resultado derivado ainda é válido sem
+# reexecutar a consulta.
+
+TABELAS_VERSIONADAS = (
+    'usuarios',
+    'turmas',
+    'alunos',
+    'materias',
+    'atividades',
+    'notas',
+    'dias_sem_aula'
+)
+
+def versoes(conn, tabelas=TABELAS_VERSIONADAS):
+    """Retorna {tabela: versão} para as tabelas pedidas"""
+    resultado = {tabela: 0 for tabela in tabelas}
+    placeholders = ', '.join('?' for _ in tabelas)
+    for tabela, versao in conn.execute(
+        f'SELECT tabela, versao FROM versoes_tabelas WHERE tabela IN ({placeholders})', tuple(tabelas)
+    ):
+        resultado[tabela] = versao
+    return resultado
+
+def assinatura(conn, tabelas=TABELAS_VERSIONADAS):
+    """Resume as versões das tabelas em uma string estável (ex.: 'alunos:3,notas:10')"""
+    return ','.join(f'{tabela}:{versao}' for tabela, versao in sorted(versoes(conn, tabelas).items()))
+
+def validadores(conn, tabelas=TABELAS_VERSIONADAS):
+    """
+    (assinatura, última alteração) das tabelas em uma consulta. A última
+    alteração é um datetime UTC (coluna atualizado_em, migração 009) ou None
+    se nenhuma das tabelas registrou escrita.
+    """
+    atuais = {tabela: (0, None) for tabela in tabelas}
+    placeholders = ', '.join('?' for _ in tabelas)
+    for tabela, versao, atualizado_em in conn.execute(
+        f'SELECT tabela, versao, atualizado_em FROM versoes_tabelas WHERE tabela IN ({placeholders})', tuple(tabelas)
+    ):
+        atuais[tabela] = (versao, atualizado_em)
+    chave = ','.join(f'{tabela}:{versao}' for tabela, (versao, _) in sorted(atuais.items()))
+    momentos = [momento for _, momento in atuais.values() if momento is not None]
+    ultima = datetime.fromtimestamp(max(momentos), timezone.utc) if momentos else None
+    return chave, ultima
+
+class VersoesRecentes:
+    """
+    Versões de todas as tabelas versionadas, relidas no máximo uma vez a cada
+    `intervalo` segundos e compartilhadas entre requisições. Serve para
+    caches em memória que aceitam alguns instantes de atraso em troca de não
+    consultar versoes_tabelas a cada uso.
+    """
+
+    def __init__(self, intervalo=1.0):
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._versoes = None
+        self._lidas_em = 0.0
+
+    def obter(self, conn=None, tabelas=TABELAS_VERSIONADAS, abrir=None):
+        """
+        {tabela: versão} das `tabelas`, com no máximo `intervalo` segundos de
+        atraso. Em vez de `conn` pode-se passar `abrir`, chamada só quando é
+        preciso reler as versões.
+        """
+        with self._lock:
+            if self._versoes is None or time.monotonic() - self._lidas_em >= self.intervalo:
+                self._versoes = versoes(conn if conn is not None else abrir())
+                self._lidas_em = time.monotonic()
+            atuais = self._versoes
+        return {tabela: atuais.get(tabela, 0) for tabela in tabelas}
+
+    def expirar(self):
+        """Força a releitura no próximo uso (após uma escrita local, por exemplo)"""
+        with self._lock:
+            self._versoes = None
@@ -0,0 +1,130 @@
+"""
+Benchmark: custo de autenticação por requisição.
+
+Compara, por requisição de aluno:
+- caminho antigo: jwt.decode (HMAC, JSON, exp) e a consulta
+  `SELECT id, turma_id FROM alunos WHERE usuario_id = ?`;
+- autenticacao.CacheTokens: sha256 do token + busca no LRU e os ids do
+  Principal já resolvidos (releitura das versões no máximo uma vez por
+  segundo).
+
+Também mede a taxa de acerto com o dobro de tokens ativos do que cabem no
+cache (acessos uniformes, o pior caso para o LRU).
+
+Uso: python benchmarks/bench_autenticacao.py [--requisicoes 50000] [--alunos 5000] [--tamanho 10000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import jwt
+from flask import Flask
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import database
+from autenticacao import CacheTokens
+
+SEGREDO = 'segredo-do-benchmark'
+
+def criar_banco(caminho, alunos):
+    conn = sqlite3.connect(caminho)
+    conn.executescript('''
+        CREATE TABLE alunos (id INTEGER PRIMARY KEY, usuario_id INTEGER UNIQUE, turma_id INTEGER);
+        CREATE TABLE versoes_tabelas (tabela TEXT PRIMARY KEY, versao INTEGER NOT NULL DEFAULT 0);
+        INSERT INTO versoes_tabelas VALUES ('alunos', 1);
+    ''')
+    conn.executemany(
+        'INSERT INTO alunos VALUES (?, ?, ?)',
+        ((i, 1000 + i, 1 + i % 40) for i in range(1, alunos + 1))
+    )
+    conn.commit()
+    return conn
+
+def gerar_token(usuario_id, sessao=0):
+    payload = {
+        'user_id': usuario_id, 'user_type': 'aluno', 'sessao': sessao,
+        'exp': datetime.utcnow() + timedelta(hours=24)
+    }
+    return jwt.encode(payload, SEGREDO, algorithm='HS256')
+
+def verificar(token):
+    try:
+        return jwt.decode(token, SEGREDO, algorithms=['HS256'])
+    except jwt.InvalidTokenError:
+        return None
+
+def cronometrar(fn):
+    inicio = time.perf_counter()
+    resultado = fn()
+    return time.perf_counter() - inicio, resultado
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requisicoes', type=int, default=50000)
+    parser.add_argument('--alunos', type=int, default=5000)
+    parser.add_argument('--tamanho', type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'bench.db')
+        conn = criar_banco(caminho, args.alunos)
+        app = Flask(__name__)
+        app.config['DATABASE'] = caminho
+        database.init_app(app)
+        tokens = [gerar_token(1000 + i) for i in range(1, args.alunos + 1)]
+        sequencia = [rng.choice(tokens) for _ in range(args.requisicoes)]
+
+        def antigo():
+            ids = []
+            for token in sequencia:
+                payload = verificar(token)
+                ids.append(tuple(conn.execute(
+                    'SELECT id, turma_id FROM alunos WHERE usuario_id = ?', (payload['user_id'],)
+                ).fetchone()))
+            return ids
+
+        cache = CacheTokens(verificar, args.tamanho)
+
+        def novo():
+            ids = []
+            for token in sequencia:
+                principal = cache.autenticar(token)
+                ids.append((principal.aluno_id, principal.turma_id))
+            return ids
+
+        # Os Principais usam a conexão do pool da aplicação, como numa requisição
+        with app.app_context():
+            # Aquecimento: cada token verificado e resolvido uma vez
+            for token in tokens:
+                cache.autenticar(token).aluno_id
+            tempo_antigo, esperado = cronometrar(antigo)
+            tempo_novo, obtido = cronometrar(novo)
+
+            print(f"\n🔐 {args.requisicoes:,} requisições, {args.alunos:,} alunos com token ativo")
+            print(
+                f"   por requisição  jwt.decode + SELECT {tempo_antigo / args.requisicoes * 1e6:7.1f} µs | "
+                f"cache {tempo_novo / args.requisicoes * 1e6:6.2f} µs "
+                f"({tempo_antigo / tempo_novo:5.1f}x) {'✅' if esperado == obtido else '❌ divergente'}"
+            )
+
+            # Mais tokens ativos que o tamanho do cache: LRU descartando
+            ativos = [gerar_token(1000 + 1 + i % args.alunos, sessao=i) for i in range(args.tamanho * 2)]
+            pequeno = CacheTokens(verificar, args.tamanho)
+            tempo_lru, _ = cronometrar(lambda: [pequeno.autenticar(rng.choice(ativos)) for _ in range(args.requisicoes)])
+            stats = pequeno.stats()
+            print(
+                f"   {len(ativos):,} tokens p/ {args.tamanho:,} vagas  "
+                f"{tempo_lru / args.requisicoes * 1e6:7.1f} µs/req | acertos {stats['taxa_acerto'] * 100:5.1f}% | "
+                f"descartados {stats['descartados']:,}"
+            )
+        conn.close()
+
+if __name__ == '__main__':
+    main()
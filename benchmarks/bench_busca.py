@@ -0,0 +1,96 @@
+"""
+Benchmark: busca de alunos.
+
+Compara utils.algorithms.search_students (varredura linear com lower() e
+substring sobre a lista de dicts, que antes exigia baixar todos os alunos)
+com a busca FTS5 de search.py (mesma consulta da rota
+/api/admin/alunos/search: primeira página por relevância + total).
+
+Uso: python benchmarks/bench_busca.py [--alunos 100000] [--repeticoes 20]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from migrations import aplicar_migracoes
+from pagination import listar
+from search import LIMITE_BUSCA, LISTAGEM_BUSCA_ALUNOS, montar_consulta_fts
+from utils.algorithms import search_students
+
+NOMES = ['João', 'Maria', 'José', 'Ana', 'Antônio', 'Francisca', 'Carlos', 'Luísa', 'Paulo', 'Márcia',
+         'Pedro', 'Adriana', 'Lucas', 'Juliana', 'Luiz', 'Patrícia', 'Gabriel', 'Aline', 'Rafael', 'Sônia']
+SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira',
+              'Lima', 'Gomes', 'Conceição', 'Ribeiro', 'Araújo', 'Carvalho', 'Fonseca', 'Gonçalves']
+
+CONSULTAS = ['maria', 'conceicao', 'joao silva', 'fons', '20240123', 'luisa araujo']
+
+def criar_banco(total, seed=42):
+    rng = random.Random(seed)
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    aplicar_migracoes(conn)
+
+    alunos = []
+    for i in range(1, total + 1):
+        nome = f'{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}'
+        email = f'aluno{i}@escola.com'
+        matricula = f'2024{i:05d}'
+        alunos.append({'id': i, 'nome': nome, 'email': email, 'matricula': matricula})
+
+    conn.executemany(
+        "INSERT INTO usuarios (id, nome, email, senha, tipo) VALUES (?, ?, ?, '', 'aluno')",
+        ((a['id'], a['nome'], a['email']) for a in alunos)
+    )
+    conn.executemany(
+        'INSERT INTO alunos (id, usuario_id, matricula) VALUES (?, ?, ?)',
+        ((a['id'], a['id'], a['matricula']) for a in alunos)
+    )
+    conn.commit()
+    return conn, alunos
+
+def busca_linear(alunos, texto):
+    # Mesmo uso de antes: filtra por cada campo e junta os resultados
+    encontrados = {}
+    for campo in ('nome', 'email', 'matricula'):
+        for aluno in search_students(alunos, texto, campo):
+            encontrados[aluno['id']] = aluno
+    return list(encontrados.values())
+
+def busca_fts(conn, texto):
+    return listar(
+        conn, LISTAGEM_BUSCA_ALUNOS, {'q': texto},
+        condicoes=[('b.alunos_busca MATCH ?', montar_consulta_fts(texto))],
+        limite_padrao=LIMITE_BUSCA
+    )
+
+def medir(fn, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = fn()
+    return (time.perf_counter() - inicio) / repeticoes * 1000, resultado
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--alunos', type=int, default=100_000)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"🛠️  Criando banco com {args.alunos:,} alunos...")
+    conn, alunos = criar_banco(args.alunos)
+
+    for texto in CONSULTAS:
+        linear_ms, linear = medir(lambda: busca_linear(alunos, texto), args.repeticoes)
+        fts_ms, (pagina, paginacao) = medir(lambda: busca_fts(conn, texto), args.repeticoes)
+        print(
+            f"🔎 {texto!r:<16} linear {linear_ms:8.2f} ms ({len(linear):>6} achados) | "
+            f"FTS5 {fts_ms:7.2f} ms ({paginacao['total']:>6} achados, página de {len(pagina)}) | "
+            f"{linear_ms / fts_ms:6.1f}x"
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: cache de resultados de consultas (cache_consultas.py).
+
+Gera --professores professores e --turmas turmas com 8 matérias cada e mede
+--leituras leituras da consulta de professores-disponiveis (GROUP BY sobre
+usuarios e materias) e da listagem de turmas:
+- direto: conn.execute a cada leitura;
+- cache local: CacheConsultas (inclui a leitura da assinatura das tabelas);
+- compartilhado: um segundo cache vazio lendo do arquivo SQLite do primeiro,
+  como um worker recém-iniciado.
+Ao fim, uma escrita em materias invalida só as entradas que dependem dela.
+
+Uso: python benchmarks/bench_cache_consultas.py [--professores 300] [--turmas 200] [--leituras 2000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from cache_consultas import ArmazemCompartilhado, CacheConsultas
+from database import connect
+from migrations import aplicar_migracoes
+
+PROFESSORES_DISPONIVEIS = '''
+    SELECT u.id, u.nome, u.email, u.telefone, u.formacao, u.experiencia, COUNT(m.id) as turmas_count
+    FROM usuarios u
+    LEFT JOIN materias m ON u.id = m.professor_id
+    WHERE u.tipo = 'professor'
+    GROUP BY u.id
+    ORDER BY u.nome
+'''
+TODAS_TURMAS = 'SELECT id, nome, codigo, capacidade_max, alunos_matriculados FROM turmas ORDER BY nome'
+
+CONSULTAS = (
+    ('professores-disponiveis', PROFESSORES_DISPONIVEIS, ('usuarios', 'materias')),
+    ('todas-turmas', TODAS_TURMAS, ('turmas',))
+)
+
+def criar_banco(caminho, professores, turmas):
+    conn = sqlite3.connect(caminho)
+    aplicar_migracoes(conn, analisar=False)
+    conn.executemany(
+        "INSERT INTO usuarios (id, nome, email, senha, tipo) VALUES (?, ?, ?, 'x', 'professor')",
+        [(i, f'Professor {i}', f'prof{i}@bench.com') for i in range(1, professores + 1)]
+    )
+    conn.executemany(
+        "INSERT INTO turmas (id, nome, codigo, ano_letivo, periodo) VALUES (?, ?, ?, '2026', 'manhã')",
+        [(i, f'Turma {i}', f'Q-{i}') for i in range(1, turmas + 1)]
+    )
+    conn.executemany(
+        'INSERT INTO materias (nome, turma_id, professor_id) VALUES (?, ?, ?)',
+        [(f'Matéria {n}', t, random.randint(1, professores)) for t in range(1, turmas + 1) for n in range(8)]
+    )
+    conn.commit()
+    conn.close()
+
+def ler(conn, leituras):
+    inicio = time.perf_counter()
+    for _ in range(leituras):
+        for _, sql, tabelas in CONSULTAS:
+            [dict(linha) for linha in conn(tabelas).execute(sql).fetchall()]
+    return (time.perf_counter() - inicio) / (leituras * len(CONSULTAS))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--professores', type=int, default=300)
+    parser.add_argument('--turmas', type=int, default=200)
+    parser.add_argument('--leituras', type=int, default=2000)
+    args = parser.parse_args()
+    random.seed(42)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'escola.db')
+        criar_banco(caminho, args.professores, args.turmas)
+        conn = connect(caminho)
+        print(f"\n🗄️  {args.professores} professores, {args.turmas} turmas, {args.turmas * 8} matérias, "
+              f"{args.leituras} leituras de cada consulta")
+
+        direto = ler(lambda tabelas: conn, args.leituras)
+        cache = CacheConsultas(compartilhado=ArmazemCompartilhado(os.path.join(pasta, 'cache.db')))
+        local = ler(lambda tabelas: cache.conexao(conn, tabelas), args.leituras)
+        worker = CacheConsultas(compartilhado=ArmazemCompartilhado(os.path.join(pasta, 'cache.db')))
+        inicio = time.perf_counter()
+        for _, sql, tabelas in CONSULTAS:
+            worker.conexao(conn, tabelas).execute(sql).fetchall()
+        compartilhado = (time.perf_counter() - inicio) / len(CONSULTAS)
+
+        conn.execute("UPDATE materias SET nome = nome || '*' WHERE id = 1")
+        conn.commit()
+        for _, sql, tabelas in CONSULTAS:
+            cache.conexao(conn, tabelas).execute(sql).fetchall()
+        stats = cache.stats()
+        conn.close()
+
+    print(f"   direto         {direto * 1e6:9.1f} µs/leitura")
+    print(f"   cache local    {local * 1e6:9.1f} µs/leitura | taxa de acerto {stats['taxa_acerto']:.2%}")
+    print(f"   compartilhado  {compartilhado * 1e6:9.1f} µs/leitura (worker sem cache local) | "
+          f"{worker.stats()['acertos_compartilhados']} acertos")
+    ok = '✅' if stats['invalidadas'] == 1 else '❌'
+    print(f"   escrita em materias: {stats['invalidadas']} entrada(s) invalidada(s) {ok}")
+    print(f"\n⚡ Cache local {direto / local:.1f}x mais rápido que a consulta")
+
+if __name__ == '__main__':
+    main()
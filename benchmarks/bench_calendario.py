@@ -0,0 +1,106 @@
+"""
+Benchmark: calendário de aulas (calendario.py).
+
+Gera --turmas turmas com --aulas aulas por semana e --feriados dias sem aula
+e mede --consultas consultas de --dias dias para turmas aleatórias:
+- sem cache: carregar_regras + dias_sem_aula + expandir a cada consulta;
+- cache: CalendarioTurmas.ocorrencias (semanas em cache pela assinatura);
+- feed: gerar_ical do intervalo inteiro de uma turma.
+
+Uso: python benchmarks/bench_calendario.py [--turmas 100] [--aulas 25] [--dias 120] [--consultas 2000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from calendario import CalendarioTurmas, carregar_regras, dias_sem_aula, expandir, gerar_ical
+from database import connect
+from horarios import DIAS_SEMANA, formatar_minutos
+from migrations import aplicar_migracoes
+
+INICIO_ANO = date(2026, 2, 2)
+
+def criar_banco(caminho, turmas, aulas, feriados):
+    conn = sqlite3.connect(caminho)
+    aplicar_migracoes(conn, analisar=False)
+    conn.execute("INSERT INTO usuarios (id, nome, email, senha, tipo) VALUES (1, 'Professor', 'prof@bench.com', 'x', 'professor')")
+    conn.executemany(
+        "INSERT INTO turmas (id, nome, codigo, ano_letivo, periodo) VALUES (?, ?, ?, '2026', 'manhã')",
+        [(i, f'Turma {i}', f'C-{i}') for i in range(1, turmas + 1)]
+    )
+    materias = []
+    for turma_id in range(1, turmas + 1):
+        for n in range(aulas):
+            inicio = 7 * 60 + (n // 5) * 50
+            materias.append((
+                f'Matéria {n}', turma_id, f'{formatar_minutos(inicio)}-{formatar_minutos(inicio + 50)}', DIAS_SEMANA[n % 5]
+            ))
+    conn.executemany(
+        'INSERT INTO materias (nome, turma_id, professor_id, horario, dia_semana) VALUES (?, ?, 1, ?, ?)', materias
+    )
+    conn.executemany(
+        'INSERT INTO dias_sem_aula (data, motivo, turma_id) VALUES (?, ?, ?)',
+        [
+            ((INICIO_ANO + timedelta(days=random.randrange(300))).isoformat(), 'Feriado',
+             random.choice((None, random.randint(1, turmas))))
+            for _ in range(feriados)
+        ]
+    )
+    conn.commit()
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--turmas', type=int, default=100)
+    parser.add_argument('--aulas', type=int, default=25)
+    parser.add_argument('--feriados', type=int, default=40)
+    parser.add_argument('--dias', type=int, default=120)
+    parser.add_argument('--consultas', type=int, default=2000)
+    args = parser.parse_args()
+    random.seed(42)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'calendario.db')
+        criar_banco(caminho, args.turmas, args.aulas, args.feriados)
+        conn = connect(caminho)
+        consultas = []
+        for _ in range(args.consultas):
+            inicio = INICIO_ANO + timedelta(days=random.randrange(0, 180, 7))
+            consultas.append((random.randint(1, args.turmas), inicio, inicio + timedelta(days=args.dias - 1)))
+        print(f"\n📅 {args.turmas} turmas x {args.aulas} aulas/semana, {args.consultas} consultas de {args.dias} dias")
+
+        inicio = time.perf_counter()
+        total_direto = 0
+        for turma_id, de, ate in consultas:
+            total_direto += sum(1 for _ in expandir(carregar_regras(conn, turma_id), de, ate, dias_sem_aula(conn, turma_id, de, ate)))
+        direto = time.perf_counter() - inicio
+
+        calendario = CalendarioTurmas()
+        inicio = time.perf_counter()
+        total_cache = 0
+        for turma_id, de, ate in consultas:
+            total_cache += sum(1 for _ in calendario.ocorrencias(conn, turma_id, de, ate))
+        cache = time.perf_counter() - inicio
+
+        turma_id, de, ate = consultas[0]
+        inicio = time.perf_counter()
+        tamanho = sum(len(parte) for parte in gerar_ical(calendario.ocorrencias(conn, turma_id, de, ate), 'Turma'))
+        feed = time.perf_counter() - inicio
+        conn.close()
+
+    n = len(consultas)
+    ok = '✅' if total_cache == total_direto else '❌'
+    print(f"   sem cache {direto / n * 1000:8.2f} ms/consulta | {total_direto} aulas")
+    print(f"   cache     {cache / n * 1000:8.2f} ms/consulta | {total_cache} aulas {ok} | {calendario.stats()}")
+    print(f"   feed ics  {feed * 1000:8.2f} ms | {tamanho / 1024:.0f} KiB")
+    print(f"\n⚡ Cache de semanas {direto / cache:.1f}x mais rápido")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Benchmark: armazenamento colunar de notas x pipeline de dicts.
+
+Gera um banco temporário com N notas (turmas, matérias, atividades e
+alunos sintéticos) e compara:
+- pipeline atual: fetchall() de sqlite3.Row, um dict por nota e laços em
+  Python para média por aluno/turma/matéria e faixas de desempenho;
+- colunar.NotasColunares: colunas array('d')/array('q') e agregação por
+  grupo em uma passada (utils/vetorial.agrupar, em C quando compilado).
+
+Mede memória (pico do tracemalloc na carga, em uma execução à parte), tempo
+de carga, tempo de cada agregação sem cache e o custo de aplicar um lote de
+30 notas incrementalmente em vez de recarregar: gravado pelo próprio
+processo (run_write_notas) e por outro worker (eventos do diário de notas).
+
+Uso: python benchmarks/bench_colunar.py [--notas 100000,1000000]
+"""
+import argparse
+import gc
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from colunar import CARGA_SQL, NotasColunares
+from utils.vetorial import USANDO_C
+
+TURMAS = 40
+MATERIAS_POR_TURMA = 10
+ATIVIDADES_POR_MATERIA = 5
+
+def criar_banco(caminho, total_notas, seed=42):
+    rng = random.Random(seed)
+    atividades_por_turma = MATERIAS_POR_TURMA * ATIVIDADES_POR_MATERIA
+    alunos_por_turma = max(1, total_notas // (TURMAS * atividades_por_turma))
+
+    conn = sqlite3.connect(caminho)
+    conn.executescript('''
+        CREATE TABLE materias (id INTEGER PRIMARY KEY, turma_id INTEGER);
+        CREATE TABLE atividades (id INTEGER PRIMARY KEY, materia_id INTEGER);
+        CREATE TABLE notas (
+            id INTEGER PRIMARY KEY, aluno_id INTEGER, atividade_id INTEGER, nota REAL,
+            UNIQUE (aluno_id, atividade_id)
+        );
+        CREATE TABLE versoes_tabelas (tabela TEXT PRIMARY KEY, versao INTEGER NOT NULL DEFAULT 0);
+        CREATE TABLE notas_eventos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, operacao TEXT, aluno_id INTEGER, atividade_id INTEGER,
+            nota_nova REAL, materia_id INTEGER, turma_id INTEGER
+        );
+        INSERT INTO versoes_tabelas VALUES ('notas', 1), ('atividades', 1), ('materias', 1);
+    ''')
+
+    materias, atividades = [], []
+    for turma_id in range(1, TURMAS + 1):
+        for _ in range(MATERIAS_POR_TURMA):
+            materia_id = len(materias) + 1
+            materias.append((materia_id, turma_id))
+            for _ in range(ATIVIDADES_POR_MATERIA):
+                atividades.append((len(atividades) + 1, materia_id, turma_id))
+    conn.executemany('INSERT INTO materias VALUES (?, ?)', materias)
+    conn.executemany('INSERT INTO atividades VALUES (?, ?)', [a[:2] for a in atividades])
+
+    def notas():
+        for atividade_id, _, turma_id in atividades:
+            primeiro = (turma_id - 1) * alunos_por_turma + 1
+            for aluno_id in range(primeiro, primeiro + alunos_por_turma):
+                yield aluno_id, atividade_id, round(rng.uniform(0, 10), 2)
+
+    conn.executemany('INSERT INTO notas (aluno_id, atividade_id, nota) VALUES (?, ?, ?)', notas())
+    conn.commit()
+    return conn
+
+def carregar_dicts(conn):
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(row) for row in conn.execute(CARGA_SQL).fetchall()]
+    finally:
+        conn.row_factory = None
+
+def agregar_dicts(dados, campo):
+    grupos = defaultdict(lambda: {'soma': 0.0, 'quantidade': 0, 'faixas': [0, 0, 0, 0]})
+    for linha in dados:
+        grupo = grupos[linha[campo]]
+        nota = linha['nota']
+        grupo['soma'] += nota
+        grupo['quantidade'] += 1
+        if nota >= 9:
+            grupo['faixas'][3] += 1
+        elif nota >= 7:
+            grupo['faixas'][2] += 1
+        elif nota >= 5:
+            grupo['faixas'][1] += 1
+        else:
+            grupo['faixas'][0] += 1
+    return {
+        id_: {'quantidade': g['quantidade'], 'media': g['soma'] / g['quantidade'], 'faixas': g['faixas']}
+        for id_, g in grupos.items()
+    }
+
+def medir_carga(fn):
+    # Tempo e memória em execuções separadas: o tracemalloc distorce o tempo
+    gc.collect()
+    inicio = time.perf_counter()
+    resultado = fn()
+    tempo = time.perf_counter() - inicio
+    del resultado
+    gc.collect()
+    tracemalloc.start()
+    resultado = fn()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, tempo, pico
+
+def cronometrar(fn):
+    inicio = time.perf_counter()
+    resultado = fn()
+    return time.perf_counter() - inicio, resultado
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--notas', default='100000,1000000')
+    args = parser.parse_args()
+
+    print(f"⚙️  Kernels em C: {'sim' if USANDO_C else 'não (fallback em Python)'}")
+    for total in (int(t) for t in args.notas.split(',')):
+        with tempfile.TemporaryDirectory() as pasta:
+            conn = criar_banco(os.path.join(pasta, 'bench.db'), total)
+            quantidade = conn.execute('SELECT COUNT(*) FROM notas').fetchone()[0]
+            print(f"\n📊 {quantidade:,} notas")
+
+            dados, tempo_dicts, pico_dicts = medir_carga(lambda: carregar_dicts(conn))
+            colunas, tempo_colunas, pico_colunas = medir_carga(lambda: NotasColunares().carregar(conn))
+            print(
+                f"   carga          dicts {tempo_dicts * 1000:9.1f} ms, {pico_dicts / 2**20:8.1f} MB | "
+                f"colunar {tempo_colunas * 1000:9.1f} ms, {pico_colunas / 2**20:6.1f} MB "
+                f"(colunas {colunas.memoria() / 2**20:.1f} MB)"
+            )
+
+            for dimensao, campo in (('aluno', 'aluno_id'), ('turma', 'turma_id'), ('materia', 'materia_id')):
+                tempo_d, esperado = cronometrar(lambda: agregar_dicts(dados, campo))
+                colunas._agregados = {}
+                tempo_c, obtido = cronometrar(lambda: colunas.agregar(dimensao))
+                conferido = all(
+                    obtido[id_]['quantidade'] == grupo['quantidade']
+                    and abs(obtido[id_]['media'] - grupo['media']) < 1e-9
+                    and obtido[id_]['faixas'] == grupo['faixas']
+                    for id_, grupo in esperado.items()
+                ) and len(obtido) == len(esperado)
+                print(
+                    f"   por {dimensao:<10} dicts {tempo_d * 1000:9.1f} ms | "
+                    f"colunar {tempo_c * 1000:9.1f} ms ({tempo_d / tempo_c:5.1f}x) "
+                    f"{'✅' if conferido else '❌ divergente'}"
+                )
+
+            versoes = dict(colunas._versoes)
+            lote = [(aluno_id, 1, 8.0, 1, 1) for aluno_id in range(10**6, 10**6 + 30)]
+            tempo_lote, _ = cronometrar(lambda: colunas.atualizar(versoes, versoes, lote))
+            print(
+                f"   lote de 30     recarga {tempo_colunas * 1000:9.1f} ms | "
+                f"incremental {tempo_lote * 1000:7.2f} ms"
+            )
+
+            # Outro worker grava 30 notas: a sincronização lê só os eventos novos do diário
+            novas = [(aluno_id, 2, 7.5) for aluno_id in range(2 * 10**6, 2 * 10**6 + 30)]
+            conn.executemany('INSERT INTO notas (aluno_id, atividade_id, nota) VALUES (?, ?, ?)', novas)
+            conn.executemany(
+                "INSERT INTO notas_eventos (operacao, aluno_id, atividade_id, nota_nova, materia_id, turma_id) "
+                "VALUES ('INSERT', ?, ?, ?, 1, 1)", novas
+            )
+            conn.execute("UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'notas'")
+            conn.commit()
+            tempo_diario, _ = cronometrar(lambda: colunas.sincronizar(conn))
+            print(
+                f"   outro worker   recarga {tempo_colunas * 1000:9.1f} ms | "
+                f"diário      {tempo_diario * 1000:7.2f} ms "
+                f"{'✅' if colunas.cargas == 1 and len(colunas) == quantidade + 60 else '❌ recarregou'}"
+            )
+
+            del dados
+            conn.close()
+
+if __name__ == '__main__':
+    main()
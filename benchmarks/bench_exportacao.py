@@ -0,0 +1,133 @@
+"""
+Benchmark: pico de memória (RSS) ao exportar um relatório grande.
+
+Compara o caminho antigo (fetchall + lista de dicts + json.dumps do
+resultado inteiro) com a exportação em streaming de backend/export.py
+(fetchmany em lotes, codificação incremental). Cada modo roda em um
+processo separado para que o pico de RSS de um não contamine o outro.
+
+Uso: python benchmarks/bench_exportacao.py [--notas 1000000] [--formato json|ndjson|csv]
+"""
+import argparse
+import json
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+ATIVIDADES = 50
+
+CONSULTA = '''
+    SELECT n.id, n.aluno_id, u.nome, a.matricula, n.atividade_id, n.nota, n.feedback, n.data_avaliacao
+    FROM notas n
+    JOIN alunos a ON n.aluno_id = a.id
+    JOIN usuarios u ON a.usuario_id = u.id
+    ORDER BY n.id
+'''
+
+def criar_banco(path, total_notas):
+    total_alunos = max(1, total_notas // ATIVIDADES)
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE usuarios (id INTEGER PRIMARY KEY, nome TEXT NOT NULL);
+        CREATE TABLE alunos (id INTEGER PRIMARY KEY, usuario_id INTEGER, matricula TEXT);
+        CREATE TABLE notas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            aluno_id INTEGER,
+            atividade_id INTEGER,
+            nota DECIMAL(5,2),
+            feedback TEXT,
+            data_avaliacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    ''')
+    conn.executemany(
+        'INSERT INTO usuarios (id, nome) VALUES (?, ?)',
+        ((i, f'Aluno {i:07d}') for i in range(1, total_alunos + 1))
+    )
+    conn.executemany(
+        'INSERT INTO alunos (id, usuario_id, matricula) VALUES (?, ?, ?)',
+        ((i, i, f'2024{i:07d}') for i in range(1, total_alunos + 1))
+    )
+    conn.executemany(
+        'INSERT INTO notas (aluno_id, atividade_id, nota, feedback) VALUES (?, ?, ?, ?)',
+        (
+            (i % total_alunos + 1, i // total_alunos + 1, (i * 7 % 101) / 10, 'Bom trabalho')
+            for i in range(total_notas)
+        )
+    )
+    conn.commit()
+    conn.close()
+
+def pico_rss_mb():
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+def executar_modo(path, modo, formato):
+    """Roda dentro do processo filho e imprime um JSON com as medições"""
+    from database import connect
+    from export import gerar_exportacao
+
+    conn = connect(path)
+    base = pico_rss_mb()
+    inicio = time.perf_counter()
+    tamanho = 0
+
+    if modo == 'materializado':
+        linhas = [dict(linha) for linha in conn.execute(CONSULTA).fetchall()]
+        tamanho = len(json.dumps({'notas': linhas}, default=str))
+    else:
+        for pedaco in gerar_exportacao(conn, CONSULTA, (), formato, 'notas'):
+            tamanho += len(pedaco)
+
+    print(json.dumps({
+        'base_mb': base,
+        'pico_mb': pico_rss_mb(),
+        'segundos': time.perf_counter() - inicio,
+        'tamanho_mb': tamanho / (1024 * 1024)
+    }))
+
+def medir(path, modo, formato):
+    saida = subprocess.run(
+        [sys.executable, __file__, '--filho', modo, '--banco', path, '--formato', formato],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--notas', type=int, default=1_000_000)
+    parser.add_argument('--formato', choices=('json', 'ndjson', 'csv'), default='json')
+    parser.add_argument('--filho', choices=('materializado', 'streaming'), help=argparse.SUPPRESS)
+    parser.add_argument('--banco', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.filho:
+        executar_modo(args.banco, args.filho, args.formato)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        print(f"🛠️  Criando banco com {args.notas:,} notas...")
+        criar_banco(path, args.notas)
+
+        resultados = {}
+        for modo in ('materializado', 'streaming'):
+            r = resultados[modo] = medir(path, modo, args.formato)
+            print(
+                f"📦 {modo:<14} pico RSS {r['pico_mb']:8.1f} MB "
+                f"(+{r['pico_mb'] - r['base_mb']:.1f} MB sobre a base) | "
+                f"{r['segundos']:.2f}s | saída {r['tamanho_mb']:.1f} MB"
+            )
+
+        antes = resultados['materializado']['pico_mb'] - resultados['materializado']['base_mb']
+        depois = resultados['streaming']['pico_mb'] - resultados['streaming']['base_mb']
+        print(f"📉 Memória adicional: {antes:.1f} MB -> {depois:.1f} MB ({antes / max(depois, 0.1):.0f}x menos)")
+
+if __name__ == '__main__':
+    main()
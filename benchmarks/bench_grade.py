@@ -0,0 +1,111 @@
+"""
+Benchmark: geração automática de grade horária (gerador_grade.py).
+
+Gera uma escola com --turmas turmas (manhã, tarde e integral) e --areas
+grupos de professores: cada grupo atende só as suas turmas, então a escola
+se divide em problemas independentes. Cada turma pede --materias matérias
+com dois professores candidatos e carga de 2 a 3 aulas.
+
+Mede o tempo para montar o problema e para resolvê-lo na thread da tarefa e
+com --processos processos, e confere que a grade gerada não tem conflitos
+(validar_grade).
+
+Uso: python benchmarks/bench_grade.py [--turmas 120] [--areas 12] [--materias 8] [--processos 4]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from database import connect
+from gerador_grade import GeradorGrade, montar_problema
+from horarios import IndiceHorarios, validar_grade
+from migrations import aplicar_migracoes
+
+PERIODOS = ('manhã', 'tarde', 'integral')
+
+def criar_banco(caminho, turmas, areas):
+    conn = sqlite3.connect(caminho)
+    aplicar_migracoes(conn, analisar=False)
+    professores_por_area = max(turmas // areas, 2)
+    professores = areas * professores_por_area
+    conn.executemany(
+        "INSERT INTO usuarios (id, nome, email, senha, tipo) VALUES (?, ?, ?, 'x', 'professor')",
+        [(i, f'Professor {i}', f'prof{i}@bench.com') for i in range(1, professores + 1)]
+    )
+    conn.executemany(
+        "INSERT INTO turmas (id, nome, codigo, ano_letivo, periodo) VALUES (?, ?, ?, '2026', ?)",
+        [(i, f'Turma {i}', f'G-{i}', PERIODOS[i % len(PERIODOS)]) for i in range(1, turmas + 1)]
+    )
+    conn.commit()
+    conn.close()
+    return professores_por_area
+
+def pedido(turmas, areas, materias, professores_por_area):
+    itens = []
+    for turma_id in range(1, turmas + 1):
+        area = turma_id % areas
+        professores = list(range(area * professores_por_area + 1, (area + 1) * professores_por_area + 1))
+        for n in range(materias):
+            itens.append({
+                'turma_id': turma_id,
+                'materia_nome': f'Matéria {n}',
+                'professores': random.sample(professores, 2),
+                'carga_horaria_semanal': random.randint(2, 3)
+            })
+    return {'materias': itens}
+
+def gerar(gerador, problema, processos):
+    inicio = time.perf_counter()
+    tarefa = gerador.iniciar(problema, processos=processos)
+    while tarefa.status in ('pendente', 'executando'):
+        time.sleep(0.01)
+    return tarefa, time.perf_counter() - inicio
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--turmas', type=int, default=120)
+    parser.add_argument('--areas', type=int, default=12)
+    parser.add_argument('--materias', type=int, default=8)
+    parser.add_argument('--processos', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    random.seed(42)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'grade.db')
+        professores_por_area = criar_banco(caminho, args.turmas, args.areas)
+        conn = connect(caminho)
+        indice = IndiceHorarios().carregar(conn)
+
+        inicio = time.perf_counter()
+        problema = montar_problema(
+            conn, indice, pedido(args.turmas, args.areas, args.materias, professores_por_area)
+        )
+        montagem = time.perf_counter() - inicio
+        print(
+            f"\n🗓️  {args.turmas} turmas, {len(problema['materias'])} matérias, "
+            f"{len(problema['blocos'])} blocos (montagem {montagem * 1000:.0f} ms)"
+        )
+
+        gerador = GeradorGrade()
+        for rotulo, processos in (('thread', 0), (f'{args.processos} processos', args.processos)):
+            tarefa, segundos = gerar(gerador, problema, processos)
+            estado = tarefa.to_dict()
+            ok = '❌ ' + (tarefa.erro or tarefa.status)
+            if tarefa.plano is not None:
+                grade = validar_grade(conn, indice, tarefa.plano)
+                ok = '✅ sem conflitos' if grade['valida'] else f"❌ {grade['resumo']['invalidas']} conflito(s)"
+            print(
+                f"   {rotulo:<12} {segundos:7.2f} s | {estado['progresso']['componentes']} componentes | "
+                f"{estado['progresso']['nos']:7d} nós | {ok}"
+            )
+        gerador.close()
+        conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark: checagem de conflito de horário.
+
+Gera --turmas turmas com --aulas aulas por semana cada e mede:
+- antigo: a consulta de validar_conflito_horario (texto de horario e
+  dia_semana iguais) em uma conexão aberta por chamada — e quantos conflitos
+  reais (intervalos sobrepostos) ela deixa passar;
+- índice: IndiceHorarios.conflitos de horarios.py (turma e professor);
+- grade: validar_grade com a grade proposta inteira em uma chamada.
+
+Uso: python benchmarks/bench_horarios.py [--turmas 200] [--aulas 25] [--checagens 5000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from database import connect
+from horarios import DIAS_SEMANA, IndiceHorarios, formatar_minutos, intervalo_horario, validar_grade
+from migrations import aplicar_migracoes
+
+def criar_banco(caminho, turmas, aulas):
+    conn = sqlite3.connect(caminho)
+    aplicar_migracoes(conn, analisar=False)
+    professores = max(turmas * aulas // 20, 1)
+    conn.executemany(
+        "INSERT INTO usuarios (id, nome, email, senha, tipo) VALUES (?, ?, ?, 'x', 'professor')",
+        [(i, f'Professor {i}', f'prof{i}@bench.com') for i in range(1, professores + 1)]
+    )
+    conn.executemany(
+        "INSERT INTO turmas (id, nome, codigo, ano_letivo, periodo) VALUES (?, ?, ?, '2026', 'manhã')",
+        [(i, f'Turma {i}', f'B-{i}') for i in range(1, turmas + 1)]
+    )
+    # Aulas de 50 minutos a partir das 07:00, sem conflito dentro da turma
+    materias = []
+    for turma_id in range(1, turmas + 1):
+        for n in range(aulas):
+            dia = DIAS_SEMANA[n % 5]
+            inicio = 7 * 60 + (n // 5) * 50
+            horario = f'{formatar_minutos(inicio)}-{formatar_minutos(inicio + 50)}'
+            materias.append((f'Matéria {n}', turma_id, random.randint(1, professores), horario, dia))
+    conn.executemany(
+        'INSERT INTO materias (nome, turma_id, professor_id, horario, dia_semana) VALUES (?, ?, ?, ?, ?)', materias
+    )
+    conn.commit()
+    conn.close()
+    return professores
+
+def propostas(total, turmas, professores):
+    aulas = []
+    for _ in range(total):
+        inicio = random.randrange(7 * 60, 13 * 60, 10)
+        aulas.append({
+            'turma_id': random.randint(1, turmas),
+            'professor_id': random.randint(1, professores),
+            'horario': f'{formatar_minutos(inicio)}-{formatar_minutos(inicio + 50)}',
+            'dia_semana': random.choice(DIAS_SEMANA[:5])
+        })
+    return aulas
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--turmas', type=int, default=200)
+    parser.add_argument('--aulas', type=int, default=25)
+    parser.add_argument('--checagens', type=int, default=5000)
+    args = parser.parse_args()
+    random.seed(42)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'horarios.db')
+        professores = criar_banco(caminho, args.turmas, args.aulas)
+        aulas = propostas(args.checagens, args.turmas, professores)
+        print(f"\n🗓️  {args.turmas * args.aulas} matérias, {professores} professores, {len(aulas)} checagens")
+
+        inicio = time.perf_counter()
+        achados_antigo = 0
+        for aula in aulas:
+            conn = connect(caminho)
+            achados_antigo += conn.execute(
+                'SELECT m.id FROM materias m JOIN usuarios u ON m.professor_id = u.id '
+                'WHERE m.turma_id = ? AND m.horario = ? AND m.dia_semana = ?',
+                (aula['turma_id'], aula['horario'], aula['dia_semana'])
+            ).fetchone() is not None
+            conn.close()
+        antigo = time.perf_counter() - inicio
+
+        conn = connect(caminho)
+        inicio = time.perf_counter()
+        indice = IndiceHorarios().carregar(conn)
+        carga = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        achados_indice = 0
+        for aula in aulas:
+            inicio_aula, fim_aula = intervalo_horario(aula['horario'])
+            achados_indice += bool(indice.conflitos(
+                aula['turma_id'], aula['professor_id'], aula['dia_semana'], inicio_aula, fim_aula
+            ))
+        tempo_indice = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        grade = validar_grade(conn, indice, aulas)
+        tempo_grade = time.perf_counter() - inicio
+        conn.close()
+
+    n = len(aulas)
+    print(f"   antigo  {antigo / n * 1e6:9.1f} µs/checagem | conflitos detectados {achados_antigo:5d}")
+    print(f"   índice  {tempo_indice / n * 1e6:9.1f} µs/checagem | conflitos detectados {achados_indice:5d} "
+          f"(carga {carga * 1000:.1f} ms)")
+    print(f"   grade   {tempo_grade * 1000:9.1f} ms para {n} aulas | inválidas {grade['resumo']['invalidas']:5d} "
+          f"(inclui conflitos dentro da própria proposta)")
+    print(f"\n⚡ Índice {antigo / tempo_indice:.0f}x mais rápido; a consulta antiga deixou passar "
+          f"{achados_indice - achados_antigo} conflito(s) real(is)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: kernels de notas em C (c_modules/notas_c) x fallback em Python.
+
+Mede as operações de utils/vetorial.py com a extensão compilada e com as
+implementações em Python que ela substitui: ordenação por nota, top-k,
+estatísticas (média, mediana, desvio padrão), faixas de desempenho e busca
+por substring em uma tabela de nomes. Os resultados dos dois caminhos são
+comparados antes de imprimir os tempos.
+
+Compile a extensão antes: cd backend/c_modules && python setup.py build_ext --inplace
+
+Uso: python benchmarks/bench_kernels.py [--tamanhos 10000,100000,1000000] [--top 10]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from utils import vetorial
+
+TERMOS = ['silva', 'maria', 'joão', 'ana', 'pereira', '123', 'xyz']
+PRENOMES = ['Maria', 'João', 'Ana', 'Pedro', 'Lucas', 'Júlia', 'Gabriel', 'Beatriz']
+SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Pereira', 'Lima', 'Costa']
+
+@contextmanager
+def sem_extensao():
+    """Força o caminho em Python durante o bloco"""
+    extensao = vetorial._c
+    vetorial._c = None
+    try:
+        yield
+    finally:
+        vetorial._c = extensao
+
+def cronometrar(fn):
+    inicio = time.perf_counter()
+    resultado = fn()
+    return time.perf_counter() - inicio, resultado
+
+def casos(total, top, rng):
+    notas = vetorial.como_array(round(rng.uniform(0, 10), 2) for _ in range(total))
+    nomes = [
+        f'{rng.choice(PRENOMES)} {rng.choice(SOBRENOMES)} {i}'
+        for i in range(total)
+    ]
+    return [
+        ('ordenar', lambda: list(vetorial.ordenar_indices(notas))),
+        (f'top {top}', lambda: list(vetorial.top_k_indices(notas, top))),
+        ('estatísticas', lambda: vetorial.estatisticas(notas)),
+        ('faixas', lambda: vetorial.distribuicao_desempenho(notas)),
+        ('busca nomes', lambda: [
+            list(tabela.buscar(termo))
+            for tabela in [vetorial.TabelaNomes(nomes)]
+            for termo in TERMOS
+        ]),
+    ]
+
+def iguais(a, b):
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(
+            (a[k] is None and b[k] is None) or abs(a[k] - b[k]) <= 1e-9 * max(1.0, abs(a[k]))
+            for k in a
+        )
+    return a == b
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tamanhos', default='10000,100000,1000000')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    if not vetorial.USANDO_C:
+        print('❌ Extensão notas_c não encontrada; compile-a antes (veja o cabeçalho).')
+        sys.exit(1)
+
+    rng = random.Random(42)
+    for total in (int(t) for t in args.tamanhos.split(',')):
+        print(f"\n📊 {total:,} notas")
+        for rotulo, fn in casos(total, args.top, rng):
+            tempo_c, resultado_c = cronometrar(fn)
+            with sem_extensao():
+                tempo_py, resultado_py = cronometrar(fn)
+
+            conferido = '✅' if iguais(resultado_c, resultado_py) else '❌ divergente'
+            print(
+                f"   {rotulo:<14} python {tempo_py * 1000:9.1f} ms | "
+                f"C {tempo_c * 1000:8.1f} ms ({tempo_py / tempo_c:5.1f}x) {conferido}"
+            )
+
+if __name__ == '__main__':
+    main()
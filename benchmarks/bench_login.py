@@ -0,0 +1,130 @@
+"""
+Teste de carga: vazão de login e latência p99.
+
+Sem --url, mede só a verificação de senha (senhas.VerificadorSenhas) com
+várias threads simulando requisições simultâneas de contas diferentes:
+- na própria thread (como o login antigo, check_password_hash inline);
+- no pool de processos do tamanho dos núcleos.
+
+Com --url, dispara logins reais contra um servidor em execução
+(POST <url>/api/auth/login) usando as contas de --conta email:senha.
+
+Uso: python benchmarks/bench_login.py [--logins 400] [--concorrencia 16] [--metodo scrypt]
+     python benchmarks/bench_login.py --url http://localhost:8000 --conta aluno@escola.com:aluno123
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from senhas import LimiteSenhas, VerificadorSenhas
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+def disparar(total, concorrencia, tentativa):
+    """Executa `total` chamadas de tentativa(i) em `concorrencia` threads; retorna (segundos, latências, status)"""
+    latencias, status = [], Counter()
+    lock = threading.Lock()
+    proximo = iter(range(total))
+
+    def laco():
+        while True:
+            with lock:
+                i = next(proximo, None)
+            if i is None:
+                return
+            inicio = time.perf_counter()
+            resultado = tentativa(i)
+            decorrido = time.perf_counter() - inicio
+            with lock:
+                latencias.append(decorrido)
+                status[resultado] += 1
+
+    threads = [threading.Thread(target=laco) for _ in range(concorrencia)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - inicio, latencias, status
+
+def relatorio(rotulo, segundos, latencias, status):
+    print(
+        f"   {rotulo:<22} {len(latencias) / segundos:8.1f} logins/s | "
+        f"p50 {percentil(latencias, 50) * 1000:7.1f} ms | p99 {percentil(latencias, 99) * 1000:7.1f} ms | "
+        f"{dict(status)}"
+    )
+
+def local(args):
+    processos = os.cpu_count() or 1
+    contas = [(f'aluno{i}@escola.com', f'senha{i}') for i in range(args.contas)]
+    print(f"🔑 Gerando {len(contas)} hashes ({args.metodo})...")
+    gerador = VerificadorSenhas(metodo=args.metodo, processos=processos)
+    hashes = gerador.gerar_lote(senha for _, senha in contas)
+    gerador.close()
+
+    print(f"\n📊 {args.logins} logins, {args.concorrencia} simultâneos, {processos} núcleo(s)")
+    for rotulo, verificador in (
+        ('na thread (antigo)', VerificadorSenhas(metodo=args.metodo, processos=0, max_pendentes=10**6)),
+        (f'pool de {processos} processo(s)', VerificadorSenhas(metodo=args.metodo, processos=processos)),
+    ):
+        verificador.verificar(hashes[0], contas[0][1])  # aquecimento (sobe o pool)
+
+        def tentativa(i):
+            email, senha = contas[i % len(contas)]
+            try:
+                confere, _ = verificador.verificar(hashes[i % len(contas)], senha, conta=email)
+                return 200 if confere else 401
+            except LimiteSenhas as e:
+                return e.status
+
+        relatorio(rotulo, *disparar(args.logins, args.concorrencia, tentativa))
+        verificador.close()
+
+def remoto(args):
+    contas = [conta.split(':', 1) for conta in args.conta] or [['aluno@escola.com', 'aluno123']]
+    url = args.url.rstrip('/') + '/api/auth/login'
+
+    def tentativa(i):
+        email, senha = contas[i % len(contas)]
+        corpo = json.dumps({'email': email, 'password': senha}).encode()
+        pedido = urllib.request.Request(url, data=corpo, headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(pedido, timeout=60) as resposta:
+                return resposta.status
+        except urllib.error.HTTPError as e:
+            return e.code
+        except OSError:
+            return 'erro'
+
+    print(f"\n📊 {args.logins} logins em {url}, {args.concorrencia} simultâneos, {len(contas)} conta(s)")
+    relatorio('servidor', *disparar(args.logins, args.concorrencia, tentativa))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=400)
+    parser.add_argument('--concorrencia', type=int, default=16)
+    parser.add_argument('--contas', type=int, default=64)
+    parser.add_argument('--metodo', default='scrypt')
+    parser.add_argument('--url')
+    parser.add_argument('--conta', action='append', default=[])
+    args = parser.parse_args()
+
+    if args.url:
+        remoto(args)
+    else:
+        local(args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: ranking de alunos por desempenho.
+
+Compara o quick_sort recursivo antigo (três listas novas e até seis chamadas
+da lambda por elemento a cada nível) com utils.ranking: ordenação completa
+com chave decorada uma vez (Timsort) e top-k por heap. Mede entradas
+aleatórias e já ordenadas; um RecursionError do quick_sort antigo aparece
+na tabela em vez de interromper o benchmark.
+
+Uso: python benchmarks/bench_ranking.py [--tamanhos 10000,100000,1000000] [--top 10]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from utils.ranking import melhores, ordenar
+
+def quick_sort_antigo(arr, key=lambda x: x):
+    """Cópia da implementação substituída, para referência"""
+    if len(arr) <= 1:
+        return arr
+    pivot = arr[len(arr) // 2]
+    left = [x for x in arr if key(x) < key(pivot)]
+    middle = [x for x in arr if key(x) == key(pivot)]
+    right = [x for x in arr if key(x) > key(pivot)]
+    return quick_sort_antigo(left, key) + middle + quick_sort_antigo(right, key)
+
+def gerar_alunos(total, seed=42):
+    rng = random.Random(seed)
+    return [
+        {'id': i, 'nome': f'Aluno {i:07d}', 'media': round(rng.uniform(0, 10), 2)}
+        for i in range(total)
+    ]
+
+def cronometrar(fn):
+    inicio = time.perf_counter()
+    try:
+        fn()
+    except RecursionError:
+        return None
+    return time.perf_counter() - inicio
+
+def formatar(segundos):
+    return 'RecursionError' if segundos is None else f'{segundos * 1000:10.1f} ms'
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tamanhos', default='10000,100000,1000000')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    for total in (int(t) for t in args.tamanhos.split(',')):
+        alunos = gerar_alunos(total)
+        ordenados = sorted(alunos, key=lambda x: x['media'])
+
+        print(f"\n📊 {total:,} alunos")
+        for rotulo, entrada in (('aleatória', alunos), ('já ordenada', ordenados)):
+            antigo = cronometrar(lambda: quick_sort_antigo(entrada, key=lambda x: x.get('media', 0)))
+            novo = cronometrar(lambda: ordenar(entrada, ['media']))
+            top = cronometrar(lambda: melhores(entrada, args.top))
+
+            ganho = f'{antigo / novo:5.1f}x' if antigo and novo else '  -  '
+            print(
+                f"   entrada {rotulo:<12} quick_sort {formatar(antigo)} | "
+                f"ranking.ordenar {formatar(novo)} ({ganho}) | top {args.top} {formatar(top)}"
+            )
+
+if __name__ == '__main__':
+    main()
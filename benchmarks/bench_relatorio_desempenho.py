@@ -0,0 +1,96 @@
+"""
+Benchmark: relatório de desempenho de turmas.
+
+Compara a versão antiga de generate_desempenho_turma_report (quick_sort
+recursivo, quatro list comprehensions para as faixas e outra passada para a
+média, ranking completo na resposta) com o motor atual de utils/reports.py
+(média/desvio em uma passada, faixas e percentis por posição no array
+ordenado), gerando os relatórios de várias turmas em uma chamada, com e sem
+o ranking.
+
+Uso: python benchmarks/bench_relatorio_desempenho.py [--turmas 40] [--alunos 1000,10000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from utils.reports import generate_desempenho_turmas_report
+
+def quick_sort_antigo(arr, key=lambda x: x):
+    if len(arr) <= 1:
+        return arr
+    pivot = arr[len(arr) // 2]
+    left = [x for x in arr if key(x) < key(pivot)]
+    middle = [x for x in arr if key(x) == key(pivot)]
+    right = [x for x in arr if key(x) > key(pivot)]
+    return quick_sort_antigo(left, key) + middle + quick_sort_antigo(right, key)
+
+def relatorio_antigo(data):
+    """Cópia da implementação substituída, para referência"""
+    alunos_ordenados = quick_sort_antigo(data['alunos'], key=lambda x: x.get('media', 0))
+    return {
+        'turma': data['turma_info'],
+        'resumo': {
+            'total_alunos': len(alunos_ordenados),
+            'media_geral': sum(aluno.get('media', 0) for aluno in alunos_ordenados) / len(alunos_ordenados) if alunos_ordenados else 0,
+            'melhor_desempenho': alunos_ordenados[-1] if alunos_ordenados else None,
+            'pior_desempenho': alunos_ordenados[0] if alunos_ordenados else None
+        },
+        'alunos_por_desempenho': {
+            'excelente': len([a for a in alunos_ordenados if a.get('media', 0) >= 9]),
+            'bom': len([a for a in alunos_ordenados if 7 <= a.get('media', 0) < 9]),
+            'regular': len([a for a in alunos_ordenados if 5 <= a.get('media', 0) < 7]),
+            'insuficiente': len([a for a in alunos_ordenados if a.get('media', 0) < 5])
+        },
+        'ranking': alunos_ordenados
+    }
+
+def gerar_turmas(turmas, alunos, seed=42):
+    rng = random.Random(seed)
+    return [
+        {
+            'turma_info': {'id': t},
+            'alunos': [
+                {'id': t * alunos + i, 'nome': f'Aluno {i:06d}', 'media': round(rng.uniform(0, 10), 2)}
+                for i in range(alunos)
+            ]
+        }
+        for t in range(turmas)
+    ]
+
+def cronometrar(fn):
+    inicio = time.perf_counter()
+    resultado = fn()
+    return time.perf_counter() - inicio, resultado
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--turmas', type=int, default=40)
+    parser.add_argument('--alunos', default='1000,10000')
+    args = parser.parse_args()
+
+    for alunos in (int(a) for a in args.alunos.split(',')):
+        turmas = gerar_turmas(args.turmas, alunos)
+        print(f"\n📊 {args.turmas} turmas x {alunos:,} alunos")
+
+        tempo_antigo, antigos = cronometrar(lambda: [relatorio_antigo(data) for data in turmas])
+        tempo_novo, novos = cronometrar(lambda: generate_desempenho_turmas_report(turmas))
+        tempo_sem, _ = cronometrar(lambda: generate_desempenho_turmas_report(turmas, incluir_ranking=False))
+
+        conferido = all(
+            antigo['alunos_por_desempenho'] == novo['alunos_por_desempenho']
+            and abs(antigo['resumo']['media_geral'] - novo['resumo']['media_geral']) < 1e-9
+            for antigo, novo in zip(antigos, novos)
+        )
+        print(
+            f"   antigo {tempo_antigo * 1000:9.1f} ms | novo {tempo_novo * 1000:8.1f} ms "
+            f"({tempo_antigo / tempo_novo:4.1f}x, +percentis e desvio) | "
+            f"sem ranking {tempo_sem * 1000:8.1f} ms {'✅' if conferido else '❌ divergente'}"
+        )
+
+if __name__ == '__main__':
+    main()
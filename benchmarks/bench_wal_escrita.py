@@ -0,0 +1,160 @@
+"""
+Benchmark: vazão de leitura durante uma rajada de escritas concorrentes.
+
+Compara a configuração antiga (journal de rollback, conexão nova por
+operação, escritores disputando o arquivo) com a nova (WAL + PRAGMAs +
+fila de escrita única).
+
+Uso: python benchmarks/bench_wal_escrita.py [--segundos 5] [--leitores 8] [--escritores 4]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from database import ConnectionPool, WriteQueue, connect
+
+TOTAL_ALUNOS = 2000
+ALUNOS_POR_TURMA = 90
+
+def criar_banco(path):
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE alunos (id INTEGER PRIMARY KEY AUTOINCREMENT, turma_id INTEGER);
+        CREATE TABLE notas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            aluno_id INTEGER,
+            atividade_id INTEGER,
+            nota DECIMAL(5,2),
+            feedback TEXT,
+            data_avaliacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            avaliado_por INTEGER
+        );
+    ''')
+    conn.executemany(
+        'INSERT INTO alunos (turma_id) VALUES (?)',
+        [(i // ALUNOS_POR_TURMA + 1,) for i in range(TOTAL_ALUNOS)]
+    )
+    conn.commit()
+    conn.close()
+
+def lancar_lote(db, atividade_id):
+    """Mesmo padrão do lançamento de notas: SELECT + UPDATE/INSERT por aluno"""
+    inicio = random.randrange(1, TOTAL_ALUNOS - ALUNOS_POR_TURMA)
+    for aluno_id in range(inicio, inicio + ALUNOS_POR_TURMA):
+        existing = db.execute(
+            'SELECT id FROM notas WHERE aluno_id = ? AND atividade_id = ?', (aluno_id, atividade_id)
+        ).fetchone()
+        if existing:
+            db.execute('UPDATE notas SET nota = ? WHERE id = ?', (random.uniform(0, 10), existing[0]))
+        else:
+            db.execute(
+                'INSERT INTO notas (aluno_id, atividade_id, nota, feedback, avaliado_por) VALUES (?, ?, ?, ?, ?)',
+                (aluno_id, atividade_id, random.uniform(0, 10), '', 1)
+            )
+
+def ler_media(db):
+    aluno_id = random.randrange(1, TOTAL_ALUNOS)
+    db.execute('SELECT AVG(nota) FROM notas WHERE aluno_id = ?', (aluno_id,)).fetchone()
+
+def executar(nome, segundos, leitores, escritores, ler, escrever):
+    parar = threading.Event()
+    resultado = {'leituras': 0, 'escritas': 0, 'erros_leitura': 0, 'erros_escrita': 0}
+    lock = threading.Lock()
+
+    def laco(operacao, ok, erro):
+        while not parar.is_set():
+            try:
+                operacao()
+                chave = ok
+            except sqlite3.OperationalError:
+                chave = erro
+            with lock:
+                resultado[chave] += 1
+
+    threads = [threading.Thread(target=laco, args=(ler, 'leituras', 'erros_leitura')) for _ in range(leitores)]
+    threads += [threading.Thread(target=laco, args=(escrever, 'escritas', 'erros_escrita')) for _ in range(escritores)]
+    for t in threads:
+        t.start()
+    time.sleep(segundos)
+    parar.set()
+    for t in threads:
+        t.join()
+
+    print(f"\n📊 {nome}")
+    print(f"   Leituras/s:        {resultado['leituras'] / segundos:10.1f}")
+    print(f"   Lotes gravados/s:  {resultado['escritas'] / segundos:10.1f}")
+    print(f"   Erros de leitura:  {resultado['erros_leitura']}")
+    print(f"   Erros de escrita:  {resultado['erros_escrita']} (database is locked)")
+    return resultado
+
+def cenario_antigo(path, args):
+    """Journal de rollback, sqlite3.connect por operação, cada escritor com sua transação"""
+    criar_banco(path)
+
+    def ler():
+        conn = sqlite3.connect(path)
+        try:
+            ler_media(conn)
+        finally:
+            conn.close()
+
+    def escrever():
+        conn = sqlite3.connect(path)
+        try:
+            lancar_lote(conn, random.randrange(1, 50))
+            conn.commit()
+        finally:
+            conn.close()
+
+    return executar('ANTES: journal de rollback, sem fila de escrita', args.segundos,
+                    args.leitores, args.escritores, ler, escrever)
+
+def cenario_novo(path, args):
+    """WAL + PRAGMAs + pool de leitura + fila de escrita única"""
+    criar_banco(path)
+    pool = ConnectionPool(path, max_size=args.leitores)
+    writer = WriteQueue(path)
+
+    def ler():
+        conn = pool.acquire()
+        try:
+            ler_media(conn)
+        finally:
+            pool.release(conn)
+
+    def escrever():
+        writer.run(lancar_lote, random.randrange(1, 50))
+
+    try:
+        return executar('DEPOIS: WAL + PRAGMAs + fila de escrita', args.segundos,
+                        args.leitores, args.escritores, ler, escrever)
+    finally:
+        writer.close()
+        pool.close()
+        conn = connect(path)
+        print(f"   journal_mode:      {conn.execute('PRAGMA journal_mode').fetchone()[0]}")
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--segundos', type=float, default=5)
+    parser.add_argument('--leitores', type=int, default=8)
+    parser.add_argument('--escritores', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        antes = cenario_antigo(os.path.join(tmp, 'antes.db'), args)
+        depois = cenario_novo(os.path.join(tmp, 'depois.db'), args)
+
+    if antes['leituras']:
+        print(f"\n🚀 Ganho de vazão de leitura: {depois['leituras'] / antes['leituras']:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""
+Teste de carga do servidor de produção (backend/servidor.py).
+
+Para cada quantidade de workers em --workers, sobe o servidor num banco
+temporário (cópia de database/sistema_academico.db, migrado uma vez pelo
+mestre), faz login como admin e aluno e dispara uma mistura de leituras
+(health, todas-turmas, minhas-notas, tela inicial do aluno) com conexões
+keep-alive em --concorrencia threads. Mostra requisições/s e latência p50/p99
+por quantidade de workers e por rota.
+
+Com --recarregar, envia SIGHUP ao mestre no meio de cada rodada: a recarga
+graciosa não pode derrubar nenhuma requisição (sai com erro se derrubar).
+
+Uso: python benchmarks/carga_servidor.py [--workers 1,2,4] [--threads 8] [--requisicoes 3000] [--concorrencia 16] [--recarregar]
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SERVIDOR = os.path.join(RAIZ, 'backend', 'servidor.py')
+BANCO = os.path.join(RAIZ, 'database', 'sistema_academico.db')
+
+# (rótulo, caminho, conta do token)
+ROTAS = (
+    ('health', '/api/health', None),
+    ('todas-turmas', '/api/admin/todas-turmas', 'admin'),
+    ('minhas-notas', '/api/aluno/minhas-notas', 'aluno'),
+    ('telas/inicio', '/api/aluno/telas/inicio', 'aluno'),
+)
+CONTAS = {
+    'admin': ('admin@escola.com', 'admin123'),
+    'aluno': ('aluno@escola.com', 'aluno123'),
+}
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def pedir(conexao, metodo, caminho, corpo=None, token=None):
+    cabecalhos = {'Content-Type': 'application/json'}
+    if token:
+        cabecalhos['Authorization'] = f'Bearer {token}'
+    conexao.request(metodo, caminho, body=json.dumps(corpo) if corpo is not None else None, headers=cabecalhos)
+    resposta = conexao.getresponse()
+    return resposta.status, resposta.read()
+
+def aguardar(porta, timeout=60):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        try:
+            status, _ = pedir(http.client.HTTPConnection('127.0.0.1', porta, timeout=2), 'GET', '/api/health')
+            if status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'servidor não respondeu em {timeout}s')
+
+def disparar(porta, total, concorrencia, tokens):
+    """Executa `total` requisições da mistura em `concorrencia` threads; retorna (segundos, latências por rota, status)"""
+    latencias, status = defaultdict(list), Counter()
+    lock = threading.Lock()
+    proximo = iter(range(total))
+
+    def laco():
+        conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=30)
+        while True:
+            with lock:
+                i = next(proximo, None)
+            if i is None:
+                break
+            rotulo, caminho, conta = ROTAS[i % len(ROTAS)]
+            inicio = time.perf_counter()
+            try:
+                resultado, _ = pedir(conexao, 'GET', caminho, token=tokens.get(conta))
+            except (OSError, http.client.HTTPException):
+                # Conexão fechada pelo servidor (keep-alive expirado, worker
+                # em recarga): tenta de novo numa conexão nova
+                conexao.close()
+                try:
+                    resultado, _ = pedir(conexao, 'GET', caminho, token=tokens.get(conta))
+                except (OSError, http.client.HTTPException):
+                    resultado = 'erro'
+            decorrido = time.perf_counter() - inicio
+            with lock:
+                latencias[rotulo].append(decorrido)
+                status[resultado] += 1
+        conexao.close()
+
+    threads = [threading.Thread(target=laco) for _ in range(concorrencia)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - inicio, latencias, status
+
+def rodada(args, workers, banco, log):
+    porta = porta_livre()
+    ambiente = dict(os.environ, SENHA_PROCESSOS='0')
+    processo = subprocess.Popen(
+        [sys.executable, SERVIDOR, '--servidor', args.servidor, '--host', '127.0.0.1', '--porta', str(porta),
+         '--workers', str(workers), '--threads', str(args.threads), '--banco', banco],
+        stdout=log, stderr=subprocess.STDOUT, env=ambiente
+    )
+    try:
+        aguardar(porta)
+        conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=30)
+        tokens = {}
+        for conta, (email, senha) in CONTAS.items():
+            status, corpo = pedir(conexao, 'POST', '/api/auth/login', {'email': email, 'password': senha})
+            if status != 200:
+                raise RuntimeError(f'login de {email} falhou ({status})')
+            tokens[conta] = json.loads(corpo)['access_token']
+        conexao.close()
+
+        disparar(porta, min(200, args.requisicoes), args.concorrencia, tokens)  # aquecimento
+
+        recarga = None
+        if args.recarregar:
+            recarga = threading.Timer(0.5, processo.send_signal, (signal.SIGHUP,))
+            recarga.start()
+        segundos, latencias, status = disparar(porta, args.requisicoes, args.concorrencia, tokens)
+        if recarga is not None:
+            recarga.join()
+        return segundos, latencias, status
+    finally:
+        processo.send_signal(signal.SIGTERM)
+        try:
+            processo.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            processo.kill()
+            processo.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default='1,2,4', help='quantidades de workers separadas por vírgula')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requisicoes', type=int, default=3000)
+    parser.add_argument('--concorrencia', type=int, default=16)
+    parser.add_argument('--servidor', default='prefork', choices=('auto', 'gunicorn', 'prefork', 'uvicorn'))
+    parser.add_argument('--recarregar', action='store_true', help='envia SIGHUP ao mestre durante cada rodada')
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix='carga_servidor_')
+    banco = os.path.join(pasta, 'sistema_academico.db')
+    shutil.copy(BANCO, banco)
+    caminho_log = os.path.join(pasta, 'servidor.log')
+
+    print(f"📊 {args.requisicoes} requisições, {args.concorrencia} clientes keep-alive, "
+          f"{args.threads} threads por worker, {os.cpu_count()} núcleo(s), servidor {args.servidor}"
+          f"{' com recarga (SIGHUP)' if args.recarregar else ''}")
+    derrubadas = 0
+    try:
+        with open(caminho_log, 'w') as log:
+            for workers in [int(w) for w in args.workers.split(',')]:
+                segundos, latencias, status = rodada(args, workers, banco, log)
+                todas = [valor for valores in latencias.values() for valor in valores]
+                erros = sum(n for resultado, n in status.items() if resultado != 200)
+                derrubadas += status.get('erro', 0)
+                print(
+                    f"\n   {workers} worker(s): {len(todas) / segundos:8.1f} req/s | "
+                    f"p50 {percentil(todas, 50) * 1000:7.1f} ms | p99 {percentil(todas, 99) * 1000:7.1f} ms | "
+                    f"{dict(status)}{' ⚠️' if erros else ''}"
+                )
+                for rotulo, valores in latencias.items():
+                    print(f"      {rotulo:<14} p50 {percentil(valores, 50) * 1000:7.1f} ms | "
+                          f"p99 {percentil(valores, 99) * 1000:7.1f} ms")
+    except RuntimeError as e:
+        print(f"❌ {e}; log do servidor em {caminho_log}")
+        return 1
+
+    shutil.rmtree(pasta, ignore_errors=True)
+    if args.recarregar and derrubadas:
+        print(f"\n❌ {derrubadas} requisição(ões) derrubada(s) durante a recarga")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
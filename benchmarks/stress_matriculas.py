@@ -0,0 +1,151 @@
+"""
+Teste de estresse: matrículas concorrentes em uma turma com poucas vagas.
+
+Dispara --paralelas matrículas ao mesmo tempo (uma thread por aluno) em uma
+turma com --capacidade vagas e confere se a turma estourou:
+- antigo: a lógica anterior de matricular_aluno (lê alunos_matriculados,
+  compara com capacidade_max em Python e só depois atualiza), cada thread
+  com sua conexão, como as conexões do pool;
+- motor: matriculas.matricular com lista de espera, rodando em
+  --processos filas de escrita independentes (como processos diferentes do
+  servidor, cada um com a sua), sem nenhum lock em Python entre elas;
+- lote: as mesmas matrículas em lotes de 10 com matricular_em_lote.
+
+Sai com código 1 se o motor deixar a turma acima da capacidade ou o
+contador divergir da contagem real.
+
+Uso: python benchmarks/stress_matriculas.py [--paralelas 100] [--capacidade 30] [--processos 4] [--pausa 0.002]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from database import WriteQueue, connect
+from matriculas import ErroMatricula, matricular, matricular_em_lote
+from migrations import aplicar_migracoes
+
+def criar_banco(caminho, alunos, capacidade):
+    conn = sqlite3.connect(caminho)
+    aplicar_migracoes(conn, analisar=False)
+    conn.execute(
+        "INSERT INTO turmas (id, nome, codigo, ano_letivo, periodo, capacidade_max, alunos_matriculados) "
+        "VALUES (1, 'Turma estresse', 'EST-1', '2026', 'manhã', ?, 0)", (capacidade,)
+    )
+    conn.executemany(
+        "INSERT INTO usuarios (id, nome, email, senha, tipo) VALUES (?, ?, ?, 'x', 'aluno')",
+        [(i, f'Aluno {i}', f'aluno{i}@estresse.com') for i in range(1, alunos + 1)]
+    )
+    conn.executemany(
+        'INSERT INTO alunos (id, usuario_id, matricula) VALUES (?, ?, ?)',
+        [(i, i, f'EST{i:04d}') for i in range(1, alunos + 1)]
+    )
+    conn.commit()
+    conn.close()
+
+def simultaneamente(tarefas):
+    """Roda as tarefas em threads liberadas juntas por uma barreira"""
+    barreira = threading.Barrier(len(tarefas))
+    erros = []
+
+    def rodar(tarefa):
+        barreira.wait()
+        try:
+            tarefa()
+        except Exception as e:
+            erros.append(e)
+
+    threads = [threading.Thread(target=rodar, args=(tarefa,)) for tarefa in tarefas]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - inicio, erros
+
+def conferir(caminho, rotulo, capacidade, segundos, erros):
+    conn = sqlite3.connect(caminho)
+    reais = conn.execute('SELECT COUNT(*) FROM alunos WHERE turma_id = 1').fetchone()[0]
+    contador = conn.execute('SELECT alunos_matriculados FROM turmas WHERE id = 1').fetchone()[0]
+    espera = conn.execute('SELECT COUNT(*) FROM lista_espera WHERE turma_id = 1').fetchone()[0]
+    conn.close()
+
+    ok = reais <= capacidade and contador == reais
+    print(
+        f"   {rotulo:<8} {segundos * 1000:8.1f} ms | matriculados {reais:3d}/{capacidade} | "
+        f"contador {contador:3d} | lista de espera {espera:3d} | erros {len(erros):3d} "
+        f"{'✅' if ok else '❌ turma estourada ou contador divergente'}"
+    )
+    return ok
+
+def cenario_antigo(caminho, args):
+    def matricular_antigo(aluno_id):
+        conn = connect(caminho)
+        try:
+            turma = conn.execute(
+                'SELECT id, capacidade_max, alunos_matriculados FROM turmas WHERE id = ?', (1,)
+            ).fetchone()
+            aluno = conn.execute('SELECT id, turma_id FROM alunos WHERE id = ?', (aluno_id,)).fetchone()
+            if turma['alunos_matriculados'] >= turma['capacidade_max'] or aluno['turma_id']:
+                return
+            time.sleep(args.pausa)  # resto do processamento da requisição
+            conn.execute('UPDATE alunos SET turma_id = ? WHERE id = ?', (1, aluno_id))
+            conn.execute('UPDATE turmas SET alunos_matriculados = alunos_matriculados + 1 WHERE id = ?', (1,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    tarefas = [lambda i=i: matricular_antigo(i) for i in range(1, args.paralelas + 1)]
+    segundos, erros = simultaneamente(tarefas)
+    return conferir(caminho, 'antigo', args.capacidade, segundos, erros)
+
+def cenario_motor(caminho, args, em_lote=False):
+    filas = [WriteQueue(caminho) for _ in range(args.processos)]
+    try:
+        if em_lote:
+            lotes = [list(range(i, min(i + 10, args.paralelas + 1))) for i in range(1, args.paralelas + 1, 10)]
+            tarefas = [
+                lambda n=n, lote=lote: filas[n % len(filas)].run(matricular_em_lote, 1, lote, lista_espera=True)
+                for n, lote in enumerate(lotes)
+            ]
+        else:
+            tarefas = [
+                lambda i=i: filas[i % len(filas)].run(matricular, 1, i, lista_espera=True)
+                for i in range(1, args.paralelas + 1)
+            ]
+        segundos, erros = simultaneamente(tarefas)
+    finally:
+        for fila in filas:
+            fila.close()
+    erros = [e for e in erros if not isinstance(e, ErroMatricula)]
+    return conferir(caminho, 'lote' if em_lote else 'motor', args.capacidade, segundos, erros)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--paralelas', type=int, default=100)
+    parser.add_argument('--capacidade', type=int, default=30)
+    parser.add_argument('--processos', type=int, default=4)
+    parser.add_argument('--pausa', type=float, default=0.002)
+    args = parser.parse_args()
+
+    print(f"\n🎓 {args.paralelas} matrículas simultâneas, turma com {args.capacidade} vagas")
+    with tempfile.TemporaryDirectory() as pasta:
+        resultados = {}
+        for nome, cenario in (
+            ('antigo', lambda c: cenario_antigo(c, args)),
+            ('motor', lambda c: cenario_motor(c, args)),
+            ('lote', lambda c: cenario_motor(c, args, em_lote=True)),
+        ):
+            caminho = os.path.join(pasta, f'{nome}.db')
+            criar_banco(caminho, args.paralelas, args.capacidade)
+            resultados[nome] = cenario(caminho)
+
+    sys.exit(0 if resultados['motor'] and resultados['lote'] else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+
+# Adicionar o diretório backend ao path para importar os módulos
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from database import connect
+from importacao import ErroImportacao, formato_importacao, importar_alunos, ler_linhas
+from senhas import VerificadorSenhas
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'sistema_academico.db')
+
+def importar(arquivo, db_path=DB_PATH, formato=None, simular=False):
+    """Importa alunos de um arquivo CSV ou JSON Lines e imprime o relatório"""
+
+    if not os.path.exists(db_path):
+        print("❌ Banco de dados não encontrado!")
+        print("💡 Execute: python database/init_db.py")
+        return False
+
+    conn = connect(db_path)
+    senhas = VerificadorSenhas()
+
+    def escrever(fn, *args):
+        # Uma transação por lote, como a fila de escrita da aplicação
+        try:
+            resultado = fn(conn, *args)
+            conn.commit()
+            return resultado
+        except Exception:
+            conn.rollback()
+            raise
+
+    inicio = time.perf_counter()
+    try:
+        formato = formato_importacao(formato, nome_arquivo=arquivo)
+        with open(arquivo, 'rb') as fluxo:
+            relatorio = importar_alunos(ler_linhas(fluxo, formato), conn, escrever, senhas, simular=simular)
+    except (ErroImportacao, OSError) as e:
+        print(f"❌ {e}")
+        return False
+    finally:
+        senhas.close()
+        conn.close()
+
+    acao = 'validados' if simular else 'importados'
+    print(f"📥 {relatorio['total']} linha(s) lida(s) em {time.perf_counter() - inicio:.1f}s")
+    print(f"✅ {relatorio['importados']} aluno(s) {acao} em {relatorio['lotes']} lote(s)")
+    if relatorio['com_erro']:
+        print(f"⚠️  {relatorio['com_erro']} linha(s) com erro:")
+        for erro in relatorio['erros']:
+            print(f"   linha {erro['linha']}: {'; '.join(erro['erros'])}")
+        if relatorio['erros_omitidos']:
+            print(f"   ... e mais {relatorio['erros_omitidos']}")
+
+    return not relatorio['com_erro']
+
+if __name__ == '__main__':
+    # Uso: python database/importar_alunos.py arquivo.csv|arquivo.jsonl [--simular] [--formato=csv|ndjson] [caminho_do_banco]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if not args:
+        print("Uso: python database/importar_alunos.py arquivo.csv|arquivo.jsonl [--simular] [--formato=csv|ndjson] [caminho_do_banco]")
+        sys.exit(2)
+
+    formato = next((arg.split('=', 1)[1] for arg in sys.argv[1:] if arg.startswith('--formato=')), None)
+    db_path = args[1] if len(args) > 1 else DB_PATH
+
+    ok = importar(args[0], db_path, formato=formato, simular='--simular' in sys.argv)
+    sys.exit(0 if ok else 1)
@@ -6,6 +6,8 @@ from werkzeug.security import generate_password_hash
 # Adicionar o diretório backend ao path para importar os módulos
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
+from migrations import aplicar_migracoes
+
 # Caminho do banco de dados
 DB_DIR = os.path.dirname(__file__)
 DB_PATH = os.path.join(DB_DIR, 'sistema_academico.db')
@@ -286,6 +288,9 @@ def init_database():
         
         # Commit das alterações
         conn.commit()
+        
+        print("🧱 Aplicando migrações (índices)...")
+        aplicar_migracoes(conn, verbose=True)
         conn.close()
         
         print("\n🎉 Banco de dados inicializado com sucesso!")
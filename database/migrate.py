@@ -0,0 +1,58 @@
+import sqlite3
+import os
+import sys
+
+# Adicionar o diretório backend ao path para importar os módulos
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from migrations import MIGRACOES, aplicar_migracoes, verificar_planos, versao_atual
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'sistema_academico.db')
+
+def migrar(db_path=DB_PATH):
+    """Aplica as migrações pendentes em um banco existente"""
+    
+    if not os.path.exists(db_path):
+        print("❌ Banco de dados não encontrado!")
+        print("💡 Execute: python database/init_db.py")
+        return False
+    
+    conn = sqlite3.connect(db_path)
+    try:
+        versao = versao_atual(conn)
+        print(f"📦 Versão atual do schema: {versao} (mais recente: {MIGRACOES[-1][0]})")
+        
+        aplicadas = aplicar_migracoes(conn, verbose=True)
+        if not aplicadas:
+            print("✅ Schema já está atualizado!")
+        return True
+    except Exception as e:
+        print(f"❌ Erro ao aplicar migrações: {e}")
+        return False
+    finally:
+        conn.close()
+
+def checar_planos():
+    """Falha se alguma consulta crítica fizer SCAN de tabela no schema migrado"""
+    
+    falhas = verificar_planos()
+    
+    if falhas:
+        print("❌ Consultas críticas sem índice:")
+        for nome, detalhe in falhas:
+            print(f"   {nome}: {detalhe}")
+        return False
+    
+    print("✅ Todas as consultas críticas usam índices!")
+    return True
+
+if __name__ == '__main__':
+    # Uso: python database/migrate.py [--verificar-planos] [caminho_do_banco]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    db_path = args[0] if args else DB_PATH
+    
+    ok = migrar(db_path)
+    if ok and '--verificar-planos' in sys.argv:
+        ok = checar_planos()
+    
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,52 @@
+import sqlite3
+import os
+import sys
+
+# Adicionar o diretório backend ao path para importar os módulos
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from agregados import recalcular_agregados
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'sistema_academico.db')
+
+def recalcular(db_path=DB_PATH, corrigir=True):
+    """Recalcula os agregados de notas do zero e relata os desvios encontrados"""
+    
+    if not os.path.exists(db_path):
+        print("❌ Banco de dados não encontrado!")
+        print("💡 Execute: python database/init_db.py")
+        return False
+    
+    conn = sqlite3.connect(db_path)
+    try:
+        desvios = recalcular_agregados(conn, corrigir=corrigir)
+        conn.commit()
+    except Exception as e:
+        print(f"❌ Erro ao recalcular agregados: {e}")
+        print("💡 Execute: python database/migrate.py")
+        return False
+    finally:
+        conn.close()
+    
+    if not desvios:
+        print("✅ Agregados de notas consistentes com a tabela notas!")
+        return True
+    
+    total = sum(len(grupos) for grupos in desvios.values())
+    print(f"{'⚠️ ' if not corrigir else '🔧'} {total} grupo(s) com desvio"
+          f"{' (corrigidos)' if corrigir else ''}:")
+    for dimensao, grupos in desvios.items():
+        for chave, campos in sorted(grupos.items()):
+            detalhes = ', '.join(f"{campo}: {antes} -> {depois}" for campo, (antes, depois) in campos.items())
+            print(f"   {dimensao} {chave}: {detalhes}")
+    
+    # Na verificação, desvio é falha; na reconstrução, já foi corrigido
+    return corrigir
+
+if __name__ == '__main__':
+    # Uso: python database/recalcular_agregados.py [--verificar] [caminho_do_banco]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    db_path = args[0] if args else DB_PATH
+    
+    ok = recalcular(db_path, corrigir='--verificar' not in sys.argv)
+    sys.exit(0 if ok else 1)
@@ -713,17 +713,146 @@ async function deleteProfessor(professorId) {
 // Adicione este case no switch statement da função showSection no app.js:
 
 // Gerenciar Alunos
-async function loadAlunosSection() {
+// A lista é paginada pela API (limit + cursor); cada página traz ALUNOS_POR_PAGINA linhas
+const ALUNOS_POR_PAGINA = 50;
+let alunosProximoCursor = null;
+let alunosExibidos = 0;
+let alunosTotal = 0;
+let alunosBusca = '';
+let alunosBuscaTimer = null;
+
+async function fetchAlunosPagina(cursor = null, filtros = {}) {
+    const params = new URLSearchParams({ limit: ALUNOS_POR_PAGINA, ...filtros });
+    if (cursor) {
+        params.set('cursor', cursor);
+    }
+
+    // Com texto de busca, a lista vem do índice de busca do servidor (ordenada por relevância)
+    const endpoint = alunosBusca ? 'alunos/search' : 'alunos-completo';
+    if (alunosBusca) {
+        params.set('q', alunosBusca);
+    }
+
+    const response = await fetch(`${API_BASE}/admin/${endpoint}?${params}`, {
+        headers: getAuthHeaders()
+    });
+
+    if (!response.ok) {
+        throw new Error('Erro ao carregar alunos');
+    }
+
+    return response.json();
+}
+
+function renderAlunoRow(aluno) {
+    return `
+        <tr>
+            <td>
+                <div class="student-info">
+                    <strong>${aluno.nome}</strong>
+                    ${aluno.telefone ? `<br><small>${aluno.telefone}</small>` : ''}
+                </div>
+            </td>
+            <td>${aluno.email}</td>
+            <td>${aluno.matricula}</td>
+            <td>
+                ${aluno.turma_nome ? `
+                    <span class="badge badge-success">${aluno.turma_nome}</span>
+                ` : `
+                    <span class="badge badge-warning">Sem turma</span>
+                `}
+            </td>
+            <td>
+                <span class="badge ${getNotaBadgeClass(aluno.media_geral)}">
+                    ${aluno.media_geral ? aluno.media_geral.toFixed(1) : 'N/A'}
+                </span>
+            </td>
+            <td>${aluno.total_avaliacoes || 0}</td>
+            <td>
+                <button class="btn btn-sm btn-info" onclick="editAluno(${aluno.id})" title="Editar">
+                    <i class="fas fa-edit"></i>
+                </button>
+                <button class="btn btn-sm btn-danger" onclick="deleteAluno(${aluno.id})" 
+                        ${aluno.total_avaliacoes > 0 ? 'disabled title="Não é possível excluir aluno com avaliações"' : 'title="Excluir aluno"'}>
+                    <i class="fas fa-trash"></i>
+                </button>
+                <button class="btn btn-sm btn-success" onclick="viewAlunoDetails(${aluno.id})" title="Ver detalhes">
+                    <i class="fas fa-eye"></i>
+                </button>
+            </td>
+        </tr>
+    `;
+}
+
+function renderAlunosPaginacao() {
+    return `
+        <span>Exibindo ${alunosExibidos} de ${alunosTotal} alunos</span>
+        ${alunosProximoCursor ? `
+            <button class="btn btn-secondary" onclick="carregarMaisAlunos()">
+                <i class="fas fa-chevron-down"></i> Carregar mais
+            </button>
+        ` : ''}
+    `;
+}
+
+async function carregarMaisAlunos() {
+    if (!alunosProximoCursor) return;
+
     try {
-        const response = await fetch(`${API_BASE}/admin/alunos-completo`, {
-            headers: getAuthHeaders()
-        });
+        const data = await fetchAlunosPagina(alunosProximoCursor);
+        const alunos = data.alunos || [];
 
-        if (!response.ok) {
-            throw new Error('Erro ao carregar alunos');
+        document.getElementById('alunos-tbody').insertAdjacentHTML(
+            'beforeend', alunos.map(renderAlunoRow).join('')
+        );
+
+        alunosExibidos += alunos.length;
+        alunosProximoCursor = data.paginacao ? data.paginacao.proximo_cursor : null;
+        document.getElementById('alunos-paginacao').innerHTML = renderAlunosPaginacao();
+    } catch (error) {
+        showNotification('Erro ao carregar mais alunos: ' + error.message, 'error');
+    }
+}
+
+function buscarAlunos(texto) {
+    clearTimeout(alunosBuscaTimer);
+    alunosBuscaTimer = setTimeout(async () => {
+        alunosBusca = texto.trim();
+
+        try {
+            const data = await fetchAlunosPagina();
+            const alunos = data.alunos || [];
+
+            document.getElementById('alunos-tbody').innerHTML = alunos.length > 0
+                ? alunos.map(renderAlunoRow).join('')
+                : '<tr><td colspan="7" class="text-center">Nenhum aluno encontrado</td></tr>';
+
+            alunosExibidos = alunos.length;
+            alunosTotal = data.paginacao ? data.paginacao.total : alunos.length;
+            alunosProximoCursor = data.paginacao ? data.paginacao.proximo_cursor : null;
+            document.getElementById('alunos-paginacao').innerHTML = renderAlunosPaginacao();
+        } catch (error) {
+            showNotification('Erro ao buscar alunos: ' + error.message, 'error');
         }
+    }, 300);
+}
 
-        const data = await response.json();
+async function loadAlunosSection() {
+    try {
+        alunosBusca = '';
+
+        // Primeira página + total de alunos sem turma (só a contagem, fields=id e limit=1)
+        const [data, semTurma] = await Promise.all([
+            fetchAlunosPagina(),
+            fetchAlunosPagina(null, { sem_turma: 1, fields: 'id', limit: 1 })
+        ]);
+
+        const alunos = data.alunos || [];
+        alunosExibidos = alunos.length;
+        alunosTotal = data.paginacao ? data.paginacao.total : alunos.length;
+        alunosProximoCursor = data.paginacao ? data.paginacao.proximo_cursor : null;
+        const totalSemTurma = semTurma.paginacao ? semTurma.paginacao.total : 0;
+        const totalAlunos = alunosTotal;
 
         return `
             <div class="section">
@@ -738,7 +867,7 @@ async function loadAlunosSection() {
                     <div class="card">
                         <div class="card-header">
                             <div>
-                                <h3>${data.alunos ? data.alunos.length : 0}</h3>
+                                <h3>${totalAlunos}</h3>
                                 <p>Total de Alunos</p>
                             </div>
                             <div class="card-icon blue">
@@ -750,7 +879,7 @@ async function loadAlunosSection() {
                     <div class="card">
                         <div class="card-header">
                             <div>
-                                <h3>${data.alunos ? data.alunos.filter(a => a.turma_id).length : 0}</h3>
+                                <h3>${totalAlunos - totalSemTurma}</h3>
                                 <p>Alunos Matriculados</p>
                             </div>
                             <div class="card-icon green">
@@ -762,7 +891,7 @@ async function loadAlunosSection() {
                     <div class="card">
                         <div class="card-header">
                             <div>
-                                <h3>${data.alunos ? data.alunos.filter(a => !a.turma_id).length : 0}</h3>
+                                <h3>${totalSemTurma}</h3>
                                 <p>Sem Matrícula</p>
                             </div>
                             <div class="card-icon orange">
@@ -772,6 +901,11 @@ async function loadAlunosSection() {
                     </div>
                 </div>
                 
+                <div class="form-group">
+                    <input type="search" id="alunos-busca" placeholder="Buscar por nome, email ou matrícula"
+                           oninput="buscarAlunos(this.value)">
+                </div>
+                
                 <div class="table-responsive">
                     <table>
                         <thead>
@@ -785,44 +919,8 @@ async function loadAlunosSection() {
                                 <th>Ações</th>
                             </tr>
                         </thead>
-                        <tbody>
-                            ${data.alunos && data.alunos.length > 0 ? data.alunos.map(aluno => `
-                                <tr>
-                                    <td>
-                                        <div class="student-info">
-                                            <strong>${aluno.nome}</strong>
-                                            ${aluno.telefone ? `<br><small>${aluno.telefone}</small>` : ''}
-                                        </div>
-                                    </td>
-                                    <td>${aluno.email}</td>
-                                    <td>${aluno.matricula}</td>
-                                    <td>
-                                        ${aluno.turma_nome ? `
-                                            <span class="badge badge-success">${aluno.turma_nome}</span>
-                                        ` : `
-                                            <span class="badge badge-warning">Sem turma</span>
-                                        `}
-                                    </td>
-                                    <td>
-                                        <span class="badge ${getNotaBadgeClass(aluno.media_geral)}">
-                                            ${aluno.media_geral ? aluno.media_geral.toFixed(1) : 'N/A'}
-                                        </span>
-                                    </td>
-                                    <td>${aluno.total_avaliacoes || 0}</td>
-                                    <td>
-                                        <button class="btn btn-sm btn-info" onclick="editAluno(${aluno.id})" title="Editar">
-                                            <i class="fas fa-edit"></i>
-                                        </button>
-                                        <button class="btn btn-sm btn-danger" onclick="deleteAluno(${aluno.id})" 
-                                                ${aluno.total_avaliacoes > 0 ? 'disabled title="Não é possível excluir aluno com avaliações"' : 'title="Excluir aluno"'}>
-                                            <i class="fas fa-trash"></i>
-                                        </button>
-                                        <button class="btn btn-sm btn-success" onclick="viewAlunoDetails(${aluno.id})" title="Ver detalhes">
-                                            <i class="fas fa-eye"></i>
-                                        </button>
-                                    </td>
-                                </tr>
-                            `).join('') : `
+                        <tbody id="alunos-tbody">
+                            ${alunos.length > 0 ? alunos.map(renderAlunoRow).join('') : `
                                 <tr>
                                     <td colspan="7" class="text-center">Nenhum aluno encontrado</td>
                                 </tr>
@@ -830,6 +928,10 @@ async function loadAlunosSection() {
                         </tbody>
                     </table>
                 </div>
+                
+                <div id="alunos-paginacao" class="form-actions">
+                    ${renderAlunosPaginacao()}
+                </div>
             </div>
         `;
     } catch (error) {
@@ -2014,8 +2116,9 @@ async function adicionarProfessorTurma(turmaId) {
     try {
         console.log('Carregando professores disponíveis para turma:', turmaId);
 
-        // Carregar professores disponíveis
-        const response = await fetch(`${API_BASE}/admin/professores-disponiveis`, {
+        // Professores disponíveis e matérias em uma única requisição
+        const secoes = 'professores_disponiveis,materias';
+        const response = await fetch(`${API_BASE}/admin/telas/turmas/${turmaId}?secoes=${secoes}`, {
             headers: getAuthHeaders()
         });
 
@@ -2025,7 +2128,7 @@ async function adicionarProfessorTurma(turmaId) {
         }
 
         const data = await response.json();
-        const professores = data.professores || [];
+        const professores = data.secoes.professores_disponiveis || [];
 
         console.log('Professores carregados:', professores);
 
@@ -2034,32 +2137,10 @@ async function adicionarProfessorTurma(turmaId) {
             return;
         }
 
-        // Carregar matérias disponíveis
-        const materiasResponse = await fetch(`${API_BASE}/admin/materias`, {
-            headers: getAuthHeaders()
-        });
-
         let materiasOptions = '<option value="">Selecione a matéria...</option>';
-        if (materiasResponse.ok) {
-            const materiasData = await materiasResponse.json();
-            if (materiasData.materias) {
-                materiasOptions += materiasData.materias.map(materia =>
-                    `<option value="${materia.id}">${materia.nome}</option>`
-                ).join('');
-            }
-        } else {
-            // Fallback para matérias padrão se a API falhar
-            materiasOptions = `
-                <option value="1">Matemática</option>
-                <option value="2">Português</option>
-                <option value="3">Ciências</option>
-                <option value="4">História</option>
-                <option value="5">Geografia</option>
-                <option value="6">Inglês</option>
-                <option value="7">Educação Física</option>
-                <option value="8">Artes</option>
-            `;
-        }
+        materiasOptions += (data.secoes.materias || []).map(materia =>
+            `<option value="${materia.id}">${materia.nome}</option>`
+        ).join('');
 
         const options = professores.map(professor => `
             <option value="${professor.id}">
@@ -2259,7 +2340,8 @@ async function adicionarProfessorTurmaSubmit(turmaId, event) {
 // Função para visualizar detalhes do professor
 async function viewProfessorDetails(professorId) {
     try {
-        const response = await fetch(`${API_BASE}/admin/professores/${professorId}`, {
+        // Professor e turmas em uma única requisição
+        const response = await fetch(`${API_BASE}/admin/telas/professores/${professorId}`, {
             headers: getAuthHeaders()
         });
 
@@ -2268,24 +2350,16 @@ async function viewProfessorDetails(professorId) {
         }
 
         const data = await response.json();
-        const professor = data.professor;
-
-        // Carregar turmas do professor
-        const turmasResponse = await fetch(`${API_BASE}/admin/professores/${professorId}/turmas`, {
-            headers: getAuthHeaders()
-        });
+        const { professor, turmas } = data.secoes;
 
         let turmasHTML = '<p>Nenhuma turma atribuída</p>';
-        if (turmasResponse.ok) {
-            const turmasData = await turmasResponse.json();
-            if (turmasData.turmas && turmasData.turmas.length > 0) {
-                turmasHTML = turmasData.turmas.map(turma => `
-                    <div class="turma-item">
-                        <strong>${turma.turma_nome}</strong> - ${turma.materia_nome}
-                        <br><small>Carga horária: ${turma.carga_horaria_semanal}h/semana</small>
-                    </div>
-                `).join('');
-            }
+        if (turmas && turmas.length > 0) {
+            turmasHTML = turmas.map(turma => `
+                <div class="turma-item">
+                    <strong>${turma.turma_nome}</strong> - ${turma.materia_nome}
+                    <br><small>Carga horária: ${turma.carga_horaria_semanal}h/semana</small>
+                </div>
+            `).join('');
         }
 
         const modalContent = `
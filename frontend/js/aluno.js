@@ -16,12 +16,9 @@ class AlunoManager {
                 return this.getErrorState('Acesso negado', 'Esta área é restrita a alunos.');
             }
 
-            // Buscar dados do aluno
-            const [notasData, atividadesData, calendarioData] = await Promise.all([
-                this.fetchMinhasNotas(),
-                this.fetchAtividadesPendentes(),
-                this.fetchCalendarioAulas()
-            ]);
+            // Notas, atividades e calendário em uma única requisição
+            const { notas: notasData, atividades: atividadesData, calendario: calendarioData } =
+                await this.fetchTelaInicio();
 
             const mediaGeral = notasData.media_geral || 0;
             const totalAtividades = notasData.notas ? notasData.notas.length : 0;
@@ -739,6 +736,19 @@ class AlunoManager {
     // =============================================
     // FUNÇÕES DE FETCH DE DADOS
     // =============================================
+    async fetchTelaInicio() {
+        const response = await fetch(`${API_BASE}/aluno/telas/inicio`, {
+            headers: getAuthHeaders()
+        });
+
+        if (!response.ok) {
+            throw new Error('Erro ao carregar o painel');
+        }
+
+        const data = await response.json();
+        return data.secoes;
+    }
+
     async fetchMinhasNotas() {
         const response = await fetch(`${API_BASE}/aluno/minhas-notas`, {
             headers: getAuthHeaders()
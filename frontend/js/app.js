@@ -219,15 +219,14 @@ async function loadInitialDashboard() {
 // Dashboard do Admin (função renomeada para evitar conflito)
 async function loadAdminDashboardContent() {
     try {
-        const [turmasRes, alunosRes, professoresRes] = await Promise.all([
-            fetch(`${API_BASE}/admin/turmas`, { headers: getAuthHeaders() }),
-            fetch(`${API_BASE}/admin/alunos`, { headers: getAuthHeaders() }),
-            fetch(`${API_BASE}/admin/professores`, { headers: getAuthHeaders() })
-        ]);
+        // Uma única chamada leve: contadores materializados + primeiras turmas
+        const telaRes = await fetch(`${API_BASE}/admin/telas/dashboard?secoes=estatisticas,turmas_recentes`, {
+            headers: getAuthHeaders()
+        });
+        const contagensData = telaRes.ok ? (await telaRes.json()).secoes : { estatisticas: {}, turmas_recentes: [] };
 
-        const turmasData = turmasRes.ok ? await turmasRes.json() : { turmas: [] };
-        const alunosData = alunosRes.ok ? await alunosRes.json() : { alunos: [] };
-        const professoresData = professoresRes.ok ? await professoresRes.json() : { professores: [] };
+        const estatisticas = contagensData.estatisticas || {};
+        const turmasData = { turmas: contagensData.turmas_recentes || [] };
 
         return `
             <div class="dashboard">
@@ -235,7 +234,7 @@ async function loadAdminDashboardContent() {
                     <div class="card">
                         <div class="card-header">
                             <div>
-                                <h3>${turmasData.turmas ? turmasData.turmas.length : 0}</h3>
+                                <h3>${estatisticas.total_turmas || 0}</h3>
                                 <p>Turmas Ativas</p>
                             </div>
                             <div class="card-icon blue">
@@ -247,7 +246,7 @@ async function loadAdminDashboardContent() {
                     <div class="card">
                         <div class="card-header">
                             <div>
-                                <h3>${alunosData.alunos ? alunosData.alunos.length : 0}</h3>
+                                <h3>${estatisticas.total_alunos || 0}</h3>
                                 <p>Alunos Matriculados</p>
                             </div>
                             <div class="card-icon green">
@@ -259,7 +258,7 @@ async function loadAdminDashboardContent() {
                     <div class="card">
                         <div class="card-header">
                             <div>
-                                <h3>${professoresData.professores ? professoresData.professores.length : 0}</h3>
+                                <h3>${estatisticas.total_professores || 0}</h3>
                                 <p>Professores</p>
                             </div>
                             <div class="card-icon orange">
@@ -0,0 +1,75 @@
+"""
+Fixtures dos testes: a aplicação sobe uma vez por sessão num banco temporário
+(cópia de database/sistema_academico.db, migrado por init_db). A aplicação é
+um objeto global do módulo app, então os testes compartilham o banco e cada
+um cria os próprios dados.
+"""
+import os
+import shutil
+import sys
+import uuid
+
+import pytest
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(RAIZ, 'backend'))
+
+BANCO = os.path.join(RAIZ, 'database', 'sistema_academico.db')
+
+CONTAS = {
+    'admin': ('admin@escola.com', 'admin123'),
+    'professor': ('professor@escola.com', 'prof123'),
+    'aluno': ('aluno@escola.com', 'aluno123'),
+}
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    import app as modulo
+
+    banco = str(tmp_path_factory.mktemp('banco') / 'sistema_academico.db')
+    shutil.copy(BANCO, banco)
+    modulo.init_db(banco)
+    aplicacao = modulo.create_app({
+        'DATABASE': banco,
+        'TESTING': True,
+        # Hash barato e sem pool de processos: os testes não medem custo de senha
+        'SENHA_METODO': 'pbkdf2:sha256:1000',
+        'SENHA_PROCESSOS': 0,
+    })
+    yield aplicacao
+    for nome in ('gerador_grade', 'senhas', 'db_writer', 'db_pool'):
+        extensao = aplicacao.extensions.get(nome)
+        if extensao is not None:
+            extensao.close()
+
+@pytest.fixture(scope='session')
+def banco(app):
+    """Conexão direta com o banco de teste, para preparar e conferir dados"""
+    from database import connect
+
+    conn = connect(app.config['DATABASE'])
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture(scope='session')
+def cabecalhos(app):
+    """cabecalhos('admin') -> {'Authorization': 'Bearer ...'} (login feito uma vez por conta)"""
+    tokens = {}
+
+    def obter(conta):
+        if conta not in tokens:
+            email, senha = CONTAS[conta]
+            resposta = app.test_client().post('/api/auth/login', json={'email': email, 'password': senha})
+            assert resposta.status_code == 200, resposta.get_json()
+            tokens[conta] = resposta.get_json()['access_token']
+        return {'Authorization': f'Bearer {tokens[conta]}'}
+    return obter
+
+@pytest.fixture
+def sufixo():
+    """Texto único para códigos, e-mails e matrículas criados pelo teste"""
+    return uuid.uuid4().hex[:8]
@@ -0,0 +1,70 @@
+"""Diário de notas e agregados incrementais mantidos por triggers (agregados.py, migração 007)"""
+from agregados import media_aluno, obter_agregados, verificar_agregados
+
+
+def _cenario(banco, sufixo):
+    """Aluno novo numa turma nova com duas atividades; retorna (aluno_id, turma_id, [atividade_ids])"""
+    turma_id = banco.execute(
+        "INSERT INTO turmas (nome, codigo, ano_letivo, periodo) VALUES (?, ?, '2025', 'tarde')",
+        (f'Turma {sufixo}', f'G-{sufixo}')
+    ).lastrowid
+    materia_id = banco.execute(
+        "INSERT INTO materias (nome, turma_id, professor_id, horario, dia_semana) "
+        "SELECT ?, ?, professor_id, '06:00', 'domingo' FROM materias LIMIT 1",
+        (f'Matéria {sufixo}', turma_id)
+    ).lastrowid
+    atividades = [
+        banco.execute(
+            "INSERT INTO atividades (titulo, materia_id, valor, data_entrega) VALUES (?, ?, 10, '2030-01-10')",
+            (f'Atividade {sufixo} {i}', materia_id)
+        ).lastrowid
+        for i in range(3)
+    ]
+    usuario_id = banco.execute(
+        "INSERT INTO usuarios (nome, email, senha, tipo) VALUES (?, ?, 'x', 'aluno')",
+        (f'Aluno {sufixo}', f'agregado-{sufixo}@escola.com')
+    ).lastrowid
+    aluno_id = banco.execute(
+        'INSERT INTO alunos (usuario_id, matricula, turma_id) VALUES (?, ?, ?)', (usuario_id, f'G-{sufixo}', turma_id)
+    ).lastrowid
+    banco.commit()
+    return aluno_id, turma_id, atividades
+
+def test_agregados_acompanham_insercao_edicao_e_remocao(banco, sufixo):
+    aluno_id, turma_id, (primeira, segunda, terceira) = _cenario(banco, sufixo)
+    banco.executemany(
+        'INSERT INTO notas (aluno_id, atividade_id, nota) VALUES (?, ?, ?)',
+        [(aluno_id, primeira, 6), (aluno_id, segunda, 8)]
+    )
+    banco.commit()
+    assert media_aluno(banco, aluno_id) == 7
+    grupo = obter_agregados(banco, 'turma', [turma_id])[turma_id]
+    assert (grupo['quantidade'], grupo['minimo'], grupo['maximo']) == (2, 6, 8)
+
+    banco.execute('UPDATE notas SET nota = 10 WHERE aluno_id = ? AND atividade_id = ?', (aluno_id, segunda))
+    # Remover o mínimo obriga o trigger a recalcular o extremo a partir de `notas`
+    banco.execute('DELETE FROM notas WHERE aluno_id = ? AND atividade_id = ?', (aluno_id, primeira))
+    # Nota NULL (entrega sem correção) conta em registros, não na média
+    banco.execute('INSERT INTO notas (aluno_id, atividade_id, nota) VALUES (?, ?, NULL)', (aluno_id, terceira))
+    banco.commit()
+
+    grupo = obter_agregados(banco, 'aluno', [aluno_id])[aluno_id]
+    assert (grupo['soma'], grupo['quantidade'], grupo['registros']) == (10, 1, 2)
+    assert (grupo['minimo'], grupo['maximo'], grupo['media']) == (10, 10, 10)
+    assert verificar_agregados(banco) == {}
+
+def test_diario_registra_nota_anterior_e_nova(banco, sufixo):
+    aluno_id, turma_id, (atividade_id, _, _) = _cenario(banco, sufixo)
+    banco.execute('INSERT INTO notas (aluno_id, atividade_id, nota) VALUES (?, ?, 3)', (aluno_id, atividade_id))
+    banco.execute('UPDATE notas SET nota = 5 WHERE aluno_id = ? AND atividade_id = ?', (aluno_id, atividade_id))
+    banco.execute('DELETE FROM notas WHERE aluno_id = ? AND atividade_id = ?', (aluno_id, atividade_id))
+    banco.commit()
+
+    eventos = banco.execute('''
+        SELECT operacao, nota_anterior, nota_nova, turma_id FROM notas_eventos
+        WHERE aluno_id = ? AND atividade_id = ? ORDER BY id
+    ''', (aluno_id, atividade_id)).fetchall()
+    assert [tuple(evento) for evento in eventos] == [
+        ('INSERT', None, 3, turma_id), ('UPDATE', 3, 5, turma_id), ('DELETE', 5, None, turma_id)
+    ]
+    assert media_aluno(banco, aluno_id) is None
@@ -0,0 +1,84 @@
+"""Cache de tokens verificados e Principal da requisição (autenticacao.py)"""
+import time
+
+from autenticacao import CacheTokens, get_cache_tokens
+
+
+class _Verificador:
+    """Substitui o jwt.decode: payloads fixos por token, contando as chamadas"""
+
+    def __init__(self, payloads):
+        self.payloads = payloads
+        self.chamadas = 0
+
+    def __call__(self, token):
+        self.chamadas += 1
+        return self.payloads.get(token)
+
+def _payload(usuario_id, exp=None):
+    return {'user_id': usuario_id, 'user_type': 'admin', 'exp': exp or time.time() + 3600}
+
+def test_token_verificado_uma_vez_e_descartado_ao_expirar():
+    verificar = _Verificador({'valido': _payload(1), 'vencido': _payload(2, exp=time.time() - 1)})
+    cache = CacheTokens(verificar)
+
+    assert cache.autenticar('valido') is cache.autenticar('valido')
+    assert verificar.chamadas == 1
+
+    # Entrada com exp no passado não é servida do cache
+    cache.autenticar('vencido')
+    cache.autenticar('vencido')
+    assert verificar.chamadas == 3
+    assert cache.stats()['expirados'] == 1
+
+    # Token inválido não entra no cache
+    assert cache.autenticar('falso') is None
+    assert cache.autenticar('falso') is None
+    assert verificar.chamadas == 5
+
+def test_lru_descarta_o_token_menos_usado():
+    verificar = _Verificador({nome: _payload(i) for i, nome in enumerate('abc')})
+    cache = CacheTokens(verificar, max_tamanho=2)
+
+    cache.autenticar('a')
+    cache.autenticar('b')
+    cache.autenticar('a')
+    cache.autenticar('c')  # descarta 'b', o menos usado
+    assert cache.stats()['descartados'] == 1
+
+    chamadas = verificar.chamadas
+    cache.autenticar('a')
+    assert verificar.chamadas == chamadas
+    cache.autenticar('b')
+    assert verificar.chamadas == chamadas + 1
+
+def test_principal_em_cache_acompanha_troca_de_turma(app, client, banco, cabecalhos, sufixo):
+    turmas = [
+        banco.execute(
+            "INSERT INTO turmas (nome, codigo, ano_letivo, periodo) VALUES (?, ?, '2025', 'manhã')",
+            (f'Turma {sufixo} {i}', f'P-{sufixo}-{i}')
+        ).lastrowid
+        for i in range(2)
+    ]
+    banco.commit()
+    email = f'principal-{sufixo}@escola.com'
+    resposta = client.post('/api/admin/alunos', headers=cabecalhos('admin'), json={
+        'nome': f'Aluno {sufixo}', 'email': email, 'matricula': f'P-{sufixo}', 'senha': 'senha123',
+        'turma_id': turmas[0],
+    })
+    assert resposta.status_code == 200, resposta.get_json()
+    aluno_id = banco.execute('SELECT id FROM alunos WHERE matricula = ?', (f'P-{sufixo}',)).fetchone()['id']
+    token = client.post('/api/auth/login', json={'email': email, 'password': 'senha123'}).get_json()['access_token']
+
+    cache = get_cache_tokens(app)
+    with app.test_request_context():
+        principal = cache.autenticar(token)
+        assert (principal.aluno_id, principal.turma_id) == (aluno_id, turmas[0])
+
+    resposta = client.put(f'/api/admin/alunos/{aluno_id}', headers=cabecalhos('admin'), json={'turma_id': turmas[1]})
+    assert resposta.status_code == 200, resposta.get_json()
+
+    # Mesmo token, mesmo Principal do cache: a nova versão de `alunos` recarrega os ids
+    with app.test_request_context():
+        assert cache.autenticar(token) is principal
+        assert principal.turma_id == turmas[1]
@@ -0,0 +1,42 @@
+"""Busca de alunos pelo índice FTS5 (search.py) em /api/admin/alunos/search"""
+
+
+def _buscar(client, cabecalhos, q, **args):
+    resposta = client.get('/api/admin/alunos/search', headers=cabecalhos('admin'), query_string=dict(args, q=q))
+    assert resposta.status_code == 200, resposta.get_json()
+    return resposta.get_json()
+
+def _criar_aluno(client, cabecalhos, nome, sufixo, i):
+    resposta = client.post('/api/admin/alunos', headers=cabecalhos('admin'), json={
+        'nome': nome, 'email': f'busca-{sufixo}-{i}@escola.com', 'matricula': f'B{sufixo}{i}', 'senha': 'senha123',
+    })
+    assert resposta.status_code == 200, resposta.get_json()
+
+def test_busca_ignora_acentos_e_pagina_por_relevancia(client, banco, cabecalhos, sufixo):
+    for i in range(3):
+        _criar_aluno(client, cabecalhos, f'João Estêvão {sufixo}', sufixo, i)
+    ids = {row['id'] for row in banco.execute('SELECT id FROM alunos WHERE matricula LIKE ?', (f'B{sufixo}%',))}
+
+    # Sem acento, em minúsculas e só com o começo da palavra
+    primeira = _buscar(client, cabecalhos, f'joao estev {sufixo}', limit=2)
+    assert primeira['paginacao']['total'] == 3
+    segunda = _buscar(client, cabecalhos, f'joao estev {sufixo}', limit=2, cursor=primeira['paginacao']['proximo_cursor'])
+    assert segunda['paginacao']['proximo_cursor'] is None
+
+    encontrados = [aluno['id'] for aluno in primeira['alunos'] + segunda['alunos']]
+    assert sorted(encontrados) == sorted(ids)
+
+def test_indice_acompanha_edicao_do_nome(client, banco, cabecalhos, sufixo):
+    _criar_aluno(client, cabecalhos, f'Cecília {sufixo}', sufixo, 0)
+    aluno_id = banco.execute('SELECT id FROM alunos WHERE matricula = ?', (f'B{sufixo}0',)).fetchone()['id']
+    assert [a['id'] for a in _buscar(client, cabecalhos, f'cecilia {sufixo}')['alunos']] == [aluno_id]
+
+    resposta = client.put(f'/api/admin/alunos/{aluno_id}', headers=cabecalhos('admin'), json={'nome': f'Beatriz {sufixo}'})
+    assert resposta.status_code == 200, resposta.get_json()
+
+    assert _buscar(client, cabecalhos, f'cecilia {sufixo}')['alunos'] == []
+    assert [a['id'] for a in _buscar(client, cabecalhos, f'beatriz {sufixo}')['alunos']] == [aluno_id]
+
+def test_operadores_fts_sao_tratados_como_texto(client, cabecalhos):
+    # Aspas, NOT e * soltos não quebram a consulta FTS5
+    assert _buscar(client, cabecalhos, '"NOT* OR')['alunos'] == []
@@ -0,0 +1,58 @@
+"""Respostas condicionais: Last-Modified tem resolução de um segundo"""
+import time
+from datetime import datetime, timezone
+
+from werkzeug.http import http_date
+
+import cache_http
+
+
+def _fixar_ultima_escrita(banco, momento):
+    # Como se todas as escritas em turmas tivessem caído no mesmo segundo
+    banco.execute("UPDATE versoes_tabelas SET atualizado_em = ? WHERE tabela = 'turmas'", (momento,))
+    banco.commit()
+
+def test_escrita_no_mesmo_segundo_nao_gera_304(client, banco, cabecalhos, sufixo, monkeypatch):
+    momento = int(time.time())
+    relogio = [momento + 0.2]
+    monkeypatch.setattr(cache_http, '_agora', lambda: datetime.fromtimestamp(relogio[0], timezone.utc))
+    _fixar_ultima_escrita(banco, momento)
+
+    # Segundo da última escrita ainda aberto: só ETag, sem Last-Modified
+    primeira = client.get('/api/admin/todas-turmas', headers=cabecalhos('admin'))
+    assert primeira.status_code == 200
+    assert primeira.headers.get('ETag')
+    assert primeira.last_modified is None
+
+    # Outra escrita no mesmo segundo: a versão muda, o momento não
+    resposta = client.post('/api/admin/turmas', headers=cabecalhos('admin'), json={
+        'nome': f'Mesmo segundo {sufixo}', 'codigo': f'S-{sufixo}', 'ano_letivo': '2025', 'periodo': 'tarde',
+    })
+    assert resposta.status_code == 200, resposta.get_json()
+    _fixar_ultima_escrita(banco, momento)
+    relogio[0] = momento + 0.6
+
+    segunda = client.get('/api/admin/todas-turmas', headers=dict(
+        cabecalhos('admin'), **{'If-Modified-Since': http_date(momento)}
+    ))
+    assert segunda.status_code == 200
+    assert f'S-{sufixo}' in segunda.get_data(as_text=True)
+
+    # Segundo encerrado: nenhuma escrita cai mais nele, Last-Modified e If-Modified-Since voltam a valer
+    relogio[0] = momento + 2
+    terceira = client.get('/api/admin/todas-turmas', headers=cabecalhos('admin'))
+    assert terceira.last_modified == datetime.fromtimestamp(momento, timezone.utc)
+    quarta = client.get('/api/admin/todas-turmas', headers=dict(
+        cabecalhos('admin'), **{'If-Modified-Since': terceira.headers['Last-Modified']}
+    ))
+    assert quarta.status_code == 304
+
+def test_etag_decide_com_os_dois_validadores(client, banco, cabecalhos, monkeypatch):
+    momento = int(time.time()) - 10
+    monkeypatch.setattr(cache_http, '_agora', lambda: datetime.fromtimestamp(momento + 5, timezone.utc))
+    _fixar_ultima_escrita(banco, momento)
+
+    resposta = client.get('/api/admin/todas-turmas', headers=dict(cabecalhos('admin'), **{
+        'If-None-Match': 'W/"outro"', 'If-Modified-Since': http_date(momento + 1)
+    }))
+    assert resposta.status_code == 200
@@ -0,0 +1,70 @@
+"""Feed iCalendar do aluno por link com token (sem cabeçalho Authorization)"""
+from calendario import ler_token_feed, token_feed
+
+
+def test_feed_sem_cabecalho_authorization(app, client, cabecalhos):
+    resposta = client.get('/api/aluno/calendario-aulas/feed', headers=cabecalhos('aluno'))
+    assert resposta.status_code == 200, resposta.get_json()
+    link = resposta.get_json()
+    assert link['url'].endswith(f"/api/aluno/calendario-aulas.ics?token={link['token']}")
+
+    # Como um aplicativo de calendário: só a URL, nenhum cabeçalho
+    resposta = client.get(f"/api/aluno/calendario-aulas.ics?token={link['token']}")
+    assert resposta.status_code == 200, resposta.get_data(as_text=True)
+    assert resposta.mimetype == 'text/calendar'
+    assert resposta.get_data(as_text=True).startswith('BEGIN:VCALENDAR')
+
+    etag = resposta.headers['ETag']
+    resposta = client.get(f"/api/aluno/calendario-aulas.ics?token={link['token']}", headers={'If-None-Match': etag})
+    assert resposta.status_code == 304
+
+    # O token do feed não abre as outras rotas nem o calendário em JSON
+    assert client.get(f"/api/aluno/calendario-aulas?token={link['token']}").status_code == 401
+    assert client.get(
+        '/api/aluno/minhas-notas', headers={'Authorization': f"Bearer {link['token']}"}
+    ).status_code == 401
+
+def test_feed_revogado_e_token_adulterado(app, client, cabecalhos):
+    antigo = client.get('/api/aluno/calendario-aulas/feed', headers=cabecalhos('aluno')).get_json()['token']
+
+    resposta = client.post('/api/aluno/calendario-aulas/feed', headers=cabecalhos('aluno'))
+    assert resposta.status_code == 200, resposta.get_json()
+    novo = resposta.get_json()['token']
+    assert novo != antigo
+
+    assert client.get(f'/api/aluno/calendario-aulas.ics?token={antigo}').status_code == 401
+    assert client.get(f'/api/aluno/calendario-aulas.ics?token={novo}').status_code == 200
+
+    # Outro aluno com a mesma versão, sem a assinatura certa
+    aluno_id, versao = ler_token_feed(app.config['SECRET_KEY'], novo)
+    forjado = token_feed('outra-chave', aluno_id + 1, versao)
+    for token in (forjado, novo[:-1], 'abc', ''):
+        assert client.get(f'/api/aluno/calendario-aulas.ics?token={token}').status_code == 401
+
+def test_link_do_feed_so_para_alunos(client, cabecalhos):
+    assert client.get('/api/aluno/calendario-aulas/feed', headers=cabecalhos('professor')).status_code == 403
+    assert client.get('/api/aluno/calendario-aulas/feed').status_code == 401
+
+def test_rota_e_blueprint_usam_a_mesma_resposta(app, client, banco, cabecalhos):
+    """routes/aluno_routes.py responde com resposta_calendario e o envelope jsonify"""
+    from datetime import date
+
+    from calendario import resposta_calendario
+
+    turma_id = banco.execute(
+        "SELECT turma_id FROM alunos a JOIN usuarios u ON u.id = a.usuario_id WHERE u.email = 'aluno@escola.com'"
+    ).fetchone()[0]
+    resposta = client.get(
+        '/api/aluno/calendario-aulas?inicio=2030-01-07&fim=2030-01-20', headers=cabecalhos('aluno')
+    )
+    assert resposta.status_code == 200, resposta.get_json()
+    da_rota = resposta.get_json()
+
+    with app.test_request_context():
+        resposta = resposta_calendario(banco, turma_id, 'json', date(2030, 1, 7), date(2030, 1, 20))
+        do_blueprint = resposta.get_json()
+    assert resposta.headers['ETag']
+
+    assert set(da_rota) - set(do_blueprint) == {'message'}
+    assert {chave: da_rota[chave] for chave in do_blueprint} == do_blueprint
+    assert do_blueprint['total_aulas'] == len(do_blueprint['dias_aula']) > 0
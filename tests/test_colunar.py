@@ -0,0 +1,98 @@
+"""Armazenamento colunar de notas (colunar.py) e a entrega de atividade que grava nele"""
+from array import array
+
+from colunar import NotasColunares, run_write_notas
+
+
+def _nova_atividade(banco, sufixo, materia_id=None):
+    materia_id = materia_id or banco.execute('SELECT id FROM materias ORDER BY id LIMIT 1').fetchone()[0]
+    atividade_id = banco.execute(
+        "INSERT INTO atividades (titulo, materia_id, valor, data_entrega) VALUES (?, ?, 10, '2099-12-31')",
+        (f'Atividade {sufixo}', materia_id)
+    ).lastrowid
+    banco.commit()
+    return atividade_id
+
+def _notas_no_banco(banco, atividade_id):
+    return array('d', [row[0] for row in banco.execute(
+        'SELECT nota FROM notas WHERE atividade_id = ? AND nota IS NOT NULL ORDER BY aluno_id', (atividade_id,)
+    )])
+
+def test_sincroniza_pelo_diario_sem_recarregar(banco, sufixo):
+    atividade_id = _nova_atividade(banco, sufixo)
+    alunos = [row[0] for row in banco.execute('SELECT id FROM alunos ORDER BY id LIMIT 3')]
+    banco.executemany(
+        'INSERT INTO notas (aluno_id, atividade_id, nota) VALUES (?, ?, ?)',
+        [(aluno_id, atividade_id, 5.0) for aluno_id in alunos[:2]]
+    )
+    banco.commit()
+
+    colunas = NotasColunares().carregar(banco)
+    assert colunas.notas_da_atividade(atividade_id) == _notas_no_banco(banco, atividade_id)
+
+    # Escritas fora de run_write_notas (outro worker, script): só o diário as traz
+    banco.execute('UPDATE notas SET nota = 9 WHERE aluno_id = ? AND atividade_id = ?', (alunos[0], atividade_id))
+    banco.execute('DELETE FROM notas WHERE aluno_id = ? AND atividade_id = ?', (alunos[1], atividade_id))
+    banco.execute('INSERT INTO notas (aluno_id, atividade_id, nota) VALUES (?, ?, 7)', (alunos[2], atividade_id))
+    banco.commit()
+
+    colunas.sincronizar(banco)
+    assert colunas.cargas == 1
+    assert colunas.eventos_aplicados >= 3
+    assert colunas.notas_da_atividade(atividade_id) == array('d', [9.0, 7.0])
+    assert colunas.notas_da_atividade(atividade_id) == _notas_no_banco(banco, atividade_id)
+
+def test_atividade_que_muda_de_turma_e_recodificada(banco, sufixo):
+    atividade_id = _nova_atividade(banco, sufixo)
+    aluno_id = banco.execute('SELECT id FROM alunos ORDER BY id LIMIT 1').fetchone()[0]
+    banco.execute('INSERT INTO notas (aluno_id, atividade_id, nota) VALUES (?, ?, 4)', (aluno_id, atividade_id))
+    turma_id = banco.execute(
+        "INSERT INTO turmas (nome, codigo, ano_letivo, periodo) VALUES (?, ?, '2025', 'noite')",
+        (f'Turma {sufixo}', f'C-{sufixo}')
+    ).lastrowid
+    materia_id = banco.execute(
+        "INSERT INTO materias (nome, turma_id, professor_id, horario, dia_semana) "
+        "SELECT ?, ?, professor_id, '06:00', 'domingo' FROM materias LIMIT 1",
+        (f'Matéria {sufixo}', turma_id)
+    ).lastrowid
+    banco.commit()
+
+    colunas = NotasColunares().carregar(banco)
+    assert turma_id not in colunas.medias_por('turma')
+
+    banco.execute('UPDATE atividades SET materia_id = ? WHERE id = ?', (materia_id, atividade_id))
+    banco.commit()
+
+    colunas.sincronizar(banco)
+    assert colunas.cargas == 1
+    assert colunas.remapeamentos == 1
+    assert colunas.medias_por('turma')[turma_id] == 4.0
+    assert colunas.medias_por('materia')[materia_id] == 4.0
+
+def test_entrega_repetida_nao_vira_erro_interno(app, client, banco, cabecalhos, sufixo):
+    from app import _registrar_entrega
+
+    turma_id = banco.execute(
+        "SELECT turma_id FROM alunos a JOIN usuarios u ON u.id = a.usuario_id WHERE u.email = 'aluno@escola.com'"
+    ).fetchone()[0]
+    materia_id = banco.execute('SELECT id FROM materias WHERE turma_id = ? LIMIT 1', (turma_id,)).fetchone()[0]
+    atividade_id = _nova_atividade(banco, sufixo, materia_id)
+
+    url = f'/api/aluno/entregar-atividade/{atividade_id}'
+    assert client.post(url, headers=cabecalhos('aluno'), json={}).status_code == 200
+    resposta = client.post(url, headers=cabecalhos('aluno'), json={})
+    assert resposta.status_code == 400
+    assert resposta.get_json()['error'] == 'Atividade já foi entregue'
+
+    # A segunda entrega que passou pela checagem da rota (clique duplo) esbarra
+    # no índice único dentro da transação: o job devolve False em vez de falhar
+    atividade = banco.execute(
+        'SELECT a.id, a.materia_id, m.turma_id FROM atividades a JOIN materias m ON m.id = a.materia_id WHERE a.id = ?',
+        (atividade_id,)
+    ).fetchone()
+    aluno_id = banco.execute(
+        'SELECT aluno_id FROM notas WHERE atividade_id = ?', (atividade_id,)
+    ).fetchone()[0]
+    with app.app_context():
+        assert run_write_notas(_registrar_entrega, aluno_id, atividade) is False
+    assert banco.execute('SELECT COUNT(*) FROM notas WHERE atividade_id = ?', (atividade_id,)).fetchone()[0] == 1
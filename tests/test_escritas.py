@@ -0,0 +1,67 @@
+"""Escritas das rotas de cadastro passam pela fila de escrita (uma transação por job)"""
+
+
+def _confirmadas(app):
+    return app.extensions['db_writer'].stats()['committed']
+
+def test_ciclo_da_turma_passa_pela_fila(app, client, banco, cabecalhos, sufixo):
+    admin = cabecalhos('admin')
+    antes = _confirmadas(app)
+
+    resposta = client.post('/api/admin/turmas', headers=admin, json={
+        'nome': f'Turma {sufixo}', 'codigo': f'T-{sufixo}', 'ano_letivo': '2025', 'periodo': 'manhã',
+    })
+    assert resposta.status_code == 200, resposta.get_json()
+    turma_id = banco.execute('SELECT id FROM turmas WHERE codigo = ?', (f'T-{sufixo}',)).fetchone()['id']
+
+    resposta = client.put(f'/api/admin/turmas/{turma_id}', headers=admin, json={
+        'nome': f'Turma {sufixo} (editada)', 'codigo': f'T-{sufixo}', 'ano_letivo': '2025',
+        'periodo': 'tarde', 'capacidade_max': 40,
+    })
+    assert resposta.status_code == 200, resposta.get_json()
+    turma = banco.execute('SELECT periodo, capacidade_max FROM turmas WHERE id = ?', (turma_id,)).fetchone()
+    assert (turma['periodo'], turma['capacidade_max']) == ('tarde', 40)
+
+    resposta = client.delete(f'/api/admin/turmas/{turma_id}', headers=admin)
+    assert resposta.status_code == 200, resposta.get_json()
+    assert banco.execute('SELECT id FROM turmas WHERE id = ?', (turma_id,)).fetchone() is None
+
+    assert _confirmadas(app) - antes == 3
+
+def test_professor_e_feedback_passam_pela_fila(app, client, banco, cabecalhos, sufixo):
+    antes = _confirmadas(app)
+
+    resposta = client.post('/api/admin/professores', headers=cabecalhos('admin'), json={
+        'nome': f'Professor {sufixo}', 'email': f'prof-{sufixo}@escola.com', 'senha': 'senha123',
+    })
+    assert resposta.status_code == 200, resposta.get_json()
+    resposta = client.post('/api/feedback', json={'feedback': f'ok {sufixo}', 'rating': 5})
+    assert resposta.status_code == 200, resposta.get_json()
+
+    assert banco.execute('SELECT tipo FROM usuarios WHERE email = ?', (f'prof-{sufixo}@escola.com',)).fetchone()[0] == 'professor'
+    assert banco.execute('SELECT COUNT(*) FROM feedback WHERE feedback = ?', (f'ok {sufixo}',)).fetchone()[0] == 1
+    assert _confirmadas(app) - antes == 2
+
+def test_ciclo_da_atividade_do_professor_passa_pela_fila(app, client, banco, cabecalhos, sufixo):
+    professor = cabecalhos('professor')
+    materia_id = banco.execute('''
+        SELECT m.id FROM materias m JOIN usuarios u ON u.id = m.professor_id
+        WHERE u.email = 'professor@escola.com' LIMIT 1
+    ''').fetchone()[0]
+    antes = _confirmadas(app)
+
+    resposta = client.post('/api/professor/atividades', headers=professor, json={
+        'titulo': f'Atividade {sufixo}', 'materia_id': materia_id, 'data_entrega': '2030-01-10', 'valor': 5,
+    })
+    assert resposta.status_code == 200, resposta.get_json()
+    atividade_id = banco.execute('SELECT id FROM atividades WHERE titulo = ?', (f'Atividade {sufixo}',)).fetchone()[0]
+
+    resposta = client.put(f'/api/professor/atividades/{atividade_id}', headers=professor, json={'valor': 8})
+    assert resposta.status_code == 200, resposta.get_json()
+    assert banco.execute('SELECT valor FROM atividades WHERE id = ?', (atividade_id,)).fetchone()[0] == 8
+
+    resposta = client.delete(f'/api/professor/atividades/{atividade_id}', headers=professor)
+    assert resposta.status_code == 200, resposta.get_json()
+    assert banco.execute('SELECT id FROM atividades WHERE id = ?', (atividade_id,)).fetchone() is None
+
+    assert _confirmadas(app) - antes == 3
@@ -0,0 +1,104 @@
+"""Geração automática de grade: gravação do plano em materias"""
+import json
+import time
+from datetime import date, timedelta
+
+from calendario import carregar_regras, expandir
+from gerador_grade import ler_tarefa
+
+
+def _aguardar(client, cabecalhos, tarefa_id, status=('gravado',), timeout=30):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        resposta = client.get(f'/api/admin/grade/gerar/{tarefa_id}', headers=cabecalhos('admin'))
+        assert resposta.status_code == 200, resposta.get_json()
+        tarefa = resposta.get_json()['tarefa']
+        if tarefa['status'] in status or tarefa['status'] in ('erro', 'sem_solucao'):
+            return tarefa
+        time.sleep(0.05)
+    raise AssertionError(f'tarefa {tarefa_id} não terminou em {timeout}s')
+
+def _nova_turma(client, banco, cabecalhos, sufixo):
+    resposta = client.post('/api/admin/turmas', headers=cabecalhos('admin'), json={
+        'nome': f'Grade {sufixo}', 'codigo': f'G-{sufixo}', 'ano_letivo': '2025', 'periodo': 'manhã',
+    })
+    assert resposta.status_code == 200, resposta.get_json()
+    return banco.execute('SELECT id FROM turmas WHERE codigo = ?', (f'G-{sufixo}',)).fetchone()['id']
+
+def test_materia_em_varios_blocos_grava_um_registro(client, banco, cabecalhos, sufixo):
+    turma_id = _nova_turma(client, banco, cabecalhos, sufixo)
+    professor_id = banco.execute("SELECT id FROM usuarios WHERE email = 'professor@escola.com'").fetchone()['id']
+
+    # 5 aulas com até 2 seguidas: três blocos (2, 2 e 1) em dias diferentes
+    resposta = client.post('/api/admin/grade/gerar', headers=cabecalhos('admin'), json={
+        'materias': [{
+            'turma_id': turma_id, 'materia_nome': f'Física {sufixo}', 'professor_id': professor_id,
+            'carga_horaria_semanal': 5,
+        }],
+        'gravar': True,
+    })
+    assert resposta.status_code == 202, resposta.get_json()
+    tarefa = _aguardar(client, cabecalhos, resposta.get_json()['tarefa']['id'])
+    assert tarefa['status'] == 'gravado', tarefa
+    assert len(tarefa['plano']) == 3
+    assert len(tarefa['materia_ids']) == 1
+
+    materias = banco.execute(
+        'SELECT id, carga_horaria_semanal, dias_aula FROM materias WHERE turma_id = ?', (turma_id,)
+    ).fetchall()
+    assert len(materias) == 1
+    assert materias[0]['id'] == tarefa['materia_ids'][0]
+    assert materias[0]['carga_horaria_semanal'] == 5
+    assert json.loads(materias[0]['dias_aula']) == {
+        bloco['dia_semana']: bloco['horario'] for bloco in tarefa['plano']
+    }
+
+    # O calendário expande os três blocos; uma semana tem 5 aulas de 50 minutos
+    segunda = date.today() - timedelta(days=date.today().weekday())
+    aulas = list(expandir(carregar_regras(banco, turma_id), segunda, segunda + timedelta(days=6)))
+    assert len(aulas) == 3
+    assert sum(bloco['aulas'] for bloco in tarefa['plano']) == 5
+
+    # Todos os blocos entram no índice de horários, não só o primeiro
+    ultimo = tarefa['plano'][-1]
+    resposta = client.post(f'/api/admin/turmas/{turma_id}/professores', headers=cabecalhos('admin'), json={
+        'professor_id': professor_id, 'materia_nome': f'Química {sufixo}',
+        'dia_semana': ultimo['dia_semana'], 'horario': ultimo['horario'],
+    })
+    assert resposta.status_code == 400, resposta.get_json()
+    conflito = resposta.get_json()['conflitos'][0]
+    assert (conflito['dia_semana'], conflito['horario']) == (ultimo['dia_semana'], ultimo['horario'])
+
+def test_tarefa_gravada_no_banco(client, banco, cabecalhos, sufixo):
+    turma_id = _nova_turma(client, banco, cabecalhos, sufixo)
+    professor_id = banco.execute("SELECT id FROM usuarios WHERE email = 'professor@escola.com'").fetchone()['id']
+
+    resposta = client.post('/api/admin/grade/gerar', headers=cabecalhos('admin'), json={
+        'materias': [{
+            'turma_id': turma_id, 'materia_nome': f'Biologia {sufixo}', 'professor_id': professor_id,
+            'carga_horaria_semanal': 2,
+        }],
+    })
+    assert resposta.status_code == 202, resposta.get_json()
+    tarefa_id = resposta.get_json()['tarefa']['id']
+    # Já gravada ao responder: outro worker encontra a tarefa
+    assert banco.execute('SELECT status FROM tarefas_grade WHERE id = ?', (tarefa_id,)).fetchone() is not None
+
+    tarefa = _aguardar(client, cabecalhos, tarefa_id, status=('concluido',))
+    assert tarefa['status'] == 'concluido', tarefa
+    assert ler_tarefa(banco, tarefa_id)['plano'] == tarefa['plano']
+
+    resposta = client.post(f'/api/admin/grade/gerar/{tarefa_id}/aplicar', headers=cabecalhos('admin'))
+    assert resposta.status_code == 200, resposta.get_json()
+    materia_ids = resposta.get_json()['materia_ids']
+    assert len(materia_ids) == 1
+    tarefa = client.get(f'/api/admin/grade/gerar/{tarefa_id}', headers=cabecalhos('admin')).get_json()['tarefa']
+    assert (tarefa['status'], tarefa['materia_ids']) == ('gravado', materia_ids)
+
+    # O status é conferido na transação: o plano não é gravado duas vezes
+    resposta = client.post(f'/api/admin/grade/gerar/{tarefa_id}/aplicar', headers=cabecalhos('admin'))
+    assert resposta.status_code == 409
+    assert banco.execute('SELECT COUNT(*) FROM materias WHERE turma_id = ?', (turma_id,)).fetchone()[0] == 1
+
+    resposta = client.get('/api/admin/grade/gerar/inexistente', headers=cabecalhos('admin'))
+    assert resposta.status_code == 404
@@ -0,0 +1,75 @@
+"""Lançamento de notas em lote (grading.salvar_notas_em_lote) pelas rotas do professor"""
+
+
+def _atividade_com_alunos(banco, sufixo, valor=10):
+    """Turma com dois alunos e uma atividade do professor de teste; retorna (atividade_id, [aluno_ids], professor_id)"""
+    professor_id = banco.execute("SELECT id FROM usuarios WHERE email = 'professor@escola.com'").fetchone()[0]
+    turma_id = banco.execute(
+        "INSERT INTO turmas (nome, codigo, ano_letivo, periodo) VALUES (?, ?, '2025', 'manhã')",
+        (f'Turma {sufixo}', f'N-{sufixo}')
+    ).lastrowid
+    materia_id = banco.execute(
+        "INSERT INTO materias (nome, turma_id, professor_id, horario, dia_semana) VALUES (?, ?, ?, '07:00', 'domingo')",
+        (f'Matéria {sufixo}', turma_id, professor_id)
+    ).lastrowid
+    atividade_id = banco.execute(
+        "INSERT INTO atividades (titulo, materia_id, valor, data_entrega, criado_por) VALUES (?, ?, ?, '2030-01-10', ?)",
+        (f'Atividade {sufixo}', materia_id, valor, professor_id)
+    ).lastrowid
+    alunos = []
+    for i in range(2):
+        usuario_id = banco.execute(
+            "INSERT INTO usuarios (nome, email, senha, tipo) VALUES (?, ?, 'x', 'aluno')",
+            (f'Aluno {sufixo} {i}', f'nota-{sufixo}-{i}@escola.com')
+        ).lastrowid
+        alunos.append(banco.execute(
+            'INSERT INTO alunos (usuario_id, matricula, turma_id) VALUES (?, ?, ?)',
+            (usuario_id, f'N-{sufixo}-{i}', turma_id)
+        ).lastrowid)
+    banco.commit()
+    return atividade_id, alunos, professor_id
+
+def _nota(banco, aluno_id, atividade_id):
+    return banco.execute(
+        'SELECT nota, avaliado_por FROM notas WHERE aluno_id = ? AND atividade_id = ?', (aluno_id, atividade_id)
+    ).fetchone()
+
+def test_lote_insere_valida_faixa_e_atualiza(client, banco, cabecalhos, sufixo):
+    atividade_id, (primeiro, segundo), _ = _atividade_com_alunos(banco, sufixo)
+    professor = cabecalhos('professor')
+
+    resposta = client.post(f'/api/professor/atividades/{atividade_id}/notas', headers=professor, json={'notas': [
+        {'aluno_id': primeiro, 'nota': 8},
+        {'aluno_id': segundo, 'nota': 10.5},
+        {'aluno_id': 999999, 'nota': 5},
+        {'aluno_id': segundo, 'nota': -1},
+    ]})
+    assert resposta.status_code == 200, resposta.get_json()
+    resumo = resposta.get_json()
+    assert (resumo['inseridas'], resumo['atualizadas'], resumo['rejeitadas']) == (1, 0, 3)
+    assert [r['status'] for r in resumo['resultados']] == ['inserida', 'ignorada', 'rejeitada', 'invalida']
+    assert _nota(banco, segundo, atividade_id) is None
+
+    # Mesmo aluno de novo: upsert atualiza a linha em vez de duplicar
+    resposta = client.post(f'/api/professor/atividades/{atividade_id}/notas', headers=professor, json={'notas': [
+        {'aluno_id': primeiro, 'nota': 9.5}, {'aluno_id': segundo, 'nota': 10},
+    ]})
+    resumo = resposta.get_json()
+    assert (resumo['inseridas'], resumo['atualizadas'], resumo['rejeitadas']) == (1, 1, 0)
+    assert _nota(banco, primeiro, atividade_id)['nota'] == 9.5
+    assert banco.execute('SELECT COUNT(*) FROM notas WHERE atividade_id = ?', (atividade_id,)).fetchone()[0] == 2
+
+def test_avaliador_vem_do_token_e_nao_do_corpo(client, banco, cabecalhos, sufixo):
+    atividade_id, (aluno_id, _), professor_id = _atividade_com_alunos(banco, sufixo)
+
+    resposta = client.post(f'/api/professor/atividades/{atividade_id}/notas', headers=cabecalhos('professor'), json={
+        'notas': [{'aluno_id': aluno_id, 'nota': 7}], 'avaliado_por': 1,
+    })
+    assert resposta.status_code == 200, resposta.get_json()
+    assert _nota(banco, aluno_id, atividade_id)['avaliado_por'] == professor_id
+
+    resposta = client.post(f'/api/professor/atividades/{atividade_id}/notas', json={
+        'notas': [{'aluno_id': aluno_id, 'nota': 1}], 'avaliado_por': 1,
+    })
+    assert resposta.status_code == 401
+    assert _nota(banco, aluno_id, atividade_id)['nota'] == 7
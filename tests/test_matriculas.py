@@ -0,0 +1,57 @@
+"""Matrícula pelas rotas de aluno: turma_id chega do formulário como texto"""
+
+
+def _turma_lotada(client, banco, cabecalhos, sufixo):
+    """Cria uma turma com uma vaga e retorna seu id"""
+    resposta = client.post('/api/admin/turmas', headers=cabecalhos('admin'), json={
+        'nome': f'Turma {sufixo}', 'codigo': f'T-{sufixo}', 'ano_letivo': '2025',
+        'periodo': 'manhã', 'capacidade_max': 1,
+    })
+    assert resposta.status_code == 200, resposta.get_json()
+    return banco.execute('SELECT id FROM turmas WHERE codigo = ?', (f'T-{sufixo}',)).fetchone()['id']
+
+def _criar_aluno(client, banco, cabecalhos, sufixo, turma_id):
+    resposta = client.post('/api/admin/alunos', headers=cabecalhos('admin'), json={
+        'nome': f'Aluno {sufixo}', 'email': f'aluno-{sufixo}@escola.com', 'matricula': f'M-{sufixo}',
+        'senha': 'senha123', 'turma_id': turma_id,
+    })
+    assert resposta.status_code == 200, resposta.get_json()
+    return banco.execute('SELECT id FROM alunos WHERE matricula = ?', (f'M-{sufixo}',)).fetchone()['id']
+
+def _ocupacao(banco, turma_id):
+    return banco.execute('SELECT alunos_matriculados FROM turmas WHERE id = ?', (turma_id,)).fetchone()[0]
+
+def test_cadastro_com_turma_id_texto(client, banco, cabecalhos, sufixo):
+    turma_id = _turma_lotada(client, banco, cabecalhos, sufixo)
+    aluno_id = _criar_aluno(client, banco, cabecalhos, sufixo, str(turma_id))
+
+    assert banco.execute('SELECT turma_id FROM alunos WHERE id = ?', (aluno_id,)).fetchone()[0] == turma_id
+    assert _ocupacao(banco, turma_id) == 1
+
+def test_atualizar_mantendo_turma_lotada_com_id_texto(client, banco, cabecalhos, sufixo):
+    turma_id = _turma_lotada(client, banco, cabecalhos, sufixo)
+    aluno_id = _criar_aluno(client, banco, cabecalhos, sufixo, turma_id)
+    assert _ocupacao(banco, turma_id) == 1
+
+    # O formulário reenvia a turma atual como texto: não é troca de turma
+    resposta = client.put(f'/api/admin/alunos/{aluno_id}', headers=cabecalhos('admin'), json={
+        'nome': f'Aluno {sufixo} (editado)', 'turma_id': str(turma_id),
+    })
+    assert resposta.status_code == 200, resposta.get_json()
+    assert _ocupacao(banco, turma_id) == 1
+
+    # Vazio tira o aluno da turma e libera a vaga
+    resposta = client.put(f'/api/admin/alunos/{aluno_id}', headers=cabecalhos('admin'), json={'turma_id': ''})
+    assert resposta.status_code == 200, resposta.get_json()
+    assert banco.execute('SELECT turma_id FROM alunos WHERE id = ?', (aluno_id,)).fetchone()[0] is None
+    assert _ocupacao(banco, turma_id) == 0
+
+def test_turma_id_invalido(client, banco, cabecalhos, sufixo):
+    turma_id = _turma_lotada(client, banco, cabecalhos, sufixo)
+    aluno_id = _criar_aluno(client, banco, cabecalhos, sufixo, None)
+
+    for valor in ('abc', '1.5', True, [turma_id]):
+        resposta = client.put(f'/api/admin/alunos/{aluno_id}', headers=cabecalhos('admin'), json={'turma_id': valor})
+        assert resposta.status_code == 400, valor
+        assert resposta.get_json()['error'] == 'turma_id inválido'
+    assert banco.execute('SELECT turma_id FROM alunos WHERE id = ?', (aluno_id,)).fetchone()[0] is None
@@ -0,0 +1,48 @@
+"""Paginação por cursor (pagination.listar): cada linha aparece exatamente uma vez"""
+from pagination import LISTAGEM_ATIVIDADES, LISTAGEM_TURMAS, listar
+
+
+def _percorrer(banco, listagem, args, condicoes=(), limite=2):
+    """Segue os cursores até o fim; retorna os ids na ordem em que vieram"""
+    ids, cursor = [], None
+    while True:
+        pagina = dict(args, limit=str(limite), fields='id')
+        if cursor:
+            pagina['cursor'] = cursor
+        itens, paginacao = listar(banco, listagem, pagina, condicoes=condicoes)
+        ids.extend(item['id'] for item in itens)
+        cursor = paginacao['proximo_cursor']
+        if not cursor:
+            return ids
+
+def test_cursor_atravessa_nomes_empatados(banco, sufixo):
+    # Cinco turmas com o mesmo nome: o desempate é o id
+    ids = [
+        banco.execute(
+            "INSERT INTO turmas (nome, codigo, ano_letivo, periodo) VALUES ('Empate', ?, ?, 'manhã')",
+            (f'E-{sufixo}-{i}', f'A-{sufixo}')
+        ).lastrowid
+        for i in range(5)
+    ]
+    banco.commit()
+
+    assert _percorrer(banco, LISTAGEM_TURMAS, {'ano_letivo': f'A-{sufixo}'}) == sorted(ids)
+
+def test_atividades_sem_data_de_entrega_nao_somem(banco, sufixo):
+    materia_id = banco.execute('SELECT id FROM materias LIMIT 1').fetchone()[0]
+    por_data = {}
+    for i, data in enumerate(('2030-03-01', None, '2030-01-01', None, '2030-03-01')):
+        por_data[banco.execute(
+            'INSERT INTO atividades (titulo, materia_id, data_entrega) VALUES (?, ?, ?)',
+            (f'Atividade {sufixo} {i}', materia_id, data)
+        ).lastrowid] = data
+    banco.commit()
+    # Restringe às atividades do teste sem depender de filtro da listagem
+    condicoes = [(f"a.titulo LIKE 'Atividade {sufixo} %'",)]
+
+    ids = _percorrer(banco, LISTAGEM_ATIVIDADES, {}, condicoes)
+
+    # Mais recentes primeiro (id decrescente no empate) e as sem data por último
+    esperado = sorted(por_data, key=lambda i: (por_data[i] or '', i), reverse=True)
+    assert ids == esperado
+    assert [por_data[i] for i in ids[-2:]] == [None, None]
@@ -0,0 +1,34 @@
+"""Regressão de planos: as consultas críticas (migrations.CONSULTAS_CRITICAS) não podem cair em SCAN"""
+import sqlite3
+
+import pytest
+
+from migrations import CONSULTAS_CRITICAS, aplicar_migracoes, verificar_planos
+
+
+@pytest.fixture
+def migrado(tmp_path):
+    # Sem ANALYZE: o plano depende só dos índices, não do volume de dados
+    conn = sqlite3.connect(str(tmp_path / 'planos.db'))
+    aplicar_migracoes(conn, analisar=False)
+    yield conn
+    conn.close()
+
+def test_consultas_criticas_usam_indice(migrado):
+    assert verificar_planos(migrado) == []
+
+def test_banco_em_memoria_padrao_usa_indice():
+    assert verificar_planos() == []
+
+def test_indice_removido_aparece_como_scan(migrado):
+    migrado.execute('DROP INDEX idx_alunos_turma')
+
+    falhas = verificar_planos(migrado)
+
+    assert [nome for nome, _ in falhas] == ['alunos_por_turma']
+    assert falhas[0][1].startswith('SCAN')
+
+def test_consulta_registrada_sem_indice_e_reportada(migrado):
+    consultas = dict(CONSULTAS_CRITICAS, feedback_por_nota=('SELECT id FROM feedback WHERE rating = ?', (5,)))
+
+    assert [nome for nome, _ in verificar_planos(migrado, consultas)] == ['feedback_por_nota']
@@ -0,0 +1,50 @@
+import time
+
+from senhas import get_senhas
+from servidor import processos_por_worker
+
+def _reservas(banco, conta):
+    return banco.execute('SELECT COUNT(*) FROM logins_em_andamento WHERE conta = ?', (conta,)).fetchone()[0]
+
+def _esvaziar_fila(app):
+    # A liberação da reserva não espera o COMMIT; um job síncrono depois dela garante que já rodou
+    app.extensions['db_writer'].run(lambda conn: None)
+
+def test_limite_por_conta_soma_reservas_de_outros_workers(app, banco, client):
+    verificador = get_senhas(app)
+    assert verificador.stats()['limites'] == 'compartilhados'
+    email = 'aluno@escola.com'
+    # Reservas vivas gravadas por outros workers ocupam todo o limite da conta
+    agora = time.time()
+    banco.executemany(
+        'INSERT INTO logins_em_andamento (conta, ip, expira_em) VALUES (?, ?, ?)',
+        [(email, '10.0.0.9', agora + 60)] * verificador.limite_conta
+    )
+    banco.commit()
+    try:
+        resposta = client.post('/api/auth/login', json={'email': email, 'password': 'aluno123'})
+        assert resposta.status_code == 429
+    finally:
+        banco.execute('DELETE FROM logins_em_andamento WHERE conta = ?', (email,))
+        banco.commit()
+
+def test_reserva_expirada_nao_conta_e_login_libera_a_sua(app, banco, client):
+    verificador = get_senhas(app)
+    email = 'aluno@escola.com'
+    # Reservas de um worker que morreu sem liberar: já expiradas
+    banco.executemany(
+        'INSERT INTO logins_em_andamento (conta, ip, expira_em) VALUES (?, ?, ?)',
+        [(email, '10.0.0.9', time.time() - 1)] * verificador.limite_conta
+    )
+    banco.commit()
+
+    resposta = client.post('/api/auth/login', json={'email': email, 'password': 'aluno123'})
+    assert resposta.status_code == 200
+    _esvaziar_fila(app)
+    assert _reservas(banco, email) == 0
+
+def test_processos_divididos_entre_workers():
+    assert processos_por_worker(8, 4) == 2
+    assert processos_por_worker(2, 4) == 1
+    assert processos_por_worker(0, 4) == 0
+    assert processos_por_worker(6, 1) == 6
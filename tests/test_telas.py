@@ -0,0 +1,53 @@
+"""Telas agregadas (telas.py) com atualização parcial por ?secoes= e ?versoes="""
+
+
+def _tela(client, cabecalhos, conta, url, **args):
+    resposta = client.get(url, headers=cabecalhos(conta), query_string=args)
+    assert resposta.status_code == 200, resposta.get_json()
+    return resposta.get_json()
+
+def _versoes(tela):
+    return ','.join(f'{nome}:{versao}' for nome, versao in tela['versoes'].items())
+
+def test_so_as_secoes_que_mudaram_voltam(client, banco, cabecalhos, sufixo):
+    inicio = _tela(client, cabecalhos, 'aluno', '/api/aluno/telas/inicio')
+    assert set(inicio['secoes']) == {'notas', 'atividades', 'calendario'}
+    assert inicio['inalteradas'] == []
+
+    # Cliente com todas as versões atuais: nada é consultado
+    repetida = _tela(client, cabecalhos, 'aluno', '/api/aluno/telas/inicio', versoes=_versoes(inicio))
+    assert repetida['secoes'] == {}
+    assert sorted(repetida['inalteradas']) == ['atividades', 'calendario', 'notas']
+
+    # Nota nova para o aluno: notas e atividades dependem de `notas`, o calendário não
+    aluno_id, turma_id = banco.execute(
+        "SELECT a.id, a.turma_id FROM alunos a JOIN usuarios u ON u.id = a.usuario_id WHERE u.email = 'aluno@escola.com'"
+    ).fetchone()
+    materia_id = banco.execute('SELECT id FROM materias WHERE turma_id = ? LIMIT 1', (turma_id,)).fetchone()[0]
+    atividade_id = banco.execute(
+        "INSERT INTO atividades (titulo, materia_id, valor, data_entrega) VALUES (?, ?, 10, '2030-01-10')",
+        (f'Atividade {sufixo}', materia_id)
+    ).lastrowid
+    banco.execute(
+        "INSERT INTO notas (aluno_id, atividade_id, nota, avaliado_por) "
+        "SELECT ?, ?, 6, id FROM usuarios WHERE email = 'professor@escola.com'",
+        (aluno_id, atividade_id)
+    )
+    banco.commit()
+
+    parcial = _tela(client, cabecalhos, 'aluno', '/api/aluno/telas/inicio', versoes=_versoes(inicio))
+    assert set(parcial['secoes']) == {'notas', 'atividades'}
+    assert parcial['inalteradas'] == ['calendario']
+    assert parcial['versoes']['notas'] != inicio['versoes']['notas']
+    assert any(nota['atividade_id'] == atividade_id for nota in parcial['secoes']['notas']['notas'])
+
+def test_secoes_pedidas_e_invalidas(client, cabecalhos):
+    tela = _tela(client, cabecalhos, 'admin', '/api/admin/telas/dashboard', secoes='estatisticas,turmas_recentes')
+    assert set(tela['secoes']) == set(tela['versoes']) == {'estatisticas', 'turmas_recentes'}
+
+    resposta = client.get('/api/admin/telas/dashboard?secoes=inexistente', headers=cabecalhos('admin'))
+    assert resposta.status_code == 400
+
+def test_tela_de_turma_inexistente(client, cabecalhos):
+    resposta = client.get('/api/admin/telas/turmas/999999', headers=cabecalhos('admin'))
+    assert resposta.status_code == 404